@@ -0,0 +1,207 @@
+"""
+Sliding-window activity counters for the Sponnect application.
+Every committed insert of a user, campaign, ad request or payment bumps a
+per-minute bucket in Redis (one hash per entity per UTC hour), so "new in the
+last 24h" or "today" is a sum over at most 25 hashes instead of a count over the
+table. Counts are exact to the minute: a window starts at the beginning of the
+minute it names.
+
+Rows written without the ORM (bulk loads, other services) don't pass through
+the hooks, so reconcile_activity_counters() periodically recounts the closed
+buckets from the database. Until it has run once, and whenever Redis is
+unavailable, reads fall back to counting in the database.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config import Config
+from models import db, User, Campaign, AdRequest, Payment
+from redis_client import get_redis
+from session_hooks import run_after_commit
+from scheduling import non_overlapping
+from workers import celery
+import metrics
+
+BUCKET_PREFIX = 'sponnect:activity:'
+COMPLETE_SINCE_KEY = 'sponnect:activity:complete_since'  # Counters are exact for windows starting at or after this
+WINDOW_HOURS = 25  # Longest window served from Redis: covers "last 24h" and "today"
+BUCKET_TTL = (WINDOW_HOURS + 2) * 3600
+
+# Counted entity name -> model (every one has created_at)
+ENTITIES = {
+    'users': User,
+    'campaigns': Campaign,
+    'ad_requests': AdRequest,
+    'payments': Payment,
+}
+_ENTITY_BY_MODEL = {model: name for name, model in ENTITIES.items()}
+
+
+def _bucket(entity, moment):
+    """(hash key, minute field) of the bucket a timestamp falls in"""
+    return f"{BUCKET_PREFIX}{entity}:{moment.strftime('%Y%m%d%H')}", str(moment.minute)
+
+
+def _apply(deltas):
+    """Add {(key, field): delta} to the buckets in one round trip"""
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for (key, field), delta in deltas.items():
+            pipe.hincrby(key, field, delta)
+            pipe.expire(key, BUCKET_TTL)
+        pipe.execute()
+    except Exception as e:
+        # Reconciliation repairs the buckets; writes must never fail over a counter
+        logging.error(f"Failed to update activity counters: {str(e)}")
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_deltas(session, flush_context):
+    """Count the flush's inserts and deletes, applied only if the transaction commits"""
+    if not Config.ACTIVITY_COUNTERS:
+        return
+    deltas = Counter()
+    oldest = datetime.utcnow() - timedelta(hours=WINDOW_HOURS)
+    try:
+        for objects, delta in ((session.new, 1), (session.deleted, -1)):
+            for obj in objects:
+                entity = _ENTITY_BY_MODEL.get(type(obj))
+                if entity is None:
+                    continue
+                # Read without loading: a deleted row can't be refreshed
+                created_at = inspect(obj).dict.get('created_at')
+                if created_at is not None and created_at >= oldest:
+                    deltas[_bucket(entity, created_at)] += delta
+    except Exception as e:
+        logging.error(f"Failed to collect activity counter changes: {str(e)}")
+        return
+    if deltas:
+        run_after_commit(session, lambda d=dict(deltas): _apply(d))
+
+
+def _window_hours(since, until):
+    hour = since.replace(minute=0, second=0, microsecond=0)
+    while hour <= until:
+        yield hour
+        hour += timedelta(hours=1)
+
+
+def _read_counters(since, entities, now):
+    """Summed buckets per entity, or None when the counters don't cover the window"""
+    client = get_redis()
+    pipe = client.pipeline(transaction=False)
+    pipe.get(COMPLETE_SINCE_KEY)
+    hours = list(_window_hours(since, now))
+    for entity in entities:
+        for hour in hours:
+            pipe.hgetall(_bucket(entity, hour)[0])
+    complete_since, *buckets = pipe.execute()
+    if complete_since is None or since < datetime.fromisoformat(complete_since):
+        return None
+
+    counts = {}
+    for i, entity in enumerate(entities):
+        total = 0
+        for hour, fields in zip(hours, buckets[i * len(hours):(i + 1) * len(hours)]):
+            total += sum(int(count) for minute, count in fields.items()
+                         if hour != hours[0] or int(minute) >= since.minute)
+        counts[entity] = total
+    return counts
+
+
+def _count_in_db(since, entities):
+    return {entity: ENTITIES[entity].query.filter(ENTITIES[entity].created_at >= since).count()
+            for entity in entities}
+
+
+def counts_since(since, entities=None):
+    """
+    Rows created at or after since, per entity
+
+    Args:
+        since (datetime): Naive UTC start of the window; older than WINDOW_HOURS counts in the database
+        entities (iterable, optional): Names from ENTITIES, defaults to all of them
+
+    Returns:
+        dict: {entity name: count}
+    """
+    entities = list(entities or ENTITIES)
+    now = datetime.utcnow()
+    if Config.ACTIVITY_COUNTERS and since >= now - timedelta(hours=WINDOW_HOURS):
+        since = since.replace(second=0, microsecond=0)
+        try:
+            counts = _read_counters(since, entities, now)
+        except Exception as e:
+            logging.error(f"Failed to read activity counters: {str(e)}")
+            counts = None
+        if counts is not None:
+            metrics.count_activity_read('redis')
+            return counts
+    metrics.count_activity_read('db')
+    return _count_in_db(since, entities)
+
+
+def reconcile(now=None):
+    """
+    Recount the closed buckets of the last WINDOW_HOURS from the database and
+    overwrite the ones that drifted. The current minute and the one before are
+    left to the hooks, whose increments may still be in flight.
+
+    Returns:
+        dict: {entity name: buckets corrected}
+    """
+    now = (now or datetime.utcnow()).replace(second=0, microsecond=0)
+    start = now - timedelta(hours=WINDOW_HOURS)
+    end = now - timedelta(minutes=1)  # Exclusive
+    client = get_redis()
+    corrected = {}
+    for entity, model in ENTITIES.items():
+        # Only the timestamps, bucketed here: portable across SQLite and other databases
+        actual = Counter(created_at.replace(second=0, microsecond=0) for (created_at,) in db.session.query(
+            model.created_at).filter(model.created_at >= start, model.created_at < end))
+
+        hours = list(_window_hours(start, end))
+        pipe = client.pipeline(transaction=False)
+        for hour in hours:
+            pipe.hgetall(_bucket(entity, hour)[0])
+        stored = Counter()
+        for hour, fields in zip(hours, pipe.execute()):
+            for minute, count in fields.items():
+                stored[hour.replace(minute=int(minute))] = int(count)
+
+        fixes = [moment for moment in set(actual) | set(stored)
+                 if start <= moment < end and actual[moment] != stored[moment]]
+        if fixes:
+            pipe = client.pipeline(transaction=False)
+            for moment in fixes:
+                key, field = _bucket(entity, moment)
+                if actual[moment]:
+                    pipe.hset(key, field, actual[moment])
+                    pipe.expire(key, BUCKET_TTL)
+                else:
+                    pipe.hdel(key, field)
+            pipe.execute()
+        corrected[entity] = len(fixes)
+    # From here on the buckets hold every row of the window
+    client.set(COMPLETE_SINCE_KEY, start.isoformat(), nx=True)
+    metrics.count_activity_corrections(corrected)
+    return corrected
+
+
+@celery.task()
+@non_overlapping()
+def reconcile_activity_counters():
+    """Periodic repair of the activity counters against the database"""
+    if not Config.ACTIVITY_COUNTERS:
+        return "Activity counters disabled"
+    try:
+        corrected = reconcile()
+    except Exception as e:
+        error_message = f"Error reconciling activity counters: {str(e)}"
+        logging.error(error_message)
+        return error_message
+    return f"Activity counters reconciled, buckets corrected: {corrected}"
@@ -0,0 +1,203 @@
+"""
+Hot-table archival for the Sponnect application.
+Completed campaigns and rejected ad requests older than ARCHIVE_AFTER_DAYS are
+copied, with their negotiation history, progress updates and payments, into the
+archive database and then removed from the hot tables in batches. Detail
+endpoints fall back to the archive when a row is no longer in the primary DB.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, date
+from sqlalchemy import func
+
+from config import Config
+from models import db, Campaign, AdRequest, NegotiationHistory, ProgressUpdate, Payment, ArchivedRecord
+from serializers import (
+    serialize_campaign_detail, serialize_ad_request_detail, serialize_negotiation_history,
+    serialize_progress_update, serialize_payment
+)
+from sync import record_tombstone
+from scheduling import non_overlapping
+from workers import celery
+
+
+def archive_cutoff(now=None):
+    """Rows last changed before this time are old enough to archive"""
+    return (now or datetime.utcnow()) - timedelta(days=Config.ARCHIVE_AFTER_DAYS)
+
+
+def _row_dict(obj):
+    """Raw column values of a model instance, JSON-ready"""
+    row = {}
+    for column in obj.__table__.columns:
+        value = getattr(obj, column.name)
+        row[column.name] = value.isoformat() if isinstance(value, (datetime, date)) else value
+    return row
+
+
+def _group_by_ad_request(model, ad_request_ids):
+    """Load child rows of several ad requests with one query"""
+    grouped = {}
+    for row in model.query.filter(model.ad_request_id.in_(ad_request_ids)).order_by(model.created_at).all():
+        grouped.setdefault(row.ad_request_id, []).append(row)
+    return grouped
+
+
+def _already_archived(entity_type, entity_ids):
+    """IDs already in the archive (a previous run archived them but failed to purge)"""
+    if not entity_ids:
+        return set()
+    rows = db.session.query(ArchivedRecord.entity_id).filter(
+        ArchivedRecord.entity_type == entity_type,
+        ArchivedRecord.entity_id.in_(entity_ids)
+    ).all()
+    return {row[0] for row in rows}
+
+
+def _archive_ad_requests(ad_requests, sponsor_ids):
+    """Add archive snapshots for ad requests and their child records to the session"""
+    ids = [ar.id for ar in ad_requests]
+    history = _group_by_ad_request(NegotiationHistory, ids)
+    progress = _group_by_ad_request(ProgressUpdate, ids)
+    payments = _group_by_ad_request(Payment, ids)
+    existing = _already_archived('ad_request', ids)
+
+    for ad_request in ad_requests:
+        sponsor_id = sponsor_ids.get(ad_request.campaign_id)
+        if ad_request.id not in existing:
+            payload = {
+                'detail': serialize_ad_request_detail(ad_request),
+                'row': _row_dict(ad_request),
+                'negotiation_history': [serialize_negotiation_history(h) for h in history.get(ad_request.id, [])],
+                'progress_updates': [serialize_progress_update(p) for p in progress.get(ad_request.id, [])],
+                'payments': [serialize_payment(p) for p in payments.get(ad_request.id, [])]
+            }
+            db.session.add(ArchivedRecord(
+                entity_type='ad_request',
+                entity_id=ad_request.id,
+                campaign_id=ad_request.campaign_id,
+                sponsor_id=sponsor_id,
+                influencer_id=ad_request.influencer_id,
+                payload=json.dumps(payload),
+                original_created_at=ad_request.created_at
+            ))
+        record_tombstone('ad_request', ad_request.id, sponsor_id=sponsor_id,
+                         influencer_id=ad_request.influencer_id, reason='archived')
+
+
+def _purge(ad_request_ids, campaign_ids=()):
+    """Delete archived rows from the hot tables, children first"""
+    if ad_request_ids:
+        for model in (Payment, ProgressUpdate, NegotiationHistory):
+            model.query.filter(model.ad_request_id.in_(ad_request_ids)).delete(synchronize_session=False)
+        AdRequest.query.filter(AdRequest.id.in_(ad_request_ids)).delete(synchronize_session=False)
+    if campaign_ids:
+        Campaign.query.filter(Campaign.id.in_(campaign_ids)).delete(synchronize_session=False)
+
+
+def _finish_batch():
+    """
+    Commit one batch. The archive and primary DBs commit one after the other, so a
+    crash in between leaves rows in both; the next run skips the existing snapshots.
+    """
+    db.session.commit()
+    # Bulk deletes bypass the identity map - drop the stale objects
+    db.session.expunge_all()
+
+
+def archive_completed_campaigns(cutoff, batch_size=None):
+    """Archive completed campaigns (with all their ad requests) last changed before the cutoff"""
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    total = 0
+    while True:
+        campaigns = Campaign.query.filter(
+            Campaign.status == 'completed',
+            func.coalesce(Campaign.updated_at, Campaign.created_at) < cutoff
+        ).order_by(Campaign.id).limit(batch_size).all()
+        if not campaigns:
+            break
+
+        campaign_ids = [c.id for c in campaigns]
+        existing = _already_archived('campaign', campaign_ids)
+        for campaign in campaigns:
+            if campaign.id not in existing:
+                db.session.add(ArchivedRecord(
+                    entity_type='campaign',
+                    entity_id=campaign.id,
+                    campaign_id=campaign.id,
+                    sponsor_id=campaign.sponsor_id,
+                    payload=json.dumps({'detail': serialize_campaign_detail(campaign), 'row': _row_dict(campaign)}),
+                    original_created_at=campaign.created_at
+                ))
+            record_tombstone('campaign', campaign.id, sponsor_id=campaign.sponsor_id, reason='archived')
+
+        ad_requests = AdRequest.query.filter(AdRequest.campaign_id.in_(campaign_ids)).all()
+        _archive_ad_requests(ad_requests, {c.id: c.sponsor_id for c in campaigns})
+        _purge([ar.id for ar in ad_requests], campaign_ids)
+        _finish_batch()
+        total += len(campaigns)
+    return total
+
+
+def archive_rejected_ad_requests(cutoff, batch_size=None):
+    """Archive rejected ad requests last changed before the cutoff"""
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    total = 0
+    while True:
+        rows = db.session.query(AdRequest, Campaign.sponsor_id)\
+            .join(Campaign, AdRequest.campaign_id == Campaign.id)\
+            .filter(AdRequest.status == 'Rejected', AdRequest.updated_at < cutoff)\
+            .order_by(AdRequest.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        ad_requests = [ad_request for ad_request, _ in rows]
+        _archive_ad_requests(ad_requests, {ar.campaign_id: sponsor_id for ar, sponsor_id in rows})
+        _purge([ar.id for ar in ad_requests])
+        _finish_batch()
+        total += len(ad_requests)
+    return total
+
+
+def run_archival(now=None):
+    """Archive everything that is old enough. Returns counts per entity type."""
+    cutoff = archive_cutoff(now)
+    try:
+        result = {
+            'campaigns': archive_completed_campaigns(cutoff),
+            'ad_requests': archive_rejected_ad_requests(cutoff)
+        }
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Archival failed: {str(e)}")
+        raise
+    logging.info(f"Archived {result['campaigns']} campaigns and {result['ad_requests']} rejected ad requests")
+    return result
+
+
+def find_archived(entity_type, entity_id):
+    """
+    Read-through lookup for detail endpoints
+
+    Returns:
+        ArchivedRecord or None
+    """
+    return ArchivedRecord.query.filter_by(entity_type=entity_type, entity_id=entity_id).first()
+
+
+def archived_payload(record):
+    """Decoded snapshot of an archived record, flagged as archived"""
+    payload = json.loads(record.payload)
+    payload['detail'].update({
+        'archived': True,
+        'archived_at_iso': record.archived_at.isoformat() if record.archived_at else None
+    })
+    return payload
+
+
+@celery.task()
+@non_overlapping(lock_seconds=6 * 3600)
+def archive_old_records():
+    """Nightly archival of completed campaigns and rejected ad requests"""
+    return run_archival()
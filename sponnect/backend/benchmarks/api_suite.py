@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+End-to-end API benchmark suite.
+
+Runs a fixed set of scenarios (search, listings, dashboards, charts, negotiation
+writes and payments) against the real endpoints on a dataset from
+benchmarks.datagen, and reports p50/p95/p99 latency, throughput and SQL query
+counts (from the X-DB-Queries header) per scenario.
+
+    --driver client  Flask test client in this process, one request at a time
+    --driver http    Gunicorn on a free port, driven by keep-alive client threads
+
+The dataset is generated once per size and seed (or given with --dataset) and
+copied before each run, so writes never leak into the next run. Results can be
+saved as JSON and compared with a baseline; a scenario regresses when its p95
+grows by more than --threshold (and --min-delta-ms), it runs more queries per
+request or it returns more errors.
+
+Usage (from sponnect/backend):
+    python -m benchmarks.api_suite
+    python -m benchmarks.api_suite --driver http --concurrency 16 --output results.json
+    python -m benchmarks.api_suite --baseline benchmarks/baselines/api_suite.json
+    python -m benchmarks.api_suite --group charts --group search --requests 500
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import cycle
+
+from benchmarks.wsgi_throughput import SERVERS, percentile, wait_until_up
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each scenario: group, acting role, method, path (ids filled from the dataset),
+# JSON body for writes, and the id pool writes draw a fresh target from ('reuse'
+# when the same target can take the write again)
+SCENARIOS = (
+    {'name': 'search_influencers', 'group': 'search', 'role': 'sponsor', 'method': 'GET',
+     'path': '/api/search/influencers?query=Creator&category=Fashion'},
+    {'name': 'search_campaigns', 'group': 'search', 'role': 'influencer', 'method': 'GET',
+     'path': '/api/search/campaigns?query=Summer&min_budget=10000'},
+    {'name': 'sponsor_campaigns', 'group': 'listings', 'role': 'sponsor', 'method': 'GET',
+     'path': '/api/sponsor/campaigns'},
+    {'name': 'sponsor_ad_requests', 'group': 'listings', 'role': 'sponsor', 'method': 'GET',
+     'path': '/api/sponsor/ad_requests'},
+    {'name': 'influencer_ad_requests', 'group': 'listings', 'role': 'influencer', 'method': 'GET',
+     'path': '/api/influencer/ad_requests'},
+    {'name': 'admin_users', 'group': 'listings', 'role': 'admin', 'method': 'GET',
+     'path': '/api/admin/users?per_page=50'},
+    {'name': 'admin_ad_requests', 'group': 'listings', 'role': 'admin', 'method': 'GET',
+     'path': '/api/admin/ad_requests'},
+    {'name': 'admin_stats', 'group': 'dashboards', 'role': 'admin', 'method': 'GET',
+     'path': '/api/admin/stats'},
+    {'name': 'admin_realtime', 'group': 'dashboards', 'role': 'admin', 'method': 'GET',
+     'path': '/api/admin/dashboard/realtime'},
+    {'name': 'campaign_budget', 'group': 'dashboards', 'role': 'sponsor', 'method': 'GET',
+     'path': '/api/sponsor/campaigns/{campaign_id}/budget'},
+    {'name': 'chart_dashboard_summary', 'group': 'charts', 'role': 'admin', 'method': 'GET',
+     'path': '/api/charts/dashboard-summary'},
+    {'name': 'chart_user_growth', 'group': 'charts', 'role': 'admin', 'method': 'GET',
+     'path': '/api/charts/user-growth'},
+    {'name': 'chart_ad_request_status', 'group': 'charts', 'role': 'admin', 'method': 'GET',
+     'path': '/api/charts/ad-request-status'},
+    {'name': 'chart_conversion_rates', 'group': 'charts', 'role': 'admin', 'method': 'GET',
+     'path': '/api/charts/conversion-rates'},
+    {'name': 'negotiation_history', 'group': 'negotiation', 'role': 'sponsor', 'method': 'GET',
+     'path': '/api/ad_requests/{ad_request_id}/history'},
+    {'name': 'sponsor_counter_offer', 'group': 'negotiation', 'role': 'sponsor', 'method': 'PUT',
+     'path': '/api/sponsor/ad_requests/{id}', 'pool': 'sponsor_turn',
+     'body': {'action': 'negotiate', 'payment_amount': 2500.0, 'message': 'Benchmark counter offer'}},
+    {'name': 'influencer_counter_offer', 'group': 'negotiation', 'role': 'influencer', 'method': 'PATCH',
+     'path': '/api/influencer/ad_requests/{id}', 'pool': 'influencer_turn',
+     'body': {'action': 'negotiate', 'payment_amount': 3000.0, 'message': 'Benchmark counter offer'}},
+    {'name': 'create_payment', 'group': 'payments', 'role': 'sponsor', 'method': 'POST',
+     'path': '/api/sponsor/ad_requests/{id}/payments', 'pool': 'payable', 'reuse': True,
+     'body': {'amount': 1.0, 'payment_type': 'partial'}},
+    {'name': 'list_payments', 'group': 'payments', 'role': 'sponsor', 'method': 'GET',
+     'path': '/api/sponsor/ad_requests/{paid_ad_request_id}/payments'},
+)
+
+
+def prepare_dataset(args, workdir):
+    """Copy the dataset (generating it first if needed) into workdir; return the copy's path"""
+    source = args.dataset or os.path.join(tempfile.gettempdir(),
+                                          f"sponnect-bench-{args.ad_requests}-{args.seed}.db")
+    if not os.path.exists(source):
+        if args.dataset:
+            raise SystemExit(f"Dataset {source} not found")
+        print(f"Generating dataset ({args.ad_requests:,} ad requests, seed {args.seed}) at {source}")
+        subprocess.run([sys.executable, '-m', 'benchmarks.datagen', '--ad-requests', str(args.ad_requests),
+                        '--seed', str(args.seed), '--database-url', f"sqlite:///{source}", '--reset'],
+                       cwd=BACKEND_DIR, check=True)
+    target = os.path.join(workdir, 'bench.db')
+    shutil.copyfile(source, target)
+    return target
+
+
+def configure_environment(database_path, workdir):
+    """Environment for the app under test; set before the app modules are imported"""
+    env = {
+        'DATABASE_URL': f"sqlite:///{database_path}",
+        'ARCHIVE_DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'archive.db')}",
+        'SQL_TIMING_HEADERS': 'True',
+        'SLOW_QUERY_LOG': os.path.join(workdir, 'slow_queries.log'),
+        'SPONNECT_PIDFILE': os.path.join(workdir, 'gunicorn.pid'),
+        'REDIS_URL': os.environ.get('REDIS_URL', 'memory://'),
+        'OUTBOX_KICK_DISPATCHER': 'False',  # No broker here; queued emails just stay in the outbox
+        'RATE_LIMITING': 'False',  # One token per role drives every scenario; measure the endpoints, not the limits
+    }
+    os.environ.update(env)
+    return dict(os.environ)
+
+
+def build_context(app):
+    """Pick the acting users and target ids from the dataset and mint their tokens"""
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import func, or_, and_
+    from models import db, User, Campaign, AdRequest
+
+    with app.app_context():
+        admin = User.query.filter_by(role='admin').first()
+        if admin is None:
+            admin = User(username='bench_admin', email='bench_admin@bench.sponnect.test', role='admin',
+                         is_active=True, sponsor_approved=True)
+            admin.set_password('password')
+            db.session.add(admin)
+            db.session.commit()
+
+        # The busiest sponsor and influencer: the heavy end of the distributions
+        sponsor_id = db.session.query(Campaign.sponsor_id).group_by(Campaign.sponsor_id) \
+            .order_by(func.count().desc()).limit(1).scalar()
+        influencer_id = db.session.query(AdRequest.influencer_id).group_by(AdRequest.influencer_id) \
+            .order_by(func.count().desc()).limit(1).scalar()
+        sponsor_requests = AdRequest.query.join(Campaign).filter(Campaign.sponsor_id == sponsor_id)
+
+        def ids(query):
+            return [row.id for row in query.order_by(AdRequest.id).with_entities(AdRequest.id)]
+
+        pools = {
+            # Counter offers must fit in the campaign's remaining budget
+            'sponsor_turn': ids(sponsor_requests.filter(Campaign.budget - Campaign.committed_amount >= 2500, or_(
+                AdRequest.status == 'Pending',
+                and_(AdRequest.status == 'Negotiating', AdRequest.last_offer_by == 'influencer')))),
+            'influencer_turn': ids(AdRequest.query.filter(AdRequest.influencer_id == influencer_id, or_(
+                AdRequest.status == 'Pending',
+                and_(AdRequest.status == 'Negotiating', AdRequest.last_offer_by == 'sponsor')))),
+            'payable': ids(sponsor_requests.filter(
+                AdRequest.status == 'Accepted', AdRequest.committed_amount - AdRequest.paid_amount > 1000)),
+        }
+        campaign_id = db.session.query(Campaign.id).filter_by(sponsor_id=sponsor_id).order_by(Campaign.id).first()[0]
+        ad_request_id = sponsor_requests.order_by(AdRequest.id).first().id
+        paid = ids(sponsor_requests.filter(AdRequest.paid_amount > 0)) or [ad_request_id]
+
+        tokens = {}
+        for role, user_id in (('admin', admin.id), ('sponsor', sponsor_id), ('influencer', influencer_id)):
+            tokens[role] = create_access_token(identity=user_id, additional_claims={'role': role},
+                                               expires_delta=timedelta(hours=6))
+    return {
+        'tokens': tokens,
+        'pools': {name: cycle(values) if values else None for name, values in pools.items()},
+        'pool_sizes': {name: len(values) for name, values in pools.items()},
+        'ids': {'campaign_id': campaign_id, 'ad_request_id': ad_request_id, 'paid_ad_request_id': paid[0]},
+    }
+
+
+def make_request_factory(scenario, context):
+    """Returns a thread-safe callable giving (method, path, body, headers) for the next request"""
+    lock = threading.Lock()
+    pool = context['pools'].get(scenario.get('pool'))
+    headers = {'Authorization': f"Bearer {context['tokens'][scenario['role']]}"}
+    if 'body' in scenario:
+        headers['Content-Type'] = 'application/json'
+    body = json.dumps(scenario['body']) if 'body' in scenario else None
+
+    def next_request():
+        fields = dict(context['ids'])
+        if pool is not None:
+            with lock:
+                fields['id'] = next(pool)
+        return scenario['method'], scenario['path'].format(**fields), body, headers
+    return next_request
+
+
+def client_driver(app, scenario, context, requests, warmup):
+    """Sequential requests through the Flask test client. Returns [(seconds, status, queries)], elapsed."""
+    next_request = make_request_factory(scenario, context)
+    client = app.test_client()
+    samples = []
+    started = None
+    for index in range(warmup + requests):
+        if index == warmup:
+            started = time.perf_counter()
+        method, path, body, headers = next_request()
+        sent = time.perf_counter()
+        response = client.open(path, method=method, data=body, headers=headers)
+        elapsed = time.perf_counter() - sent
+        if index >= warmup:
+            samples.append((elapsed, response.status_code, int(response.headers.get('X-DB-Queries', 0))))
+    return samples, time.perf_counter() - started
+
+
+def http_driver(port, scenario, context, requests, warmup, concurrency):
+    """Keep-alive client threads against a running server. Returns [(seconds, status, queries)], elapsed."""
+    next_request = make_request_factory(scenario, context)
+    samples = []
+    lock = threading.Lock()
+
+    def client(count, record):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local = []
+        for _ in range(count):
+            method, path, body, headers = next_request()
+            sent = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status, queries = response.status, int(response.getheader('X-DB-Queries', 0))
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status, queries = 0, 0
+            local.append((time.perf_counter() - sent, status, queries))
+        conn.close()
+        if record:
+            with lock:
+                samples.extend(local)
+
+    def run(total, record):
+        shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for share in shares:
+                pool.submit(client, share, record)
+
+    run(warmup, record=False)
+    started = time.perf_counter()
+    run(requests, record=True)
+    return samples, time.perf_counter() - started
+
+
+def summarize(scenario, samples, elapsed):
+    latencies = [seconds for seconds, _, _ in samples]
+    queries = [count for _, _, count in samples]
+    return {
+        'group': scenario['group'],
+        'method': scenario['method'],
+        'path': scenario['path'],
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _ in samples if status == 0 or status >= 400),
+        'requests_per_second': round(len(samples) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries_mean': round(statistics.mean(queries), 2),
+        'queries_max': max(queries),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Per-scenario changes against a baseline. Returns (rows, regressed scenario names)."""
+    rows, regressions = [], []
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            rows.append((name, None, None, False))
+            continue
+        p95_change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0
+        queries_change = result['queries_mean'] - before['queries_mean']
+        # Sub-millisecond jitter on fast endpoints is not a regression
+        slower = p95_change > threshold and result['p95_ms'] - before['p95_ms'] > min_delta_ms
+        regressed = slower or queries_change > 0.5 or result['errors'] > before['errors']
+        if regressed:
+            regressions.append(name)
+        rows.append((name, p95_change, queries_change, regressed))
+    return rows, regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--driver', choices=('client', 'http'), default='client')
+    parser.add_argument('--dataset', help='SQLite file from benchmarks.datagen (default: generate and cache one)')
+    parser.add_argument('--ad-requests', type=int, default=20_000, help='Dataset size when generating')
+    parser.add_argument('--seed', type=int, default=42, help='Dataset seed when generating')
+    parser.add_argument('--group', action='append', help='Only run this scenario group (repeatable)')
+    parser.add_argument('--scenario', action='append', help='Only run this scenario (repeatable)')
+    parser.add_argument('--requests', type=int, default=100, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads (http driver)')
+    parser.add_argument('--port', type=int, default=5098, help='Port for the http driver')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare with the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed p95 growth vs the baseline (0.2 = 20%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Ignore p95 growth smaller than this')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on a regression')
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS
+                 if (not args.group or s['group'] in args.group) and (not args.scenario or s['name'] in args.scenario)]
+    workdir = tempfile.mkdtemp(prefix='sponnect-api-suite-')
+    env = configure_environment(prepare_dataset(args, workdir), workdir)
+
+    from app import create_app, init_db
+    app = create_app()
+    with app.app_context():
+        init_db()
+    context = build_context(app)
+
+    server = None
+    if args.driver == 'http':
+        server = subprocess.Popen(SERVERS['gunicorn'](args.port), cwd=BACKEND_DIR, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if not wait_until_up(args.port):
+            server.terminate()
+            raise RuntimeError(f"Gunicorn did not start on port {args.port}")
+
+    results = {}
+    try:
+        for scenario in scenarios:
+            if scenario.get('pool') and not context['pool_sizes'][scenario['pool']]:
+                print(f"{scenario['name']:<26} skipped: no {scenario['pool']} ad requests in the dataset")
+                continue
+            if scenario.get('pool') and not scenario.get('reuse') \
+                    and context['pool_sizes'][scenario['pool']] < args.warmup + args.requests:
+                # The pool wraps around and repeats targets, which the endpoint may refuse
+                print(f"{scenario['name']:<26} note: only {context['pool_sizes'][scenario['pool']]} "
+                      f"{scenario['pool']} ad requests; expect errors once they are used up")
+            if args.driver == 'client':
+                samples, elapsed = client_driver(app, scenario, context, args.requests, args.warmup)
+            else:
+                samples, elapsed = http_driver(args.port, scenario, context, args.requests, args.warmup,
+                                               args.concurrency)
+            results[scenario['name']] = summarize(scenario, samples, elapsed)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'scenario':<26}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:<26}{r['requests_per_second']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+              f"{r['queries_mean']:>9}{r['errors']:>8}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        meta = baseline.get('meta', {})
+        print(f"\nvs {args.baseline} ({meta.get('git_revision') or 'unknown revision'})")
+        if meta.get('driver') != args.driver or meta.get('dataset') != (args.dataset or {'ad_requests': args.ad_requests, 'seed': args.seed}):
+            print("Warning: the baseline used a different driver or dataset; latencies are not comparable")
+        for name, p95_change, queries_change, regressed in rows:
+            if p95_change is None:
+                print(f"{name:<26} new scenario")
+            else:
+                print(f"{name:<26} p95 {p95_change:+7.1%}  queries {queries_change:+6.2f}"
+                      f"{'  REGRESSION' if regressed else ''}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': datetime.utcnow().isoformat(),
+                    'git_revision': git_revision(),
+                    'driver': args.driver,
+                    'concurrency': args.concurrency if args.driver == 'http' else 1,
+                    'dataset': args.dataset or {'ad_requests': args.ad_requests, 'seed': args.seed},
+                    'requests': args.requests,
+                    'python': sys.version.split()[0],
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for benchmarks.
+
+Fills a database with sponsors, influencers, campaigns, ad requests, negotiation
+history and payments at any scale. The same seed and sizes always produce the
+same rows, so benchmark runs are comparable. Distributions are skewed like real
+traffic: influencer reach is heavy-tailed (Pareto) and popular influencers get
+more ad requests, a few sponsors own most campaigns (Zipf), campaign sizes are
+log-normal and negotiations run to a long tail of counter offers.
+
+Rows are written with bulk (executemany) inserts in batched transactions, with
+secondary indexes dropped during the load and rebuilt afterwards. Campaign
+ledger totals are filled in from the generated ad requests and payments, so
+the budget checks in ledger.py hold. Every user's password is "password".
+
+Sizes default to ratios of --ad-requests; 250k ad requests is roughly a million
+rows in total.
+
+Usage (from sponnect/backend):
+    python -m benchmarks.datagen --ad-requests 250000 --database-url sqlite:///bench.db --reset
+    python -m benchmarks.datagen --ad-requests 2000000 --seed 7 --sponsors 5000 --reset
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import bindparam, create_engine, event, func, select, update
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Campaign, AdRequest, NegotiationHistory, Payment
+from constants import INDUSTRIES, INFLUENCER_CATEGORIES, INDUSTRY_TO_CATEGORY, DEFAULT_CATEGORY
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Fixed reference time so the same seed gives the same timestamps on any day
+EPOCH_END = datetime(2025, 1, 1)
+
+NICHES = ('Product Reviews', 'Tutorials', 'Lifestyle', 'How-to Guides', 'Unboxing',
+          'Challenges', 'Vlogs', 'Interviews', 'Live Events')
+CAMPAIGN_WORDS = ('Summer', 'Launch', 'Holiday', 'Ambassador', 'Review', 'Showcase',
+                  'Limited', 'Seasonal', 'Wellness', 'Awareness', 'Takeover', 'Demo')
+
+# (value, weight) tables
+CAMPAIGN_STATUSES = (('active', 60), ('completed', 20), ('paused', 8),
+                     ('pending_approval', 5), ('draft', 4), ('rejected', 3))
+AD_REQUEST_STATUSES = (('Pending', 30), ('Negotiating', 15), ('Accepted', 35), ('Rejected', 20))
+# Campaigns that can have ad requests
+OPEN_STATUSES = ('active', 'completed', 'paused')
+
+REACH_CAP = 50_000_000
+
+
+def weighted(rng, table):
+    values, weights = zip(*table)
+    return rng.choices(values, weights=weights)[0]
+
+
+class WeightedPicker:
+    """Draws indexes in proportion to fixed weights (binary search over cumulative weights)"""
+
+    def __init__(self, weights):
+        self.cumulative = list(accumulate(weights))
+        self.total = self.cumulative[-1]
+
+    def pick(self, rng):
+        return bisect_left(self.cumulative, rng.random() * self.total)
+
+
+def default_sizes(ad_requests):
+    return {
+        'sponsors': max(ad_requests // 500, 10),
+        'influencers': max(ad_requests // 50, 20),
+        'campaigns': max(ad_requests // 20, 30),
+        'ad_requests': ad_requests,
+    }
+
+
+class BatchWriter:
+    """Buffers rows per table and writes each full batch in its own transaction"""
+
+    def __init__(self, engine, batch_size):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, table, row):
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # Parents first, so foreign keys hold on databases that enforce them
+        with self.engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                rows = self.buffers.pop(table, None)
+                if rows:
+                    conn.execute(table.insert(), rows)
+                    self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+
+
+def generate_users(rng, writer, sizes, span_seconds, password_hash):
+    """Insert sponsors then influencers. Returns ({sponsor id: industry}, influencer ids, influencer reach)."""
+    users = User.__table__
+    sponsors, influencer_ids, reach = {}, [], []
+    user_id = 0
+    for index in range(sizes['sponsors']):
+        user_id += 1
+        industry = rng.choice(INDUSTRIES)
+        writer.add(users, {
+            'id': user_id, 'username': f"sponsor{index + 1}", 'email': f"sponsor{index + 1}@bench.sponnect.test",
+            'password_hash': password_hash, 'role': 'sponsor', 'is_active': True,
+            'sponsor_approved': rng.random() < 0.95, 'influencer_approved': None, 'is_flagged': rng.random() < 0.01,
+            'created_at': EPOCH_END - timedelta(seconds=span_seconds * (0.5 + rng.random() / 2)),
+            'company_name': f"{industry.split()[0]} Co {index + 1}", 'industry': industry,
+            'influencer_name': None, 'category': None, 'niche': None, 'reach': 0,
+        })
+        sponsors[user_id] = industry
+    for index in range(sizes['influencers']):
+        user_id += 1
+        # Pareto with alpha ~1.16: the top 20% of influencers hold ~80% of total reach
+        followers = min(int(1000 * rng.paretovariate(1.16)), REACH_CAP)
+        writer.add(users, {
+            'id': user_id, 'username': f"influencer{index + 1}", 'email': f"influencer{index + 1}@bench.sponnect.test",
+            'password_hash': password_hash, 'role': 'influencer', 'is_active': True,
+            'sponsor_approved': None, 'influencer_approved': rng.random() < 0.9, 'is_flagged': rng.random() < 0.01,
+            'created_at': EPOCH_END - timedelta(seconds=span_seconds * (0.3 + rng.random() * 0.7)),
+            'company_name': None, 'industry': None,
+            'influencer_name': f"Creator {index + 1}", 'category': rng.choice(INFLUENCER_CATEGORIES),
+            'niche': rng.choice(NICHES), 'reach': followers,
+        })
+        influencer_ids.append(user_id)
+        reach.append(followers)
+    return sponsors, influencer_ids, reach
+
+
+def generate_campaigns(rng, writer, sizes, sponsors, span_seconds):
+    """Insert campaigns. Returns one dict per campaign with what the ad requests need."""
+    campaigns = Campaign.__table__
+    sponsor_ids = list(sponsors)
+    # Zipf (s=1.1) over sponsors: a handful of large brands run most campaigns
+    sponsor_picker = WeightedPicker([1 / (rank ** 1.1) for rank in range(1, len(sponsor_ids) + 1)])
+    generated = []
+    for campaign_id in range(1, sizes['campaigns'] + 1):
+        sponsor_id = sponsor_ids[sponsor_picker.pick(rng)]
+        industry = sponsors[sponsor_id]
+        status = weighted(rng, CAMPAIGN_STATUSES)
+        created = EPOCH_END - timedelta(seconds=span_seconds * rng.random() ** 1.5)
+        budget = round(rng.lognormvariate(math.log(50_000), 1.0), -2) + 1000
+        writer.add(campaigns, {
+            'id': campaign_id, 'name': f"{rng.choice(CAMPAIGN_WORDS)} {rng.choice(CAMPAIGN_WORDS)} #{campaign_id}",
+            'description': f"Benchmark campaign {campaign_id}", 'start_date': created,
+            'end_date': created + timedelta(days=rng.randint(14, 180)), 'budget': budget,
+            'committed_amount': 0.0, 'paid_amount': 0.0,
+            'visibility': 'public' if rng.random() < 0.7 else 'private', 'status': status,
+            'category': INDUSTRY_TO_CATEGORY.get(industry, DEFAULT_CATEGORY), 'goals': None,
+            'is_flagged': rng.random() < 0.01, 'created_at': created, 'updated_at': created,
+            'sponsor_id': sponsor_id,
+        })
+        generated.append({'id': campaign_id, 'sponsor_id': sponsor_id, 'status': status, 'budget': budget,
+                          'created': created, 'committed': 0.0, 'paid': 0.0,
+                          # Log-normal popularity: most campaigns get a few requests, some get hundreds
+                          'weight': rng.lognormvariate(0, 1.2) if status in OPEN_STATUSES else 0})
+    return generated
+
+
+def negotiation_rows(rng, ad_request_id, status, sponsor_id, influencer_id, amount, created, mean_counters):
+    """Negotiation history for one ad request: a proposal, counter offers, then accept/reject"""
+    if status == 'Pending':
+        counters = 0
+    else:
+        # Exponential number of counter offers: most settle quickly, a few haggle at length
+        counters = int(rng.expovariate(1 / mean_counters)) + (1 if status == 'Negotiating' else 0)
+    steps = [('sponsor', 'propose', amount)]
+    for turn in range(counters):
+        amount = round(amount * rng.uniform(0.85, 1.15), 2)
+        steps.append(('influencer' if turn % 2 == 0 else 'sponsor', 'counter', amount))
+    if status in ('Accepted', 'Rejected'):
+        last_role = steps[-1][0]
+        steps.append(('influencer' if last_role == 'sponsor' else 'sponsor',
+                      'accept' if status == 'Accepted' else 'reject', amount))
+
+    rows, at = [], created
+    for role, action, offer in steps:
+        rows.append({
+            'ad_request_id': ad_request_id, 'user_id': sponsor_id if role == 'sponsor' else influencer_id,
+            'user_role': role, 'action': action, 'message': None,
+            'payment_amount': offer, 'requirements': None, 'created_at': at,
+        })
+        at += timedelta(minutes=rng.expovariate(1 / 600))
+    return rows, amount, steps[-1][0], at
+
+
+def generate_ad_requests(rng, writer, sizes, campaigns, influencer_ids, reach, mean_counters):
+    """Insert ad requests with their negotiation history and payments; updates campaign totals in place"""
+    ad_requests = AdRequest.__table__
+    negotiations = NegotiationHistory.__table__
+    payments = Payment.__table__
+    open_campaigns = [campaign for campaign in campaigns if campaign['weight']]
+    campaign_picker = WeightedPicker([campaign['weight'] for campaign in open_campaigns])
+    # Requests go to influencers roughly in proportion to sqrt(reach): big accounts get more, not all
+    influencer_picker = WeightedPicker([math.sqrt(followers) for followers in reach])
+    payment_id = 0
+
+    for ad_request_id in range(1, sizes['ad_requests'] + 1):
+        campaign = open_campaigns[campaign_picker.pick(rng)]
+        influencer_index = influencer_picker.pick(rng)
+        influencer_id = influencer_ids[influencer_index]
+        status = weighted(rng, AD_REQUEST_STATUSES)
+        # Price tracks audience size: about 20 per thousand followers, with spread
+        offer = round(max(100.0, reach[influencer_index] * 0.02 * rng.lognormvariate(0, 0.4)), 2)
+        created = min(campaign['created'] + timedelta(seconds=rng.random() * 60 * 86400), EPOCH_END)
+
+        rows, amount, last_role, updated = negotiation_rows(
+            rng, ad_request_id, status, campaign['sponsor_id'], influencer_id, offer, created, mean_counters)
+        if status == 'Accepted' and campaign['committed'] + amount > campaign['budget']:
+            # Keep the ledger invariant: the budget can't cover it, so the sponsor declined
+            status = 'Rejected'
+            rows[-1]['action'] = 'reject'
+
+        committed = amount if status == 'Accepted' else 0.0
+        paid = 0.0
+        if committed and rng.random() < 0.6:
+            paid = committed if rng.random() < 0.8 else round(committed * 0.5, 2)
+            payment_id += 1
+            writer.add(payments, {
+                'id': payment_id, 'ad_request_id': ad_request_id, 'amount': paid,
+                'platform_fee': round(paid * 0.01, 2), 'influencer_amount': round(paid * 0.99, 2),
+                'status': 'Completed', 'payment_method': 'Razorpay', 'transaction_id': f"bench_{payment_id}",
+                'payment_response': None, 'created_at': updated, 'updated_at': updated,
+            })
+        campaign['committed'] += committed
+        campaign['paid'] += paid
+
+        writer.add(ad_requests, {
+            'id': ad_request_id, 'campaign_id': campaign['id'], 'influencer_id': influencer_id,
+            'initiator_id': campaign['sponsor_id'] if last_role == 'sponsor' else influencer_id,
+            'message': None, 'requirements': 'One post and two stories', 'payment_amount': amount,
+            'committed_amount': committed, 'paid_amount': paid, 'status': status,
+            'last_offer_by': last_role if status in ('Pending', 'Negotiating') else None,
+            'is_flagged': rng.random() < 0.005, 'created_at': created, 'updated_at': updated,
+        })
+        for row in rows:
+            writer.add(negotiations, row)
+
+
+def write_campaign_totals(engine, campaigns, batch_size):
+    campaigns_table = Campaign.__table__
+    rows = [{'campaign_id': c['id'], 'committed': round(c['committed'], 2), 'paid': round(c['paid'], 2)}
+            for c in campaigns if c['committed']]
+    statement = (update(campaigns_table)
+                 .where(campaigns_table.c.id == bindparam('campaign_id'))
+                 .values(committed_amount=bindparam('committed'), paid_amount=bindparam('paid')))
+    for start in range(0, len(rows), batch_size):
+        with engine.begin() as conn:
+            conn.execute(statement, rows[start:start + batch_size])
+
+
+def prepare_schema(engine, reset):
+    """Create the tables (dropping them first with --reset) and drop secondary indexes for the load"""
+    if reset:
+        db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(User.__table__)).scalar():
+            raise SystemExit('Target database already has users; use --reset to replace its data')
+    indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+    return indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ad-requests', type=int, default=250_000, help='Ad requests to generate; other sizes scale with it')
+    parser.add_argument('--sponsors', type=int, help='Default: ad requests / 500')
+    parser.add_argument('--influencers', type=int, help='Default: ad requests / 50')
+    parser.add_argument('--campaigns', type=int, help='Default: ad requests / 20')
+    parser.add_argument('--counter-offers', type=float, default=1.5, help='Mean counter offers per negotiated request')
+    parser.add_argument('--days', type=int, default=365, help='Time span the data covers, ending 2025-01-01')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=20_000, help='Rows per table per transaction')
+    parser.add_argument('--database-url', default=f"sqlite:///{os.path.join(BACKEND_DIR, 'bench_data.db')}")
+    parser.add_argument('--reset', action='store_true', help='Drop and recreate the tables first')
+    args = parser.parse_args()
+
+    sizes = default_sizes(args.ad_requests)
+    for name in ('sponsors', 'influencers', 'campaigns'):
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+
+    engine = create_engine(args.database_url)
+    if engine.dialect.name == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def fast_load(dbapi_connection, connection_record):
+            # Bulk load only: a crash mid-load means regenerating the data anyway
+            dbapi_connection.execute('PRAGMA synchronous=OFF')
+            dbapi_connection.execute('PRAGMA journal_mode=MEMORY')
+
+    rng = random.Random(args.seed)
+    span_seconds = args.days * 86400
+    started = time.perf_counter()
+    indexes = prepare_schema(engine, args.reset)
+    writer = BatchWriter(engine, args.batch_size)
+
+    sponsors, influencer_ids, reach = generate_users(
+        rng, writer, sizes, span_seconds, generate_password_hash('password'))
+    campaigns = generate_campaigns(rng, writer, sizes, sponsors, span_seconds)
+    generate_ad_requests(rng, writer, sizes, campaigns, influencer_ids, reach, args.counter_offers)
+    writer.flush()
+    write_campaign_totals(engine, campaigns, args.batch_size)
+    loaded = time.perf_counter() - started
+
+    with engine.begin() as conn:
+        for index in indexes:
+            index.create(conn)
+    elapsed = time.perf_counter() - started
+
+    total = sum(writer.counts.values())
+    for table, count in sorted(writer.counts.items()):
+        print(f"{table:<22} {count:>10,}")
+    print(f"{'total':<22} {total:>10,} rows in {loaded:.1f}s ({total / loaded:,.0f} rows/s), "
+          f"{elapsed:.1f}s with indexes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Email rendering benchmark: Flask's render_template against the precompiled
+email environment, one render at a time and batched through render_many().
+
+Renders the stats email templates for a fixed number of synthetic recipients
+and reports renders/second per method. The `pooled` method spreads the batch
+over --processes worker processes; on a single-CPU machine it only adds
+overhead, so read it on the hardware the workers run on.
+
+Usage (from sponnect/backend):
+    python -m benchmarks.email_render
+    python -m benchmarks.email_render --recipients 5000 --processes 4
+    python -m benchmarks.email_render --template emails/sponsor_stats.html --output results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES = ('emails/sponsor_stats.html', 'emails/influencer_stats.html')
+
+
+def make_contexts(template_name, count):
+    """Picklable contexts shaped like the ones the stats tasks build"""
+    contexts = []
+    for i in range(count):
+        user = SimpleNamespace(id=i, username=f'user{i}', email=f'user{i}@example.com')
+        context = dict(frontend_url='http://localhost:5173', active_negotiations=i % 4)
+        if template_name == 'emails/sponsor_stats.html':
+            context.update(
+                sponsor=user, active_campaigns=i % 7, total_campaigns=i % 11, pending_requests=i % 5,
+                accepted_partnerships=i % 3, pending_progress_updates=i % 2,
+                recent_requests=[dict(influencer_username=f'influencer{j}', campaign_name=f'Campaign {j}',
+                                      created_at=(datetime(2024, 1, 1) + timedelta(days=j)).strftime('%Y-%m-%d'))
+                                 for j in range(5)]
+            )
+        else:
+            context.update(
+                influencer=user, pending_applications=i % 5, active_partnerships=i % 3,
+                completed_partnerships=i % 9, pending_content_reviews=i % 2, matching_campaigns=i % 13,
+                recent_matching_campaigns=[SimpleNamespace(name=f'Campaign {j}', description='Launch campaign ' * 10)
+                                           for j in range(5)]
+            )
+        contexts.append(context)
+    return contexts
+
+
+def timed(fn, rounds):
+    """Best wall time of rounds calls"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3, help='Runs per method (the best is reported)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='Pool size for the pooled method')
+    parser.add_argument('--template', action='append', choices=TEMPLATES, help='Template to render (repeatable)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='sponnect-email-render-')
+    os.environ.setdefault('REDIS_URL', 'memory://')
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.setdefault('ARCHIVE_DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'archive.db')}")
+    os.environ['EMAIL_TEMPLATE_CACHE_DIR'] = workdir
+    os.environ['EMAIL_RENDER_PROCESSES'] = str(args.processes)
+    os.environ['EMAIL_RENDER_POOL_MIN'] = '1'
+    sys.path.insert(0, BACKEND_DIR)
+
+    from flask import render_template
+    from app import create_app
+    import email_render
+
+    app = create_app()
+    email_render.precompile()
+    results = []
+    for template_name in args.template or TEMPLATES:
+        contexts = make_contexts(template_name, args.recipients)
+
+        def flask_render():
+            with app.app_context():
+                for context in contexts:
+                    render_template(template_name, **context)
+
+        methods = {
+            'flask': flask_render,
+            'precompiled': lambda: [email_render.render(template_name, **context) for context in contexts],
+            'batched': lambda: email_render._render_chunk(template_name, contexts),
+        }
+        if args.processes > 1:
+            email_render.render_many(template_name, contexts[:1])  # Start the pool outside the timing
+            methods['pooled'] = lambda: email_render.render_many(template_name, contexts)
+
+        for method, fn in methods.items():
+            elapsed = timed(fn, args.rounds)
+            results.append({
+                'template': template_name,
+                'method': method,
+                'recipients': len(contexts),
+                'seconds': round(elapsed, 4),
+                'renders_per_second': round(len(contexts) / elapsed, 1),
+            })
+
+    print(f"{'template':<32}{'method':<14}{'renders/s':>12}{'seconds':>10}")
+    for r in results:
+        print(f"{r['template']:<32}{r['method']:<14}{r['renders_per_second']:>12}{r['seconds']:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'recipients': args.recipients, 'processes': args.processes, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
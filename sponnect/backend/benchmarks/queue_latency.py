@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Registration-email latency while a stats run is in flight.
+
+Starts Celery workers against the configured broker (CELERY_BROKER_URL, Redis),
+measures the latency of `send_registration_pending_notification` on an idle
+system, then enqueues a burst of stats tasks and measures it again while they
+run. Latency is enqueue to completion, taken from the result backend.
+
+    --mode split   one worker per queue, as `python run.py` starts them
+    --mode shared  a single worker consuming every queue (the old setup)
+
+With split queues the loaded latency should stay close to the idle one.
+
+Usage (from sponnect/backend, with Redis running and users in the DB):
+    python -m benchmarks.queue_latency --mode split
+    python -m benchmarks.queue_latency --mode shared --stats-runs 30 --output shared.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import timezone
+
+from workers import celery, QUEUE_NAMES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATS_TASKS = (
+    'user_notifications.send_sponsor_stats_update',
+    'user_notifications.send_influencer_stats_update',
+    'user_notifications.send_admin_daily_report',
+    'user_notifications.send_minute_activity_update',
+)
+PROBE_TASK = 'user_notifications.send_registration_pending_notification'
+
+
+def start_workers(mode, concurrency):
+    """Start the workers for a mode. Returns (processes, node names)."""
+    base = [sys.executable, '-m', 'celery', '-A', 'workers.celery', 'worker', '--loglevel=warning']
+    if mode == 'split':
+        specs = [(queue, ['-Q', queue, '-n', f'bench-{queue}@%h']) for queue in QUEUE_NAMES]
+    else:
+        specs = [('all', ['-Q', ','.join(QUEUE_NAMES), '-n', 'bench-all@%h', '--concurrency', str(concurrency)])]
+    procs = [subprocess.Popen(base + args, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL)
+             for _, args in specs]
+    return procs, [f'bench-{name}' for name, _ in specs]
+
+
+def wait_for_workers(names, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        replies = celery.control.ping(timeout=1.0) or []
+        up = {node.split('@')[0] for reply in replies for node in reply}
+        if all(name in up for name in names):
+            return True
+    return False
+
+
+def probe_latencies(user_id, count, interval):
+    """Send probe tasks at a fixed interval; return enqueue-to-done latencies in ms"""
+    sent = []
+    for _ in range(count):
+        sent.append((time.time(), celery.send_task(PROBE_TASK, args=[user_id])))
+        time.sleep(interval)
+    latencies = []
+    for enqueued_at, result in sent:
+        result.get(timeout=300, propagate=False)
+        done = result.date_done
+        if done.tzinfo is None:
+            done = done.replace(tzinfo=timezone.utc)
+        latencies.append((done.timestamp() - enqueued_at) * 1000)
+    return latencies
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'p50_ms': round(statistics.median(ordered), 1),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        'max_ms': round(ordered[-1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('split', 'shared'), default='split')
+    parser.add_argument('--concurrency', type=int, default=4, help='Worker concurrency in shared mode')
+    parser.add_argument('--stats-runs', type=int, default=20, help='How many times to enqueue each stats task')
+    parser.add_argument('--probes', type=int, default=20, help='Registration emails sent per phase')
+    parser.add_argument('--interval', type=float, default=0.25, help='Seconds between probes')
+    parser.add_argument('--user-id', type=int, default=1, help='Existing user the registration email goes to')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    celery.control.purge()  # Start from empty queues
+
+    procs, names = start_workers(args.mode, args.concurrency)
+    try:
+        if not wait_for_workers(names):
+            raise RuntimeError('Workers did not come up; is the broker running?')
+
+        idle = summarize(probe_latencies(args.user_id, args.probes, args.interval))
+        print(f"idle        p50 {idle['p50_ms']:8.1f} ms  p95 {idle['p95_ms']:8.1f} ms  max {idle['max_ms']:8.1f} ms")
+
+        for _ in range(args.stats_runs):
+            for name in STATS_TASKS:
+                celery.send_task(name)
+        loaded = summarize(probe_latencies(args.user_id, args.probes, args.interval))
+        print(f"stats run   p50 {loaded['p50_ms']:8.1f} ms  p95 {loaded['p95_ms']:8.1f} ms  max {loaded['max_ms']:8.1f} ms")
+    finally:
+        celery.control.purge()  # Drop what's left of the stats run
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=60)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'mode': args.mode, 'stats_runs': args.stats_runs, 'idle': idle, 'stats_run': loaded}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
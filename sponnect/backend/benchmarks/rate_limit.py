@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Load test for rate limiting: latency of well-behaved clients while abusive
+clients hammer the same expensive endpoint.
+
+Starts Gunicorn on a benchmarks.datagen dataset for each phase and runs the
+same well-behaved clients (distinct users and IPs, each sending one search every
+--interval seconds) in each:
+
+    baseline   well-behaved clients alone
+    unlimited  plus --abusers threads sending --abuse-rate searches/second in all, RATE_LIMITING=False
+    limited    the same abuse with RATE_LIMITING=True
+
+The abusers are paced so both phases get the same abusive load; with
+--abuse-rate 0 they resend as soon as they get an answer, so cheap 429s buy
+them more requests (and, on a small box, more of the CPU the clients share).
+
+The phases run --repeat times, interleaved so drift hits every phase alike.
+Reports the well-behaved clients' p50/p95/p99 over all rounds (and the p99 of
+each round, to show how stable it is), errors, and what the abusers got
+(requests/second, 200/429/503). A tail percentile needs thousands of samples:
+the defaults give each phase about 16 * 2/s * 60s * 3 = 5760, each client
+staying under the default search limit (30/10). Client IPs are sent in
+X-Forwarded-For with TRUSTED_PROXIES=1. With the default REDIS_URL=memory://
+each Gunicorn worker keeps its own buckets; set REDIS_URL to a real Redis to
+share them (and exercise the Lua script).
+
+Usage (from sponnect/backend):
+    python -m benchmarks.rate_limit
+    python -m benchmarks.rate_limit --duration 20 --repeat 1         # quick look; p99 is noisy
+    python -m benchmarks.rate_limit --abuse-rate 0 --output results.json   # unpaced abuse
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from benchmarks.api_suite import BACKEND_DIR, configure_environment, prepare_dataset
+from benchmarks.wsgi_throughput import SERVERS, percentile, wait_until_up
+
+SEARCH_PATH = '/api/search/influencers?query=Creator&category=Fashion'
+PHASES = (
+    ('baseline', False, 'True'),
+    ('unlimited', True, 'False'),
+    ('limited', True, 'True'),
+)
+
+
+def mint_tokens(count):
+    """Access tokens for count distinct sponsors of the dataset"""
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from models import User
+
+    app = create_app()
+    with app.app_context():
+        sponsor_ids = [row.id for row in User.query.filter_by(role='sponsor', is_active=True)
+                       .order_by(User.id).with_entities(User.id).limit(count)]
+        if len(sponsor_ids) < count:
+            raise SystemExit(f"The dataset has only {len(sponsor_ids)} active sponsors; {count} are needed")
+        return [create_access_token(identity=user_id, additional_claims={'role': 'sponsor'},
+                                    expires_delta=timedelta(hours=6)) for user_id in sponsor_ids]
+
+
+def client_loop(port, token, ip, deadline, interval, record):
+    """Send searches until deadline, one per interval (as fast as possible when interval is 0)"""
+    headers = {'Authorization': f"Bearer {token}", 'X-Forwarded-For': ip}
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    while time.perf_counter() < deadline:
+        sent = time.perf_counter()
+        try:
+            conn.request('GET', SEARCH_PATH, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            status = 0
+        elapsed = time.perf_counter() - sent
+        record(elapsed, status)
+        if interval:
+            time.sleep(max(0.0, interval - elapsed))
+    conn.close()
+
+
+def run_phase(abuse, rate_limiting, args, env, tokens):
+    """Start a server for one round of a phase and run the clients; returns (good, bad) samples"""
+    env = dict(env, RATE_LIMITING=rate_limiting, TRUSTED_PROXIES='1', WEB_CONCURRENCY=str(args.workers))
+    server = subprocess.Popen(SERVERS['gunicorn'](args.port), cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    good, bad = [], []
+    lock = threading.Lock()
+
+    def recorder(samples):
+        def record(elapsed, status):
+            with lock:
+                samples.append((elapsed, status))
+        return record
+
+    try:
+        if not wait_until_up(args.port):
+            raise RuntimeError(f"Server did not start on port {args.port}")
+        deadline = time.perf_counter() + args.duration
+        threads = [threading.Thread(target=client_loop, args=(
+            args.port, tokens[i], f"10.0.0.{i + 1}", deadline, args.interval, recorder(good)))
+            for i in range(args.good_clients)]
+        if abuse:
+            # A few abusive accounts, each behind its own address, with many connections
+            threads += [threading.Thread(target=client_loop, args=(
+                args.port, tokens[args.good_clients + i % args.abuser_accounts],
+                f"10.1.0.{i % args.abuser_accounts + 1}", deadline,
+                args.abusers / args.abuse_rate if args.abuse_rate else 0, recorder(bad)))
+                for i in range(args.abusers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return good, bad
+
+
+def summarize(name, rate_limiting, rounds, args):
+    """One phase's results over all its rounds"""
+    good = [sample for round_good, _ in rounds for sample in round_good]
+    bad = [sample for _, round_bad in rounds for sample in round_bad]
+    latencies = [elapsed for elapsed, _ in good]
+    return {
+        'phase': name,
+        'rate_limiting': rate_limiting == 'True',
+        'good_requests': len(good),
+        'good_errors': sum(1 for _, status in good if status != 200),
+        'good_statuses': dict(Counter(str(status) for _, status in good)),
+        'good_p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'good_p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'good_p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'good_p99_ms_per_round': [round(percentile([elapsed for elapsed, _ in round_good], 99) * 1000, 2)
+                                  for round_good, _ in rounds],
+        'abuser_requests_per_second': round(len(bad) / (args.duration * len(rounds)), 1),
+        'abuser_statuses': dict(Counter(str(status) for _, status in bad)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', help='SQLite file from benchmarks.datagen (default: generate and cache one)')
+    parser.add_argument('--ad-requests', type=int, default=20_000, help='Dataset size when generating')
+    parser.add_argument('--seed', type=int, default=42, help='Dataset seed when generating')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds per phase and round')
+    parser.add_argument('--repeat', type=int, default=3, help='Rounds of every phase')
+    parser.add_argument('--good-clients', type=int, default=16)
+    parser.add_argument('--interval', type=float, default=0.5, help='Seconds between a good client\'s requests')
+    parser.add_argument('--abusers', type=int, default=16, help='Abusive client threads')
+    parser.add_argument('--abuse-rate', type=float, default=200,
+                        help='Searches/second the abusers send in all (0: as fast as they can)')
+    parser.add_argument('--abuser-accounts', type=int, default=2, help='Accounts (and IPs) the abusive threads share')
+    parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers')
+    parser.add_argument('--port', type=int, default=5097)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='sponnect-rate-limit-')
+    env = configure_environment(prepare_dataset(args, workdir), workdir)
+    tokens = mint_tokens(args.good_clients + args.abuser_accounts)
+
+    rounds = {name: [] for name, _, _ in PHASES}
+    for _ in range(args.repeat):
+        for name, abuse, rate_limiting in PHASES:
+            rounds[name].append(run_phase(abuse, rate_limiting, args, env, tokens))
+    results = [summarize(name, rate_limiting, rounds[name], args) for name, _, rate_limiting in PHASES]
+
+    print(f"{'phase':<12}{'samples':>9}{'good p50':>10}{'good p95':>10}{'good p99':>10}{'good err':>10}"
+          f"{'abuse req/s':>13}  p99 per round / abuser statuses")
+    for r in results:
+        print(f"{r['phase']:<12}{r['good_requests']:>9}{r['good_p50_ms']:>10}{r['good_p95_ms']:>10}"
+              f"{r['good_p99_ms']:>10}{r['good_errors']:>10}{r['abuser_requests_per_second']:>13}"
+              f"  {r['good_p99_ms_per_round']} {r['abuser_statuses']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
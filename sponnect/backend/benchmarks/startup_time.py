@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the web app and the Celery worker.
+
+Imports each entry point in a fresh interpreter under `python -X importtime`,
+repeats it a few times and reports the median wall time, the cumulative import
+time and the packages that take longest to import. Each run can be appended to a
+JSON Lines history (tagged with the git commit) so regressions show up over time.
+
+Usage (from sponnect/backend):
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --runs 10 --top 15
+    python -m benchmarks.startup_time --history benchmarks/startup_history.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each process has to import before it can serve
+TARGETS = {
+    'app_module': 'import app',          # Importing the factory module only
+    'web': 'import wsgi',                # Factory + create_app(), what Gunicorn preloads
+    'worker': 'import workers, task',    # Celery worker: broker config and task modules
+}
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into [(module, self_us, cumulative_us, depth)]"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        except ValueError:
+            continue
+        name = name[1:]  # Drop the separator space; the rest is two spaces per nesting level
+        modules.append((name.strip(), int(self_us), int(cumulative_us), (len(name) - len(name.lstrip())) // 2))
+    return modules
+
+
+def import_time_by_package(modules):
+    """Self import time summed per top-level package, so the figures add up to the total"""
+    totals = {}
+    for name, self_us, _, _ in modules:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def measure(statement, env):
+    """Run one import in a fresh interpreter. Returns (wall_seconds, modules)."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', statement],
+                          cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{proc.stderr[-2000:]}")
+    return elapsed, parse_importtime(proc.stderr)
+
+
+def benchmark_target(statement, runs, top, env):
+    walls, imports, packages = [], [], None
+    for _ in range(runs):
+        wall, modules = measure(statement, env)
+        walls.append(wall)
+        # Outermost imports (depth 0) add up to the total import time
+        imports.append(sum(cum for _, _, cum, depth in modules if depth == 0) / 1e6)
+        if packages is None:
+            packages = import_time_by_package(modules)
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'statement': statement,
+        'wall_seconds_median': round(statistics.median(walls), 4),
+        'wall_seconds_min': round(min(walls), 4),
+        'import_seconds_median': round(statistics.median(imports), 4),
+        'top_packages_ms': [(name, round(us / 1000, 1)) for name, us in slowest],
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def last_entry(history_path):
+    if not os.path.exists(history_path):
+        return None
+    with open(history_path) as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per target (median is reported)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest packages to list')
+    parser.add_argument('--target', action='append', choices=sorted(TARGETS), help='Target to measure (repeatable)')
+    parser.add_argument('--history', help='Append the results to this JSON Lines file and compare with its last entry')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('REDIS_URL', 'memory://')
+    workdir = tempfile.mkdtemp(prefix='sponnect-startup-')
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'startup.db')}")
+    env.setdefault('ARCHIVE_DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'archive.db')}")
+
+    results = {}
+    for name in args.target or list(TARGETS):
+        results[name] = benchmark_target(TARGETS[name], args.runs, args.top, env)
+
+    previous = last_entry(args.history) if args.history else None
+    for name, result in results.items():
+        line = (f"{name:<11} wall {result['wall_seconds_median'] * 1000:7.1f} ms (min {result['wall_seconds_min'] * 1000:.1f})"
+                f"   imports {result['import_seconds_median'] * 1000:7.1f} ms")
+        before = (previous or {}).get('results', {}).get(name)
+        if before:
+            delta = (result['wall_seconds_median'] - before['wall_seconds_median']) * 1000
+            line += f"   {delta:+.1f} ms vs {previous.get('git_revision') or 'previous'}"
+        print(line)
+        for package, ms in result['top_packages_ms']:
+            print(f"    {ms:8.1f} ms  {package}")
+
+    if args.history:
+        entry = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'git_revision': git_revision(),
+            'python': sys.version.split()[0],
+            'runs': args.runs,
+            'results': results,
+        }
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        print(f"Appended to {args.history}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Throughput comparison of the Flask development server and Gunicorn production mode.
+
+Starts each server on a fresh SQLite database, warms it up, then drives a fixed
+number of keep-alive requests from a fixed number of client threads and reports
+requests/second and latency percentiles.
+
+Usage (from sponnect/backend):
+    python -m benchmarks.wsgi_throughput
+    python -m benchmarks.wsgi_throughput --requests 5000 --concurrency 32 --path /api/health
+    python -m benchmarks.wsgi_throughput --token <jwt> --path /api/search/campaigns --output results.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'dev': lambda port: [sys.executable, '-c',
+                         f"from wsgi import app; app.run(host='127.0.0.1', port={port}, threaded=True)"],
+    'gunicorn': lambda port: ['gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                              '--access-logfile', '/dev/null', 'wsgi:app'],
+}
+
+
+def wait_until_up(port, timeout=60):
+    """Poll the health check until the server answers"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_load(port, paths, total_requests, concurrency, headers):
+    """Send total_requests spread over concurrency keep-alive connections"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            path = paths[i % len(paths)]
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[0] += 1
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            except (OSError, http.client.HTTPException):
+                errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            local.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - started
+    return latencies, errors[0], elapsed
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def benchmark_server(name, port, args, headers):
+    """Start one server, load it and return its summary"""
+    workdir = tempfile.mkdtemp(prefix=f'sponnect-bench-{name}-')
+    env = dict(os.environ)
+    env.setdefault('REDIS_URL', 'memory://')
+    env['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env['ARCHIVE_DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'archive.db')}"
+    env['SPONNECT_PIDFILE'] = os.path.join(workdir, 'gunicorn.pid')
+    if args.workers:
+        env['WEB_CONCURRENCY'] = str(args.workers)
+
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'], cwd=BACKEND_DIR, env=env,
+                   stdout=subprocess.DEVNULL, check=True)
+    proc = subprocess.Popen(SERVERS[name](port), cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_until_up(port):
+            raise RuntimeError(f"{name} server did not start on port {port}")
+        run_load(port, args.path, args.warmup, args.concurrency, headers)
+        latencies, errors, elapsed = run_load(port, args.path, args.requests, args.concurrency, headers)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    return {
+        'server': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servers', default='dev,gunicorn', help='Comma-separated: dev,gunicorn')
+    parser.add_argument('--path', action='append', help='Path to request (repeatable), default /api/health')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, help='Override the Gunicorn worker count')
+    parser.add_argument('--token', help='JWT sent as a Bearer token')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+    args.path = args.path or ['/api/health']
+
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    results = []
+    for name in args.servers.split(','):
+        results.append(benchmark_server(name.strip(), args.port, args, headers))
+
+    print(f"{'server':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['server']:<10}{r['requests_per_second']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'paths': args.path, 'concurrency': args.concurrency, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
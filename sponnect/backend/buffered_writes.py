@@ -0,0 +1,168 @@
+"""
+Write-behind buffer for per-request Redis bookkeeping (metrics, SQL profiling).
+Request hooks add to a per-process buffer instead of talking to Redis; a
+background thread sends everything buffered every few seconds in one pipeline.
+Increments to the same hash field are summed, so a flush costs one command per
+field touched rather than one per request, and a slow or unreachable Redis only
+delays the flusher thread, never a request.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+MAX_FIELDS = 50000  # Distinct fields held between flushes; beyond this new fields are dropped
+
+
+class WriteBuffer:
+    """
+    Hash increments, sets and maxima, set members, capped lists and key
+    expiries, aggregated per process and flushed by a daemon thread.
+    """
+
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self._fields = {}  # (key, field) -> [mode ('int', 'float', 'set' or 'max'), value]
+        self._members = {}  # key -> set of members
+        self._lists = {}  # key -> ([values, oldest first], length kept)
+        self._expiries = {}  # key -> seconds
+
+    def _ensure_flusher(self):
+        """Start this process's flusher (again after a fork, dropping what the parent buffered)"""
+        if self._pid == os.getpid():
+            return
+        self._reset()
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name=f"{self.name}-flusher", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def _field(self, key, field, mode, value):
+        entry = self._fields.get((key, field))
+        if entry is None:
+            if len(self._fields) < MAX_FIELDS:
+                self._fields[(key, field)] = [mode, value]
+        elif mode == 'set':
+            entry[:] = [mode, value]
+        elif mode == 'max':
+            entry[1] = max(entry[1], value)
+        elif entry[0] == 'set':
+            entry[1] = float(entry[1]) + value  # An increment on top of a value set in this window
+        else:
+            entry[1] += value
+            if mode == 'float':
+                entry[0] = 'float'
+
+    # The write methods mirror the redis-py pipeline methods they replace
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            self._ensure_flusher()
+            self._field(key, field, 'int', amount)
+
+    def hincrbyfloat(self, key, field, amount):
+        with self._lock:
+            self._ensure_flusher()
+            self._field(key, field, 'float', amount)
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._ensure_flusher()
+            self._field(key, field, 'set', value)
+
+    def hmax(self, key, field, value):
+        """Raise a hash field to value if it is lower (read back at flush; racing processes may under-report)"""
+        with self._lock:
+            self._ensure_flusher()
+            self._field(key, field, 'max', value)
+
+    def sadd(self, key, *members):
+        with self._lock:
+            self._ensure_flusher()
+            self._members.setdefault(key, set()).update(members)
+
+    def lpush_capped(self, key, value, keep):
+        """LPUSH value and keep the list's newest `keep` entries"""
+        with self._lock:
+            self._ensure_flusher()
+            values, _ = self._lists.get(key, ([], keep))
+            values.append(value)
+            del values[:-keep]
+            self._lists[key] = (values, keep)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            self._ensure_flusher()
+            self._expiries[key] = seconds
+
+    def flush(self):
+        """Send everything buffered in one pipeline (two when maxima need comparing)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            fields, members, lists, expiries = self._fields, self._members, self._lists, self._expiries
+            self._reset()
+        if not (fields or members or lists or expiries):
+            return
+        from redis_client import get_redis
+        try:
+            client = get_redis()
+            pipe = client.pipeline(transaction=False)
+            maxima = []
+            for key, values in members.items():
+                pipe.sadd(key, *values)
+            for (key, field), (mode, value) in fields.items():
+                if mode == 'int':
+                    pipe.hincrby(key, field, value)
+                elif mode == 'float':
+                    pipe.hincrbyfloat(key, field, value)
+                elif mode == 'set':
+                    pipe.hset(key, field, value)
+                else:
+                    maxima.append((key, field, value))
+            for key, (values, keep) in lists.items():
+                pipe.lpush(key, *values)
+                pipe.ltrim(key, 0, keep - 1)
+            for key, seconds in expiries.items():
+                pipe.expire(key, seconds)
+            for key, field, _ in maxima:
+                pipe.hget(key, field)
+            results = pipe.execute()
+            if maxima:
+                # Maxima are rarely beaten, so most flushes need no second round trip
+                pipe = client.pipeline(transaction=False)
+                beaten = [(key, field, value) for (key, field, value), stored
+                          in zip(maxima, results[-len(maxima):]) if value > float(stored or 0)]
+                for key, field, value in beaten:
+                    pipe.hset(key, field, value)
+                if beaten:
+                    pipe.execute()
+        except Exception as e:
+            # Dropped rather than kept, so an outage can't grow the buffer without bound
+            logging.error(f"Failed to flush {self.name} ({len(fields)} fields): {str(e)}")
+
+
+_buffers = []
+
+
+def create_buffer(name, interval):
+    """A WriteBuffer flushed every `interval` seconds and once more at exit"""
+    buffer = WriteBuffer(name, interval)
+    _buffers.append(buffer)
+    return buffer
+
+
+@atexit.register
+def _flush_all():
+    for buffer in _buffers:
+        buffer.flush()
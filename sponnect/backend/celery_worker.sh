@@ -1,3 +1,9 @@
 #!/bin/bash
 cd "$(dirname "$0")"
-celery -A workers.celery worker --loglevel=info
+# ./celery_worker.sh <queue> runs a worker for one queue (transactional, periodic,
+# maintenance or bulk); without an argument one worker consumes all of them
+if [ -n "$1" ]; then
+    celery -A workers.celery worker -Q "$1" -n "$1@%h" --loglevel=info
+else
+    celery -A workers.celery worker --loglevel=info
+fi
@@ -21,4 +21,131 @@ class Config:
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'password')
     DEBUG = os.environ.get('FLASK_DEBUG') == '1'
 
+    # Redis - set to 'memory://' to use an in-process fakeredis stand-in (tests/local dev)
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
 
+    # Live updates (Server-Sent Events)
+    SSE_HEARTBEAT_SECONDS = int(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 3000))
+
+    # Delta sync - re-scan this many seconds before a watermark to cover in-flight commits
+    SYNC_WATERMARK_OVERLAP_SECONDS = int(os.environ.get('SYNC_WATERMARK_OVERLAP_SECONDS', 2))
+
+    # Batch endpoint - maximum number of sub-requests per call
+    BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+
+    # Archival - completed campaigns and rejected ad requests move to a separate SQLite DB
+    # (a relative SQLite path is created in the app's instance folder, like the main DB's default)
+    ARCHIVE_DATABASE_URL = os.environ.get('ARCHIVE_DATABASE_URL', 'sqlite:///sponnect_archive.db')
+    SQLALCHEMY_BINDS = {'archive': ARCHIVE_DATABASE_URL}
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 180))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 100))
+
+    # Read replica - read-only endpoints and tasks query this bind when set
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    if DATABASE_REPLICA_URL:
+        SQLALCHEMY_BINDS['replica'] = DATABASE_REPLICA_URL
+    REPLICA_MAX_LAG_SECONDS = int(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))  # Assumed lag when the replica reports none
+    REPLICA_SNAPSHOT_SECONDS = int(os.environ.get('REPLICA_SNAPSHOT_SECONDS', 30))  # SQLite snapshot replica refresh
+
+
+
+    # Beat schedule - cadence per task: "every <seconds>", a crontab "<minute> <hour> <day> <month> <weekday>" or "off"
+    # Crontabs are in CELERY_TIMEZONE (IST by default)
+    SCHEDULE_MINUTE_ACTIVITY_UPDATE = os.environ.get('SCHEDULE_MINUTE_ACTIVITY_UPDATE', 'every 60')
+    SCHEDULE_ADMIN_PENDING_APPROVALS = os.environ.get('SCHEDULE_ADMIN_PENDING_APPROVALS', 'off')  # Sent on each registration; set a cadence for reminders
+    SCHEDULE_EXPIRED_CAMPAIGNS = os.environ.get('SCHEDULE_EXPIRED_CAMPAIGNS', 'every 300')
+    SCHEDULE_SPONSOR_STATS = os.environ.get('SCHEDULE_SPONSOR_STATS', 'every 3600')
+    SCHEDULE_INFLUENCER_STATS = os.environ.get('SCHEDULE_INFLUENCER_STATS', 'every 3600')
+    SCHEDULE_ADMIN_DAILY_REPORT = os.environ.get('SCHEDULE_ADMIN_DAILY_REPORT', '0 9 * * *')
+    SCHEDULE_ARCHIVE = os.environ.get('SCHEDULE_ARCHIVE', '30 2 * * *')
+    SCHEDULE_OUTBOX_DISPATCH = os.environ.get('SCHEDULE_OUTBOX_DISPATCH', 'every 15')  # Sweep for emails no kick picked up
+    SCHEDULE_OUTBOX_PURGE = os.environ.get('SCHEDULE_OUTBOX_PURGE', '15 3 * * *')
+    SCHEDULE_ACTIVITY_RECONCILE = os.environ.get('SCHEDULE_ACTIVITY_RECONCILE', 'every 600')
+    SCHEDULE_DOMAIN_EVENTS = os.environ.get('SCHEDULE_DOMAIN_EVENTS', 'every 5')
+    SCHEDULE_INBOX_PURGE = os.environ.get('SCHEDULE_INBOX_PURGE', '45 3 * * *')
+    SCHEDULE_REVOCATION_SYNC = os.environ.get('SCHEDULE_REVOCATION_SYNC', 'every 3600')
+    SCHEDULE_JITTER_SECONDS = int(os.environ.get('SCHEDULE_JITTER_SECONDS', 5))  # Random delay added to each interval run
+    SCHEDULE_LOCK_SECONDS = int(os.environ.get('SCHEDULE_LOCK_SECONDS', 900))  # Longest a run may hold its no-overlap lock
+    SCHEDULE_HISTORY_SIZE = int(os.environ.get('SCHEDULE_HISTORY_SIZE', 100))  # Run durations kept per task
+
+    # Deployment environment - gunicorn.conf.py sets 'production'
+    APP_ENV = os.environ.get('APP_ENV', 'development')
+
+    # SQL profiling - per-request query count/time, slow-query log with EXPLAIN plans
+    SQL_PROFILING_ENABLED = os.environ.get('SQL_PROFILING_ENABLED', 'True').lower() == 'true'
+    SQL_TIMING_HEADERS = os.environ.get('SQL_TIMING_HEADERS', str(APP_ENV != 'production')).lower() == 'true'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')  # File for slow queries with their plans; they are kept in Redis either way
+    SQL_PROFILING_FLUSH_SECONDS = float(os.environ.get('SQL_PROFILING_FLUSH_SECONDS', 5))  # Each process sends its aggregates to Redis this often
+
+    # Metrics - Prometheus text format at GET /metrics, shared across processes through Redis
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # When set, scrapes must send "Authorization: Bearer <token>"
+    METRICS_LATENCY_BUCKETS = os.environ.get('METRICS_LATENCY_BUCKETS', '0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10')
+    METRICS_TASK_BUCKETS = os.environ.get('METRICS_TASK_BUCKETS', '0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120,300')
+    METRICS_PROCESS_TTL = int(os.environ.get('METRICS_PROCESS_TTL', 300))  # Per-process gauges expire after this idle time
+    METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))  # Each process sends its buffered metrics to Redis this often
+
+    # Celery task runtime - streamed iteration and sampled memory tracing (task_runtime.py)
+    TASK_STREAM_BATCH_SIZE = int(os.environ.get('TASK_STREAM_BATCH_SIZE', 500))  # Rows held in the session at once
+    TASK_MEMORY_SAMPLE_RATE = float(os.environ.get('TASK_MEMORY_SAMPLE_RATE', 0.1))  # Share of task runs traced with tracemalloc
+    TASK_MEMORY_WARN_MB = int(os.environ.get('TASK_MEMORY_WARN_MB', 100))  # Log a warning above this traced peak
+
+    # Email outbox - emails are stored with the change they report and sent by the dispatcher task (outbox.py)
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))  # Emails claimed per batch
+    OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', 300))  # A batch left by a dead worker is claimed again after this
+    OUTBOX_RUN_SECONDS = int(os.environ.get('OUTBOX_RUN_SECONDS', 60))  # A dispatcher run stops claiming batches after this
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))  # Then the email is dead-lettered
+    OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', 30))  # Backoff: base * 2^(attempt - 1)
+    OUTBOX_RETRY_MAX_SECONDS = int(os.environ.get('OUTBOX_RETRY_MAX_SECONDS', 3600))
+    OUTBOX_KICK_DISPATCHER = os.environ.get('OUTBOX_KICK_DISPATCHER', 'True').lower() == 'true'  # False: rely on the beat sweep alone
+    OUTBOX_KEEP_SENT_DAYS = int(os.environ.get('OUTBOX_KEEP_SENT_DAYS', 7))  # Sent rows are purged after this
+
+    # Stats emails - skip a recipient's email when its numbers match the last one sent (notification_gate.py)
+    STATS_EMAIL_CHANGE_DETECTION = os.environ.get('STATS_EMAIL_CHANGE_DETECTION', 'True').lower() == 'true'
+    STATS_EMAIL_DAILY_LIMIT = int(os.environ.get('STATS_EMAIL_DAILY_LIMIT', 24))  # Stats emails per user per UTC day, 0 for no limit
+    STATS_EMAIL_FINGERPRINT_DAYS = int(os.environ.get('STATS_EMAIL_FINGERPRINT_DAYS', 7))  # Then an unchanged email is sent again
+
+    # Email rendering - precompiled templates with an on-disk bytecode cache (email_render.py)
+    EMAIL_TEMPLATE_CACHE_DIR = os.environ.get('EMAIL_TEMPLATE_CACHE_DIR')  # Defaults to a per-user temp directory
+    EMAIL_RENDER_PROCESSES = int(os.environ.get('EMAIL_RENDER_PROCESSES', 1))  # Above 1, large fan-outs render on a process pool
+    EMAIL_RENDER_POOL_MIN = int(os.environ.get('EMAIL_RENDER_POOL_MIN', 200))  # Smallest fan-out worth sending to the pool
+
+    # Activity counters - "new in the last 24h / today" read from per-minute Redis buckets (activity_counters.py)
+    ACTIVITY_COUNTERS = os.environ.get('ACTIVITY_COUNTERS', 'True').lower() == 'true'
+
+    # Domain events - committed changes go to a Redis Stream read by consumer groups (domain_events.py, event_consumers.py)
+    DOMAIN_EVENTS = os.environ.get('DOMAIN_EVENTS', 'True').lower() == 'true'
+    DOMAIN_EVENTS_MAXLEN = int(os.environ.get('DOMAIN_EVENTS_MAXLEN', 100000))  # Approximate stream length kept
+    DOMAIN_EVENTS_BATCH_SIZE = int(os.environ.get('DOMAIN_EVENTS_BATCH_SIZE', 100))
+    DOMAIN_EVENTS_RUN_SECONDS = int(os.environ.get('DOMAIN_EVENTS_RUN_SECONDS', 30))  # Longest a consume run drains one group
+    DOMAIN_EVENTS_CLAIM_IDLE_MS = int(os.environ.get('DOMAIN_EVENTS_CLAIM_IDLE_MS', 60000))  # Then an unacknowledged event is retried
+    DOMAIN_EVENTS_MAX_ATTEMPTS = int(os.environ.get('DOMAIN_EVENTS_MAX_ATTEMPTS', 5))  # Then it moves to the dead letter stream
+    ACTIVITY_UPDATES_FROM_EVENTS = os.environ.get('ACTIVITY_UPDATES_FROM_EVENTS', 'True').lower() == 'true'  # Digest only users with changes
+
+    # Notification inbox - in-app notifications with Redis unread counters (inbox.py)
+    INBOX_ENABLED = os.environ.get('INBOX_ENABLED', 'True').lower() == 'true'  # Domain events write inbox notifications
+    INBOX_UNREAD_TTL = int(os.environ.get('INBOX_UNREAD_TTL', 3600))  # Then an unread counter is recounted
+    INBOX_KEEP_READ_DAYS = int(os.environ.get('INBOX_KEEP_READ_DAYS', 30))  # Read notifications are purged after this
+    ACTIVITY_UPDATES_CHANNEL = os.environ.get('ACTIVITY_UPDATES_CHANNEL', 'inbox')  # Minute activity digests: 'inbox' or 'email'
+
+    # Token revocation - deactivated/flagged users and logged-out tokens are rejected on every request (revocation.py)
+    TOKEN_REVOCATION = os.environ.get('TOKEN_REVOCATION', 'True').lower() == 'true'
+    REVOCATION_CACHE_SIZE = int(os.environ.get('REVOCATION_CACHE_SIZE', 10000))  # Users and tokens mirrored in each web process
+
+    # Rate limiting - token buckets per user and per client IP, "<requests>/<seconds>" or 'off' (throttling.py)
+    RATE_LIMITING = os.environ.get('RATE_LIMITING', 'True').lower() == 'true'
+    RATE_LIMIT_SEARCH = os.environ.get('RATE_LIMIT_SEARCH', '30/10')
+    RATE_LIMIT_SEARCH_IP = os.environ.get('RATE_LIMIT_SEARCH_IP', '120/10')
+    RATE_LIMIT_LOGIN = os.environ.get('RATE_LIMIT_LOGIN', '5/60')  # Per username or email tried, per client IP
+    RATE_LIMIT_LOGIN_IP = os.environ.get('RATE_LIMIT_LOGIN_IP', '20/60')
+    RATE_LIMIT_ADMIN_REALTIME = os.environ.get('RATE_LIMIT_ADMIN_REALTIME', '10/10')
+    RATE_LIMIT_ADMIN_REALTIME_IP = os.environ.get('RATE_LIMIT_ADMIN_REALTIME_IP', 'off')
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))  # Proxies in front of the app whose X-Forwarded-For is trusted
+
+    # Load shedding - 503 with Retry-After instead of queuing when a web process is saturated
+    LOAD_SHEDDING = os.environ.get('LOAD_SHEDDING', 'True').lower() == 'true'
+    SHED_POOL_SATURATION = float(os.environ.get('SHED_POOL_SATURATION', 0.9))  # Share of DB pool capacity checked out
+    SHED_MAX_IN_FLIGHT = int(os.environ.get('SHED_MAX_IN_FLIGHT', 0))  # Concurrent API requests per process, 0 for no limit
+    SHED_RETRY_AFTER_SECONDS = int(os.environ.get('SHED_RETRY_AFTER_SECONDS', 2))
@@ -0,0 +1,158 @@
+"""
+Read/write session routing for the Sponnect application.
+Endpoints and tasks marked @read_only send their queries to the 'replica' bind
+(DATABASE_REPLICA_URL); everything else, and anything that writes, uses the
+primary. A user whose own write is newer than the replica is kept on the primary
+so they always read their writes, and code acting on a just-consumed event can
+force the primary with `with primary():`.
+"""
+
+import contextvars
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from flask_jwt_extended import get_jwt_identity
+
+from config import Config
+from redis_client import get_redis
+
+REPLICA_BIND_KEY = 'replica'
+REPLICA_SYNCED_KEY = 'sponnect:db:replica_synced_at'
+LAST_WRITE_KEY_PREFIX = 'sponnect:db:last_write:user:'
+
+_read_only = contextvars.ContextVar('sponnect_read_only', default=False)
+_primary = contextvars.ContextVar('sponnect_primary', default=False)
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica while a @read_only scope is active"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if (bind is None and _read_only.get() and not _primary.get() and not self._flushing
+                and not (self.new or self.dirty or self.deleted)):
+            engines = self._db.engines
+            # Only default-bind tables are replicated (not e.g. the archive bind)
+            if REPLICA_BIND_KEY in engines and engine is engines.get(None):
+                return engines[REPLICA_BIND_KEY]
+        return engine
+
+
+def replica_enabled():
+    return bool(Config.DATABASE_REPLICA_URL)
+
+
+def _current_user_id():
+    """JWT identity of the current request, if one was verified"""
+    if not has_request_context():
+        return None
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def record_write(user_id):
+    """Remember when a user last wrote, for read-your-writes routing"""
+    try:
+        get_redis().set(f"{LAST_WRITE_KEY_PREFIX}{user_id}", time.time(),
+                        ex=max(Config.REPLICA_MAX_LAG_SECONDS * 10, 300))
+    except Exception as e:
+        logging.error(f"Failed to record last write for user {user_id}: {str(e)}")
+
+
+def replica_is_fresh_for(user_id):
+    """
+    Whether the replica already contains the user's latest write. Uses the snapshot
+    time when the replica reports one, otherwise assumes REPLICA_MAX_LAG_SECONDS.
+    """
+    if user_id is None:
+        return True
+    try:
+        client = get_redis()
+        last_write = client.get(f"{LAST_WRITE_KEY_PREFIX}{user_id}")
+        if last_write is None:
+            return True
+        synced_at = client.get(REPLICA_SYNCED_KEY)
+        if synced_at is not None:
+            return float(synced_at) > float(last_write)
+        return time.time() - float(last_write) > Config.REPLICA_MAX_LAG_SECONDS
+    except Exception as e:
+        # Without lag information the primary is the safe choice
+        logging.error(f"Failed to check replica freshness: {str(e)}")
+        return False
+
+
+def read_only(f):
+    """Route the queries of a read-only endpoint or task to the replica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not replica_enabled() or not replica_is_fresh_for(_current_user_id()):
+            return f(*args, **kwargs)
+        token = _read_only.set(True)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return decorated_function
+
+
+@contextmanager
+def primary():
+    """
+    Read from the primary inside this block, even in @read_only code it calls.
+    For work triggered by an event that may be newer than the replica.
+    """
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+def track_writes(response):
+    """after_request hook: record successful writes by the current user"""
+    if (replica_enabled() and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400):
+        user_id = _current_user_id()
+        if user_id is not None:
+            record_write(user_id)
+    return response
+
+
+def _sqlite_path(engine):
+    return engine.url.database if engine.url.get_backend_name() == 'sqlite' else None
+
+
+def snapshot_sqlite_replica():
+    """
+    Copy the primary SQLite DB into the replica file with the online backup API,
+    so the replica can be exercised locally. Returns False if either side isn't SQLite.
+    Needs an app context.
+    """
+    from models import db
+
+    engines = db.engines
+    if REPLICA_BIND_KEY not in engines:
+        return False
+    primary_path = _sqlite_path(engines[None])
+    replica_path = _sqlite_path(engines[REPLICA_BIND_KEY])
+    if not primary_path or not replica_path:
+        return False
+
+    started = time.time()
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        # Back up into the existing file so open replica connections see the new data
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    # Anything written before the backup started is now on the replica
+    get_redis().set(REPLICA_SYNCED_KEY, started)
+    return True
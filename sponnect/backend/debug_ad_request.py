@@ -3,10 +3,13 @@
 Debug script to test the ad request creation process
 """
 
-from app import app, db
+from app import create_app
+from models import db
 from models import User, Campaign, AdRequest, NegotiationHistory
 import sys
 
+app = create_app()
+
 def test_ad_request_creation(campaign_id=1, influencer_id=7):
     """Test the ad request creation process step by step"""
     print(f"Testing ad request creation for campaign ID {campaign_id} and influencer ID {influencer_id}...")
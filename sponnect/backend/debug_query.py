@@ -3,9 +3,11 @@
 Debug script to test the problematic influencer query
 """
 
-from app import app
+from app import create_app
 from models import User, db
 
+app = create_app()
+
 def test_query_with_flag_condition():
     """Test the influencer query with is_flagged condition"""
     print("Testing query with is_flagged=False condition...")
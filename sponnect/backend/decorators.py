@@ -0,0 +1,29 @@
+"""
+Role-based access decorators for the API routes
+"""
+
+from flask import jsonify
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from functools import wraps
+
+
+def role_required(required_role):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            # Also rejects revoked tokens and deactivated or flagged accounts (revocation.py)
+            verify_jwt_in_request()
+            claims = get_jwt()
+            user_role = claims.get('role')
+            # Allow admin access to all role-restricted routes
+            if user_role == 'admin':
+                return fn(*args, **kwargs)
+            if user_role != required_role:
+                return jsonify(message=f"{required_role.capitalize()} access required"), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+admin_required = role_required('admin') # Note: Admin can access sponsor/influencer routes too
+sponsor_required = role_required('sponsor')
+influencer_required = role_required('influencer')
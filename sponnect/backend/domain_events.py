@@ -0,0 +1,239 @@
+"""
+Domain events for the Sponnect application.
+Business changes (user registered/approved, campaign created/expired, ad request
+created/countered/accepted, payment completed, progress update reviewed) are
+detected at flush time and appended to one Redis Stream once their transaction
+commits. Downstream workers read the stream through consumer groups
+(event_consumers.py), so each group sees every event once and only does work
+for what changed, instead of re-scanning tables on a timer.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from redis.exceptions import ResponseError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config import Config
+from models import User, Campaign, AdRequest, Payment, ProgressUpdate
+from realtime import get_in_flush
+from redis_client import get_redis
+from session_hooks import run_after_commit
+import metrics
+
+STREAM_KEY = 'sponnect:domain_events'
+DEAD_LETTER_KEY = 'sponnect:domain_events:dead'
+FAILURES_PREFIX = 'sponnect:domain_events:failures:'
+
+
+def _changed_to(obj, field, values):
+    """Whether field changed in this flush to one of values"""
+    history = inspect(obj).attrs[field].history
+    return history.has_changes() and getattr(obj, field) in values
+
+
+def _ad_request_data(session, ad_request):
+    campaign = get_in_flush(session, Campaign, ad_request.campaign_id)
+    return {
+        'ad_request_id': ad_request.id,
+        'campaign_id': ad_request.campaign_id,
+        'sponsor_id': campaign.sponsor_id if campaign else None,
+        'influencer_id': ad_request.influencer_id,
+        'status': ad_request.status,
+        'payment_amount': ad_request.payment_amount,
+        'last_offer_by': ad_request.last_offer_by
+    }
+
+
+def _campaign_data(campaign):
+    return {
+        'campaign_id': campaign.id,
+        'sponsor_id': campaign.sponsor_id,
+        'category': campaign.category,
+        'visibility': campaign.visibility
+    }
+
+
+def _detect(session, obj, is_new):
+    """The (event type, data) pairs a flushed object produces"""
+    if isinstance(obj, User):
+        if is_new and obj.role != 'admin':
+            return [('user.registered', {'user_id': obj.id, 'role': obj.role, 'category': obj.category})]
+        if not is_new and (_changed_to(obj, 'sponsor_approved', (True,)) or
+                           _changed_to(obj, 'influencer_approved', (True,))):
+            return [('user.approved', {'user_id': obj.id, 'role': obj.role, 'category': obj.category})]
+    elif isinstance(obj, Campaign):
+        if is_new:
+            return [('campaign.created', _campaign_data(obj))]
+        if _changed_to(obj, 'status', ('completed',)) and obj.end_date and obj.end_date < datetime.utcnow():
+            return [('campaign.expired', _campaign_data(obj))]
+    elif isinstance(obj, AdRequest):
+        if is_new:
+            return [('ad_request.created', _ad_request_data(session, obj))]
+        if _changed_to(obj, 'status', ('Accepted',)):
+            return [('ad_request.accepted', _ad_request_data(session, obj))]
+        if obj.status == 'Negotiating' and any(inspect(obj).attrs[field].history.has_changes()
+                                               for field in ('status', 'payment_amount', 'last_offer_by')):
+            return [('ad_request.countered', _ad_request_data(session, obj))]
+    elif isinstance(obj, Payment):
+        if (is_new and obj.status == 'Completed') or (not is_new and _changed_to(obj, 'status', ('Completed',))):
+            ad_request = get_in_flush(session, AdRequest, obj.ad_request_id)
+            data = _ad_request_data(session, ad_request) if ad_request else {'ad_request_id': obj.ad_request_id}
+            data.update(payment_id=obj.id, amount=obj.amount)
+            return [('payment.completed', data)]
+    elif isinstance(obj, ProgressUpdate) and not is_new and _changed_to(obj, 'status', ('Approved', 'Revision Requested')):
+        ad_request = get_in_flush(session, AdRequest, obj.ad_request_id)
+        data = _ad_request_data(session, ad_request) if ad_request else {'ad_request_id': obj.ad_request_id}
+        data.update(progress_update_id=obj.id, review_status=obj.status)
+        return [('progress_update.reviewed', data)]
+    return []
+
+
+def publish(events):
+    """Append [(event type, data)] to the stream in one round trip"""
+    at = datetime.utcnow().isoformat()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for event_type, data in events:
+            pipe.xadd(STREAM_KEY, {'type': event_type, 'data': json.dumps(data), 'at': at},
+                      maxlen=Config.DOMAIN_EVENTS_MAXLEN, approximate=True)
+        pipe.execute()
+    except Exception as e:
+        logging.error(f"Failed to publish {len(events)} domain events: {str(e)}")
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_events(session, flush_context):
+    """Build the flush's events and publish them if the transaction commits"""
+    if not Config.DOMAIN_EVENTS:
+        return
+    events = []
+    try:
+        for obj in list(session.new) + list(session.dirty):
+            events.extend(_detect(session, obj, obj in session.new))
+    except Exception as e:
+        # Never let event collection break the business transaction
+        logging.error(f"Failed to collect domain events: {str(e)}")
+        return
+    if events:
+        run_after_commit(session, lambda e=events: publish(e))
+
+
+def ensure_group(group):
+    """
+    Create a consumer group if it doesn't exist. A new group starts with the
+    oldest event still in the stream, so nothing published before its first run
+    is missed.
+    """
+    try:
+        get_redis().xgroup_create(STREAM_KEY, group, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def _decode(group, entries):
+    events, trimmed = [], []
+    for entry_id, fields in entries:
+        if fields:
+            # The entry ID is stable across redeliveries, so handlers can dedupe side effects on it
+            events.append((entry_id, fields['type'], dict(json.loads(fields['data']), event_id=entry_id)))
+        else:
+            trimmed.append(entry_id)  # Trimmed from the stream while pending: nothing left to handle
+    if trimmed:
+        get_redis().xack(STREAM_KEY, group, *trimmed)
+    return events
+
+
+def read_batch(group, consumer, count):
+    """
+    The group's next events as [(entry id, event type, data)]: first ones another
+    consumer took but never acknowledged, then new ones
+    """
+    client = get_redis()
+    _, claimed, *_ = client.xautoclaim(STREAM_KEY, group, consumer, Config.DOMAIN_EVENTS_CLAIM_IDLE_MS,
+                                       start_id='0-0', count=count)
+    if claimed:
+        return _decode(group, claimed)
+    response = client.xreadgroup(group, consumer, {STREAM_KEY: '>'}, count=count)
+    return _decode(group, response[0][1]) if response else []
+
+
+def _fail(group, entry_id, event_type, data, error):
+    """Count a failed delivery; after DOMAIN_EVENTS_MAX_ATTEMPTS the event moves to the dead letter stream"""
+    client = get_redis()
+    attempts = client.hincrby(f"{FAILURES_PREFIX}{group}", entry_id, 1)
+    logging.error(f"Domain event {event_type} {entry_id} failed in {group} (attempt {attempts}): {str(error)}")
+    if attempts < Config.DOMAIN_EVENTS_MAX_ATTEMPTS:
+        return False  # Stays pending and is reclaimed after DOMAIN_EVENTS_CLAIM_IDLE_MS
+    pipe = client.pipeline()
+    pipe.xadd(DEAD_LETTER_KEY, {'group': group, 'id': entry_id, 'type': event_type,
+                                'data': json.dumps(data), 'error': str(error)[:500]},
+              maxlen=Config.DOMAIN_EVENTS_MAXLEN, approximate=True)
+    pipe.xack(STREAM_KEY, group, entry_id)
+    pipe.hdel(f"{FAILURES_PREFIX}{group}", entry_id)
+    pipe.execute()
+    return True
+
+
+def consume(group, handler, consumer, max_seconds=None):
+    """
+    Feed the group's events to handler in batches until the stream is drained or
+    max_seconds pass. handler gets [(event type, data)], with the stream entry ID
+    as data['event_id'], and may raise: the batch is then retried one event at a
+    time so a bad event can't hold up the others.
+
+    Returns:
+        dict: {'handled': n, 'failed': n, 'dead': n}
+    """
+    ensure_group(group)
+    deadline = time.monotonic() + (max_seconds or Config.DOMAIN_EVENTS_RUN_SECONDS)
+    counts = {'handled': 0, 'failed': 0, 'dead': 0}
+    client = get_redis()
+    while time.monotonic() < deadline:
+        batch = read_batch(group, consumer, Config.DOMAIN_EVENTS_BATCH_SIZE)
+        if not batch:
+            break
+        try:
+            handler([(event_type, data) for _, event_type, data in batch])
+            done = [entry_id for entry_id, _, _ in batch]
+        except Exception:
+            done = []
+            for entry_id, event_type, data in batch:
+                try:
+                    handler([(event_type, data)])
+                    done.append(entry_id)
+                except Exception as e:
+                    counts['failed'] += 1
+                    counts['dead'] += _fail(group, entry_id, event_type, data, e)
+        if done:
+            pipe = client.pipeline()
+            pipe.xack(STREAM_KEY, group, *done)
+            pipe.hdel(f"{FAILURES_PREFIX}{group}", *done)
+            pipe.execute()
+        counts['handled'] += len(done)
+        if len(done) < len(batch):
+            break  # Failed events stay pending until they are reclaimed on a later run
+    metrics.count_domain_events(group, counts)
+    return counts
+
+
+def stream_report():
+    """Stream length and, per consumer group, events not yet read (lag) and not yet acknowledged (pending)"""
+    client = get_redis()
+    try:
+        groups = client.xinfo_groups(STREAM_KEY)
+    except ResponseError:
+        groups = []  # No stream yet
+    return {
+        'length': client.xlen(STREAM_KEY),
+        'dead_letters': client.xlen(DEAD_LETTER_KEY),
+        'groups': [{
+            'group': info['name'],
+            'pending': info['pending'],
+            'lag': info.get('lag'),  # Redis 7+
+            'last_delivered_id': info['last-delivered-id']
+        } for info in groups]
+    }
@@ -0,0 +1,102 @@
+"""
+Email template rendering for the Sponnect application.
+Emails are rendered with a dedicated Jinja environment over templates/ rather
+than Flask's render_template: every template under templates/emails is compiled
+once per process (precompile() runs at worker start, and compiled bytecode is
+cached on disk so restarts skip parsing), and the defaults every email gets are
+environment globals instead of a dict rebuilt per call. render_many() renders a
+fan-out in one call and spreads large ones over a process pool.
+"""
+
+import atexit
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+from config import Config
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+EMAIL_TEMPLATE_PREFIX = 'emails/'
+CHUNKS_PER_PROCESS = 4  # Smaller chunks even out slow renders across the pool
+
+_env = None
+_pool = None
+_pool_broken = False
+
+
+def get_environment():
+    """The process's email Jinja environment, built on first use"""
+    global _env
+    if _env is None:
+        _env = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(['html', 'htm', 'xml', 'xhtml']),  # Same as Flask
+            bytecode_cache=FileSystemBytecodeCache(Config.EMAIL_TEMPLATE_CACHE_DIR),
+            cache_size=-1,  # Keep every compiled template
+            auto_reload=Config.DEBUG  # Template edits show up without a restart while debugging
+        )
+        # Defaults for every email; a render's own context overrides them
+        _env.globals.update(
+            frontend_url=os.environ.get('FRONTEND_URL', 'http://localhost:5173'),
+            now=datetime.now
+        )
+    return _env
+
+
+def precompile():
+    """Compile every email template now, from the bytecode cache when it is current. Returns the count."""
+    env = get_environment()
+    names = env.list_templates(filter_func=lambda name: name.startswith(EMAIL_TEMPLATE_PREFIX) and name.endswith('.html'))
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def render(template_name, **context):
+    """Render an email template with the email defaults"""
+    return get_environment().get_template(template_name).render({'current_year': datetime.now().year, **context})
+
+
+def _render_chunk(template_name, contexts):
+    template = get_environment().get_template(template_name)
+    year = datetime.now().year
+    return [template.render({'current_year': year, **context}) for context in contexts]
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # Forked from a process that has already compiled the templates
+        _pool = ProcessPoolExecutor(max_workers=Config.EMAIL_RENDER_PROCESSES, initializer=precompile)
+        atexit.register(_pool.shutdown, cancel_futures=True)
+    return _pool
+
+
+def render_many(template_name, contexts):
+    """
+    Render one template for many contexts, returning the bodies in order. With
+    EMAIL_RENDER_PROCESSES > 1, fan-outs of at least EMAIL_RENDER_POOL_MIN
+    contexts are rendered in chunks across a process pool; their contexts must
+    then pickle, and model instances in them must already have loaded whatever
+    the template reads (they arrive detached). Falls back to rendering here.
+    """
+    global _pool, _pool_broken
+    contexts = list(contexts)
+    if Config.EMAIL_RENDER_PROCESSES > 1 and len(contexts) >= Config.EMAIL_RENDER_POOL_MIN and not _pool_broken:
+        size = math.ceil(len(contexts) / (Config.EMAIL_RENDER_PROCESSES * CHUNKS_PER_PROCESS))
+        chunks = [contexts[start:start + size] for start in range(0, len(contexts), size)]
+        try:
+            pool = _get_pool()
+            return [body for bodies in pool.map(_render_chunk, [template_name] * len(chunks), chunks) for body in bodies]
+        except (BrokenProcessPool, AssertionError, OSError) as e:
+            # E.g. a daemonic process that can't start children: stop trying
+            logging.error(f"Email render pool unavailable, rendering in-process: {str(e)}")
+            _pool_broken = True
+            _pool = None
+        except Exception as e:
+            logging.error(f"Pooled render of {template_name} failed, rendering in-process: {str(e)}")
+    return _render_chunk(template_name, contexts)
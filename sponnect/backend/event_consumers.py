@@ -0,0 +1,214 @@
+"""
+Domain event consumers for the Sponnect application.
+Each consumer group reads the domain event stream (domain_events.py) on its own:
+
+- notifications: registration and approval emails
+- inbox: in-app notifications for the other party of an ad request when it is
+  created, countered or accepted, paid, or when its progress update is reviewed
+- analytics: per-day event counts, and the sponsors, influencers and campaign
+  categories whose activity digest may have changed since the last digest run
+- cache: drops cached admin and chart responses the events made stale
+
+The consume_domain_events task drains every group; beat runs it every few
+seconds (SCHEDULE_DOMAIN_EVENTS), so the work done is proportional to the
+number of changes, not to the size of the tables.
+"""
+
+import socket
+from datetime import datetime, timedelta
+from flask import has_app_context
+
+from config import Config
+from db_routing import primary
+from domain_events import consume
+from extensions import cache
+from formatting import format_currency
+from inbox import notify_users
+from models import db, Campaign
+from redis_client import get_redis
+from scheduling import non_overlapping
+from workers import celery
+
+ANALYTICS_PREFIX = 'sponnect:analytics:events:'
+ANALYTICS_TTL = 35 * 24 * 3600
+CHANGED_PREFIX = 'sponnect:activity_changes:'
+ALL_CATEGORIES = '*'
+
+INBOX_EVENTS = ('ad_request.created', 'ad_request.countered', 'ad_request.accepted',
+                'payment.completed', 'progress_update.reviewed')
+
+# Admin views cached by path (@cache.cached without query_string) and the events that make them stale
+_ADMIN_USER_VIEWS = ('/api/admin/stats', '/api/admin/pending_sponsors', '/api/admin/pending_influencers',
+                     '/api/admin/pending_users', '/api/charts/dashboard-summary')
+_CAMPAIGN_VIEWS = ('/api/admin/stats', '/api/charts/dashboard-summary', '/api/charts/campaign-distribution')
+_AD_REQUEST_VIEWS = ('/api/admin/stats', '/api/charts/dashboard-summary', '/api/charts/ad-request-status')
+CACHED_VIEWS = {
+    'user.registered': _ADMIN_USER_VIEWS,
+    'user.approved': _ADMIN_USER_VIEWS,
+    'campaign.created': _CAMPAIGN_VIEWS,
+    'campaign.expired': _CAMPAIGN_VIEWS,
+    'ad_request.created': _AD_REQUEST_VIEWS,
+    'ad_request.countered': _AD_REQUEST_VIEWS,
+    'ad_request.accepted': _AD_REQUEST_VIEWS,
+    'payment.completed': ('/api/admin/stats', '/api/charts/dashboard-summary'),
+}
+
+
+def handle_notifications(events):
+    """
+    Send the emails a registration or an approval triggers. A failed batch is
+    retried event by event and redelivered, so every email has a dedupe key and
+    a failure to queue one raises to keep its event pending.
+    """
+    from user_notifications import (send_registration_pending_notification, send_account_approval_notification,
+                                    notify_admin_pending_approvals)
+    registered = False
+    for event_type, data in events:
+        if event_type == 'user.registered':
+            send_registration_pending_notification(data['user_id'], notify_admins=False,
+                                                   dedupe_key=f"registration_pending:{data['user_id']}")
+            registered = True
+        elif event_type == 'user.approved':
+            # Keyed by event too: an account can be approved again after a rejection
+            send_account_approval_notification(
+                data['user_id'], dedupe_key=f"account_approved:{data['user_id']}:{data['event_id']}")
+    if registered:
+        # One summary per batch of registrations; the replica may not have them yet
+        with primary():
+            notify_admin_pending_approvals(dedupe=True)
+
+
+def _inbox_notification(event_type, data, campaign_names):
+    """The inbox notification an event produces, or None"""
+    if not data.get('sponsor_id'):
+        return None
+    campaign = campaign_names.get(data.get('campaign_id'), 'a campaign')
+    offer_by = data.get('last_offer_by')
+    other = 'influencer' if offer_by == 'sponsor' else 'sponsor'
+    if event_type == 'ad_request.created':
+        recipient, title = other, f"New ad request for {campaign}"
+    elif event_type == 'ad_request.countered':
+        recipient, title = other, f"New counter offer for {campaign}"
+    elif event_type == 'ad_request.accepted':
+        # The party whose offer was accepted
+        recipient, title = offer_by or 'sponsor', f"Ad request for {campaign} accepted"
+    elif event_type == 'payment.completed':
+        recipient, title = 'influencer', f"Payment received for {campaign}"
+    elif event_type == 'progress_update.reviewed':
+        recipient, title = 'influencer', f"Progress update {data['review_status'].lower()} for {campaign}"
+    else:
+        return None
+    body = None
+    if event_type.startswith('ad_request.') and data.get('payment_amount') is not None:
+        body = f"Amount: {format_currency(data['payment_amount'])}"
+    elif event_type == 'payment.completed' and data.get('amount') is not None:
+        body = f"Amount: {format_currency(data['amount'])}"
+    return {
+        'user_id': data[f"{recipient}_id"],
+        'kind': event_type,
+        'title': title,
+        'body': body,
+        'link': f"/{recipient}/ad-requests/{data['ad_request_id']}"
+    }
+
+
+def handle_inbox(events):
+    """Write the batch's inbox notifications in one insert"""
+    if not Config.INBOX_ENABLED:
+        return
+    campaign_ids = {data['campaign_id'] for event_type, data in events
+                    if event_type in INBOX_EVENTS and data.get('campaign_id')}
+    campaign_names = dict(db.session.query(Campaign.id, Campaign.name).filter(
+        Campaign.id.in_(campaign_ids))) if campaign_ids else {}
+    notifications = [n for n in (_inbox_notification(event_type, data, campaign_names)
+                                 for event_type, data in events if event_type in INBOX_EVENTS) if n]
+    if notifications and not notify_users(notifications):
+        raise RuntimeError(f"Failed to store {len(notifications)} inbox notifications")
+
+
+def handle_analytics(events):
+    """Count events per day and mark whose activity digest changed"""
+    day = datetime.utcnow().strftime('%Y%m%d')
+    pipe = get_redis().pipeline(transaction=False)
+    for event_type, data in events:
+        pipe.hincrby(f"{ANALYTICS_PREFIX}{day}", event_type, 1)
+        if data.get('sponsor_id'):
+            pipe.sadd(f"{CHANGED_PREFIX}sponsors", data['sponsor_id'])
+        if data.get('influencer_id'):
+            pipe.sadd(f"{CHANGED_PREFIX}influencers", data['influencer_id'])
+        if event_type == 'user.approved':
+            pipe.sadd(f"{CHANGED_PREFIX}{data['role']}s", data['user_id'])
+        if event_type in ('campaign.created', 'campaign.expired') and data.get('visibility') == 'public':
+            # Every influencer of the category sees it in their matching campaigns
+            category = (data.get('category') or '').lower()
+            pipe.sadd(f"{CHANGED_PREFIX}categories", ALL_CATEGORIES if category == 'any' else category)
+    pipe.expire(f"{ANALYTICS_PREFIX}{day}", ANALYTICS_TTL)
+    pipe.execute()
+
+
+def handle_cache(events):
+    """Delete the cached responses the events changed"""
+    paths = set()
+    for event_type, _ in events:
+        paths.update(CACHED_VIEWS.get(event_type, ()))
+    if paths and has_app_context():
+        cache.delete_many(*(f"view/{path}" for path in paths))
+
+
+CONSUMERS = {
+    'notifications': handle_notifications,
+    'inbox': handle_inbox,
+    'analytics': handle_analytics,
+    'cache': handle_cache,
+}
+
+
+def take_activity_changes():
+    """
+    Atomically take the IDs and categories marked since the last call
+
+    Returns:
+        dict: {'sponsors': set of IDs, 'influencers': set of IDs, 'categories': set of lowercase names ('*' for all)}
+    """
+    names = ('sponsors', 'influencers', 'categories')
+    pipe = get_redis().pipeline()  # MULTI: nothing marked in between is lost
+    for name in names:
+        pipe.smembers(f"{CHANGED_PREFIX}{name}")
+    for name in names:
+        pipe.delete(f"{CHANGED_PREFIX}{name}")
+    members = pipe.execute()[:len(names)]
+    changes = dict(zip(names, members))
+    changes['sponsors'] = {int(i) for i in changes['sponsors']}
+    changes['influencers'] = {int(i) for i in changes['influencers']}
+    return changes
+
+
+def restore_activity_changes(changes):
+    """Put back changes from take_activity_changes() that could not be acted on"""
+    pipe = get_redis().pipeline(transaction=False)
+    for name, members in changes.items():
+        if members:
+            pipe.sadd(f"{CHANGED_PREFIX}{name}", *members)
+    pipe.execute()
+
+
+def daily_event_counts(days=7):
+    """[{'date': 'YYYY-MM-DD', 'counts': {event type: n}}] for the last days, newest first"""
+    today = datetime.utcnow().date()
+    dates = [today - timedelta(days=i) for i in range(days)]
+    pipe = get_redis().pipeline(transaction=False)
+    for day in dates:
+        pipe.hgetall(f"{ANALYTICS_PREFIX}{day.strftime('%Y%m%d')}")
+    return [{'date': day.isoformat(), 'counts': {k: int(v) for k, v in counts.items()}}
+            for day, counts in zip(dates, pipe.execute())]
+
+
+@celery.task()
+@non_overlapping()
+def consume_domain_events():
+    """Drain the domain event stream for every consumer group"""
+    if not Config.DOMAIN_EVENTS:
+        return "Domain events disabled"
+    consumer = socket.gethostname()
+    results = {group: consume(group, handler, consumer) for group, handler in CONSUMERS.items()}
+    return f"Domain events consumed: {results}"
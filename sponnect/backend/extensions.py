@@ -0,0 +1,13 @@
+"""
+Flask extension instances for the Sponnect application.
+Created unbound here and attached to the app in create_app(), so routes and
+helpers can import them without importing (and building) the app.
+"""
+
+from flask_caching import Cache
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+
+cors = CORS()
+jwt = JWTManager()
+cache = Cache()
@@ -2,4 +2,5 @@
 cd "$(dirname "$0")"
 export FLASK_APP=app.py
 export FLASK_ENV=development
+flask init-db
 flask run --debug
@@ -0,0 +1,46 @@
+"""
+Currency and IST date formatting helpers
+"""
+
+from datetime import timedelta, timezone
+
+
+# --- Constants ---
+# Indian Rupee symbol and IST timezone
+CURRENCY_SYMBOL = '₹'
+IST = timezone(timedelta(hours=5, minutes=30))  # IST is UTC+5:30
+
+# --- Helper Functions for Currency and Time ---
+def format_currency(amount):
+    """Format amount as Indian Rupees"""
+    if amount is None:
+        return None
+    return f"{CURRENCY_SYMBOL}{amount:,.2f}"
+
+def format_currency_pdf(amount):
+    """Format amount as Indian Rupees for PDF export compatibility
+    Uses 'Rs.' instead of ₹ symbol to avoid PDF rendering issues"""
+    if amount is None:
+        return None
+    return f"Rs. {amount:,.2f}"
+
+def utc_to_ist(utc_datetime):
+    """Convert UTC datetime to IST timezone"""
+    if utc_datetime is None:
+        return None
+    ist_datetime = utc_datetime.replace(tzinfo=timezone.utc).astimezone(IST)
+    return ist_datetime
+
+def format_datetime(utc_datetime, format_str="%d-%m-%Y %H:%M:%S"):
+    """Convert UTC datetime to IST and format it"""
+    if utc_datetime is None:
+        return None
+    ist_datetime = utc_to_ist(utc_datetime)
+    return ist_datetime.strftime(format_str)
+
+def format_date(utc_datetime, format_str="%d-%m-%Y"):
+    """Convert UTC date to IST and format it"""
+    if utc_datetime is None:
+        return None
+    ist_datetime = utc_to_ist(utc_datetime)
+    return ist_datetime.strftime(format_str)
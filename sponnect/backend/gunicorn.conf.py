@@ -0,0 +1,48 @@
+"""
+Gunicorn settings for the Sponnect API (production mode of run.py).
+Pre-fork workers sized to the CPU count; the app is preloaded once in the master
+and shared copy-on-write. Reload gracefully with `kill -HUP $(cat gunicorn.pid)`.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('SPONNECT_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# Import the app once before forking
+preload_app = True
+
+# Keep-alive tuned for a reverse proxy / browser connection reuse
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+backlog = 2048
+
+# Requests are short; stalled workers are recycled
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers periodically, staggered so they don't all restart at once
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 200))
+
+pidfile = os.environ.get('SPONNECT_PIDFILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.pid'))
+accesslog = '-'
+# Path only, no query string: /api/events/stream takes ?token=<jwt> when served by this pool
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
+proc_name = 'sponnect-api'
+
+# Production mode: no X-DB-* debug headers (see Config.APP_ENV)
+raw_env = [f"APP_ENV={os.environ.get('APP_ENV', 'production')}"]
+
+
+def post_fork(server, worker):
+    """Drop DB connections inherited from the preloading master; each worker opens its own"""
+    from wsgi import app  # Already imported by the master (preload_app)
+    from models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
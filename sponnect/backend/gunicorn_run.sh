@@ -0,0 +1,9 @@
+#!/bin/bash
+cd "$(dirname "$0")"
+# Create missing tables once, before any worker starts
+flask --app app init-db
+# API workers
+gunicorn -c gunicorn.conf.py wsgi:app &
+# Long-lived SSE streams on their own pool
+gunicorn -c gunicorn_sse.conf.py wsgi:app &
+wait
@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for the long-lived Server-Sent Events stream (/api/events/stream).
+Each open stream holds one thread for its whole lifetime, so this pool uses few
+processes with many threads and runs on its own port, leaving the API workers free
+for short requests. Point VITE_EVENTS_URL (or the proxy) at this port.
+"""
+
+import os
+
+bind = os.environ.get('SPONNECT_SSE_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('SSE_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('SSE_THREADS', 100))
+preload_app = True
+
+# Streams stay open; heartbeats keep proxies from closing them
+keepalive = int(os.environ.get('SSE_KEEPALIVE', 75))
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+
+pidfile = os.environ.get('SPONNECT_SSE_PIDFILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn_sse.pid'))
+accesslog = '-'
+# Gunicorn's default format, but with the path only: the stream authenticates with ?token=<jwt>,
+# which must not end up in the logs
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
+proc_name = 'sponnect-sse'
+raw_env = [f"APP_ENV={os.environ.get('APP_ENV', 'production')}"]
+
+
+def post_fork(server, worker):
+    """Drop DB connections inherited from the preloading master; each worker opens its own"""
+    from wsgi import app  # Already imported by the master (preload_app)
+    from models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,237 @@
+"""
+In-app notification inbox for the Sponnect application.
+Notification tasks write inbox rows in bulk (notify_users) instead of sending
+an email per change, and each user's unread count is kept in Redis so the
+frontend can poll it without touching the database. Lists page by an opaque
+cursor over (created_at, id), served by the (user_id, is_read, created_at) index.
+
+The counter is only adjusted when it is known to be accurate: a missing counter
+is recounted from the database on the next read, and a write that can't adjust
+it atomically marks it stale instead. A counter also expires after
+INBOX_UNREAD_TTL, so any drift corrects itself.
+"""
+
+import base64
+import logging
+from datetime import datetime, timedelta
+from redis.exceptions import ResponseError, WatchError
+from sqlalchemy import select, update, delete, func, or_, and_
+
+from config import Config
+from models import db, Notification
+from redis_client import get_redis
+from scheduling import non_overlapping
+from workers import celery
+import metrics
+
+UNREAD_PREFIX = 'sponnect:inbox:unread:'
+STALE = 'stale'
+STALE_TTL = 300  # A stale marker only has to outlive the writes racing a recount
+SEED_ATTEMPTS = 3
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+PURGE_BATCH_SIZE = 1000
+
+# Adjust a counter that holds a number; otherwise (missing, stale or gone negative) leave it to be recounted
+_ADJUST_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value and value ~= ARGV[3] then
+    local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+    if count >= 0 then
+        return count
+    end
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[2])
+return false
+"""
+_adjust = None
+_scripting = True
+
+
+def _key(user_id):
+    return f"{UNREAD_PREFIX}{user_id}"
+
+
+def _adjust_counters(deltas):
+    """Apply {user id: delta} to the unread counters in one round trip"""
+    global _adjust, _scripting
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    client = get_redis()
+    try:
+        if _scripting:
+            if _adjust is None:
+                _adjust = client.register_script(_ADJUST_SCRIPT)
+            pipe = client.pipeline(transaction=False)
+            for user_id, delta in deltas.items():
+                _adjust(keys=[_key(user_id)], args=[delta, STALE_TTL, STALE], client=pipe)
+            pipe.execute()
+            return
+    except ResponseError as e:
+        # A server without scripting: mark the counters stale from now on
+        logging.error(f"Unread counter script unavailable, invalidating instead: {str(e)}")
+        _scripting = False
+    except Exception as e:
+        logging.error(f"Failed to update unread counters: {str(e)}")
+    try:
+        pipe = client.pipeline(transaction=False)
+        for user_id in deltas:
+            pipe.set(_key(user_id), STALE, ex=STALE_TTL)
+        pipe.execute()
+    except Exception as e:
+        # The counters expire after INBOX_UNREAD_TTL
+        logging.error(f"Failed to invalidate unread counters: {str(e)}")
+
+
+def notify_users(notifications):
+    """
+    Store many notifications in one transaction, leaving db.session alone, and
+    bump the recipients' unread counters
+
+    Args:
+        notifications (list): Dicts with user_id, kind, title and optionally body and link
+
+    Returns:
+        int: Number stored (0 on failure)
+    """
+    if not notifications:
+        return 0
+    now = datetime.utcnow()
+    rows = [{'user_id': n['user_id'], 'kind': n['kind'], 'title': n['title'][:200], 'body': n.get('body'),
+             'link': n.get('link'), 'is_read': False, 'created_at': now} for n in notifications]
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(Notification.__table__.insert(), rows)
+    except Exception as e:
+        logging.error(f"Failed to store {len(rows)} notifications: {str(e)}")
+        return 0
+    deltas = {}
+    for row in rows:
+        deltas[row['user_id']] = deltas.get(row['user_id'], 0) + 1
+    _adjust_counters(deltas)
+    return len(rows)
+
+
+def _count_unread(user_id):
+    return db.session.execute(
+        select(func.count()).select_from(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read.is_(False))
+    ).scalar()
+
+
+def unread_count(user_id):
+    """A user's unread notifications, from Redis when the counter is current"""
+    key = _key(user_id)
+    try:
+        client = get_redis()
+        value = client.get(key)
+        if value is not None and value != STALE:
+            metrics.count_inbox_read('redis')
+            return int(value)
+        metrics.count_inbox_read('db')
+        # Recount, and store it only if no write touched the counter meanwhile
+        with client.pipeline() as pipe:
+            for _ in range(SEED_ATTEMPTS):
+                try:
+                    pipe.watch(key)
+                    count = _count_unread(user_id)
+                    pipe.multi()
+                    pipe.set(key, count, ex=Config.INBOX_UNREAD_TTL)
+                    pipe.execute()
+                    return count
+                except WatchError:
+                    continue
+    except Exception as e:
+        logging.error(f"Failed to read unread counter for user {user_id}: {str(e)}")
+    return _count_unread(user_id)
+
+
+def encode_cursor(notification):
+    raw = f"{notification.created_at.isoformat()}|{notification.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) of a cursor from encode_cursor(); raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, notification_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def list_notifications(user_id, cursor=None, limit=PAGE_SIZE, unread_only=False):
+    """
+    A page of a user's notifications, newest first
+
+    Args:
+        cursor (str, optional): next_cursor of the previous page
+        limit (int): Page size, capped at MAX_PAGE_SIZE
+        unread_only (bool): Only unread notifications
+
+    Returns:
+        tuple: (list of Notification, next cursor or None on the last page)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = select(Notification).where(Notification.user_id == user_id)
+    if unread_only:
+        query = query.where(Notification.is_read.is_(False))
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Notification.created_at < created_at,
+            and_(Notification.created_at == created_at, Notification.id < notification_id)
+        ))
+    # One extra row tells whether there is a next page
+    rows = db.session.execute(
+        query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1)
+    ).scalars().all()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+def mark_read(user_id, notification_ids=None):
+    """
+    Mark a user's notifications read in one statement: the given IDs, or all of
+    them when notification_ids is None. Returns the number that were unread.
+    """
+    statement = update(Notification).where(Notification.user_id == user_id, Notification.is_read.is_(False))
+    if notification_ids is not None:
+        if not notification_ids:
+            return 0
+        statement = statement.where(Notification.id.in_(notification_ids))
+    result = db.session.execute(statement.values(is_read=True, read_at=datetime.utcnow()),
+                                execution_options={'synchronize_session': False})
+    db.session.commit()
+    updated = result.rowcount
+    if notification_ids is None:
+        # Recounted on the next read: a notification stored meanwhile may already be unread
+        try:
+            get_redis().delete(_key(user_id))
+        except Exception as e:
+            logging.error(f"Failed to reset unread counter for user {user_id}: {str(e)}")
+    else:
+        _adjust_counters({user_id: -updated})
+    return updated
+
+
+@celery.task()
+@non_overlapping()
+def purge_read_notifications():
+    """Delete notifications read more than INBOX_KEEP_READ_DAYS ago, in batches"""
+    cutoff = datetime.utcnow() - timedelta(days=Config.INBOX_KEEP_READ_DAYS)
+    purged = 0
+    while True:
+        ids = db.session.execute(
+            select(Notification.id).where(Notification.is_read.is_(True), Notification.read_at < cutoff)
+            .limit(PURGE_BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(delete(Notification).where(Notification.id.in_(ids)))
+        db.session.commit()
+        purged += len(ids)
+    return purged
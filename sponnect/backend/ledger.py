@@ -0,0 +1,123 @@
+"""
+Campaign budget ledger for the Sponnect application.
+committed_amount and paid_amount are kept on Campaign and AdRequest in the same
+transaction as the accept/payment that changes them. Every change is a conditional
+UPDATE, so budget checks never need an aggregate scan and concurrent accepts or
+payments cannot overshoot the budget.
+"""
+
+from sqlalchemy import update, func
+
+from models import db, Campaign, AdRequest, Payment
+
+# Tolerance for float rounding when comparing money amounts
+AMOUNT_EPSILON = 0.005
+
+
+class BudgetExceededError(Exception):
+    """Accepting the ad request would commit more than the campaign budget"""
+
+
+class OverpaymentError(Exception):
+    """The payment would exceed the amount committed for the ad request"""
+
+
+def remaining_budget(campaign):
+    """Budget not yet committed to accepted ad requests"""
+    return max(campaign.budget - (campaign.committed_amount or 0.0), 0.0)
+
+
+def outstanding_amount(ad_request):
+    """Committed amount for an ad request that has not been paid yet"""
+    return max((ad_request.committed_amount or 0.0) - (ad_request.paid_amount or 0.0), 0.0)
+
+
+def commit_ad_request(ad_request):
+    """
+    Reserve an accepted ad request's payment amount against its campaign budget.
+    Call in the accept transaction; the caller commits or rolls back.
+
+    Raises:
+        BudgetExceededError: If the campaign has too little budget left, or the
+            ad request was already committed by a concurrent accept
+    """
+    amount = float(ad_request.payment_amount)
+
+    # Only the first accept reserves money for an ad request
+    result = db.session.execute(
+        update(AdRequest)
+        .where(AdRequest.id == ad_request.id, AdRequest.committed_amount == 0)
+        .values(committed_amount=amount)
+    )
+    if result.rowcount == 0:
+        raise BudgetExceededError("Ad request has already been committed")
+
+    result = db.session.execute(
+        update(Campaign)
+        .where(Campaign.id == ad_request.campaign_id,
+               Campaign.committed_amount + amount <= Campaign.budget + AMOUNT_EPSILON)
+        .values(committed_amount=Campaign.committed_amount + amount)
+    )
+    if result.rowcount == 0:
+        raise BudgetExceededError("Accepting this request would exceed the campaign budget")
+
+
+def record_payment(ad_request, amount):
+    """
+    Add a completed payment to the ad request and campaign paid totals.
+    Call in the payment transaction; the caller commits or rolls back.
+
+    Raises:
+        OverpaymentError: If the payment exceeds the unpaid committed amount
+    """
+    result = db.session.execute(
+        update(AdRequest)
+        .where(AdRequest.id == ad_request.id,
+               AdRequest.paid_amount + amount <= AdRequest.committed_amount + AMOUNT_EPSILON)
+        .values(paid_amount=AdRequest.paid_amount + amount)
+    )
+    if result.rowcount == 0:
+        raise OverpaymentError("Payment exceeds the outstanding amount for this ad request")
+
+    db.session.execute(
+        update(Campaign)
+        .where(Campaign.id == ad_request.campaign_id)
+        .values(paid_amount=Campaign.paid_amount + amount)
+    )
+
+
+def serialize_ledger(campaign):
+    """Ledger totals for a campaign"""
+    return {
+        'budget': campaign.budget,
+        'committed_amount': campaign.committed_amount or 0.0,
+        'paid_amount': campaign.paid_amount or 0.0,
+        'remaining_budget': remaining_budget(campaign),
+        'outstanding_amount': max((campaign.committed_amount or 0.0) - (campaign.paid_amount or 0.0), 0.0)
+    }
+
+
+def burn_down(campaign):
+    """
+    Daily completed payments for a campaign with the budget left after each day.
+
+    Returns:
+        list: [{'date', 'paid', 'cumulative_paid', 'remaining'}] in date order
+    """
+    day = func.date(Payment.created_at)
+    rows = db.session.query(day, func.sum(Payment.amount))\
+        .join(AdRequest, Payment.ad_request_id == AdRequest.id)\
+        .filter(AdRequest.campaign_id == campaign.id, Payment.status == 'Completed')\
+        .group_by(day).order_by(day).all()
+
+    series = []
+    cumulative = 0.0
+    for date_value, paid in rows:
+        cumulative += paid or 0.0
+        series.append({
+            'date': str(date_value),
+            'paid': paid or 0.0,
+            'cumulative_paid': cumulative,
+            'remaining': campaign.budget - cumulative
+        })
+    return series
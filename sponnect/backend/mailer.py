@@ -1,14 +1,20 @@
 from flask_mail import Mail, Message
-from flask import current_app as app, render_template
+from flask import current_app as app
+from markupsafe import escape
 import logging
-import os
-from datetime import datetime
+import email_render
 
 mail = Mail()
 
+# Recipient attributes a shared body may use; they render as tokens that are
+# swapped for each recipient's value (private-use characters survive escaping)
+RECIPIENT_FIELDS = ('username', 'email')
+TOKEN_START, TOKEN_END = '\ue000', '\ue001'
+
 def render_template_with_defaults(template_name, **context):
     """
-    Render a template with default context values that are useful across all emails
+    Render an email template with the defaults useful across all emails
+    (frontend_url, current_year, now) on the precompiled email environment
     
     Args:
         template_name (str): The name of the template to render
@@ -17,23 +23,97 @@ def render_template_with_defaults(template_name, **context):
     Returns:
         str: The rendered template HTML
     """
-    # Add global defaults to all templates
-    defaults = {
-        'frontend_url': os.environ.get('FRONTEND_URL', 'http://localhost:5173'),
-        'current_year': datetime.now().year,
-        'now': datetime.now
-    }
+    return email_render.render(template_name, **context)
+
+class RecipientPlaceholder:
+    """Stands in for the recipient while a shared body is rendered"""
+
+    def __init__(self):
+        self.used_fields = set()
+        self.other_access = False
+
+    def __getattr__(self, name):
+        if name in RECIPIENT_FIELDS:
+            self.used_fields.add(name)
+            return f"{TOKEN_START}{name}{TOKEN_END}"
+        # Anything else can't be substituted later, so the shared body is unusable
+        self.other_access = True
+        raise AttributeError(name)
+
+
+def _render_shared(template_name, recipient_var, context):
+    """Render with a placeholder recipient; None if the template needs more than RECIPIENT_FIELDS"""
+    placeholder = RecipientPlaceholder()
+    html = render_template_with_defaults(template_name, **{**context, recipient_var: placeholder})
+    if placeholder.other_access:
+        return None
+    # A filter applied to a token (e.g. |title) leaves it unrecognisable
+    stripped = html
+    for field in placeholder.used_fields:
+        stripped = stripped.replace(f"{TOKEN_START}{field}{TOKEN_END}", '')
+    if TOKEN_START in stripped:
+        return None
+    return html, placeholder.used_fields
+
+
+def render_for_recipients(template_name, recipients, recipient_var, context, group_by=None):
+    """
+    Render a template for many recipients, once per group of recipients with the
+    same context instead of once each. The recipient's name and email are
+    substituted into the group's body; templates that use anything else about
+    the recipient fall back to one render per recipient.
+    
+    Args:
+        template_name (str): The name of the template to render
+        recipients (list): User objects
+        recipient_var (str): Template variable the recipient is passed as
+        context (dict or callable): Shared variables, or a function of a group's first recipient
+        group_by (callable, optional): Key of a recipient's group; all share one group by default
+    
+    Returns:
+        list: (recipient, html) pairs
+    """
+    groups = {}
+    for recipient in recipients:
+        groups.setdefault(group_by(recipient) if group_by else None, []).append(recipient)
     
-    # Don't override user-provided variables with defaults
-    for key, value in defaults.items():
-        if key not in context:
-            context[key] = value
-            
-    return render_template(template_name, **context)
-
-def send_template_email(subject, to, template_name, context, cc=None, bcc=None, attachments=None):
+    rendered = []
+    for members in groups.values():
+        group_context = context(members[0]) if callable(context) else context
+        shared = _render_shared(template_name, recipient_var, group_context)
+        if shared is None:
+            bodies = email_render.render_many(template_name, [{**group_context, recipient_var: recipient}
+                                                              for recipient in members])
+            rendered.extend(zip(members, bodies))
+            continue
+        html, used_fields = shared
+        for recipient in members:
+            body = html
+            for field in used_fields:
+                body = body.replace(f"{TOKEN_START}{field}{TOKEN_END}", str(escape(getattr(recipient, field) or '')))
+            rendered.append((recipient, body))
+    return rendered
+
+
+def send_to_recipients(subject, template_name, recipients, recipient_var, context, group_by=None, dedupe_key=None):
+    """
+    Render a template with render_for_recipients() and queue one email per
+    recipient with an address, all in one outbox transaction. With dedupe_key,
+    each recipient gets at most one email under "<dedupe_key>:<user id>".
+    
+    Returns:
+        int: Number of emails queued
+    """
+    from outbox import enqueue_emails
+    rendered = render_for_recipients(template_name, [r for r in recipients if r.email],
+                                     recipient_var, context, group_by)
+    return enqueue_emails([(subject, recipient.email, html, f"{dedupe_key}:{recipient.id}" if dedupe_key else None)
+                           for recipient, html in rendered])
+
+
+def send_template_email(subject, to, template_name, context, cc=None, bcc=None, dedupe_key=None):
     """
-    Send an email using a template
+    Queue an email rendered from a template
     
     Args:
         subject (str): Email subject
@@ -42,24 +122,26 @@ def send_template_email(subject, to, template_name, context, cc=None, bcc=None,
         context (dict): Variables to pass to the template
         cc (str or list, optional): CC recipient(s)
         bcc (str or list, optional): BCC recipient(s)
-        attachments (list, optional): List of attachment tuples (filename, mimetype, data)
+        dedupe_key (str, optional): Queue at most one email under this key
     
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if the email was queued, False otherwise
     """
     try:
         # Render the template with defaults
         html = render_template_with_defaults(template_name, **context)
         
-        # Send the email
-        return send_email(subject, to, html, cc, bcc, attachments)
+        # Queue the email
+        return send_email(subject, to, html, cc, bcc, dedupe_key)
     except Exception as e:
         logging.error(f"Failed to send template email to {to}: {str(e)}")
         return False
 
-def send_email(subject, to, body=None, cc=None, bcc=None, attachments=None):
+def send_email(subject, to, body=None, cc=None, bcc=None, dedupe_key=None):
     """
-    Send email using Flask-Mail
+    Queue an email in the outbox, committed on its own connection; the dispatcher
+    task sends it. To send an email only if a business change commits, use
+    outbox.queue_email() in that change's transaction instead.
     
     Args:
         subject (str): Email subject
@@ -67,32 +149,22 @@ def send_email(subject, to, body=None, cc=None, bcc=None, attachments=None):
         body (str, optional): HTML content of the email
         cc (str or list, optional): CC recipient(s)
         bcc (str or list, optional): BCC recipient(s)
-        attachments (list, optional): List of attachment tuples (filename, mimetype, data)
+        dedupe_key (str, optional): Queue at most one email under this key
     
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if the email was queued, False otherwise
     """
+    from outbox import enqueue_email
+    return enqueue_email(subject, to, body, cc, bcc, dedupe_key)
+
+def build_message(subject, recipients, body, cc=None, bcc=None):
+    """Flask-Mail message for an email; recipient arguments are lists of addresses"""
     sender = app.config.get('MAIL_DEFAULT_SENDER', 'noreply@sponnect.com')
-    try:
-        msg = Message(subject, recipients=[to] if isinstance(to, str) else to, sender=sender, html=body)
-        
-        # Add CC if provided
-        if cc:
-            msg.cc = [cc] if isinstance(cc, str) else cc
-            
-        # Add BCC if provided
-        if bcc:
-            msg.bcc = [bcc] if isinstance(bcc, str) else bcc
-            
-        # Add attachments if provided
-        if attachments:
-            for attachment in attachments:
-                filename, mimetype, data = attachment
-                msg.attach(filename=filename, content_type=mimetype, data=data)
-                
-        mail.send(msg)
-        return True
-    except Exception as e:
-        logging.error(f"Failed to send email to {to}: {str(e)}")
-        print(f"Email delivery failed: {str(e)}")
-        return False 
\ No newline at end of file
+    msg = Message(subject, recipients=recipients, sender=sender, html=body)
+    
+    # Add CC/BCC if provided
+    if cc:
+        msg.cc = cc
+    if bcc:
+        msg.bcc = bcc
+    return msg
@@ -0,0 +1,427 @@
+"""
+Prometheus-style metrics for the Sponnect web app and Celery workers.
+Series are kept in Redis so every Gunicorn worker and Celery process adds to the
+same counters, and GET /metrics renders them in the Prometheus text format.
+Writes go to a per-process buffer that a background thread flushes every
+METRICS_FLUSH_SECONDS, so recording a request or task never waits on Redis.
+Request hooks record latency, in-flight requests, DB pool usage and cache
+hits; Celery signal handlers record task durations, failures, retries, emails
+sent and worker memory. Queue depths are read from the broker at scrape time.
+"""
+
+import logging
+import os
+import resource
+import socket
+import time
+from celery import current_task
+from celery.signals import task_prerun, task_postrun, task_failure, task_retry, worker_process_shutdown
+from flask import g, has_request_context, request
+
+from buffered_writes import create_buffer
+from config import Config
+from redis_client import get_redis
+
+METRICS_PREFIX = 'sponnect:metrics:'
+PROCESS_PREFIX = 'sponnect:metrics:process:'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = []
+_buffer = create_buffer('metrics', Config.METRICS_FLUSH_SECONDS)
+
+
+def _buckets(setting):
+    return tuple(sorted(float(bound) for bound in setting.split(',') if bound.strip()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _join_labels(*parts):
+    return ','.join(part for part in parts if part)
+
+
+def process_id():
+    """Label for per-process gauges; read on every call because workers fork"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Metric:
+    """A metric family stored in one Redis hash, one field per label set"""
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.key = f"{METRICS_PREFIX}{name}"
+        REGISTRY.append(self)
+
+    def labels(self, **labels):
+        return ','.join(f'{name}="{_escape(labels[name])}"' for name in self.labelnames)
+
+    def collect(self, client):
+        """[(sample name, label string, value)] for the exposition"""
+        return [(self.name, labels, value) for labels, value in sorted(client.hgetall(self.key).items())]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, pipe, amount=1, **labels):
+        pipe.hincrbyfloat(self.key, self.labels(**labels), amount)
+
+
+class Histogram(Metric):
+    """Bucket counts are stored per bucket and summed into cumulative buckets on render"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, pipe, value, **labels):
+        labels = self.labels(**labels)
+        bound = next((_format_value(bound) for bound in self.buckets if value <= bound), '+Inf')
+        pipe.hincrby(self.key, f"{labels}|{bound}", 1)
+        pipe.hincrbyfloat(self.key, f"{labels}|sum", value)
+
+    def collect(self, client):
+        series = {}
+        for field, value in client.hgetall(self.key).items():
+            labels, _, part = field.rpartition('|')
+            series.setdefault(labels, {})[part] = float(value)
+        samples = []
+        for labels, parts in sorted(series.items()):
+            cumulative = 0
+            for bound in [_format_value(bound) for bound in self.buckets] + ['+Inf']:
+                cumulative += parts.get(bound, 0)
+                samples.append((f"{self.name}_bucket", _join_labels(labels, f'le="{bound}"'), cumulative))
+            samples.append((f"{self.name}_count", labels, cumulative))
+            samples.append((f"{self.name}_sum", labels, parts.get('sum', 0)))
+        return samples
+
+
+class ProcessGauge(Metric):
+    """
+    Gauge kept per process (in-flight requests, DB pool). Each process writes its
+    own hash, which expires METRICS_PROCESS_TTL seconds after its last update so
+    recycled workers drop out.
+    """
+    kind = 'gauge'
+
+    def labels(self, **labels):
+        return _join_labels(f'process="{_escape(process_id())}"', super().labels(**labels))
+
+    def set(self, pipe, value, **labels):
+        pipe.hset(f"{PROCESS_PREFIX}{process_id()}", f"{self.name}|{self.labels(**labels)}", value)
+
+    def inc(self, pipe, amount=1, **labels):
+        pipe.hincrby(f"{PROCESS_PREFIX}{process_id()}", f"{self.name}|{self.labels(**labels)}", amount)
+
+    def collect(self, client):
+        samples = []
+        for key in sorted(client.scan_iter(match=f"{PROCESS_PREFIX}*")):
+            for field, value in client.hgetall(key).items():
+                name, _, labels = field.partition('|')
+                if name == self.name:
+                    samples.append((self.name, labels, value))
+        return sorted(samples)
+
+
+class QueueDepth(Metric):
+    """Messages waiting in each Celery queue, read from the Redis broker on every scrape"""
+    kind = 'gauge'
+
+    def collect(self, client):
+        from workers import celery, QUEUE_NAMES
+        broker_url = celery.conf.broker_url
+        if not broker_url.startswith(('redis://', 'rediss://', 'memory://')):
+            return []
+        broker = get_redis(broker_url)
+        # The Redis transport keeps one list per priority step: "<queue>", "<queue>:1", ...
+        sep = celery.conf.broker_transport_options.get('sep', ':')
+        steps = celery.conf.broker_transport_options.get('priority_steps', [0])
+        pipe = broker.pipeline()
+        for queue in QUEUE_NAMES:
+            for step in steps:
+                pipe.llen(f"{queue}{sep}{step}" if step else queue)
+        lengths = iter(pipe.execute())
+        return [(self.name, self.labels(queue=queue), sum(next(lengths) for _ in steps))
+                for queue in QUEUE_NAMES]
+
+
+# --- Web ---
+http_request_duration = Histogram(
+    'sponnect_http_request_duration_seconds', 'Request latency by route',
+    ('route', 'method'), _buckets(Config.METRICS_LATENCY_BUCKETS))
+http_requests = Counter(
+    'sponnect_http_requests_total', 'Requests by route and status', ('route', 'method', 'status'))
+http_in_flight = ProcessGauge(
+    'sponnect_http_requests_in_flight', 'Requests currently being handled')
+db_pool_checked_out = ProcessGauge(
+    'sponnect_db_pool_checked_out', 'Connections checked out of the pool', ('bind',))
+db_pool_size = ProcessGauge(
+    'sponnect_db_pool_size', 'Configured pool size', ('bind',))
+db_pool_overflow = ProcessGauge(
+    'sponnect_db_pool_overflow', 'Connections open beyond the pool size', ('bind',))
+cache_lookups = Counter(
+    'sponnect_cache_lookups_total', 'Response cache lookups by result', ('route', 'result'))
+
+# --- Worker ---
+task_duration = Histogram(
+    'sponnect_celery_task_duration_seconds', 'Task run time',
+    ('task', 'queue'), _buckets(Config.METRICS_TASK_BUCKETS))
+tasks = Counter(
+    'sponnect_celery_tasks_total', 'Finished tasks by state', ('task', 'queue', 'state'))
+task_failures = Counter(
+    'sponnect_celery_task_failures_total', 'Failed tasks by exception', ('task', 'exception'))
+task_retries = Counter(
+    'sponnect_celery_task_retries_total', 'Task retries', ('task',))
+emails = Counter(
+    'sponnect_emails_total', 'Email send attempts by queuing task and outcome', ('task', 'status'))
+emails_suppressed = Counter(
+    'sponnect_emails_suppressed_total', 'Stats emails skipped by kind and reason', ('kind', 'reason'))
+activity_reads = Counter(
+    'sponnect_activity_counter_reads_total', 'Windowed activity counts by where they were read from', ('source',))
+domain_events = Counter(
+    'sponnect_domain_events_total', 'Domain events processed by consumer group and result', ('group', 'result'))
+throttled = Counter(
+    'sponnect_throttled_requests_total', 'Requests refused by rate limits (429) or load shedding (503)', ('kind', 'reason'))
+inbox_reads = Counter(
+    'sponnect_inbox_unread_reads_total', 'Unread notification counts by where they were read from', ('source',))
+activity_corrections = Counter(
+    'sponnect_activity_counter_corrections_total', 'Activity counter buckets fixed by reconciliation', ('entity',))
+task_memory_peak = Histogram(
+    'sponnect_celery_task_memory_peak_bytes', 'Peak Python allocations of sampled task runs (tracemalloc)',
+    ('task',), (1 << 20, 4 << 20, 16 << 20, 64 << 20, 256 << 20, 1 << 30))
+worker_rss = ProcessGauge(
+    'sponnect_worker_rss_bytes', 'Resident memory of the worker process after its last task')
+queue_depth = QueueDepth(
+    'sponnect_celery_queue_length', 'Messages waiting in the queue', ('queue',))
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    _buffer.flush()  # Include this process's latest writes
+    client = get_redis()
+    lines = []
+    for metric in REGISTRY:
+        try:
+            samples = metric.collect(client)
+        except Exception as e:
+            logging.error(f"Failed to collect {metric.name}: {str(e)}")
+            continue
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in samples:
+            lines.append(f"{name}{{{labels}}} {_format_value(value)}" if labels else f"{name} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def _write(fill):
+    """
+    Run fill(pipe) against the process's write buffer, which takes the same hash
+    writes as a pipeline and sends them in the background; metrics never fail
+    or slow the caller
+    """
+    try:
+        fill(_buffer)
+        _buffer.expire(f"{PROCESS_PREFIX}{process_id()}", Config.METRICS_PROCESS_TTL)
+    except Exception as e:
+        logging.error(f"Failed to record metrics: {str(e)}")
+
+
+# --- Request hooks ---
+def _route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def _start_request():
+    # Batch sub-requests run the hooks inside the batch's g, hence the stack
+    g.setdefault('request_metrics', []).append({'started': time.perf_counter(), 'status': 500, 'hits': 0, 'misses': 0})
+    _write(lambda pipe: http_in_flight.inc(pipe, 1))
+
+
+def _record_status(response):
+    if g.get('request_metrics'):
+        g.request_metrics[-1]['status'] = response.status_code
+    return response
+
+
+def _finish_request(exc=None):
+    if not g.get('request_metrics'):
+        return
+    frame = g.request_metrics.pop()
+    elapsed = time.perf_counter() - frame['started']
+    route, method = _route(), request.method
+    from models import db
+    pools = {bind or 'default': engine.pool for bind, engine in db.engines.items()}
+
+    def fill(pipe):
+        http_in_flight.inc(pipe, -1)
+        http_request_duration.observe(pipe, elapsed, route=route, method=method)
+        http_requests.inc(pipe, route=route, method=method, status=frame['status'])
+        if frame['hits']:
+            cache_lookups.inc(pipe, frame['hits'], route=route, result='hit')
+        if frame['misses']:
+            cache_lookups.inc(pipe, frame['misses'], route=route, result='miss')
+        for bind, pool in pools.items():
+            # Only QueuePool reports sizes; SQLite memory DBs use a static pool
+            if hasattr(pool, 'checkedout'):
+                db_pool_checked_out.set(pipe, pool.checkedout(), bind=bind)
+                db_pool_size.set(pipe, pool.size(), bind=bind)
+                db_pool_overflow.set(pipe, max(pool.overflow(), 0), bind=bind)
+    _write(fill)
+
+
+def count_cache_lookup(hit):
+    if has_request_context() and g.get('request_metrics'):
+        g.request_metrics[-1]['hits' if hit else 'misses'] += 1
+    else:
+        _write(lambda pipe: cache_lookups.inc(pipe, route='none', result='hit' if hit else 'miss'))
+
+
+def _instrument_cache(app):
+    """Count hits and misses on the Flask-Caching backend (what @cache.cached reads through)"""
+    from extensions import cache
+    backend = app.extensions['cache'][cache]
+    backend_get = backend.get
+
+    def get(key):
+        value = backend_get(key)
+        count_cache_lookup(value is not None)
+        return value
+    backend.get = get
+
+
+def init_metrics(app):
+    """Register the request hooks and cache instrumentation"""
+    if not Config.METRICS_ENABLED:
+        return
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
+    _instrument_cache(app)
+
+
+# --- Worker collectors ---
+_task_started = {}
+
+
+def _task_labels(task):
+    delivery_info = getattr(task.request, 'delivery_info', None) or {}
+    return {'task': task.name, 'queue': delivery_info.get('routing_key') or 'unknown'}
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _on_task_postrun(sender=None, task_id=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None or not Config.METRICS_ENABLED:
+        return
+    elapsed = time.perf_counter() - started
+    labels = _task_labels(sender)
+
+    def fill(pipe):
+        task_duration.observe(pipe, elapsed, **labels)
+        tasks.inc(pipe, state=state or 'UNKNOWN', **labels)
+        worker_rss.set(pipe, current_rss())
+    _write(fill)
+
+
+def current_rss():
+    """Resident set size of this process in bytes (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def record_task_memory(task_name, peak_bytes):
+    if Config.METRICS_ENABLED:
+        _write(lambda pipe: task_memory_peak.observe(pipe, peak_bytes, task=task_name))
+
+
+@task_failure.connect
+def _on_task_failure(sender=None, exception=None, **kwargs):
+    if Config.METRICS_ENABLED:
+        _write(lambda pipe: task_failures.inc(pipe, task=sender.name, exception=type(exception).__name__))
+
+
+@task_retry.connect
+def _on_task_retry(sender=None, **kwargs):
+    if Config.METRICS_ENABLED:
+        _write(lambda pipe: task_retries.inc(pipe, task=sender.name))
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    # Pool processes may exit without running atexit handlers
+    _buffer.flush()
+
+
+def count_email(sent, task=None):
+    """Count one email for the task that queued it (default: the running task, 'web' in a request)"""
+    if Config.METRICS_ENABLED:
+        task = task or (current_task.name if current_task else 'web')
+        _write(lambda pipe: emails.inc(pipe, task=task, status='sent' if sent else 'failed'))
+
+
+def count_suppressed_emails(kind, counts):
+    """Add a run's skipped stats emails ({reason: count})"""
+    if Config.METRICS_ENABLED and any(counts.values()):
+        def fill(pipe):
+            for reason, count in counts.items():
+                if count:
+                    emails_suppressed.inc(pipe, count, kind=kind, reason=reason)
+        _write(fill)
+
+
+def count_activity_read(source):
+    """Count one windowed activity read served from 'redis' or 'db'"""
+    if Config.METRICS_ENABLED:
+        _write(lambda pipe: activity_reads.inc(pipe, source=source))
+
+
+def count_throttled(kind, reason):
+    """Count one request refused: kind 'rate_limit' (reason: limit name) or 'shed' (reason: 'in_flight' or 'db_pool')"""
+    if Config.METRICS_ENABLED:
+        _write(lambda pipe: throttled.inc(pipe, kind=kind, reason=reason))
+
+
+def count_inbox_read(source):
+    """Count one unread-count read served from 'redis' or 'db'"""
+    if Config.METRICS_ENABLED:
+        _write(lambda pipe: inbox_reads.inc(pipe, source=source))
+
+
+def count_activity_corrections(corrected):
+    """Add a reconciliation run's fixed buckets ({entity: count})"""
+    if Config.METRICS_ENABLED and any(corrected.values()):
+        def fill(pipe):
+            for entity, count in corrected.items():
+                if count:
+                    activity_corrections.inc(pipe, count, entity=entity)
+        _write(fill)
+
+
+def count_domain_events(group, counts):
+    """Add a consume run's results ({'handled': n, 'failed': n, 'dead': n})"""
+    if Config.METRICS_ENABLED and any(counts.values()):
+        def fill(pipe):
+            for result, count in counts.items():
+                if count:
+                    domain_events.inc(pipe, count, group=group, result=result)
+        _write(fill)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the budget ledger columns (committed_amount, paid_amount)
+to campaigns and ad_requests and backfill them from existing data.
+"""
+import sys
+import os
+import sqlite3
+
+LEDGER_COLUMNS = ['committed_amount', 'paid_amount']
+
+def add_budget_ledger():
+    """Add ledger columns to campaigns and ad_requests and backfill totals"""
+    try:
+        # Get the database path from the environment or use the default
+        db_path = os.environ.get('DATABASE_PATH', 'instance/app.db')
+        
+        # Ensure the full path is resolved
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), db_path)
+        
+        print(f"Using database at: {db_path}")
+        
+        # Connect directly to the SQLite database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        for table in ['campaigns', 'ad_requests']:
+            # Check which columns already exist
+            cursor.execute(f"PRAGMA table_info({table})")
+            column_names = [column[1] for column in cursor.fetchall()]
+            for column in LEDGER_COLUMNS:
+                if column not in column_names:
+                    print(f"Adding {column} column to {table} table...")
+                    cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} FLOAT DEFAULT 0 NOT NULL')
+                else:
+                    print(f"Column {column} already exists in {table} table.")
+        
+        # Backfill: accepted requests are committed at their agreed amount,
+        # paid totals come from completed payments
+        print("Backfilling ledger totals...")
+        cursor.execute('''
+            UPDATE ad_requests SET committed_amount = CASE WHEN status = 'Accepted' THEN payment_amount ELSE 0 END
+        ''')
+        cursor.execute('''
+            UPDATE ad_requests SET paid_amount = COALESCE((
+                SELECT SUM(amount) FROM payments
+                WHERE payments.ad_request_id = ad_requests.id AND payments.status = 'Completed'
+            ), 0)
+        ''')
+        cursor.execute('''
+            UPDATE campaigns SET
+                committed_amount = COALESCE((SELECT SUM(committed_amount) FROM ad_requests WHERE campaign_id = campaigns.id), 0),
+                paid_amount = COALESCE((SELECT SUM(paid_amount) FROM ad_requests WHERE campaign_id = campaigns.id), 0)
+        ''')
+        conn.commit()
+        
+        # Report campaigns that were already over budget before the ledger existed
+        cursor.execute("SELECT COUNT(*) FROM campaigns WHERE committed_amount > budget")
+        over_budget = cursor.fetchone()[0]
+        if over_budget:
+            print(f"Warning: {over_budget} campaign(s) have more committed than their budget")
+        print("Migration complete: Added budget ledger fields")
+        
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Error during migration: {str(e)}")
+        return False
+
+run_migration = add_budget_ledger
+
+if __name__ == "__main__":
+    success = add_budget_ledger()
+    sys.exit(0 if success else 1)
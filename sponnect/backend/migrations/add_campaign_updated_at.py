@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Migration script for delta sync: adds updated_at to campaigns and the tombstones table.
+"""
+import sys
+import os
+import sqlite3
+
+def add_sync_fields():
+    """Add campaigns.updated_at, the tombstones table and the sync indexes"""
+    try:
+        # Get the database path from the environment or use the default
+        db_path = os.environ.get('DATABASE_PATH', 'instance/app.db')
+        
+        # Ensure the full path is resolved
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), db_path)
+        
+        print(f"Using database at: {db_path}")
+        
+        # Connect directly to the SQLite database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        # Check if the column already exists
+        cursor.execute("PRAGMA table_info(campaigns)")
+        columns = cursor.fetchall()
+        column_names = [column[1] for column in columns]
+        
+        if 'updated_at' not in column_names:
+            print("Adding updated_at column to campaigns table...")
+            cursor.execute('ALTER TABLE campaigns ADD COLUMN updated_at DATETIME')
+            # Existing campaigns count as last changed when they were created
+            cursor.execute('UPDATE campaigns SET updated_at = created_at WHERE updated_at IS NULL')
+            print("Added updated_at field to campaigns table")
+        else:
+            print("Column updated_at already exists in campaigns table.")
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tombstones (
+                id INTEGER PRIMARY KEY,
+                entity_type VARCHAR(20) NOT NULL,
+                entity_id INTEGER NOT NULL,
+                sponsor_id INTEGER,
+                influencer_id INTEGER,
+                reason VARCHAR(20) NOT NULL DEFAULT 'deleted',
+                deleted_at DATETIME NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_tombstones_sponsor_id ON tombstones (sponsor_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_tombstones_influencer_id ON tombstones (influencer_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_tombstones_deleted_at ON tombstones (deleted_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_campaign_sponsor_updated ON campaigns (sponsor_id, updated_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_adrequest_updated ON ad_requests (updated_at)')
+        conn.commit()
+        print("Migration complete: delta sync fields are in place")
+        
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Error during migration: {str(e)}")
+        return False
+
+run_migration = add_sync_fields
+
+if __name__ == "__main__":
+    success = add_sync_fields()
+    sys.exit(0 if success else 1)
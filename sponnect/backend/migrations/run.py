@@ -14,6 +14,14 @@ def run_migrations():
         from add_campaign_status_field import run_migration as add_campaign_status_field
         add_campaign_status_field()
         
+        print("\n2. Adding delta sync fields")
+        from add_campaign_updated_at import run_migration as add_campaign_updated_at
+        add_campaign_updated_at()
+        
+        print("\n3. Adding budget ledger fields")
+        from add_budget_ledger import run_migration as add_budget_ledger
+        add_budget_ledger()
+        
         # Add other migrations here in order
         
         print("\nAll migrations completed successfully.")
@@ -12,7 +12,7 @@ import json
 from datetime import datetime, timedelta
 from faker import Faker
 from sqlalchemy import func
-from app import app
+from app import create_app, init_db
 from models import db, User, Campaign, AdRequest, NegotiationHistory, ProgressUpdate, Payment
 from constants import INDUSTRIES, CATEGORIES, INFLUENCER_CATEGORIES, INDUSTRY_TO_CATEGORY, DEFAULT_CATEGORY
 
@@ -421,7 +421,8 @@ def create_payments(ad_requests):
 
 def main():
     """Main function to generate mock data."""
-    with app.app_context():
+    with create_app().app_context():
+        init_db()  # Create any missing tables
         print("Starting mock data generation...")
         
         # Check if data already exists
@@ -18,10 +18,13 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 # Import Flask app, models and config
-from app import app, db
+from app import create_app, init_db
+from models import db
 from models import User
 from config import Config
 
+app = create_app()
+
 # Mock data lists
 sponsor_companies = [
     {
@@ -111,6 +114,7 @@ def create_mock_pending_users():
     recent_times = [now - timedelta(hours=random.randint(1, 24)) for _ in range(10)]
     
     with app.app_context():
+        init_db()  # Create any missing tables
         # Check if database already has these mock users to avoid duplicates
         existing_usernames = [u.username for u in User.query.all()]
         
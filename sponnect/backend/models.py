@@ -3,8 +3,9 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 from sqlalchemy.orm import validates
 from constants import INDUSTRIES, CATEGORIES, INFLUENCER_CATEGORIES, DEFAULT_CATEGORY
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # Reads can be routed to a replica
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -74,12 +75,15 @@ class Campaign(db.Model):
     start_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     end_date = db.Column(db.DateTime, nullable=True)
     budget = db.Column(db.Float, nullable=False)
+    committed_amount = db.Column(db.Float, nullable=False, default=0.0) # Sum of accepted ad request amounts (ledger)
+    paid_amount = db.Column(db.Float, nullable=False, default=0.0) # Sum of completed payments (ledger)
     visibility = db.Column(db.String(10), nullable=False, default='private', index=True) # 'public', 'private'
     status = db.Column(db.String(20), nullable=False, default='active', index=True) # 'draft', 'pending_approval', 'active', 'paused', 'completed', 'rejected'
     category = db.Column(db.String(50), nullable=True)  # Match category with sponsor's category
     goals = db.Column(db.Text, nullable=True)
     is_flagged = db.Column(db.Boolean, default=False, nullable=False) # For admin flagging
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Delta sync watermark
     sponsor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
 
     # Relationships
@@ -116,6 +120,8 @@ class AdRequest(db.Model):
     message = db.Column(db.Text, nullable=True) # Latest message/note in negotiation
     requirements = db.Column(db.Text, nullable=False)
     payment_amount = db.Column(db.Float, nullable=False)
+    committed_amount = db.Column(db.Float, nullable=False, default=0.0) # Amount reserved against the campaign budget on accept
+    paid_amount = db.Column(db.Float, nullable=False, default=0.0) # Sum of completed payments
     status = db.Column(db.String(20), nullable=False, default='Pending', index=True) # 'Pending', 'Accepted', 'Rejected', 'Negotiating'
     last_offer_by = db.Column(db.String(20), nullable=True) # 'sponsor' or 'influencer' - tracks negotiation turn
     is_flagged = db.Column(db.Boolean, default=False, nullable=False) # For admin flagging
@@ -187,10 +193,83 @@ class ProgressUpdate(db.Model):
     def __repr__(self):
         return f'<ProgressUpdate {self.id} for AdRequest {self.ad_request_id}>'
 
+class Tombstone(db.Model):
+    """Marker left behind when a synced row is deleted, so delta sync clients can drop it"""
+    __tablename__ = 'tombstones'
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # 'campaign' or 'ad_request'
+    entity_id = db.Column(db.Integer, nullable=False)
+    sponsor_id = db.Column(db.Integer, nullable=True, index=True)  # Owners at deletion time (rows are gone)
+    influencer_id = db.Column(db.Integer, nullable=True, index=True)
+    reason = db.Column(db.String(20), nullable=False, default='deleted')
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<Tombstone {self.entity_type}:{self.entity_id} ({self.reason})>'
+
+class ArchivedRecord(db.Model):
+    """Snapshot of an archived campaign or ad request, stored in the archive database"""
+    __bind_key__ = 'archive'
+    __tablename__ = 'archived_records'
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # 'campaign' or 'ad_request'
+    entity_id = db.Column(db.Integer, nullable=False)
+    campaign_id = db.Column(db.Integer, nullable=True, index=True)
+    sponsor_id = db.Column(db.Integer, nullable=True, index=True)  # Owners, for access checks on read-through
+    influencer_id = db.Column(db.Integer, nullable=True, index=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON: API view, raw row and child records
+    original_created_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('entity_type', 'entity_id', name='uq_archived_entity'),)
+
+    def __repr__(self):
+        return f'<ArchivedRecord {self.entity_type}:{self.entity_id}>'
+
+class EmailOutbox(db.Model):
+    """An email waiting to be sent, written in the same transaction as the change it reports"""
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.Text, nullable=False)  # Comma-separated addresses
+    cc = db.Column(db.Text, nullable=True)
+    bcc = db.Column(db.Text, nullable=True)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)  # HTML
+    source = db.Column(db.String(100), nullable=False, default='web')  # Task that queued it ('web' from a request)
+    dedupe_key = db.Column(db.String(100), unique=True, nullable=True)  # Queuing the same key twice keeps one email
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'sending', 'sent' or 'dead'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claim_token = db.Column(db.String(32), nullable=True, index=True)  # Dispatcher batch holding the row
+    claimed_until = db.Column(db.DateTime, nullable=True)  # Lease end; an expired 'sending' row is claimed again
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.status}>'
+
+class Notification(db.Model):
+    """An in-app notification in a user's inbox"""
+    __tablename__ = 'notifications'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # E.g. 'ad_request.countered', 'sponsor_activity'
+    title = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=True)
+    link = db.Column(db.String(255), nullable=True)  # Frontend path to open
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    read_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Notification {self.id} user:{self.user_id}>'
+
 # Add Indexes
 db.Index('idx_adrequest_campaign_influencer', AdRequest.campaign_id, AdRequest.influencer_id)
 db.Index('idx_adrequest_status', AdRequest.status)
 db.Index('idx_campaign_sponsor_visibility', Campaign.sponsor_id, Campaign.visibility)
-
-
-
+db.Index('idx_campaign_sponsor_updated', Campaign.sponsor_id, Campaign.updated_at)
+db.Index('idx_adrequest_updated', AdRequest.updated_at)
+db.Index('idx_email_outbox_due', EmailOutbox.status, EmailOutbox.next_attempt_at)
+db.Index('idx_notification_user_read_created', Notification.user_id, Notification.is_read, Notification.created_at)
@@ -0,0 +1,108 @@
+"""
+Change detection for the recurring stats emails.
+Each run fingerprints the numbers a recipient's email would show and skips the
+email when they match the last one sent, so users only hear about changes.
+A per-user daily cap (STATS_EMAIL_DAILY_LIMIT) bounds what is left. The last
+fingerprints and the daily counts live in Redis.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import date, datetime
+from sqlalchemy import inspect
+from sqlalchemy.orm.exc import UnmappedInstanceError
+
+from config import Config
+from redis_client import get_redis
+import metrics
+
+FINGERPRINT_PREFIX = 'sponnect:stats_email:fingerprint:'
+DAILY_COUNT_PREFIX = 'sponnect:stats_email:sent:'
+DAILY_COUNT_TTL = 2 * 24 * 3600
+
+
+def _canonical(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    try:
+        # Model instances count by identity and last change, not their repr
+        state = inspect(value)
+    except UnmappedInstanceError:
+        return str(value)
+    return [type(value).__name__, list(state.identity or ()), _canonical(getattr(value, 'updated_at', None))]
+
+
+def fingerprint(context):
+    """Compact hash of an email's context"""
+    payload = json.dumps(context, sort_keys=True, default=_canonical, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class StatsEmailGate:
+    """
+    Decides, per recipient of one notification run, whether their stats email
+    goes out, and counts the skipped ones. Redis errors let the email through.
+
+    Usage:
+        gate = StatsEmailGate('sponsor_stats')
+        for sponsor in ...:
+            stats = {...}
+            if gate.should_send(sponsor.id, stats):
+                ...send...
+                gate.record_sent(sponsor.id)
+        gate.finish()
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.suppressed = {'unchanged': 0, 'daily_limit': 0}
+        self._pending = {}
+
+    def _keys(self, user_id):
+        day = datetime.utcnow().strftime('%Y%m%d')
+        return f"{FINGERPRINT_PREFIX}{self.kind}:{user_id}", f"{DAILY_COUNT_PREFIX}{user_id}:{day}"
+
+    def should_send(self, user_id, context):
+        """Whether the user's email with this context should be sent"""
+        if not Config.STATS_EMAIL_CHANGE_DETECTION:
+            return True
+        current = fingerprint(context)
+        fingerprint_key, count_key = self._keys(user_id)
+        try:
+            pipe = get_redis().pipeline()
+            pipe.get(fingerprint_key)
+            pipe.get(count_key)
+            last, sent_today = pipe.execute()
+        except Exception as e:
+            logging.error(f"Failed to read stats email state for user {user_id}: {str(e)}")
+            return True
+        if last == current:
+            self.suppressed['unchanged'] += 1
+            return False
+        if Config.STATS_EMAIL_DAILY_LIMIT and int(sent_today or 0) >= Config.STATS_EMAIL_DAILY_LIMIT:
+            # The fingerprint isn't stored, so the change is sent once the cap resets
+            self.suppressed['daily_limit'] += 1
+            return False
+        self._pending[user_id] = current
+        return True
+
+    def record_sent(self, user_id):
+        """Remember the fingerprint of an email that was queued, and count it for the day"""
+        current = self._pending.pop(user_id, None)
+        if current is None:
+            return
+        fingerprint_key, count_key = self._keys(user_id)
+        try:
+            pipe = get_redis().pipeline()
+            pipe.set(fingerprint_key, current, ex=Config.STATS_EMAIL_FINGERPRINT_DAYS * 24 * 3600)
+            pipe.incr(count_key)
+            pipe.expire(count_key, DAILY_COUNT_TTL)
+            pipe.execute()
+        except Exception as e:
+            logging.error(f"Failed to record stats email for user {user_id}: {str(e)}")
+
+    def finish(self):
+        """Export the run's skipped emails; returns the total skipped"""
+        metrics.count_suppressed_emails(self.kind, self.suppressed)
+        return sum(self.suppressed.values())
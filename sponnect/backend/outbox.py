@@ -0,0 +1,356 @@
+"""
+Transactional email outbox for the Sponnect application.
+Emails are stored in the email_outbox table instead of being sent inline:
+queue_email() adds one to the caller's transaction, so it exists exactly when the
+business change commits, and send_email() commits one on its own. The dispatcher
+task claims due rows in batches, sends them over one SMTP connection, retries
+failures with exponential backoff and moves permanent failures (and emails out
+of attempts) to the 'dead' state, from where an admin can requeue them.
+"""
+
+import logging
+import random
+import smtplib
+import time
+import uuid
+from datetime import datetime, timedelta
+from celery import current_task
+from flask_mail import BadHeaderError
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from workers import celery
+from config import Config
+from models import db, EmailOutbox
+from mailer import mail, build_message
+from redis_client import get_redis
+from session_hooks import run_after_commit
+import metrics
+
+STATUS_PENDING = 'pending'
+STATUS_SENDING = 'sending'
+STATUS_SENT = 'sent'
+STATUS_DEAD = 'dead'
+
+KICK_KEY = 'sponnect:outbox:kicked'
+KICK_INTERVAL_MS = 1000  # At most one dispatcher kick per interval; a running dispatcher drains new rows too
+PURGE_BATCH_SIZE = 1000
+
+
+def _addresses(value):
+    if not value:
+        return None
+    return ','.join([value] if isinstance(value, str) else value)
+
+
+def _row_values(subject, to, body, cc, bcc, dedupe_key):
+    return {
+        'recipients': _addresses(to),
+        'cc': _addresses(cc),
+        'bcc': _addresses(bcc),
+        'subject': subject,
+        'body': body or '',
+        'source': current_task.name if current_task else 'web',
+        'dedupe_key': dedupe_key
+    }
+
+
+def queue_email(subject, to, body, cc=None, bcc=None, dedupe_key=None):
+    """
+    Add an email to the current transaction. It is sent once db.session commits
+    and never if it rolls back. A dedupe_key already in the outbox fails the commit.
+    """
+    email = EmailOutbox(**_row_values(subject, to, body, cc, bcc, dedupe_key))
+    db.session.add(email)
+    run_after_commit(db.session, kick_dispatcher)
+    return email
+
+
+def enqueue_email(subject, to, body, cc=None, bcc=None, dedupe_key=None):
+    """
+    Store an email in its own transaction, leaving db.session alone. Returns True
+    once it is stored (or was already queued under dedupe_key), False on failure.
+    """
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(EmailOutbox.__table__.insert(), _row_values(subject, to, body, cc, bcc, dedupe_key))
+    except IntegrityError:
+        logging.info(f"Email {dedupe_key} is already queued")
+        return True
+    except Exception as e:
+        logging.error(f"Failed to queue email to {to}: {str(e)}")
+        return False
+    kick_dispatcher()
+    return True
+
+
+def enqueue_emails(emails):
+    """
+    Store many (subject, to, body[, dedupe_key]) emails in one transaction, leaving
+    db.session alone. Returns the number stored or already queued under their
+    dedupe_key (0 on failure).
+    """
+    if not emails:
+        return 0
+    emails = [(email + (None,))[:4] for email in emails]
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(EmailOutbox.__table__.insert(),
+                         [_row_values(subject, to, body, None, None, key) for subject, to, body, key in emails])
+    except IntegrityError as e:
+        if not any(key for _, _, _, key in emails):
+            logging.error(f"Failed to queue {len(emails)} emails: {str(e)}")
+            return 0
+        # Some were queued before (e.g. a redelivered event): store the rest one by one
+        return sum(enqueue_email(subject, to, body, dedupe_key=key) for subject, to, body, key in emails)
+    except Exception as e:
+        logging.error(f"Failed to queue {len(emails)} emails: {str(e)}")
+        return 0
+    kick_dispatcher()
+    return len(emails)
+
+
+def kick_dispatcher():
+    """Start a dispatcher run now instead of waiting for the beat sweep"""
+    if not Config.OUTBOX_KICK_DISPATCHER:
+        return
+    try:
+        if not get_redis().set(KICK_KEY, 1, nx=True, px=KICK_INTERVAL_MS):
+            return
+    except Exception as e:
+        logging.error(f"Failed to throttle outbox kick: {str(e)}")
+    try:
+        dispatch_outbox.apply_async()
+    except Exception as e:
+        # The beat sweep sends it instead
+        logging.error(f"Failed to start outbox dispatcher: {str(e)}")
+
+
+def _due(now):
+    return or_(
+        and_(EmailOutbox.status == STATUS_PENDING, EmailOutbox.next_attempt_at <= now),
+        # Claimed by a worker that died or stalled before finishing its batch
+        and_(EmailOutbox.status == STATUS_SENDING, EmailOutbox.claimed_until < now)
+    )
+
+
+def claim_batch(limit=None):
+    """
+    Atomically claim up to limit due emails for this dispatcher and count the
+    attempt. Returns (claim token, emails).
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    due_ids = select(EmailOutbox.id).where(_due(now)) \
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(limit or Config.OUTBOX_BATCH_SIZE)
+    # The outer condition is re-checked against the latest row version, so two
+    # dispatchers racing for the same rows can't both claim one
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due_ids.scalar_subquery()), _due(now))
+        .values(status=STATUS_SENDING, claim_token=token, attempts=EmailOutbox.attempts + 1,
+                claimed_until=now + timedelta(seconds=Config.OUTBOX_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    emails = db.session.execute(
+        select(EmailOutbox).where(EmailOutbox.claim_token == token).order_by(EmailOutbox.id)
+    ).scalars().all()
+    # Detached, so the per-email commits don't expire them and reload each one
+    for email in emails:
+        db.session.expunge(email)
+    return token, emails
+
+
+def _finish(email, token, **values):
+    """Update a claimed email, unless its lease expired and another dispatcher took it"""
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id == email.id, EmailOutbox.claim_token == token)
+        .values(claim_token=None, claimed_until=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _is_permanent(error):
+    """Whether resending can't succeed: a refused recipient, 5xx reply or bad header"""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, BadHeaderError)):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False  # Our credentials, not the email
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return False
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt, doubling per attempt with up to 25% jitter"""
+    delay = min(Config.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), Config.OUTBOX_RETRY_MAX_SECONDS)
+    return delay * random.uniform(1, 1.25)
+
+
+def _mark_sent(email, token):
+    _finish(email, token, status=STATUS_SENT, sent_at=datetime.utcnow(), last_error=None)
+    metrics.count_email(sent=True, task=email.source)
+
+
+def _mark_failed(email, token, error):
+    message = f"{type(error).__name__}: {str(error)}"[:1000]
+    if _is_permanent(error) or email.attempts >= Config.OUTBOX_MAX_ATTEMPTS:
+        logging.error(f"Email {email.id} to {email.recipients} dead-lettered after "
+                      f"{email.attempts} attempt(s): {message}")
+        _finish(email, token, status=STATUS_DEAD, last_error=message)
+    else:
+        logging.warning(f"Email {email.id} to {email.recipients} failed (attempt {email.attempts}): {message}")
+        _finish(email, token, status=STATUS_PENDING, last_error=message,
+                next_attempt_at=datetime.utcnow() + timedelta(seconds=retry_delay(email.attempts)))
+    metrics.count_email(sent=False, task=email.source)
+
+
+def _release(emails, token):
+    """Hand unsent emails of a batch back without counting their attempt"""
+    if not emails:
+        return
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_([email.id for email in emails]), EmailOutbox.claim_token == token)
+        .values(status=STATUS_PENDING, claim_token=None, claimed_until=None,
+                attempts=EmailOutbox.attempts - 1, next_attempt_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _split(value):
+    return value.split(',') if value else None
+
+
+def _connection_lost(error):
+    # SMTPException subclasses OSError; only socket-level errors and disconnects count
+    return isinstance(error, smtplib.SMTPServerDisconnected) or \
+        (isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException))
+
+
+def send_batch(conn, emails, token, lease_ends, counts):
+    """
+    Send a claimed batch over an open SMTP connection, adding to counts['sent'] and
+    counts['failed']. Each email is marked as soon as it has gone, so a crash can
+    resend at most the email in flight. Re-raises when the connection is lost.
+    """
+    for index, email in enumerate(emails):
+        if time.monotonic() >= lease_ends:
+            # Another dispatcher may claim these once the lease ends; don't race it
+            _release(emails[index:], token)
+            return
+        try:
+            conn.send(build_message(email.subject, _split(email.recipients), email.body,
+                                    _split(email.cc), _split(email.bcc)))
+        except Exception as e:
+            _mark_failed(email, token, e)
+            counts['failed'] += 1
+            if _connection_lost(e):
+                # Retry the rest on the next connection without using up an attempt
+                _release(emails[index + 1:], token)
+                raise
+        else:
+            _mark_sent(email, token)
+            counts['sent'] += 1
+
+
+@celery.task(ignore_result=True)
+def dispatch_outbox():
+    """
+    Send due outbox emails batch by batch over one SMTP connection, until the
+    outbox is drained or OUTBOX_RUN_SECONDS have passed. Kicked when emails are
+    queued and swept by beat.
+    """
+    deadline = time.monotonic() + Config.OUTBOX_RUN_SECONDS
+    counts = {'sent': 0, 'failed': 0}
+    token, emails = claim_batch()
+    if not emails:
+        return counts
+    try:
+        with mail.connect() as conn:
+            while emails:
+                # Stop well before the lease ends so the batch is never sent twice
+                lease_ends = time.monotonic() + Config.OUTBOX_LEASE_SECONDS * 0.8
+                send_batch(conn, emails, token, lease_ends, counts)
+                if time.monotonic() >= deadline:
+                    break
+                token, emails = claim_batch()
+    except Exception as e:
+        # Couldn't connect or lost the connection: what's still claimed counts as a failed attempt
+        logging.error(f"Outbox dispatch failed: {str(e)}")
+        db.session.rollback()
+        unsent = db.session.execute(
+            select(EmailOutbox).where(EmailOutbox.claim_token == token)
+        ).scalars().all()
+        for email in unsent:
+            _mark_failed(email, token, e)
+            counts['failed'] += 1
+    if counts['sent'] or counts['failed']:
+        logging.info(f"Outbox dispatch: {counts['sent']} sent, {counts['failed']} failed")
+    return counts
+
+
+@celery.task()
+def purge_sent_emails():
+    """Delete sent emails older than OUTBOX_KEEP_SENT_DAYS, in batches"""
+    cutoff = datetime.utcnow() - timedelta(days=Config.OUTBOX_KEEP_SENT_DAYS)
+    purged = 0
+    while True:
+        ids = db.session.execute(
+            select(EmailOutbox.id).where(EmailOutbox.status == STATUS_SENT, EmailOutbox.sent_at < cutoff)
+            .limit(PURGE_BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(ids)))
+        db.session.commit()
+        purged += len(ids)
+    return purged
+
+
+def outbox_report(dead_limit=20):
+    """Email counts by status, the age of the oldest due email and the latest dead letters"""
+    counts = dict(db.session.execute(
+        select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)
+    ).all())
+    oldest_due = db.session.execute(
+        select(func.min(EmailOutbox.next_attempt_at)).where(EmailOutbox.status == STATUS_PENDING)
+    ).scalar()
+    dead = db.session.execute(
+        select(EmailOutbox).where(EmailOutbox.status == STATUS_DEAD)
+        .order_by(EmailOutbox.id.desc()).limit(dead_limit)
+    ).scalars().all()
+    now = datetime.utcnow()
+    return {
+        'counts': {status: counts.get(status, 0) for status in (STATUS_PENDING, STATUS_SENDING, STATUS_SENT, STATUS_DEAD)},
+        'oldest_due_seconds': round(max((now - oldest_due).total_seconds(), 0), 1) if oldest_due else None,
+        'dead': [{
+            'id': email.id,
+            'recipients': email.recipients,
+            'subject': email.subject,
+            'source': email.source,
+            'attempts': email.attempts,
+            'last_error': email.last_error,
+            'created_at': email.created_at.isoformat()
+        } for email in dead]
+    }
+
+
+def requeue_dead(email_id):
+    """Give a dead-lettered email a fresh set of attempts. Returns False if it isn't dead."""
+    result = db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id == email_id, EmailOutbox.status == STATUS_DEAD)
+        .values(status=STATUS_PENDING, attempts=0, next_attempt_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        db.session.rollback()
+        return False
+    run_after_commit(db.session, kick_dispatcher)
+    db.session.commit()
+    return True
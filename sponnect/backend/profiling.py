@@ -0,0 +1,162 @@
+"""
+Request-level SQL profiling for the Sponnect application.
+SQLAlchemy cursor events time every query on every engine. Per request the query
+count and DB time are returned as X-DB-Queries / X-DB-Time headers (outside
+production) and added to per-endpoint aggregates, which each process buffers
+and flushes to Redis every SQL_PROFILING_FLUSH_SECONDS. Queries slower than
+SLOW_QUERY_MS are written to the slow-query log with their EXPLAIN plan.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from buffered_writes import create_buffer
+from config import Config
+from redis_client import get_redis
+
+ENDPOINT_STATS_PREFIX = 'sponnect:sqlprof:endpoint:'
+ENDPOINTS_KEY = 'sponnect:sqlprof:endpoints'
+SLOW_QUERIES_KEY = 'sponnect:sqlprof:slow_queries'
+SLOW_QUERIES_KEPT = 50
+
+slow_query_logger = logging.getLogger('sponnect.slow_queries')
+_buffer = create_buffer('sql-profile', Config.SQL_PROFILING_FLUSH_SECONDS)
+
+
+def _configure_slow_query_log():
+    if Config.SLOW_QUERY_LOG and not slow_query_logger.handlers:
+        handler = logging.FileHandler(Config.SLOW_QUERY_LOG)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.INFO)
+        slow_query_logger.propagate = False
+
+
+def explain(conn, statement, parameters):
+    """
+    EXPLAIN plan of a statement as a list of text rows. Runs on a raw DBAPI cursor
+    so it doesn't re-enter the profiling events.
+    """
+    dialect = conn.dialect.name
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [' | '.join(str(col) for col in row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def log_slow_query(conn, statement, parameters, elapsed, executemany):
+    plan = None
+    if not executemany and statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE', 'WITH'):
+        try:
+            plan = explain(conn, statement, parameters)
+        except Exception as e:
+            plan = [f"EXPLAIN failed: {str(e)}"]
+    entry = {
+        'at': datetime.utcnow().isoformat(),
+        'ms': round(elapsed * 1000, 2),
+        'endpoint': request.endpoint if has_request_context() else None,
+        'statement': statement,
+        'plan': plan
+    }
+    slow_query_logger.info(json.dumps(entry))
+    _buffer.lpush_capped(SLOW_QUERIES_KEY, json.dumps(entry), SLOW_QUERIES_KEPT)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('sponnect_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('sponnect_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context() and 'db_profile' in g:
+        # Batch sub-requests share g; each open request counts the query
+        for counters in g.db_profile:
+            counters[0] += 1
+            counters[1] += elapsed
+    if Config.SQL_PROFILING_ENABLED and elapsed * 1000 >= Config.SLOW_QUERY_MS:
+        log_slow_query(conn, statement, parameters, elapsed, executemany)
+
+
+def _start_request():
+    g.setdefault('db_profile', []).append([0, 0.0])
+
+
+def _finish_request(response):
+    if not g.get('db_profile'):
+        return response
+    queries, db_time = g.db_profile.pop()
+    if Config.SQL_TIMING_HEADERS:
+        response.headers['X-DB-Queries'] = str(queries)
+        response.headers['X-DB-Time'] = f"{db_time * 1000:.2f}ms"
+    if request.endpoint and request.endpoint != 'static':
+        record_request(request.endpoint, queries, db_time)
+    return response
+
+
+def record_request(endpoint, queries, db_time):
+    """Add one request to the endpoint's aggregates (buffered; no Redis call on the request)"""
+    key = f"{ENDPOINT_STATS_PREFIX}{endpoint}"
+    _buffer.sadd(ENDPOINTS_KEY, endpoint)
+    _buffer.hincrby(key, 'requests', 1)
+    _buffer.hincrby(key, 'queries', queries)
+    _buffer.hincrbyfloat(key, 'db_ms', db_time * 1000)
+    _buffer.hmax(key, 'max_queries', queries)
+    _buffer.hmax(key, 'max_db_ms', round(db_time * 1000, 2))
+
+
+def endpoint_report():
+    """Per-endpoint query aggregates, most total DB time first"""
+    _buffer.flush()  # Include this process's latest requests
+    client = get_redis()
+    report = []
+    for endpoint in client.smembers(ENDPOINTS_KEY):
+        stats = client.hgetall(f"{ENDPOINT_STATS_PREFIX}{endpoint}")
+        requests = int(stats.get('requests', 0))
+        if not requests:
+            continue
+        db_ms = float(stats.get('db_ms', 0))
+        report.append({
+            'endpoint': endpoint,
+            'requests': requests,
+            'avg_queries': round(int(stats.get('queries', 0)) / requests, 2),
+            'max_queries': int(stats.get('max_queries', 0)),
+            'avg_db_ms': round(db_ms / requests, 2),
+            'max_db_ms': float(stats.get('max_db_ms', 0)),
+            'total_db_ms': round(db_ms, 2)
+        })
+    report.sort(key=lambda row: row['total_db_ms'], reverse=True)
+    return report
+
+
+def recent_slow_queries():
+    _buffer.flush()
+    return [json.loads(entry) for entry in get_redis().lrange(SLOW_QUERIES_KEY, 0, -1)]
+
+
+def reset_profile():
+    _buffer.flush()  # So nothing buffered before the reset lands after it
+    client = get_redis()
+    keys = [f"{ENDPOINT_STATS_PREFIX}{endpoint}" for endpoint in client.smembers(ENDPOINTS_KEY)]
+    client.delete(ENDPOINTS_KEY, SLOW_QUERIES_KEY, *keys)
+
+
+def init_profiling(app):
+    """Register the per-request hooks (the cursor events are global)"""
+    if not Config.SQL_PROFILING_ENABLED:
+        return
+    _configure_slow_query_log()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
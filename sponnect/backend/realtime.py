@@ -0,0 +1,249 @@
+"""
+Live negotiation updates for the Sponnect application.
+Ad request status changes, new negotiation history entries and progress update
+reviews are published to a per-user Redis pub/sub channel once their transaction
+commits, and streamed to the browser over Server-Sent Events. A commit hands its
+events to a background publisher thread, which sends them in one pipeline, so
+the request never waits on Redis.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config import Config
+from models import User, Campaign, AdRequest, NegotiationHistory, ProgressUpdate
+from redis_client import get_redis
+from session_hooks import run_after_commit
+
+CHANNEL_PREFIX = 'sponnect:events:user:'
+PUBLISH_QUEUE_SIZE = 10000  # Commits waiting for the publisher; beyond this their events are dropped
+PUBLISH_BATCH_SIZE = 100  # Commits sent per pipeline
+
+# Ad request columns whose change is worth pushing to the other party
+AD_REQUEST_TRACKED_FIELDS = ('status', 'payment_amount', 'last_offer_by', 'message', 'requirements')
+
+
+def user_channel(user_id):
+    """Pub/sub channel name for a user"""
+    return f"{CHANNEL_PREFIX}{user_id}"
+
+
+def _messages(events):
+    """(channel, message) pairs for [(user IDs, event type, data)]"""
+    messages = []
+    for user_ids, event_type, data in events:
+        message = json.dumps({'type': event_type, 'data': data})
+        messages.extend((user_channel(user_id), message) for user_id in set(user_ids) if user_id is not None)
+    return messages
+
+
+def publish_messages(messages):
+    """Send (channel, message) pairs in one pipeline"""
+    if not messages:
+        return
+    pipe = get_redis().pipeline(transaction=False)
+    for channel, message in messages:
+        pipe.publish(channel, message)
+    pipe.execute()
+
+
+def publish_to_users(user_ids, event_type, data):
+    """
+    Publish an event to the channel of each user immediately
+
+    Args:
+        user_ids (iterable): Recipient user IDs
+        event_type (str): SSE event name, e.g. 'ad_request.updated'
+        data (dict): JSON-serializable payload
+    """
+    publish_messages(_messages([(user_ids, event_type, data)]))
+
+
+# --- Background publisher ---
+_publish_queue = queue.Queue(maxsize=PUBLISH_QUEUE_SIZE)
+_publisher_pid = None
+_publisher_lock = threading.Lock()
+
+
+def _publish_queued(block):
+    """Send up to PUBLISH_BATCH_SIZE queued commits in one pipeline; returns how many were taken"""
+    batch = []
+    try:
+        batch.append(_publish_queue.get(block=block))
+        while len(batch) < PUBLISH_BATCH_SIZE:
+            batch.append(_publish_queue.get_nowait())
+    except queue.Empty:
+        pass
+    try:
+        publish_messages([message for messages in batch for message in messages])
+    except Exception as e:
+        # Live updates are best effort; clients catch up through delta sync
+        logging.error(f"Failed to publish realtime events of {len(batch)} commits: {str(e)}")
+    return len(batch)
+
+
+def _run_publisher():
+    while True:
+        _publish_queued(block=True)
+
+
+def _ensure_publisher():
+    """Start this process's publisher thread (again after a fork)"""
+    global _publisher_pid
+    if _publisher_pid == os.getpid():
+        return
+    with _publisher_lock:
+        if _publisher_pid != os.getpid():
+            threading.Thread(target=_run_publisher, name='realtime-publisher', daemon=True).start()
+            _publisher_pid = os.getpid()
+
+
+def publish_later(events):
+    """Queue [(user IDs, event type, data)] for the publisher thread; never blocks"""
+    messages = _messages(events)
+    if not messages:
+        return
+    _ensure_publisher()
+    try:
+        _publish_queue.put_nowait(messages)
+    except queue.Full:
+        logging.error(f"Realtime publish queue full, dropping {len(messages)} messages")
+
+
+@atexit.register
+def _drain_publish_queue():
+    if _publisher_pid == os.getpid():
+        while _publish_queue.qsize() and _publish_queued(block=False):
+            pass
+
+
+def serialize_ad_request_event(ad_request, campaign=None, influencer=None):
+    """Row-level payload matching the fields the ad request lists display"""
+    campaign = campaign or ad_request.campaign
+    influencer = influencer or ad_request.target_influencer
+    return {
+        'id': ad_request.id,
+        'campaign_id': ad_request.campaign_id,
+        'campaign_name': campaign.name if campaign else None,
+        'influencer_id': ad_request.influencer_id,
+        'influencer_name': influencer.username if influencer else None,
+        'status': ad_request.status,
+        'payment_amount': ad_request.payment_amount,
+        'last_offer_by': ad_request.last_offer_by,
+        'message': ad_request.message,
+        'requirements': ad_request.requirements,
+        'created_at_iso': ad_request.created_at.isoformat() if ad_request.created_at else None,
+        'updated_at_iso': ad_request.updated_at.isoformat() if ad_request.updated_at else None
+    }
+
+
+def get_in_flush(session, model, pk):
+    """
+    Resolve a related row during a flush. Relationship lazy loads return None for
+    objects inserted in this flush, so check the pending objects first.
+    """
+    if pk is None:
+        return None
+    for obj in session.new:
+        if isinstance(obj, model) and obj.id == pk:
+            return obj
+    return session.get(model, pk)
+
+
+def _participants(campaign, ad_request):
+    """Sponsor and influencer user IDs for an ad request"""
+    return [campaign.sponsor_id if campaign else None, ad_request.influencer_id]
+
+
+def _has_changes(obj, fields):
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_events(session, flush_context):
+    """
+    Build event payloads while the flushed state is still available and queue
+    them to be published only if the transaction commits
+    """
+    events = []
+    try:
+        for obj in list(session.new) + list(session.dirty):
+            is_new = obj in session.new
+            if isinstance(obj, AdRequest):
+                if is_new or _has_changes(obj, AD_REQUEST_TRACKED_FIELDS):
+                    campaign = get_in_flush(session, Campaign, obj.campaign_id)
+                    influencer = get_in_flush(session, User, obj.influencer_id)
+                    event_type = 'ad_request.created' if is_new else 'ad_request.updated'
+                    events.append((_participants(campaign, obj), event_type,
+                                   serialize_ad_request_event(obj, campaign, influencer)))
+            elif isinstance(obj, NegotiationHistory) and is_new:
+                ad_request = get_in_flush(session, AdRequest, obj.ad_request_id)
+                if ad_request:
+                    campaign = get_in_flush(session, Campaign, ad_request.campaign_id)
+                    events.append((_participants(campaign, ad_request), 'negotiation.created', {
+                        'id': obj.id,
+                        'ad_request_id': obj.ad_request_id,
+                        'user_id': obj.user_id,
+                        'user_role': obj.user_role,
+                        'action': obj.action,
+                        'message': obj.message,
+                        'payment_amount': obj.payment_amount,
+                        'created_at_iso': obj.created_at.isoformat() if obj.created_at else None
+                    }))
+            elif isinstance(obj, ProgressUpdate) and (is_new or _has_changes(obj, ('status', 'feedback'))):
+                ad_request = get_in_flush(session, AdRequest, obj.ad_request_id)
+                if ad_request:
+                    campaign = get_in_flush(session, Campaign, ad_request.campaign_id)
+                    event_type = 'progress_update.created' if is_new else 'progress_update.reviewed'
+                    events.append((_participants(campaign, ad_request), event_type, {
+                        'id': obj.id,
+                        'ad_request_id': obj.ad_request_id,
+                        'status': obj.status,
+                        'feedback': obj.feedback,
+                        'updated_at_iso': obj.updated_at.isoformat() if obj.updated_at else None
+                    }))
+    except Exception as e:
+        # Never let live updates break the business transaction
+        logging.error(f"Failed to collect realtime events: {str(e)}")
+        return
+
+    if events:
+        run_after_commit(session, lambda e=events: publish_later(e))
+
+
+def format_sse(event_type, data):
+    """Format one Server-Sent Events frame"""
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_user_events(user_id, heartbeat_seconds=None):
+    """
+    Generator yielding SSE frames for everything published to a user's channel.
+    Sends a comment line every heartbeat so proxies keep the connection open.
+    """
+    heartbeat_seconds = heartbeat_seconds or Config.SSE_HEARTBEAT_SECONDS
+    pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(user_channel(user_id))
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield f"retry: {Config.SSE_RETRY_MS}\n\n"
+        last_sent = time.monotonic()
+        while True:
+            message = pubsub.get_message(timeout=1.0)
+            if message and message.get('type') == 'message':
+                payload = json.loads(message['data'])
+                yield format_sse(payload['type'], payload['data'])
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= heartbeat_seconds:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+    finally:
+        pubsub.close()
@@ -0,0 +1,36 @@
+"""
+Shared Redis connections for the Sponnect application.
+Set REDIS_URL to 'memory://' to use an in-process fakeredis server instead of
+a real Redis (useful for tests and local development without Redis running).
+"""
+
+import redis
+from config import Config
+
+_clients = {}
+_fake_server = None
+
+
+def get_redis(url=None):
+    """
+    Get a cached Redis client
+
+    Args:
+        url (str, optional): Redis URL, defaults to Config.REDIS_URL
+
+    Returns:
+        redis.Redis: Client returning decoded (str) responses
+    """
+    global _fake_server
+    url = url or Config.REDIS_URL
+    client = _clients.get(url)
+    if client is None:
+        if url.startswith('memory://'):
+            import fakeredis  # Only needed for the in-process stand-in
+            if _fake_server is None:
+                _fake_server = fakeredis.FakeServer()
+            client = fakeredis.FakeRedis(server=_fake_server, decode_responses=True)
+        else:
+            client = redis.Redis.from_url(url, decode_responses=True, socket_connect_timeout=2)
+        _clients[url] = client
+    return client
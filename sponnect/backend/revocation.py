@@ -0,0 +1,310 @@
+"""
+Token revocation and account-state checks for the Sponnect application.
+Access tokens live for 24 hours, so deactivating or flagging a user, or logging
+out, has to reach tokens that are already issued. Every token is checked in the
+JWT blocklist loader (so on every @jwt_required and role_required route)
+against two Redis structures:
+
+- a hash of blocked user IDs ('inactive' or 'flagged'), kept in step with the
+  users table by an after-commit hook and resynced by sync_blocked_users()
+- a sorted set of revoked token IDs (jti) scored by expiry, written on logout
+
+Each web process keeps an LRU mirror of the answers. A pub/sub listener drops
+entries as they change, so almost every request is answered from memory; while
+the listener is down the mirror is bypassed and Redis is asked directly. If
+Redis is unavailable, the user's state is read from the database.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, g, jsonify
+from redis.exceptions import WatchError
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import Session
+
+from config import Config
+from extensions import jwt
+from models import db, User
+from redis_client import get_redis
+from session_hooks import run_after_commit
+from scheduling import non_overlapping
+from workers import celery
+
+BLOCKED_USERS_KEY = 'sponnect:revocation:users'
+REVOKED_TOKENS_KEY = 'sponnect:revocation:tokens'
+SYNCED_KEY = 'sponnect:revocation:synced_at'  # Set once the users hash matches the database
+SYNC_LOCK_KEY = 'sponnect:revocation:sync_lock'
+CHANNEL = 'sponnect:revocation'
+SYNC_ATTEMPTS = 3
+LISTENER_RETRY_SECONDS = 5
+
+# Responses for a token that may no longer be used (401, so the frontend logs out)
+MESSAGES = {
+    'revoked': {"message": "Token has been revoked", "error": "TOKEN_REVOKED"},
+    'inactive': {"message": "Account is disabled. Please contact support.", "error": "ACCOUNT_DISABLED"},
+    'flagged': {"message": "Your account has been flagged due to policy violations. Please contact support for assistance.",
+                "error": "ACCOUNT_FLAGGED"},
+}
+
+
+class RevocationMirror:
+    """
+    Thread-safe LRU of recent answers. Entries are only stored while the
+    pub/sub listener is live, and not if an invalidation arrived during the
+    lookup that produced them (the generation changed).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.live = False
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """(found, value)"""
+        with self._lock:
+            if not self.live or key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+
+    def put(self, key, value, generation):
+        with self._lock:
+            if not self.live or generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or all of them"""
+        with self._lock:
+            self.generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def set_live(self, live):
+        # Anything cached before (re)subscribing may have missed an invalidation
+        with self._lock:
+            self.live = live
+            self.generation += 1
+            self._entries.clear()
+
+
+_mirror = RevocationMirror(Config.REVOCATION_CACHE_SIZE)
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def _apply_message(data):
+    if data == '*':
+        _mirror.invalidate()
+    else:
+        kind, _, value = data.partition(':')
+        _mirror.invalidate((kind, value))
+
+
+def _listen():
+    """Keep the mirror in step with the channel; reconnects after errors"""
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_redis().pubsub()
+            pubsub.subscribe(CHANNEL)
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if not message:
+                    continue
+                if message['type'] == 'subscribe':
+                    _mirror.set_live(True)
+                elif message['type'] == 'message':
+                    _apply_message(message['data'])
+        except Exception as e:
+            logging.error(f"Revocation listener disconnected: {str(e)}")
+        finally:
+            _mirror.set_live(False)
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+        time.sleep(LISTENER_RETRY_SECONDS)
+
+
+def _ensure_listener():
+    """Start this process's listener thread (again after a fork)"""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid != os.getpid():
+            _mirror.set_live(False)
+            threading.Thread(target=_listen, name='revocation-listener', daemon=True).start()
+            _listener_pid = os.getpid()
+
+
+def _user_state(user):
+    """'inactive', 'flagged' or None for a user row"""
+    if user is None or not user.is_active:
+        return 'inactive'
+    return 'flagged' if user.is_flagged else None
+
+
+def sync_blocked_users():
+    """
+    Make the blocked users hash match the database. Watches the hash so a hook
+    update landing meanwhile isn't overwritten with older state.
+
+    Returns:
+        int: Entries added, changed or removed
+    """
+    client = get_redis()
+    with client.pipeline() as pipe:
+        for _ in range(SYNC_ATTEMPTS):
+            try:
+                pipe.watch(BLOCKED_USERS_KEY)
+                stored = pipe.hgetall(BLOCKED_USERS_KEY)
+                blocked = {str(user_id): 'inactive' if not is_active else 'flagged'
+                           for user_id, is_active, is_flagged in db.session.query(
+                               User.id, User.is_active, User.is_flagged).filter(
+                               or_(User.is_active.is_(False), User.is_flagged.is_(True)))}
+                removed = [user_id for user_id in stored if user_id not in blocked]
+                changed = {user_id: state for user_id, state in blocked.items() if stored.get(user_id) != state}
+                pipe.multi()
+                if removed:
+                    pipe.hdel(BLOCKED_USERS_KEY, *removed)
+                if changed:
+                    pipe.hset(BLOCKED_USERS_KEY, mapping=changed)
+                pipe.set(SYNCED_KEY, datetime.utcnow().isoformat())
+                if removed or changed:
+                    pipe.publish(CHANNEL, '*')
+                pipe.execute()
+                return len(removed) + len(changed)
+            except WatchError:
+                continue
+    raise RuntimeError('Blocked users kept changing during the sync')
+
+
+def _lookup(user_id, jti):
+    """(user state, token state) from Redis, syncing the users hash first if it never was"""
+    client = get_redis()
+    pipe = client.pipeline(transaction=False)
+    pipe.hget(BLOCKED_USERS_KEY, user_id)
+    pipe.zscore(REVOKED_TOKENS_KEY, jti)
+    pipe.exists(SYNCED_KEY)
+    user_state, revoked, synced = pipe.execute()
+    if not synced:
+        if not client.set(SYNC_LOCK_KEY, 1, nx=True, ex=60):
+            raise RuntimeError('Blocked users are being synced')  # Answered from the database meanwhile
+        try:
+            sync_blocked_users()
+        finally:
+            client.delete(SYNC_LOCK_KEY)
+        user_state = client.hget(BLOCKED_USERS_KEY, user_id)
+    return user_state, 'revoked' if revoked is not None else None
+
+
+def token_state(payload):
+    """
+    Whether a decoded access token may still be used
+
+    Returns:
+        str: None if it may, otherwise 'revoked', 'inactive' or 'flagged'
+    """
+    if not Config.TOKEN_REVOCATION:
+        return None
+    user_id = str(payload.get(current_app.config.get('JWT_IDENTITY_CLAIM', 'sub')))
+    jti = payload.get('jti') or ''
+    _ensure_listener()
+    generation = _mirror.generation
+    user_found, user_state = _mirror.get(('user', user_id))
+    token_found, token_revoked = _mirror.get(('jti', jti))
+    if user_found and token_found:
+        return user_state or token_revoked
+    try:
+        user_state, token_revoked = _lookup(user_id, jti)
+    except Exception as e:
+        # A revoked token can't be told apart without Redis; account state still can
+        logging.error(f"Revocation lookup failed, reading user {user_id} from the database: {str(e)}")
+        return _user_state(db.session.get(User, int(user_id)))
+    _mirror.put(('user', user_id), user_state, generation)
+    _mirror.put(('jti', jti), token_revoked, generation)
+    return user_state or token_revoked
+
+
+@jwt.token_in_blocklist_loader
+def _check_token(jwt_header, jwt_payload):
+    g.token_state = token_state(jwt_payload)
+    return g.token_state is not None
+
+
+@jwt.revoked_token_loader
+def _revoked_response(jwt_header, jwt_payload):
+    return jsonify(MESSAGES.get(g.get('token_state'), MESSAGES['revoked'])), 401
+
+
+def revoke_token(jti, expires_at):
+    """Revoke one token until it expires (epoch seconds)"""
+    client = get_redis()
+    pipe = client.pipeline()
+    pipe.zadd(REVOKED_TOKENS_KEY, {jti: expires_at})
+    pipe.zremrangebyscore(REVOKED_TOKENS_KEY, '-inf', time.time())  # Expired tokens are rejected anyway
+    pipe.publish(CHANNEL, f"jti:{jti}")
+    pipe.execute()
+
+
+def _publish_user_states(states):
+    """Write {user id: state or None} to the users hash and tell every mirror"""
+    try:
+        pipe = get_redis().pipeline()
+        for user_id, state in states.items():
+            if state:
+                pipe.hset(BLOCKED_USERS_KEY, user_id, state)
+            else:
+                pipe.hdel(BLOCKED_USERS_KEY, user_id)
+            pipe.publish(CHANNEL, f"user:{user_id}")
+        pipe.execute()
+    except Exception as e:
+        # sync_revoked_users repairs the hash; a missed publish is covered by the listener's resubscribe
+        logging.error(f"Failed to publish account state of {len(states)} users: {str(e)}")
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_user_states(session, flush_context):
+    """Record users deactivated, reactivated, flagged or unflagged, applied if the transaction commits"""
+    if not Config.TOKEN_REVOCATION:
+        return
+    states = {}
+    try:
+        for obj in session.dirty:
+            if isinstance(obj, User) and any(inspect(obj).attrs[field].history.has_changes()
+                                             for field in ('is_active', 'is_flagged')):
+                states[str(obj.id)] = _user_state(obj)
+    except Exception as e:
+        logging.error(f"Failed to collect account state changes: {str(e)}")
+        return
+    if states:
+        run_after_commit(session, lambda s=states: _publish_user_states(s))
+
+
+@celery.task()
+@non_overlapping()
+def sync_revoked_users():
+    """Periodic repair of the blocked users hash against the database"""
+    if not Config.TOKEN_REVOCATION:
+        return "Token revocation disabled"
+    try:
+        changed = sync_blocked_users()
+    except Exception as e:
+        error_message = f"Error syncing blocked users: {str(e)}"
+        logging.error(error_message)
+        return error_message
+    return f"Blocked users synced, entries corrected: {changed}"
@@ -0,0 +1,12 @@
+"""
+API route blueprints, split by role. URLs keep their full /api/... paths.
+"""
+
+from routes import auth, admin, sponsor, influencer, charts, search, common
+
+BLUEPRINTS = (auth.bp, admin.bp, sponsor.bp, influencer.bp, charts.bp, search.bp, common.bp)
+
+
+def register_blueprints(app):
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
@@ -0,0 +1,746 @@
+"""
+Admin routes: approvals, moderation, user management and background task triggers
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from sqlalchemy import or_, and_
+from config import Config
+from models import db, User, Campaign, AdRequest
+from extensions import cache
+from decorators import admin_required
+from formatting import format_datetime
+from serializers import (
+    serialize_ad_request_detail, serialize_campaign_basic, serialize_campaign_detail,
+    serialize_pagination, serialize_user_profile
+)
+from archive import find_archived, archived_payload
+from db_routing import read_only
+from throttling import rate_limited
+from activity_counters import counts_since
+
+bp = Blueprint('admin', __name__)
+
+
+# == Admin Actions ==
+@bp.route('/api/admin/stats', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=60)  # Cache for 60 seconds to balance freshness and performance
+def admin_dashboard_stats():
+    """Get dashboard stats for admin"""
+    # Get counts for different user types
+    total_users = User.query.count()
+    active_sponsors = User.query.filter_by(role='sponsor', is_active=True, sponsor_approved=True).count()
+    pending_sponsors = User.query.filter_by(role='sponsor', sponsor_approved=None).count()
+    active_influencers = User.query.filter_by(role='influencer', is_active=True, influencer_approved=True).count()
+    pending_influencers = User.query.filter_by(role='influencer', influencer_approved=None).count()
+    
+    # Get campaign counts
+    public_campaigns = Campaign.query.filter_by(visibility='public').count()
+    private_campaigns = Campaign.query.filter_by(visibility='private').count()
+    
+    # Get ad request status counts
+    ad_requests_by_status = {}
+    for status in ['Pending', 'Accepted', 'Rejected', 'Negotiating']:
+        count = AdRequest.query.filter_by(status=status).count()
+        ad_requests_by_status[status] = count
+    
+    # Get flagged content count
+    flagged_users = User.query.filter_by(is_flagged=True).count()
+    flagged_campaigns = Campaign.query.filter_by(is_flagged=True).count()
+    
+    # Get pending users (both sponsors and influencers)
+    pending_users = User.query.filter(
+        or_(
+            and_(User.role == 'sponsor', User.sponsor_approved == None),
+            and_(User.role == 'influencer', User.influencer_approved == None)
+        )
+    ).all()
+    
+    # Simple data collection for pending users
+    pending_users_data = []
+    for user in pending_users[:5]:  # Limit to 5 users for the dashboard
+        user_data = {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'role': user.role,
+            'created_at': format_datetime(user.created_at),
+            'company_name': user.company_name if user.role == 'sponsor' else None,
+            'influencer_name': user.influencer_name if user.role == 'influencer' else None
+        }
+        pending_users_data.append(user_data)
+    
+    return jsonify({
+        'total_users': total_users,
+        'active_sponsors': active_sponsors,
+        'pending_sponsors': pending_sponsors,
+        'active_influencers': active_influencers,
+        'pending_influencers': pending_influencers,
+        'public_campaigns': public_campaigns,
+        'private_campaigns': private_campaigns,
+        'ad_requests_by_status': ad_requests_by_status,
+        'flagged_users': flagged_users,
+        'flagged_campaigns': flagged_campaigns,
+        'pending_users': pending_users_data  # Include recent pending users data
+    }), 200
+
+@bp.route('/api/admin/pending_sponsors', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=15)  # Cache for 15 seconds to ensure fresh data
+def admin_get_pending_sponsors():
+    pending = User.query.filter_by(role='sponsor', sponsor_approved=None, is_active=True).all()
+    return jsonify([serialize_user_profile(user) for user in pending]), 200
+
+@bp.route('/api/admin/pending_influencers', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=15)  # Cache for 15 seconds to ensure fresh data
+def admin_get_pending_influencers():
+    pending = User.query.filter_by(role='influencer', influencer_approved=None, is_active=True).all()
+    return jsonify([serialize_user_profile(user) for user in pending]), 200
+
+@bp.route('/api/admin/pending_users', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=15)  # Cache for 15 seconds to ensure fresh data
+def admin_get_pending_users():
+    """Get all pending users (both sponsors and influencers)"""
+    pending_sponsors = User.query.filter_by(role='sponsor', sponsor_approved=None, is_active=True).all()
+    pending_influencers = User.query.filter_by(role='influencer', influencer_approved=None, is_active=True).all()
+    
+    all_pending = pending_sponsors + pending_influencers
+    return jsonify([serialize_user_profile(user) for user in all_pending]), 200
+
+@bp.route('/api/admin/sponsors/<int:sponsor_id>/approve', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_approve_sponsor(sponsor_id):
+    sponsor = User.query.filter_by(id=sponsor_id, role='sponsor').first()
+    
+    if not sponsor:
+        return jsonify({"message": "Sponsor not found"}), 404
+        
+    sponsor.sponsor_approved = True
+    sponsor.is_active = True  # Also activate the account
+    
+    db.session.commit()
+    
+    # Send account approval notification (the notifications event consumer sends it otherwise)
+    if not Config.DOMAIN_EVENTS:
+        from user_notifications import send_account_approval_notification
+        send_account_approval_notification.delay(sponsor.id)
+    
+    return jsonify({"message": "Sponsor approved successfully"}), 200
+
+@bp.route('/api/admin/influencers/<int:influencer_id>/approve', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_approve_influencer(influencer_id):
+    influencer = User.query.filter_by(id=influencer_id, role='influencer').first()
+    
+    if not influencer:
+        return jsonify({"message": "Influencer not found"}), 404
+        
+    influencer.influencer_approved = True
+    influencer.is_active = True  # Also activate the account
+    
+    db.session.commit()
+    
+    # Send account approval notification (the notifications event consumer sends it otherwise)
+    if not Config.DOMAIN_EVENTS:
+        from user_notifications import send_account_approval_notification
+        send_account_approval_notification.delay(influencer.id)
+    
+    return jsonify({"message": "Influencer approved successfully"}), 200
+
+@bp.route('/api/admin/sponsors/<int:sponsor_id>/reject', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_reject_sponsor(sponsor_id):
+    sponsor = db.session.get(User, sponsor_id)
+    if not sponsor or sponsor.role != 'sponsor': return jsonify({"message": "Sponsor not found"}), 404
+    if sponsor.sponsor_approved is not False: return jsonify({"message": "Can only reject pending sponsors"}), 400
+    sponsor.is_active = False # Deactivate rejected sponsors
+    sponsor.sponsor_approved = None # Reset approval status, maybe? Or keep False. Keep False.
+    db.session.commit()
+    return jsonify({"message": "Sponsor rejected and deactivated"}), 200
+
+@bp.route('/api/admin/influencers/<int:influencer_id>/reject', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_reject_influencer(influencer_id):
+    influencer = db.session.get(User, influencer_id)
+    if not influencer or influencer.role != 'influencer': return jsonify({"message": "Influencer not found"}), 404
+    if influencer.influencer_approved is not False: return jsonify({"message": "Can only reject pending influencers"}), 400
+    influencer.is_active = False # Deactivate rejected influencers
+    influencer.influencer_approved = None # Reset approval status
+    db.session.commit()
+    return jsonify({"message": "Influencer rejected and deactivated"}), 200
+
+@bp.route('/api/admin/users/<int:user_id>/flag', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_flag_user(user_id):
+    user = db.session.get(User, user_id)
+    if not user or user.role == 'admin': return jsonify({"message": "User not found or cannot flag admin"}), 404
+    
+    # Flag the user
+    user.is_flagged = True
+    
+    # Cascade flag to related content
+    if user.role == 'sponsor':
+        # Flag all campaigns by this sponsor
+        campaigns = Campaign.query.filter_by(sponsor_id=user_id).all()
+        for campaign in campaigns:
+            campaign.is_flagged = True
+        
+        # Flag all ad requests associated with these campaigns
+        for campaign in campaigns:
+            ad_requests = AdRequest.query.filter_by(campaign_id=campaign.id).all()
+            for ad_request in ad_requests:
+                ad_request.is_flagged = True
+    
+    elif user.role == 'influencer':
+        # Flag all ad requests where this user is the influencer
+        ad_requests = AdRequest.query.filter_by(influencer_id=user_id).all()
+        for ad_request in ad_requests:
+            ad_request.is_flagged = True
+    
+    db.session.commit()
+    
+    # Count affected items for the response
+    flagged_campaigns = 0
+    flagged_ad_requests = 0
+    
+    if user.role == 'sponsor':
+        flagged_campaigns = Campaign.query.filter_by(sponsor_id=user_id, is_flagged=True).count()
+        flagged_ad_requests = AdRequest.query.join(Campaign).filter(Campaign.sponsor_id == user_id, AdRequest.is_flagged == True).count()
+    elif user.role == 'influencer':
+        flagged_ad_requests = AdRequest.query.filter_by(influencer_id=user_id, is_flagged=True).count()
+    
+    return jsonify({
+        "message": "User flagged successfully",
+        "flagged_items": {
+            "user": user.username,
+            "role": user.role,
+            "campaigns": flagged_campaigns,
+            "ad_requests": flagged_ad_requests
+        }
+    }), 200
+
+@bp.route('/api/admin/users/<int:user_id>/unflag', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_unflag_user(user_id):
+    user = db.session.get(User, user_id)
+    if not user: return jsonify({"message": "User not found"}), 404
+    
+    # Unflag the user
+    user.is_flagged = False
+    
+    # Check if we should cascade unflag
+    cascade = request.args.get('cascade', 'false').lower() == 'true'
+    
+    if cascade:
+        # Cascade unflag to related content
+        if user.role == 'sponsor':
+            # Unflag all campaigns by this sponsor
+            campaigns = Campaign.query.filter_by(sponsor_id=user_id).all()
+            for campaign in campaigns:
+                campaign.is_flagged = False
+            
+            # Unflag all ad requests associated with these campaigns
+            for campaign in campaigns:
+                ad_requests = AdRequest.query.filter_by(campaign_id=campaign.id).all()
+                for ad_request in ad_requests:
+                    ad_request.is_flagged = False
+        
+        elif user.role == 'influencer':
+            # Unflag all ad requests where this user is the influencer
+            ad_requests = AdRequest.query.filter_by(influencer_id=user_id).all()
+            for ad_request in ad_requests:
+                ad_request.is_flagged = False
+                
+        unflagged_campaigns = 0
+        unflagged_ad_requests = 0
+        
+        if user.role == 'sponsor':
+            unflagged_campaigns = Campaign.query.filter_by(sponsor_id=user_id).count()
+            unflagged_ad_requests = AdRequest.query.join(Campaign).filter(Campaign.sponsor_id == user_id).count()
+        elif user.role == 'influencer':
+            unflagged_ad_requests = AdRequest.query.filter_by(influencer_id=user_id).count()
+            
+        message = "User unflagged with cascade"
+        response_data = {
+            "unflagged_items": {
+                "user": user.username,
+                "role": user.role,
+                "campaigns": unflagged_campaigns,
+                "ad_requests": unflagged_ad_requests
+            }
+        }
+    else:
+        message = "User unflagged"
+        response_data = {}
+    
+    db.session.commit()
+    
+    return jsonify({"message": message, **response_data}), 200
+
+@bp.route('/api/admin/campaigns/<int:campaign_id>/flag', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_flag_campaign(campaign_id):
+    campaign = db.session.get(Campaign, campaign_id)
+    if not campaign: return jsonify({"message": "Campaign not found"}), 404
+    campaign.is_flagged = True
+    db.session.commit()
+    return jsonify({"message": "Campaign flagged"}), 200
+
+@bp.route('/api/admin/campaigns', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+def admin_list_campaigns():
+    """Get list of campaigns with pagination and filtering options"""
+    # Parse query parameters
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 10, type=int), 100)  # Cap at 100 items
+    
+    # Filtering options
+    name = request.args.get('name', '')
+    flagged = request.args.get('flagged', '').lower() == 'true'
+    status = request.args.get('status', '')
+    sponsor_id = request.args.get('sponsor_id')
+    budget_min = request.args.get('budget_min', type=float)
+    budget_max = request.args.get('budget_max', type=float)
+    
+    # Sorting options
+    sort_by = request.args.get('sort_by', 'created_at')
+    sort_order = request.args.get('sort_order', 'desc')
+    
+    # Build query
+    query = Campaign.query
+    
+    # Apply filters
+    if name:
+        query = query.filter(Campaign.name.ilike(f'%{name}%'))
+    if flagged:
+        query = query.filter(Campaign.is_flagged == True)
+    if status:
+        query = query.filter(Campaign.status == status)
+    if sponsor_id:
+        try:
+            sponsor_id = int(sponsor_id)
+            query = query.filter(Campaign.sponsor_id == sponsor_id)
+        except (ValueError, TypeError):
+            pass  # Invalid sponsor_id, ignore filter
+    
+    # Apply budget filters
+    if budget_min is not None:
+        query = query.filter(Campaign.budget >= budget_min)
+    if budget_max is not None:
+        query = query.filter(Campaign.budget <= budget_max)
+    
+    # Apply sorting
+    if sort_by:
+        if hasattr(Campaign, sort_by):
+            sort_attr = getattr(Campaign, sort_by)
+            if sort_order.lower() == 'asc':
+                query = query.order_by(sort_attr.asc())
+            else:
+                query = query.order_by(sort_attr.desc())
+        else:
+            # Default sort if invalid sort_by
+            query = query.order_by(Campaign.created_at.desc())
+    else:
+        # Default sort
+        query = query.order_by(Campaign.created_at.desc())
+    
+    # Paginate
+    campaigns = query.paginate(page=page, per_page=per_page)
+    
+    # Return response
+    return jsonify({
+        'campaigns': [serialize_campaign_detail(c) for c in campaigns.items],
+        'pagination': serialize_pagination(campaigns)
+    }), 200
+
+
+# == Admin Actions (Additions/Modifications) ==
+
+@bp.route('/api/admin/users', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+def admin_list_users():
+    """List and search users with filters and pagination."""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 10, type=int)
+        search_term = request.args.get('search', None, type=str)
+        role_filter = request.args.get('role', None, type=str)
+        flagged_filter = request.args.get('flagged', None, type=str) # 'true' or 'false'
+        status_filter = request.args.get('status', None, type=str) # 'active', 'inactive', 'pending_approval', 'approved'
+
+        query = User.query.filter(User.role != 'admin') # Exclude admin itself
+
+        # Apply Filters
+        if role_filter and role_filter in ['sponsor', 'influencer']:
+            query = query.filter(User.role == role_filter)
+
+        if flagged_filter is not None:
+            query = query.filter(User.is_flagged == (flagged_filter.lower() == 'true'))
+
+        if status_filter:
+            if status_filter == 'active':
+                query = query.filter(User.is_active == True)
+            elif status_filter == 'inactive':
+                query = query.filter(User.is_active == False)
+            elif status_filter == 'pending_approval':
+                query = query.filter(User.role == 'sponsor', User.sponsor_approved == False, User.is_active == True)
+            elif status_filter == 'approved':
+                 query = query.filter(User.role == 'sponsor', User.sponsor_approved == True, User.is_active == True)
+
+        # Apply Search (simple search on username, sponsor/influencer name)
+        if search_term:
+            search_like = f"%{search_term}%"
+            query = query.filter(
+                or_(
+                    User.username.ilike(search_like),
+                    User.company_name.ilike(search_like),
+                    User.influencer_name.ilike(search_like)
+                )
+            )
+
+        # Apply Sorting (optional, e.g., by creation date or username)
+        query = query.order_by(User.created_at.desc())
+
+        # Apply Pagination
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False) # error_out=False avoids 404 on invalid page [2, 8]
+
+        return jsonify({
+            'users': [serialize_user_profile(user) for user in pagination.items],
+            'pagination': serialize_pagination(pagination)
+        }), 200
+
+    except Exception as e:
+        # Log the exception e
+        return jsonify({"message": "An error occurred while fetching users."}), 500
+
+
+@bp.route('/api/admin/users/<int:user_id>/deactivate', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_deactivate_user(user_id):
+    user = db.session.get(User, user_id)
+    if not user or user.role == 'admin':
+        return jsonify({"message": "User not found or cannot deactivate admin"}), 404
+    if not user.is_active:
+         return jsonify({"message": "User already inactive"}), 400
+
+    user.is_active = False
+    db.session.commit()
+    return jsonify({"message": "User deactivated successfully"}), 200
+
+@bp.route('/api/admin/users/<int:user_id>/activate', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_activate_user(user_id):
+    user = db.session.get(User, user_id)
+    if not user or user.role == 'admin':
+        return jsonify({"message": "User not found"}), 404
+    if user.is_active:
+         return jsonify({"message": "User already active"}), 400
+
+    # Special check for sponsors: only activate if they are approved
+    if user.role == 'sponsor' and not user.sponsor_approved:
+         return jsonify({"message": "Cannot activate a sponsor whose registration is not approved"}), 400
+
+    user.is_active = True
+    db.session.commit()
+    return jsonify({"message": "User activated successfully"}), 200
+
+# Add API endpoint for testing Celery integration
+@bp.route('/api/admin/test/celery', methods=['POST'])
+@jwt_required()
+@admin_required
+def test_celery():
+    """Endpoint for testing Celery integration"""
+    data = request.get_json()
+    email = data.get('email', get_jwt_identity())
+    
+    # Validate email
+    if not email or '@' not in email:
+        return jsonify({"error": "Valid email address is required"}), 400
+    
+    # Send a test email using Celery
+    from task import send_test_email
+    task = send_test_email.delay(email)
+    
+    return jsonify({
+        "message": "Test task dispatched successfully",
+        "task_id": task.id
+    }), 202
+
+@bp.route('/api/admin/test/reminder', methods=['POST'])
+@jwt_required()
+@admin_required
+def test_minute_reminder():
+    """Endpoint for testing the minute reminder Celery task"""
+    # Trigger the minute reminder task immediately
+    from task import send_minute_test_reminder
+    task = send_minute_test_reminder.delay()
+    
+    return jsonify({
+        "message": "Minute reminder test task dispatched successfully",
+        "task_id": task.id,
+        "note": "Check Mailhog for the test email. The task is also scheduled to run every minute with Celery Beat."
+    }), 202
+
+# Add API endpoint for exporting user data
+@bp.route('/api/admin/export/users', methods=['POST'])
+@jwt_required()
+@admin_required
+def export_users():
+    """Trigger a background task to export all users data"""
+    admin_id = get_jwt_identity()
+    
+    # Import and trigger export task
+    from task import export_user_data
+    task = export_user_data.delay(admin_id)
+    
+    return jsonify({
+        "message": "User export started in background",
+        "task_id": task.id,
+        "status": "Processing"
+    }), 200
+
+# Add API endpoint for checking Celery task status
+@bp.route('/api/admin/tasks/<task_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def check_task_status(task_id):
+    """Check the status of a background task"""
+    from workers import celery
+    task = celery.AsyncResult(task_id)
+    
+    response = {
+        "task_id": task_id,
+        "status": task.state
+    }
+    
+    if task.state == 'SUCCESS':
+        response["result"] = task.result
+    elif task.state == 'FAILURE':
+        response["error"] = str(task.result)
+    
+    return jsonify(response), 200
+
+@bp.route('/api/admin/schedule', methods=['GET'])
+@jwt_required()
+@admin_required
+def admin_schedule_report():
+    """Beat schedule with recorded run durations, for tuning task cadences"""
+    from scheduling import schedule_report
+    from workers import celery
+    return jsonify({"timezone": str(celery.timezone), "entries": schedule_report()}), 200
+
+@bp.route('/api/admin/metrics/db', methods=['GET'])
+@jwt_required()
+@admin_required
+def admin_db_metrics():
+    """Per-endpoint query counts and DB time, plus the most recent slow queries"""
+    from profiling import endpoint_report, recent_slow_queries
+    return jsonify({
+        "slow_query_ms": Config.SLOW_QUERY_MS,
+        "endpoints": endpoint_report(),
+        "slow_queries": recent_slow_queries()
+    }), 200
+
+@bp.route('/api/admin/metrics/db', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def admin_reset_db_metrics():
+    """Start a fresh profiling window"""
+    from profiling import reset_profile
+    reset_profile()
+    return jsonify({"message": "DB metrics reset"}), 200
+
+@bp.route('/api/admin/email-outbox', methods=['GET'])
+@jwt_required()
+@admin_required
+def admin_email_outbox():
+    """Outbox counts by status, the oldest due email's age and the latest dead letters"""
+    from outbox import outbox_report
+    return jsonify(outbox_report()), 200
+
+@bp.route('/api/admin/email-outbox/<int:email_id>/retry', methods=['POST'])
+@jwt_required()
+@admin_required
+def admin_retry_email(email_id):
+    """Requeue a dead-lettered email with a fresh set of attempts"""
+    from outbox import requeue_dead
+    if not requeue_dead(email_id):
+        return jsonify({"message": "No dead-lettered email with that ID"}), 404
+    return jsonify({"message": "Email requeued"}), 200
+
+@bp.route('/api/admin/domain-events', methods=['GET'])
+@jwt_required()
+@admin_required
+def admin_domain_events():
+    """Domain event stream length, consumer group lag and per-day event counts (?days=, default 7)"""
+    from domain_events import stream_report
+    from event_consumers import daily_event_counts
+    days = min(max(request.args.get('days', 7, type=int), 1), 35)
+    return jsonify({**stream_report(), 'daily_counts': daily_event_counts(days)}), 200
+
+@bp.route('/api/admin/test/activity-update', methods=['POST'])
+@jwt_required()
+@admin_required
+def test_activity_update():
+    """Endpoint for testing the minute activity update Celery task"""
+    # Trigger the minute activity update task immediately
+    from user_notifications import send_minute_activity_update
+    task = send_minute_activity_update.delay()
+    
+    return jsonify({
+        "message": "Activity update test task dispatched successfully",
+        "task_id": task.id,
+        "note": "Check Mailhog for the test emails. The task is also scheduled to run every minute with Celery Beat."
+    }), 202
+
+@bp.route('/api/admin/ad_requests/<int:ad_request_id>/flag', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_flag_ad_request(ad_request_id):
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request: return jsonify({"message": "Ad request not found"}), 404
+    ad_request.is_flagged = True
+    db.session.commit()
+    return jsonify({"message": "Ad request flagged"}), 200
+
+@bp.route('/api/admin/ad_requests/<int:ad_request_id>/unflag', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def admin_unflag_ad_request(ad_request_id):
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request: return jsonify({"message": "Ad request not found"}), 404
+    ad_request.is_flagged = False
+    db.session.commit()
+    return jsonify({"message": "Ad request unflagged"}), 200
+
+@bp.route('/api/admin/ad_requests', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+def admin_list_ad_requests():
+    """Get list of ad requests with pagination and filtering options"""
+    # Parse query parameters
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 10, type=int), 100)  # Cap at 100 items
+    
+    # Filtering options
+    status = request.args.get('status', '')
+    flagged = request.args.get('flagged', '').lower() == 'true'
+    campaign_id = request.args.get('campaign_id', type=int)
+    influencer_id = request.args.get('influencer_id', type=int)
+    
+    # Build query
+    query = AdRequest.query
+    
+    # Apply filters
+    if status:
+        query = query.filter(AdRequest.status == status)
+    if flagged:
+        query = query.filter(AdRequest.is_flagged == True)
+    if campaign_id:
+        query = query.filter(AdRequest.campaign_id == campaign_id)
+    if influencer_id:
+        query = query.filter(AdRequest.influencer_id == influencer_id)
+    
+    # Order by most recent first
+    query = query.order_by(AdRequest.created_at.desc())
+    
+    # Paginate
+    ad_requests = query.paginate(page=page, per_page=per_page)
+    
+    # Return response
+    return jsonify({
+        'ad_requests': [serialize_ad_request_detail(ar) for ar in ad_requests.items],
+        'pagination': serialize_pagination(ad_requests)
+    }), 200
+
+@bp.route('/api/admin/ad_requests/<int:ad_request_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def admin_get_ad_request(ad_request_id):
+    """Get a specific ad request by ID"""
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request:
+        archived = find_archived('ad_request', ad_request_id)
+        if archived:
+            payload = archived_payload(archived)
+            return jsonify(dict(payload['detail'], negotiation_history=payload['negotiation_history'],
+                                progress_updates=payload['progress_updates'], payments=payload['payments'])), 200
+        return jsonify({"message": "Ad request not found"}), 404
+    
+    return jsonify(serialize_ad_request_detail(ad_request)), 200
+
+# Add a dedicated endpoint for real-time dashboard data
+@bp.route('/api/admin/dashboard/realtime', methods=['GET'])
+@jwt_required()
+@admin_required
+@rate_limited('admin_realtime')
+def admin_realtime_dashboard():
+    """Get real-time dashboard data (not cached)"""
+    # Pending approval counts
+    pending_sponsors_count = User.query.filter_by(role='sponsor', sponsor_approved=None, is_active=True).count()
+    pending_influencers_count = User.query.filter_by(role='influencer', influencer_approved=None, is_active=True).count()
+    
+    # Get most recent pending users (limit to 5)
+    recent_pending_sponsors = User.query.filter_by(
+        role='sponsor', sponsor_approved=None, is_active=True
+    ).order_by(User.created_at.desc()).limit(5).all()
+    
+    recent_pending_influencers = User.query.filter_by(
+        role='influencer', influencer_approved=None, is_active=True
+    ).order_by(User.created_at.desc()).limit(5).all()
+    
+    # Recent activity
+    recent_campaigns = Campaign.query.order_by(Campaign.created_at.desc()).limit(5).all()
+    recent_ad_requests = AdRequest.query.order_by(AdRequest.created_at.desc()).limit(5).all()
+    
+    # Today's stats
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    today = counts_since(today_start, ('campaigns', 'ad_requests', 'users'))
+    
+    return jsonify({
+        'pending_counts': {
+            'sponsors': pending_sponsors_count,
+            'influencers': pending_influencers_count,
+            'total': pending_sponsors_count + pending_influencers_count
+        },
+        'recent_pending': {
+            'sponsors': [serialize_user_profile(user) for user in recent_pending_sponsors],
+            'influencers': [serialize_user_profile(user) for user in recent_pending_influencers]
+        },
+        'today_stats': {
+            'campaigns': today['campaigns'],
+            'ad_requests': today['ad_requests'],
+            'new_users': today['users']
+        },
+        'recent_activity': {
+            'campaigns': [serialize_campaign_basic(c) for c in recent_campaigns],
+            'ad_requests': [serialize_ad_request_detail(ar) for ar in recent_ad_requests]
+        },
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
@@ -0,0 +1,261 @@
+"""
+Registration, login and profile routes
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity, get_jwt
+from datetime import datetime, timedelta
+from config import Config
+from models import db, User, Campaign
+from serializers import serialize_user_profile
+from constants import map_industry_to_category
+from db_routing import read_only
+from revocation import revoke_token
+from throttling import rate_limited, login_identity
+
+bp = Blueprint('auth', __name__)
+
+
+# == Authentication ==
+@bp.route('/api/register', methods=['POST'])
+def register():
+    data = request.get_json()
+    
+    # Validate required fields
+    required_fields = ['username', 'email', 'password', 'role']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'message': f'Missing required field: {field}'}), 400
+    
+    # Check if username or email already exists
+    if User.query.filter_by(username=data['username']).first():
+        return jsonify({'message': 'Username already exists'}), 400
+    
+    if User.query.filter_by(email=data['email']).first():
+        return jsonify({'message': 'Email already exists'}), 400
+    
+    # Validate role
+    if data['role'] not in ['sponsor', 'influencer']:
+        return jsonify({'message': 'Invalid role'}), 400
+    
+    # Create new user
+    new_user = User(
+        username=data['username'],
+        email=data['email'],
+        role=data['role']
+    )
+    new_user.set_password(data['password'])
+    
+    # Additional fields for sponsor
+    if data['role'] == 'sponsor':
+        if 'company_name' not in data:
+            return jsonify({'message': 'Company name is required for sponsors'}), 400
+        
+        new_user.company_name = data['company_name']
+        
+        # Optional fields
+        new_user.industry = data.get('industry', '')
+        
+        # Start as pending approval
+        new_user.sponsor_approved = None
+    
+    # Additional fields for influencer
+    elif data['role'] == 'influencer':
+        if 'influencer_name' not in data:
+            return jsonify({'message': 'Influencer name is required'}), 400
+        
+        new_user.influencer_name = data['influencer_name']
+        
+        # Optional fields with defaults
+        new_user.category = data.get('category', 'Other')
+        new_user.niche = data.get('niche', '')
+        new_user.bio = data.get('bio', '')
+        new_user.reach = int(data.get('reach', 0))
+        
+        # Start as pending approval
+        new_user.influencer_approved = None
+    
+    try:
+        db.session.add(new_user)
+        db.session.commit()
+        
+        # Send registration pending notification (the notifications event consumer sends it otherwise)
+        if not Config.DOMAIN_EVENTS:
+            from user_notifications import send_registration_pending_notification
+            send_registration_pending_notification.delay(new_user.id)
+        
+        return jsonify({
+            'message': 'User registered successfully. Account is pending approval.',
+            'user_id': new_user.id
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Error creating user: {str(e)}'}), 500
+
+@bp.route('/api/login', methods=['POST'])
+@rate_limited('login', identity=login_identity)
+def login():
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"message": "Missing JSON in request"}), 400
+        
+    username = data.get('username')
+    email = data.get('email')
+    password = data.get('password')
+    
+    if not password:
+        return jsonify({"message": "Password is required"}), 400
+        
+    if not username and not email:
+        return jsonify({"message": "Username or email is required"}), 400
+        
+    # Check if login is with username or email
+    if username:
+        user = User.query.filter_by(username=username).first()
+    else:
+        user = User.query.filter_by(email=email).first()
+    
+    if not user or not user.check_password(password):
+        return jsonify({"message": "Invalid login credentials"}), 401
+        
+    # Check if user is active
+    if not getattr(user, 'is_active', True):
+        return jsonify({"message": "Account is disabled. Please contact support."}), 403
+    
+    # Check if user is flagged
+    if user.is_flagged:
+        return jsonify({
+            "message": "Your account has been flagged due to policy violations. Please contact support for assistance.",
+            "error": "ACCOUNT_FLAGGED"
+        }), 403
+    
+    # Check role-specific approval requirements
+    if user.role == 'sponsor' and user.sponsor_approved is False:
+        return jsonify({"message": "Your sponsor account has been rejected. Please contact support."}), 403
+    
+    if user.role == 'influencer' and user.influencer_approved is False:
+        return jsonify({"message": "Your influencer account has been rejected. Please contact support."}), 403
+    
+    if (user.role == 'sponsor' and user.sponsor_approved is None) or \
+       (user.role == 'influencer' and user.influencer_approved is None):
+        return jsonify({"message": "Your account is pending approval"}), 403
+    
+    # Create access token with role in additional_claims
+    expires = datetime.utcnow() + timedelta(days=1)
+    # Add 'role' to the token's claims to match what the decorator expects
+    additional_claims = {"role": user.role}
+    access_token = create_access_token(
+        identity=user.id, 
+        expires_delta=expires - datetime.utcnow(),
+        additional_claims=additional_claims
+    )
+    
+    # Update last login time
+    user.last_login = datetime.utcnow()
+    db.session.commit()
+    
+    # Send login stats to the user's email
+    from user_notifications import send_login_stats
+    send_login_stats.delay(user.id)
+    
+    return jsonify({
+        "message": "Login successful",
+        "access_token": access_token,
+        "user_role": user.role,
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "role": user.role
+        }
+    }), 200
+
+
+@bp.route('/api/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Revoke the current access token"""
+    claims = get_jwt()
+    try:
+        revoke_token(claims['jti'], claims['exp'])
+    except Exception as e:
+        return jsonify({"message": f"Error logging out: {str(e)}"}), 500
+    return jsonify({"message": "Logged out"}), 200
+
+
+# == Profile Management ==
+@bp.route('/api/profile', methods=['GET'])
+@jwt_required()
+def get_profile():
+    user_id = get_jwt_identity()
+    user = db.session.get(User, user_id)
+    if not user: return jsonify({"message": "User not found"}), 404
+    return jsonify(serialize_user_profile(user)), 200
+
+@bp.route('/api/profile', methods=['PUT'])
+@jwt_required()
+def update_profile():
+    user_id = get_jwt_identity()
+    user = db.session.get(User, user_id)
+    if not user: return jsonify({"message": "User not found"}), 404
+
+    data = request.get_json()
+    # Update fields based on role - prevent users from changing role/approval status
+    if user.role == 'sponsor':
+        # Check if industry is being changed
+        industry_changed = 'industry' in data and data['industry'] != user.industry
+        old_industry = user.industry
+        
+        # Update sponsor fields
+        user.company_name = data.get('company_name', user.company_name)
+        user.industry = data.get('industry', user.industry)
+        
+        # If industry changed, update all campaign categories
+        if industry_changed and user.industry:
+            # Get all campaigns for this sponsor
+            campaigns = Campaign.query.filter_by(sponsor_id=user_id).all()
+            
+            # Update all campaigns with the new category based on industry
+            new_category = map_industry_to_category(user.industry)
+            for campaign in campaigns:
+                # Only update campaigns that haven't been explicitly categorized
+                # or have the old category derived from the old industry
+                old_category = map_industry_to_category(old_industry)
+                if not campaign.category or campaign.category == old_category:
+                    campaign.category = new_category
+    
+    elif user.role == 'influencer':
+        user.influencer_name = data.get('influencer_name', user.influencer_name)
+        user.category = data.get('category', user.category)
+        user.niche = data.get('niche', user.niche)
+        if 'reach' in data: # Allow updating reach, maybe validate later
+             try: user.reach = int(data['reach'])
+             except (ValueError, TypeError): pass
+
+    db.session.commit()
+    return jsonify({"message": "Profile updated successfully", "profile": serialize_user_profile(user)}), 200
+
+@bp.route('/api/influencers/<int:influencer_id>/profile', methods=['GET'])
+@jwt_required() # Any logged-in user can view public profile
+@read_only
+def get_public_influencer_profile(influencer_id):
+    user = User.query.filter_by(
+        id=influencer_id, 
+        role='influencer', 
+        is_active=True,
+        influencer_approved=True,
+        is_flagged=False
+    ).first()
+    
+    if not user: 
+        return jsonify({"message": "Influencer not found or unavailable"}), 404
+        
+    # Return only public-safe info
+    return jsonify({
+        'id': user.id, 
+        'influencer_name': user.influencer_name, 
+        'category': user.category,
+        'niche': user.niche, 
+        'reach': user.reach 
+    }), 200
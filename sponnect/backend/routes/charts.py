@@ -0,0 +1,406 @@
+"""
+Admin dashboard chart data
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, User, Campaign, AdRequest
+from extensions import cache
+from decorators import admin_required
+from formatting import CURRENCY_SYMBOL
+from db_routing import read_only
+
+bp = Blueprint('charts', __name__)
+
+
+# == ChartJS Data Endpoints ==
+@bp.route('/api/charts/user-growth', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=300, query_string=True)  # Cache for 5 minutes, vary by query parameters
+def chart_user_growth():
+    """Returns user growth chart data"""
+    # Get time period from query params (default: last 6 months)
+    months = int(request.args.get('months', 6))
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=30 * months)
+    
+    # Query users by role and registration date
+    influencers_by_month = db.session.query(
+        func.strftime('%Y-%m', User.created_at).label('month'),
+        func.count().label('count')
+    ).filter(
+        User.role == 'influencer',
+        User.created_at >= start_date,
+        User.created_at <= end_date
+    ).group_by('month').order_by('month').all()
+    
+    sponsors_by_month = db.session.query(
+        func.strftime('%Y-%m', User.created_at).label('month'),
+        func.count().label('count')
+    ).filter(
+        User.role == 'sponsor',
+        User.created_at >= start_date,
+        User.created_at <= end_date
+    ).group_by('month').order_by('month').all()
+    
+    # Generate all months in range (for complete labels even if no data)
+    all_months = []
+    current = start_date.replace(day=1)
+    while current <= end_date:
+        all_months.append(current.strftime('%Y-%m'))
+        # Move to next month
+        if current.month == 12:
+            current = current.replace(year=current.year + 1, month=1)
+        else:
+            current = current.replace(month=current.month + 1)
+    
+    # Convert query results to dict for easier lookup
+    inf_data = {m: c for m, c in influencers_by_month}
+    spo_data = {m: c for m, c in sponsors_by_month}
+    
+    # Format data for ChartJS
+    chart_data = {
+        'labels': all_months,
+        'datasets': [
+            {
+                'label': 'Influencers',
+                'data': [inf_data.get(m, 0) for m in all_months],
+                'borderColor': 'rgba(75, 192, 192, 1)',
+                'backgroundColor': 'rgba(75, 192, 192, 0.2)',
+            },
+            {
+                'label': 'Sponsors',
+                'data': [spo_data.get(m, 0) for m in all_months],
+                'borderColor': 'rgba(153, 102, 255, 1)',
+                'backgroundColor': 'rgba(153, 102, 255, 0.2)',
+            }
+        ]
+    }
+    
+    return jsonify(chart_data), 200
+
+@bp.route('/api/charts/ad-request-status', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=180)  # Cache for 3 minutes
+def chart_ad_request_status():
+    """Returns ad request status distribution chart data"""
+    # Get counts by status
+    status_counts = db.session.query(
+        AdRequest.status,
+        func.count().label('count')
+    ).group_by(AdRequest.status).all()
+    
+    # Convert to lists for ChartJS
+    statuses = [status for status, _ in status_counts]
+    counts = [count for _, count in status_counts]
+    
+    # Prepare data for ChartJS
+    chart_data = {
+        'labels': statuses,
+        'datasets': [{
+            'label': 'Ad Requests by Status',
+            'data': counts,
+            'backgroundColor': [
+                'rgba(54, 162, 235, 0.6)',  # Pending - Blue
+                'rgba(75, 192, 192, 0.6)',  # Accepted - Green
+                'rgba(255, 99, 132, 0.6)',  # Rejected - Red
+                'rgba(255, 206, 86, 0.6)',  # Negotiating - Yellow
+            ],
+            'borderColor': [
+                'rgba(54, 162, 235, 1)',
+                'rgba(75, 192, 192, 1)',
+                'rgba(255, 99, 132, 1)',
+                'rgba(255, 206, 86, 1)',
+            ],
+            'borderWidth': 1
+        }]
+    }
+    
+    return jsonify(chart_data), 200
+
+@bp.route('/api/charts/campaign-activity', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=180, query_string=True)  # Cache for 3 minutes, vary by query parameters
+def chart_campaign_activity():
+    """Returns campaign and ad request activity over time"""
+    # Get time period from query params (default: last 6 months)
+    months = int(request.args.get('months', 6))
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=30 * months)
+    
+    # Query campaigns by creation date
+    campaigns_by_month = db.session.query(
+        func.strftime('%Y-%m', Campaign.created_at).label('month'),
+        func.count().label('count')
+    ).filter(
+        Campaign.created_at >= start_date,
+        Campaign.created_at <= end_date
+    ).group_by('month').order_by('month').all()
+    
+    # Query ad requests by creation date
+    requests_by_month = db.session.query(
+        func.strftime('%Y-%m', AdRequest.created_at).label('month'),
+        func.count().label('count')
+    ).filter(
+        AdRequest.created_at >= start_date,
+        AdRequest.created_at <= end_date
+    ).group_by('month').order_by('month').all()
+    
+    # Generate all months in range
+    all_months = []
+    current = start_date.replace(day=1)
+    while current <= end_date:
+        all_months.append(current.strftime('%Y-%m'))
+        # Move to next month
+        if current.month == 12:
+            current = current.replace(year=current.year + 1, month=1)
+        else:
+            current = current.replace(month=current.month + 1)
+    
+    # Convert query results to dict for easier lookup
+    camp_data = {m: c for m, c in campaigns_by_month}
+    req_data = {m: c for m, c in requests_by_month}
+    
+    # Format data for ChartJS
+    chart_data = {
+        'labels': all_months,
+        'datasets': [
+            {
+                'label': 'New Campaigns',
+                'data': [camp_data.get(m, 0) for m in all_months],
+                'borderColor': 'rgba(255, 99, 132, 1)',
+                'backgroundColor': 'rgba(255, 99, 132, 0.2)',
+                'type': 'line'
+            },
+            {
+                'label': 'Ad Requests',
+                'data': [req_data.get(m, 0) for m in all_months],
+                'borderColor': 'rgba(54, 162, 235, 1)',
+                'backgroundColor': 'rgba(54, 162, 235, 0.2)',
+                'type': 'bar'
+            }
+        ]
+    }
+    
+    return jsonify(chart_data), 200
+
+@bp.route('/api/charts/conversion-rates', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=300, query_string=True)  # Cache for 5 minutes, vary by query parameters
+def chart_conversion_rates():
+    """Returns conversion rates from ad requests to accepted partnerships"""
+    # Get time period from query params (default: last 6 months)
+    months = int(request.args.get('months', 6))
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=30 * months)
+    
+    # Group by month and count total requests
+    total_by_month = db.session.query(
+        func.strftime('%Y-%m', AdRequest.created_at).label('month'),
+        func.count().label('count')
+    ).filter(
+        AdRequest.created_at >= start_date,
+        AdRequest.created_at <= end_date
+    ).group_by('month').order_by('month').all()
+    
+    # Group by month and count accepted requests
+    accepted_by_month = db.session.query(
+        func.strftime('%Y-%m', AdRequest.created_at).label('month'),
+        func.count().label('count')
+    ).filter(
+        AdRequest.created_at >= start_date,
+        AdRequest.created_at <= end_date,
+        AdRequest.status == 'Accepted'
+    ).group_by('month').order_by('month').all()
+    
+    # Generate all months in range
+    all_months = []
+    current = start_date.replace(day=1)
+    while current <= end_date:
+        all_months.append(current.strftime('%Y-%m'))
+        # Move to next month
+        if current.month == 12:
+            current = current.replace(year=current.year + 1, month=1)
+        else:
+            current = current.replace(month=current.month + 1)
+    
+    # Convert query results to dict for easier lookup
+    total_data = {m: c for m, c in total_by_month}
+    accepted_data = {m: c for m, c in accepted_by_month}
+    
+    # Calculate conversion rates (as percentage)
+    conversion_rates = []
+    for month in all_months:
+        total = total_data.get(month, 0)
+        accepted = accepted_data.get(month, 0)
+        rate = (accepted / total * 100) if total > 0 else 0
+        conversion_rates.append(round(rate, 1))
+    
+    # Format data for ChartJS
+    chart_data = {
+        'labels': all_months,
+        'datasets': [{
+            'label': 'Conversion Rate (%)',
+            'data': conversion_rates,
+            'borderColor': 'rgba(75, 192, 192, 1)',
+            'backgroundColor': 'rgba(75, 192, 192, 0.2)',
+            'borderWidth': 2,
+            'fill': False,
+            'tension': 0.1
+        }]
+    }
+    
+    return jsonify(chart_data), 200
+
+@bp.route('/api/charts/dashboard-summary', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=120)  # Cache for 2 minutes
+def chart_dashboard_summary():
+    """Returns summarized data for dashboard charts"""
+    # Get stats for different user types
+    total_influencers = User.query.filter_by(role='influencer').count()
+    active_influencers = User.query.filter_by(role='influencer', is_active=True).count()
+    
+    total_sponsors = User.query.filter_by(role='sponsor').count()
+    approved_sponsors = User.query.filter_by(role='sponsor', sponsor_approved=True).count()
+    
+    # Get campaign stats
+    public_campaigns = Campaign.query.filter_by(visibility='public').count()
+    private_campaigns = Campaign.query.filter_by(visibility='private').count()
+    
+    # Calculate average campaign budget
+    avg_budget_result = db.session.query(func.avg(Campaign.budget)).scalar()
+    avg_campaign_budget = int(avg_budget_result) if avg_budget_result else 0
+    
+    # Get ad request stats
+    total_requests = AdRequest.query.count()
+    accepted_requests = AdRequest.query.filter_by(status='Accepted').count()
+    pending_requests = AdRequest.query.filter_by(status='Pending').count()
+    rejected_requests = AdRequest.query.filter_by(status='Rejected').count()
+    negotiating_requests = AdRequest.query.filter_by(status='Negotiating').count()
+    
+    # Prepare data for multiple chart types
+    chart_data = {
+        'userSummary': {
+            'labels': ['Active Influencers', 'Inactive Influencers', 'Approved Sponsors', 'Pending Sponsors'],
+            'datasets': [{
+                'data': [
+                    active_influencers,
+                    total_influencers - active_influencers,
+                    approved_sponsors,
+                    total_sponsors - approved_sponsors
+                ],
+                'backgroundColor': [
+                    'rgba(75, 192, 192, 0.6)',
+                    'rgba(153, 102, 255, 0.6)',
+                    'rgba(255, 159, 64, 0.6)',
+                    'rgba(255, 205, 86, 0.6)'
+                ]
+            }]
+        },
+        'campaignVisibility': {
+            'labels': ['Public Campaigns', 'Private Campaigns'],
+            'datasets': [{
+                'data': [public_campaigns, private_campaigns],
+                'backgroundColor': [
+                    'rgba(54, 162, 235, 0.6)',
+                    'rgba(255, 99, 132, 0.6)'
+                ]
+            }]
+        },
+        'adRequestStatus': {
+            'labels': ['Accepted', 'Pending', 'Rejected', 'Negotiating'],
+            'datasets': [{
+                'data': [accepted_requests, pending_requests, rejected_requests, negotiating_requests],
+                'backgroundColor': [
+                    'rgba(75, 192, 192, 0.6)',
+                    'rgba(54, 162, 235, 0.6)',
+                    'rgba(255, 99, 132, 0.6)',
+                    'rgba(255, 206, 86, 0.6)'
+                ]
+            }]
+        },
+        'conversionRate': {
+            'value': 0,  # Default value
+            'label': 'Acceptance Rate'
+        },
+        'avgCampaignBudget': avg_campaign_budget,
+        'currencySymbol': CURRENCY_SYMBOL,
+        'timezoneName': 'IST (UTC+5:30)'
+    }
+    
+    # Calculate conversion rate only if there are requests
+    if total_requests > 0:
+        chart_data['conversionRate']['value'] = round((accepted_requests / total_requests) * 100, 1)
+    
+    return jsonify(chart_data), 200
+
+@bp.route('/api/charts/campaign-distribution', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_only
+@cache.cached(timeout=180)  # Cache for 3 minutes
+def chart_campaign_distribution():
+    """Returns campaign distribution chart data"""
+    
+    # Query to count campaigns by category
+    category_counts = db.session.query(
+        Campaign.category, 
+        func.count(Campaign.id).label('count')
+    ).group_by(Campaign.category).all()
+    
+    # Create labels and data arrays
+    labels = []
+    data = []
+    background_colors = [
+        'rgba(255, 99, 132, 0.6)',
+        'rgba(54, 162, 235, 0.6)',
+        'rgba(255, 206, 86, 0.6)',
+        'rgba(75, 192, 192, 0.6)',
+        'rgba(153, 102, 255, 0.6)',
+        'rgba(255, 159, 64, 0.6)',
+        'rgba(199, 199, 199, 0.6)',
+        'rgba(83, 102, 255, 0.6)',
+        'rgba(40, 159, 64, 0.6)',
+        'rgba(210, 199, 199, 0.6)',
+        'rgba(78, 52, 199, 0.6)',
+        'rgba(225, 99, 132, 0.6)',
+        'rgba(24, 162, 235, 0.6)',
+        'rgba(215, 206, 86, 0.6)'
+    ]
+    
+    for category, count in category_counts:
+        labels.append(category or 'Uncategorized')
+        data.append(count)
+    
+    # If there are more categories than colors, cycle through colors
+    while len(background_colors) < len(labels):
+        background_colors.extend(background_colors)
+    
+    # Limit colors to the number of categories
+    background_colors = background_colors[:len(labels)]
+    
+    # Format data for ChartJS
+    chart_data = {
+        'labels': labels,
+        'datasets': [{
+            'label': 'Campaigns by Category',
+            'data': data,
+            'backgroundColor': background_colors,
+            'borderWidth': 1
+        }]
+    }
+    
+    return jsonify(chart_data), 200
@@ -0,0 +1,229 @@
+"""
+Routes shared by all roles: negotiation history, live updates, notifications, batching, receipts and health
+"""
+
+from flask import Blueprint, current_app, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from models import db, User, AdRequest, Payment, NegotiationHistory
+from formatting import CURRENCY_SYMBOL, format_currency, format_currency_pdf, format_datetime
+from serializers import serialize_ad_request_detail, serialize_negotiation_history, serialize_notification
+from archive import find_archived, archived_payload
+import realtime
+import inbox
+import metrics
+
+bp = Blueprint('common', __name__)
+
+
+# == Negotiation History Endpoints ==
+@bp.route('/api/ad_requests/<int:ad_request_id>/history', methods=['GET'])
+@jwt_required()
+def get_negotiation_history(ad_request_id):
+    """Get negotiation history for an ad request (available to both parties involved)"""
+    user_id = get_jwt_identity()
+    user_role = get_jwt().get('role')
+    
+    # Find the ad request
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request:
+        # Fall back to the archive for old closed ad requests
+        archived = find_archived('ad_request', ad_request_id)
+        if archived and (user_role == 'admin'
+                         or (user_role == 'sponsor' and archived.sponsor_id == user_id)
+                         or (user_role == 'influencer' and archived.influencer_id == user_id)):
+            payload = archived_payload(archived)
+            return jsonify({'ad_request': payload['detail'], 'history': payload['negotiation_history']}), 200
+        return jsonify({"message": "Ad request not found"}), 404
+    
+    # Check if user is authorized to view this history (either the sponsor or the influencer)
+    is_sponsor = user_role == 'sponsor' and ad_request.campaign.sponsor_id == user_id
+    is_influencer = user_role == 'influencer' and ad_request.influencer_id == user_id
+    is_admin = user_role == 'admin'
+    
+    if not (is_sponsor or is_influencer or is_admin):
+        return jsonify({"message": "You are not authorized to view this negotiation history"}), 403
+    
+    # Get history sorted by creation date
+    history = NegotiationHistory.query.filter_by(ad_request_id=ad_request_id).order_by(NegotiationHistory.created_at).all()
+    
+    # Include ad request details for context
+    result = {
+        'ad_request': serialize_ad_request_detail(ad_request),
+        'history': [serialize_negotiation_history(item) for item in history]
+    }
+    
+    return jsonify(result), 200
+
+# == Live Updates ==
+@bp.route('/api/events/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def event_stream():
+    """Server-Sent Events stream of ad request, negotiation and progress update changes for the current user"""
+    user_id = get_jwt_identity()
+    return Response(
+        stream_with_context(realtime.stream_user_events(user_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# == Notification Inbox ==
+@bp.route('/api/notifications', methods=['GET'])
+@jwt_required()
+def list_notifications():
+    """
+    The current user's notifications, newest first, a page at a time.
+    Query: cursor (next_cursor of the previous page), limit, unread=1 for unread only
+    """
+    user_id = get_jwt_identity()
+    try:
+        limit = int(request.args.get('limit', inbox.PAGE_SIZE))
+        notifications, next_cursor = inbox.list_notifications(
+            user_id, cursor=request.args.get('cursor'), limit=limit,
+            unread_only=request.args.get('unread', '').lower() in ('1', 'true'))
+    except ValueError:
+        return jsonify({"message": "Invalid cursor or limit"}), 400
+    return jsonify({
+        'notifications': [serialize_notification(n) for n in notifications],
+        'next_cursor': next_cursor,
+        'unread_count': inbox.unread_count(user_id)
+    }), 200
+
+@bp.route('/api/notifications/unread-count', methods=['GET'])
+@jwt_required()
+def notifications_unread_count():
+    """Unread notification count for polling; served from Redis"""
+    return jsonify({'unread_count': inbox.unread_count(get_jwt_identity())}), 200
+
+@bp.route('/api/notifications/read', methods=['POST'])
+@jwt_required()
+def mark_notifications_read():
+    """Mark notifications read. Body: {"ids": [...]} or {"all": true}"""
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    if data.get('all') is True:
+        updated = inbox.mark_read(user_id)
+    else:
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not all(type(i) is int for i in ids):
+            return jsonify({"message": "ids must be a list of notification IDs, or pass all: true"}), 400
+        if len(ids) > inbox.MAX_PAGE_SIZE:
+            return jsonify({"message": f"At most {inbox.MAX_PAGE_SIZE} IDs per request"}), 400
+        updated = inbox.mark_read(user_id, ids)
+    return jsonify({'updated': updated, 'unread_count': inbox.unread_count(user_id)}), 200
+
+# == Batch Requests ==
+# Paths that must not run inside a batch (streams never finish, batches don't nest)
+BATCH_EXCLUDED_PATHS = ('/api/batch', '/api/events/stream')
+
+def run_batch_subrequest(path, params=None):
+    """
+    Dispatch one internal GET request in the current app context, so it shares the
+    batch's DB session and connection. Returns (status_code, body).
+    """
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    with current_app.test_request_context(path, method='GET', query_string=params, headers=headers):
+        try:
+            response = current_app.full_dispatch_request()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Batch sub-request {path} failed: {str(e)}")
+            return 500, {"message": "Internal server error"}
+        return response.status_code, response.get_json(silent=True)
+
+@bp.route('/api/batch', methods=['POST'])
+@jwt_required()
+def batch_requests():
+    """
+    Run several GET API requests in one round trip, e.g. for dashboard page loads.
+    Body: {"requests": [{"id": "stats", "path": "/api/admin/stats", "params": {...}}, ...]}
+    Sub-requests run one after another: they share a single SQLAlchemy session, which
+    is not safe to use from several threads at once.
+    """
+    data = request.get_json() or {}
+    sub_requests = data.get('requests')
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return jsonify({"message": "requests must be a non-empty list"}), 400
+    if len(sub_requests) > current_app.config['BATCH_MAX_REQUESTS']:
+        return jsonify({"message": f"At most {current_app.config['BATCH_MAX_REQUESTS']} requests per batch"}), 400
+
+    responses = {}
+    for index, sub in enumerate(sub_requests):
+        if not isinstance(sub, dict):
+            return jsonify({"message": f"Request {index} must be an object"}), 400
+        sub_id = str(sub.get('id', index))
+        path = sub.get('path') or ''
+        params = sub.get('params')
+        if (sub.get('method', 'GET').upper() != 'GET' or not path.startswith('/api/')
+                or path.split('?')[0].rstrip('/') in BATCH_EXCLUDED_PATHS
+                or (params is not None and not isinstance(params, dict))):
+            responses[sub_id] = {"status": 400, "body": {"message": "Only GET /api/ requests can be batched"}}
+            continue
+        status, body = run_batch_subrequest(path, params)
+        responses[sub_id] = {"status": status, "body": body}
+
+    return jsonify({"responses": responses}), 200
+
+# Simple Health Check
+@bp.route('/api/health', methods=['GET'])
+def health_check():
+    return jsonify({"status": "OK"}), 200
+
+@bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Web and worker metrics in the Prometheus text format"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return jsonify({"message": "Invalid metrics token"}), 401
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@bp.route('/api/sponsor/payments/<int:payment_id>/receipt', methods=['GET'])
+@jwt_required()
+def get_payment_receipt(payment_id):
+    """Get payment receipt"""
+    try:
+        user_id = get_jwt_identity()
+        
+        # Get payment
+        payment = db.session.get(Payment, payment_id)
+        if not payment:
+            return jsonify({"message": "Payment not found", "error": True}), 404
+        
+        # Get ad request
+        ad_request = payment.ad_request
+        
+        # Check permissions (either the sponsor or influencer can view the receipt)
+        if not (ad_request.campaign.sponsor_id == user_id or ad_request.influencer_id == user_id):
+            return jsonify({"message": "Access denied", "error": True}), 403
+        
+        # Get user details
+        sponsor = User.query.get(ad_request.campaign.sponsor_id)
+        influencer = User.query.get(ad_request.influencer_id)
+        
+        # Create receipt data
+        receipt = {
+            "receipt_id": f"RCPT-{payment.id}",
+            "transaction_id": payment.transaction_id,
+            "date": format_datetime(payment.created_at),
+            "campaign_name": ad_request.campaign.name,
+            "sponsor_name": sponsor.username if sponsor else "Unknown",
+            "influencer_name": influencer.username if influencer else "Unknown",
+            "amount": payment.amount,
+            "amount_formatted": format_currency(payment.amount),
+            "amount_formatted_pdf": format_currency_pdf(payment.amount),
+            "platform_fee": payment.platform_fee,
+            "platform_fee_formatted": format_currency(payment.platform_fee),
+            "platform_fee_formatted_pdf": format_currency_pdf(payment.platform_fee),
+            "influencer_amount": payment.influencer_amount,
+            "influencer_amount_formatted": format_currency(payment.influencer_amount),
+            "influencer_amount_formatted_pdf": format_currency_pdf(payment.influencer_amount),
+            "payment_method": payment.payment_method,
+            "status": payment.status,
+            "currency_symbol": CURRENCY_SYMBOL,
+            "currency_code": "INR",
+            "currency_name": "Indian Rupee"
+        }
+        
+        return jsonify(receipt), 200
+    except Exception as e:
+        current_app.logger.error(f"Error generating receipt: {str(e)}", exc_info=True)
+        return jsonify({"message": f"Error generating receipt: {str(e)}", "error": True}), 500
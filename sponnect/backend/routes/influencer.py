@@ -0,0 +1,349 @@
+"""
+Influencer routes: ad request responses, applications, progress updates and payments
+"""
+
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from models import db, User, Campaign, AdRequest, Payment, NegotiationHistory, ProgressUpdate
+from decorators import influencer_required
+from formatting import format_datetime
+from serializers import serialize_ad_request_detail, serialize_payment, serialize_progress_update
+from ledger import BudgetExceededError, commit_ad_request
+from sync import (
+    new_watermark, changes_window_start, tombstones_since, filtered_out_tombstone, get_since_param,
+    sync_response
+)
+
+bp = Blueprint('influencer', __name__)
+
+
+# == Influencer: Ad Request Management ==
+@bp.route('/api/influencer/ad_requests', methods=['GET'])
+@jwt_required()
+@influencer_required
+def influencer_get_ad_requests():
+    influencer_id = get_jwt_identity()
+    status_filter = request.args.get('status')
+    since, error = get_since_param()
+    if error: return error
+    watermark = new_watermark()
+
+    query = AdRequest.query.filter_by(influencer_id=influencer_id)
+    if since is not None:
+        # Delta mode: changed rows outside the status filter are returned as tombstones instead
+        query = query.filter(AdRequest.updated_at >= changes_window_start(since))
+    elif status_filter:
+        query = query.filter(AdRequest.status == status_filter)
+    
+    # Join with Campaign and User (sponsor) to get all needed information
+    ad_requests = query.join(Campaign, AdRequest.campaign_id == Campaign.id)\
+                      .join(User, Campaign.sponsor_id == User.id)\
+                      .order_by(AdRequest.updated_at.desc())\
+                      .all()
+    
+    # Process results
+    serialized_requests = []
+    tombstones = []
+    for req in ad_requests:
+        if since is not None and status_filter and req.status != status_filter:
+            tombstones.append(filtered_out_tombstone('ad_request', req.id, req.status, req.updated_at))
+            continue
+        data = serialize_ad_request_detail(req)
+        
+        # Ensure campaign name is directly accessible
+        if 'campaign' in data and data['campaign'].get('name'):
+            data['campaign_name'] = data['campaign']['name']
+        elif req.campaign:
+            data['campaign_name'] = req.campaign.name or 'Unnamed Campaign'
+        else:
+            data['campaign_name'] = 'Unnamed Campaign'
+        
+        # Ensure influencer name is directly accessible
+        if 'influencer' in data and data['influencer'].get('influencer_name'):
+            data['influencer_name'] = data['influencer']['influencer_name']
+        elif req.target_influencer:
+            data['influencer_name'] = req.target_influencer.influencer_name or req.target_influencer.username
+        else:
+            data['influencer_name'] = 'Unknown Influencer'
+        
+        # Ensure dates are available in both formatted and ISO format
+        for date_field in ['created_at', 'updated_at']:
+            if req.__dict__.get(date_field):
+                date_obj = getattr(req, date_field)
+                data[f'{date_field}_iso'] = date_obj.isoformat()
+                data[date_field] = format_datetime(date_obj)
+        
+        serialized_requests.append(data)
+    
+    if since is not None:
+        return sync_response({
+            'ad_requests': serialized_requests,
+            'tombstones': tombstones + tombstones_since('ad_request', since, influencer_id=influencer_id)
+        }, watermark)
+    return sync_response(serialized_requests, watermark)
+
+@bp.route('/api/influencer/ad_requests/<int:ad_request_id>', methods=['PATCH'])
+@jwt_required()
+@influencer_required
+def influencer_action_ad_request(ad_request_id):
+    try:
+        influencer_id = get_jwt_identity()
+        data = request.get_json()
+        
+        current_app.logger.info(f"Influencer {influencer_id} attempting action on ad_request {ad_request_id}")
+        current_app.logger.info(f"Received payload: {data}")
+        
+        # Validate payload
+        if not data:
+            return jsonify({"message": "No data provided"}), 400
+            
+        action = data.get('action')
+        if not action:
+            return jsonify({"message": "Action is required"}), 400
+        
+        if action not in ['accept', 'reject', 'negotiate']:
+            return jsonify({"message": f"Invalid action '{action}'. Use 'accept', 'reject', or 'negotiate'."}), 400
+            
+        # Find ad request
+        ad_request = AdRequest.query.filter_by(id=ad_request_id, influencer_id=influencer_id).first()
+        if not ad_request: 
+            return jsonify({"message": "Ad Request not found/denied"}), 404
+            
+        current_app.logger.info(f"Current ad_request status: {ad_request.status}, last_offer_by: {ad_request.last_offer_by}")
+        
+        # Check allowed states for action
+        allowed_states = ['Pending']
+        if ad_request.status == 'Negotiating' and ad_request.last_offer_by == 'sponsor':
+            allowed_states.append('Negotiating') # Allow response if sponsor made last offer
+
+        if ad_request.status not in allowed_states:
+            return jsonify({
+                "message": f"Cannot action request in status '{ad_request.status}' or not influencer's turn",
+                "status": ad_request.status,
+                "last_offer_by": ad_request.last_offer_by
+            }), 400
+
+        # Handle based on action
+        if action == 'accept':
+            ad_request.status = 'Accepted'
+            try:
+                commit_ad_request(ad_request)
+            except BudgetExceededError as e:
+                db.session.rollback()
+                return jsonify({"message": str(e)}), 409
+            message = "Ad Request accepted"
+        elif action == 'reject':
+            ad_request.status = 'Rejected'
+            message = "Ad Request rejected"
+        elif action == 'negotiate':
+            # Influencer makes counter-offer
+            new_payment = data.get('payment_amount')
+            new_message = data.get('message')
+            
+            if new_payment is None: 
+                return jsonify({"message": "Payment amount required to negotiate"}), 400
+                
+            try: 
+                payment_amount = float(new_payment)
+                ad_request.payment_amount = payment_amount
+            except (ValueError, TypeError): 
+                return jsonify({"message": f"Invalid payment amount: {new_payment}"}), 400
+
+            if new_message: 
+                ad_request.message = new_message
+                
+            ad_request.status = 'Negotiating' # Set/Keep status
+            ad_request.last_offer_by = 'influencer'
+            message = "Negotiation offer sent to sponsor"
+
+        # Create history record
+        history = NegotiationHistory(
+            ad_request_id=ad_request.id,
+            user_id=influencer_id,
+            user_role='influencer',
+            action=action,
+            message=data.get('message'),
+            payment_amount=data.get('payment_amount', ad_request.payment_amount),
+            requirements=None  # Influencers don't typically modify requirements
+        )
+        db.session.add(history)
+
+        ad_request.updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        current_app.logger.info(f"Action '{action}' successful for ad_request {ad_request_id}")
+        
+        return jsonify({
+            "message": message, 
+            "ad_request": serialize_ad_request_detail(ad_request)
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error in influencer_action_ad_request: {str(e)}")
+        db.session.rollback()
+        return jsonify({"message": f"Server error: {str(e)}"}), 500
+
+# == Influencer: Apply to Public Campaigns ==
+@bp.route('/api/influencer/campaigns/<int:campaign_id>/apply', methods=['POST'])
+@jwt_required()
+@influencer_required
+def influencer_apply_campaign(campaign_id):
+    influencer_id = get_jwt_identity()
+    campaign = Campaign.query.filter_by(id=campaign_id, visibility='public').first()
+    if not campaign: return jsonify({"message": "Public campaign not found"}), 404
+
+    data = request.get_json()
+    requirements = data.get('requirements', "Influencer proposal based on campaign goals.") # Default or require input?
+    payment_amount = data.get('payment_amount')
+    message = data.get('message', "Interested in collaborating on this campaign.")
+
+    if payment_amount is None: return jsonify({"message": "Proposed payment amount required"}), 400
+    try: payment = float(payment_amount)
+    except (ValueError, TypeError): return jsonify({"message": "Invalid payment amount"}), 400
+
+    # Check if any request already exists between this influencer and campaign
+    existing_request = AdRequest.query.filter_by(
+        campaign_id=campaign.id, influencer_id=influencer_id
+    ).first()
+    if existing_request:
+        status_msg = f"You already have an ad request for this campaign (status: {existing_request.status})"
+        return jsonify({"message": status_msg, "ad_request_id": existing_request.id}), 409
+
+    ad_request = AdRequest(
+        campaign_id=campaign.id, influencer_id=influencer_id, initiator_id=influencer_id, # Influencer initiated
+        last_offer_by='influencer', message=message, requirements=requirements,
+        payment_amount=payment, status='Pending' # Sponsor needs to accept/reject this application
+    )
+    db.session.add(ad_request)
+    db.session.flush()  # Get the ad_request ID before committing
+    
+    # Create initial history record
+    history = NegotiationHistory(
+        ad_request_id=ad_request.id,
+        user_id=influencer_id,
+        user_role='influencer',
+        action='propose',
+        message=message,
+        payment_amount=payment,
+        requirements=requirements
+    )
+    db.session.add(history)
+    
+    db.session.commit()
+    # Add notification to sponsor later
+    return jsonify({"message": "Application submitted successfully", "ad_request": serialize_ad_request_detail(ad_request)}), 201
+
+@bp.route('/api/influencer/negotiations', methods=['GET'])
+@jwt_required()
+@influencer_required
+def influencer_negotiations():
+    """Get all negotiations the influencer is involved in"""
+    influencer_id = get_jwt_identity()
+    
+    # Get all ad requests where this user is the influencer
+    ad_requests = AdRequest.query.filter_by(influencer_id=influencer_id).all()
+    
+    # For each ad request, get the latest negotiation
+    results = []
+    for ad_request in ad_requests:
+        latest_history = NegotiationHistory.query.filter_by(ad_request_id=ad_request.id).order_by(NegotiationHistory.created_at.desc()).first()
+        
+        if latest_history:
+            results.append({
+                'ad_request': serialize_ad_request_detail(ad_request),
+                'latest_action': {
+                    'user_role': latest_history.user_role,
+                    'action': latest_history.action,
+                    'payment_amount': latest_history.payment_amount,
+                    'created_at': latest_history.created_at.isoformat() if latest_history.created_at else None,
+                }
+            })
+    
+    return jsonify(results), 200
+
+# == Influencer: Progress Updates ==
+@bp.route('/api/influencer/ad_requests/<int:ad_request_id>/progress', methods=['GET'])
+@jwt_required()
+@influencer_required
+def influencer_get_progress_updates(ad_request_id):
+    influencer_id = get_jwt_identity()
+    ad_request = AdRequest.query.filter_by(id=ad_request_id, influencer_id=influencer_id).first()
+    if not ad_request: return jsonify({"message": "Ad Request not found/denied"}), 404
+    
+    updates = ProgressUpdate.query.filter_by(ad_request_id=ad_request_id).order_by(ProgressUpdate.created_at.desc()).all()
+    return jsonify([serialize_progress_update(update) for update in updates]), 200
+
+@bp.route('/api/influencer/ad_requests/<int:ad_request_id>/progress', methods=['POST'])
+@jwt_required()
+@influencer_required
+def influencer_add_progress_update(ad_request_id):
+    influencer_id = get_jwt_identity()
+    current_app.logger.info(f"Influencer {influencer_id} creating progress update for ad_request {ad_request_id}")
+    
+    try:
+        ad_request = AdRequest.query.filter_by(id=ad_request_id, influencer_id=influencer_id).first()
+        if not ad_request: 
+            current_app.logger.warning(f"Ad request not found for influencer {influencer_id}, ad_request {ad_request_id}")
+            return jsonify({"message": "Ad Request not found/denied"}), 404
+        
+        if ad_request.status != 'Accepted': 
+            current_app.logger.warning(f"Cannot add progress update - ad request status is {ad_request.status}, not Accepted")
+            return jsonify({"message": "Can only add progress updates for accepted requests"}), 400
+        
+        data = request.get_json()
+        current_app.logger.info(f"Progress update payload: {data}")
+        
+        if not data:
+            return jsonify({"message": "No data provided"}), 400
+            
+        if not data.get('content'): 
+            return jsonify({"message": "Content is required"}), 400
+        
+        # Create new progress update
+        progress_update = ProgressUpdate(
+            ad_request_id=ad_request_id,
+            content=data.get('content'),
+            media_urls=','.join(data.get('media_urls', [])) if isinstance(data.get('media_urls'), list) else None,
+            metrics_data=data.get('metrics_data'),
+            status='Pending'  # Explicitly set initial status
+        )
+        
+        db.session.add(progress_update)
+        db.session.commit()
+        
+        current_app.logger.info(f"Successfully created progress update {progress_update.id} for ad_request {ad_request_id}")
+        
+        return jsonify({
+            "message": "Progress update added successfully",
+            "progress_update": serialize_progress_update(progress_update)
+        }), 201
+        
+    except Exception as e:
+        current_app.logger.error(f"Error in influencer_add_progress_update: {str(e)}", exc_info=True)
+        db.session.rollback()
+        return jsonify({"message": f"An error occurred: {str(e)}"}), 500
+
+@bp.route('/api/influencer/ad_requests/<int:ad_request_id>/payments', methods=['GET'])
+@jwt_required()
+@influencer_required
+def influencer_get_payments(ad_request_id):
+    """Get payments for an ad request (influencer view)"""
+    influencer_id = get_jwt_identity()
+    
+    # Check ad request exists and belongs to the influencer
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request:
+        return jsonify({"message": "Ad Request not found"}), 404
+    
+    # Verify ownership
+    if ad_request.influencer_id != influencer_id:
+        return jsonify({"message": "Access denied"}), 403
+    
+    # Get all payments for this ad request
+    payments = Payment.query.filter_by(ad_request_id=ad_request_id).order_by(Payment.created_at.desc()).all()
+    
+    # Serialize payments
+    payments_data = [serialize_payment(payment) for payment in payments]
+    
+    return jsonify(payments_data), 200
@@ -0,0 +1,200 @@
+"""
+Influencer and campaign search
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from sqlalchemy import or_, and_
+from models import db, User, Campaign
+from formatting import format_datetime, format_date
+from serializers import serialize_campaign_detail, serialize_pagination, serialize_user_profile
+from constants import INFLUENCER_CATEGORIES
+from db_routing import read_only
+from throttling import rate_limited
+
+bp = Blueprint('search', __name__)
+
+
+# == Search Routes ==
+@bp.route('/api/search/influencers', methods=['GET'])
+@jwt_required() # Any logged-in user can search
+@rate_limited('search')
+@read_only
+def search_influencers():
+    query = User.query.filter_by(
+        role='influencer', 
+        is_active=True, 
+        is_flagged=False,
+        influencer_approved=True  # Only return approved influencers
+    ) 
+    
+    # Text search
+    if search_query := request.args.get('query'):
+        query = query.filter(
+            or_(
+                User.username.ilike(f'%{search_query}%'),
+                User.influencer_name.ilike(f'%{search_query}%'),
+                User.category.ilike(f'%{search_query}%'),
+                User.niche.ilike(f'%{search_query}%')
+            )
+        )
+    
+    # Specific ID search - useful for direct lookup
+    if user_id := request.args.get('id'):
+        try:
+            user_id = int(user_id)
+            query = query.filter(User.id == user_id)
+        except (ValueError, TypeError):
+            pass
+    
+    # Filters
+    if niche := request.args.get('niche'): 
+        query = query.filter(User.niche.ilike(f'%{niche}%'))
+        
+    if category := request.args.get('category'): 
+        # Validate the category is in our allowed list
+        if category in INFLUENCER_CATEGORIES:
+            query = query.filter(User.category == category)
+    
+    # Reach filters
+    if reach_min_str := request.args.get('min_reach'):
+        try: 
+            query = query.filter(User.reach >= int(reach_min_str))
+        except (ValueError, TypeError): 
+            pass
+            
+    if reach_max_str := request.args.get('max_reach'):
+        try: 
+            query = query.filter(User.reach <= int(reach_max_str))
+        except (ValueError, TypeError): 
+            pass
+    
+    # Get limit parameter (default 20, max 50)
+    try:
+        limit = min(int(request.args.get('limit', 20)), 50)
+    except (ValueError, TypeError):
+        limit = 20
+    
+    # Sorting
+    sort_by = request.args.get('sort', 'reach')
+    if sort_by == 'popularity':
+        # Sort by reach (as a popularity proxy) - highest first
+        query = query.order_by(User.reach.desc())
+    elif sort_by == 'name':
+        query = query.order_by(User.influencer_name)
+    elif sort_by == 'newest':
+        query = query.order_by(User.created_at.desc())
+    else:
+        # Default sorting by reach
+        query = query.order_by(User.reach.desc())
+    
+    # Execute query with limit
+    influencers = query.limit(limit).all()
+    
+    # Return serialized influencers
+    return jsonify([serialize_user_profile(i) for i in influencers]), 200
+
+@bp.route('/api/search/campaigns', methods=['GET'])
+@jwt_required() # Any logged-in user can search public campaigns
+@rate_limited('search')
+@read_only
+def search_campaigns():
+    # Join with User to get sponsor information
+    user_id = get_jwt_identity()
+    user = db.session.get(User, user_id)
+    
+    # Get query parameters
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 10, type=int), 50)  # Limit max items
+    category = request.args.get('category')
+    query = request.args.get('query', '')
+    min_budget = request.args.get('min_budget', 0, type=float)
+    max_budget = request.args.get('max_budget')
+    
+    # Build base query - join with User to get sponsor details
+    base_q = db.session.query(Campaign, User).join(User, Campaign.sponsor_id == User.id)
+    
+    # Filter basic requirements:
+    # 1. Campaign visibility must be public (unless user is viewing their own campaigns)
+    # 2. Campaign should not be flagged (unless user is admin)
+    # 3. Sponsor must be approved
+    # 4. Sponsor user must be active
+    # 5. Campaign end dates should be in the future or null
+    
+    # Start with basic criteria
+    criteria = [
+        User.sponsor_approved == True,
+        User.is_active == True,
+        or_(
+            Campaign.end_date == None,
+            Campaign.end_date >= datetime.utcnow()
+        )
+    ]
+    
+    # Non-admin users shouldn't see flagged campaigns
+    if user.role != 'admin':
+        criteria.append(Campaign.is_flagged == False)
+    
+    # Apply visibility filter (sponsors can see their own private campaigns)
+    if user.role == 'sponsor':
+        # Sponsors see public campaigns OR their own campaigns (including private)
+        visibility_filter = or_(Campaign.visibility == 'public', 
+                               and_(Campaign.visibility == 'private', Campaign.sponsor_id == user_id))
+        criteria.append(visibility_filter)
+    else:
+        # Regular users only see public campaigns
+        criteria.append(Campaign.visibility == 'public')
+    
+    # Apply additional filters from query params
+    if category:
+        criteria.append(Campaign.category == category)
+    if query:
+        criteria.append(or_(
+            Campaign.name.ilike(f'%{query}%'),
+            Campaign.description.ilike(f'%{query}%')
+        ))
+    if min_budget:
+        criteria.append(Campaign.budget >= min_budget)
+    if max_budget:
+        criteria.append(Campaign.budget <= float(max_budget))
+    
+    # Complete the query
+    search_query = base_q.filter(and_(*criteria))
+    
+    # Order and paginate
+    search_query = search_query.order_by(Campaign.created_at.desc())
+    campaigns_page = search_query.paginate(page=page, per_page=per_page, error_out=False)
+    
+    # Process results
+    campaigns_data = []
+    for campaign, sponsor in campaigns_page.items:
+        # Use detailed serialization instead of basic to include more fields
+        campaign_dict = serialize_campaign_detail(campaign)
+        
+        # Ensure all required fields are present with fallbacks
+        campaign_dict['name'] = campaign_dict.get('name') or campaign.name or 'Unnamed Campaign'
+        campaign_dict['description'] = campaign_dict.get('description') or campaign.description or ''
+        campaign_dict['budget'] = campaign_dict.get('budget') or campaign.budget or 0
+        campaign_dict['sponsor_name'] = sponsor.company_name or sponsor.username or 'Unknown Sponsor'
+        campaign_dict['sponsor_id'] = sponsor.id
+        
+        # Ensure date fields are properly formatted for frontend
+        if campaign.start_date:
+            campaign_dict['start_date'] = format_date(campaign.start_date)
+            campaign_dict['start_date_iso'] = campaign.start_date.isoformat()
+        
+        if campaign.end_date:
+            campaign_dict['end_date'] = format_date(campaign.end_date)
+            campaign_dict['end_date_iso'] = campaign.end_date.isoformat()
+        
+        if campaign.created_at:
+            campaign_dict['created_at'] = format_datetime(campaign.created_at)
+            campaign_dict['created_at_iso'] = campaign.created_at.isoformat()
+        
+        campaigns_data.append(campaign_dict)
+    
+    return jsonify({
+        'campaigns': campaigns_data,
+        'pagination': serialize_pagination(campaigns_page)
+    }), 200
@@ -0,0 +1,897 @@
+"""
+Sponsor routes: campaigns, ad requests, applications, progress reviews and payments
+"""
+
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from sqlalchemy.orm import joinedload
+import json
+import time
+from models import db, User, Campaign, AdRequest, Payment, NegotiationHistory
+from decorators import sponsor_required
+from formatting import CURRENCY_SYMBOL, format_currency, format_datetime
+from serializers import (
+    serialize_ad_request_detail, serialize_campaign_detail, serialize_campaign_list,
+    serialize_pagination, serialize_payment, serialize_progress_update
+)
+from archive import find_archived, archived_payload
+from ledger import (
+    BudgetExceededError, OverpaymentError, AMOUNT_EPSILON, commit_ad_request, record_payment,
+    remaining_budget, outstanding_amount, serialize_ledger, burn_down
+)
+from sync import (
+    new_watermark, changes_window_start, record_tombstone, tombstones_since,
+    filtered_out_tombstone, get_since_param, sync_response
+)
+from constants import DEFAULT_CATEGORY, map_industry_to_category
+from mailer import render_template_with_defaults
+from outbox import queue_email
+
+bp = Blueprint('sponsor', __name__)
+
+
+# == Sponsor: Campaign Management ==
+@bp.route('/api/sponsor/campaigns', methods=['POST'])
+@jwt_required()
+@sponsor_required
+def sponsor_create_campaign():
+    data = request.get_json(); sponsor_id = get_jwt_identity()
+    required = ['name', 'budget', 'start_date', 'visibility']
+    if not all(f in data for f in required): return jsonify({"message": "Missing fields"}), 400
+    try:
+        start_date = datetime.fromisoformat(data['start_date'].replace('Z', '+00:00'))
+        end_date = datetime.fromisoformat(data['end_date'].replace('Z', '+00:00')) if data.get('end_date') else None
+        budget = float(data['budget'])
+        if data['visibility'] not in ['public', 'private']: raise ValueError("Invalid visibility")
+    except (ValueError, TypeError): return jsonify({"message": "Invalid date, budget, or visibility"}), 400
+
+    # Get sponsor to inherit category based on industry
+    sponsor = db.session.get(User, sponsor_id)
+    
+    # Use provided category if available, otherwise map from industry
+    category = data.get('category')
+    if not category and sponsor and sponsor.industry:
+        category = map_industry_to_category(sponsor.industry)
+
+    campaign = Campaign(sponsor_id=sponsor_id, name=data['name'], budget=budget, start_date=start_date,
+                        end_date=end_date, visibility=data['visibility'], category=category,
+                        description=data.get('description'), goals=data.get('goals'))
+    db.session.add(campaign); db.session.commit()
+    return jsonify({"message": "Campaign created", "campaign": serialize_campaign_detail(campaign)}), 201
+
+@bp.route('/api/sponsor/campaigns', methods=['GET'])
+@jwt_required()
+@sponsor_required
+def sponsor_get_campaigns():
+    """
+    List the sponsor's campaigns with ad request counts by status and latest activity.
+    Pass page/per_page for a paginated response, or since for delta sync.
+    """
+    sponsor_id = get_jwt_identity()
+    since, error = get_since_param()
+    if error: return error
+    watermark = new_watermark()
+
+    query = Campaign.query.filter_by(sponsor_id=sponsor_id).options(joinedload(Campaign.sponsor))
+    if since is not None:
+        # Delta mode: only campaigns changed since the watermark, plus deletions
+        campaigns = query.filter(Campaign.updated_at >= changes_window_start(since))\
+                         .order_by(Campaign.updated_at.desc()).all()
+        return sync_response({
+            'campaigns': serialize_campaign_list(campaigns),
+            'tombstones': tombstones_since('campaign', since, sponsor_id=sponsor_id)
+        }, watermark)
+
+    query = query.order_by(Campaign.created_at.desc())
+    if 'page' in request.args or 'per_page' in request.args:
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)  # Cap at 100 items
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        return sync_response({
+            'campaigns': serialize_campaign_list(pagination.items),
+            'pagination': serialize_pagination(pagination)
+        }, watermark)
+
+    return sync_response(serialize_campaign_list(query.all()), watermark)
+
+@bp.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['GET'])
+@jwt_required()
+@sponsor_required
+def sponsor_get_campaign(campaign_id):
+    sponsor_id = get_jwt_identity()
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+    if not campaign:
+        # Fall back to the archive for old completed campaigns
+        archived = find_archived('campaign', campaign_id)
+        if archived and archived.sponsor_id == sponsor_id:
+            return jsonify(archived_payload(archived)['detail']), 200
+        return jsonify({"message": "Campaign not found or access denied"}), 404
+    return jsonify(serialize_campaign_detail(campaign)), 200
+
+@bp.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['PUT'])
+@jwt_required()
+@sponsor_required
+def sponsor_update_campaign(campaign_id):
+    sponsor_id = get_jwt_identity(); data = request.get_json()
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+    if not campaign: return jsonify({"message": "Campaign not found/denied"}), 404
+
+    # Selective update
+    if 'name' in data: campaign.name = data['name']
+    if 'description' in data: campaign.description = data['description']
+    if 'goals' in data: campaign.goals = data['goals']
+    if 'visibility' in data and data['visibility'] in ['public', 'private']: campaign.visibility = data['visibility']
+    
+    # Update category if provided, otherwise keep existing or inherit from sponsor if null
+    if 'category' in data:
+        if data['category']:
+            campaign.category = data['category']
+        elif data['category'] is None:
+            # Inherit from sponsor if explicitly setting to null
+            sponsor = db.session.get(User, sponsor_id)
+            if sponsor and sponsor.industry:
+                campaign.category = map_industry_to_category(sponsor.industry)
+            else:
+                campaign.category = DEFAULT_CATEGORY
+            
+    if 'budget' in data:
+        try: new_budget = float(data['budget'])
+        except (ValueError, TypeError): new_budget = None # ignore invalid budget on update
+        if new_budget is not None:
+            if new_budget + AMOUNT_EPSILON < (campaign.committed_amount or 0.0):
+                return jsonify({"message": f"Budget cannot be lower than the committed amount ({format_currency(campaign.committed_amount)})"}), 400
+            campaign.budget = new_budget
+    for date_field in ['start_date', 'end_date']:
+         if date_field in data:
+              try:
+                  date_val = datetime.fromisoformat(data[date_field].replace('Z', '+00:00')) if data[date_field] else None
+                  setattr(campaign, date_field, date_val)
+              except (ValueError, TypeError): pass
+
+    db.session.commit()
+    return jsonify({"message": "Campaign updated", "campaign": serialize_campaign_detail(campaign)}), 200
+
+@bp.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['DELETE'])
+@jwt_required()
+@sponsor_required
+def sponsor_delete_campaign(campaign_id):
+    sponsor_id = get_jwt_identity()
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+    if not campaign: return jsonify({"message": "Campaign not found/denied"}), 404
+    # Leave tombstones for delta sync clients, including the cascaded ad requests
+    record_tombstone('campaign', campaign.id, sponsor_id=sponsor_id)
+    for ad_request_id, influencer_id in db.session.query(AdRequest.id, AdRequest.influencer_id)\
+            .filter(AdRequest.campaign_id == campaign.id).all():
+        record_tombstone('ad_request', ad_request_id, sponsor_id=sponsor_id, influencer_id=influencer_id)
+    db.session.delete(campaign); db.session.commit() # Cascade deletes AdRequests
+    return jsonify({"message": "Campaign deleted"}), 200
+
+@bp.route('/api/sponsor/campaigns/<int:campaign_id>/budget', methods=['GET'])
+@jwt_required()
+@sponsor_required
+def sponsor_campaign_budget(campaign_id):
+    """Budget ledger totals and daily payment burn-down for a campaign"""
+    sponsor_id = get_jwt_identity()
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+    if not campaign: return jsonify({"message": "Campaign not found/denied"}), 404
+
+    data = serialize_ledger(campaign)
+    data.update({
+        'campaign_id': campaign.id,
+        'remaining_budget_formatted': format_currency(data['remaining_budget']),
+        'burn_down': burn_down(campaign)
+    })
+    return jsonify(data), 200
+
+# == Sponsor: Ad Request Management ==
+@bp.route('/api/sponsor/campaigns/<int:campaign_id>/ad_requests', methods=['POST'])
+@jwt_required()
+@sponsor_required
+def sponsor_create_ad_request(campaign_id):
+    try:
+        sponsor_id = get_jwt_identity()
+        
+        # Check if the campaign exists and belongs to the sponsor
+        campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+        if not campaign: 
+            return jsonify({"message": "Campaign not found/denied"}), 404
+
+        # Get and validate request data
+        data = request.get_json()
+        if not data:
+            return jsonify({"message": "No JSON data received"}), 400
+            
+        # Check required fields
+        required = ['influencer_id', 'requirements', 'payment_amount']
+        missing = [f for f in required if f not in data]
+        if missing:
+            return jsonify({"message": f"Missing required fields: {', '.join(missing)}"}), 400
+        
+        # Validate influencer ID is an integer
+        try:
+            influencer_id = int(data['influencer_id'])
+        except (ValueError, TypeError):
+            return jsonify({"message": "Invalid influencer ID format"}), 400
+        
+        # Check for approved and non-flagged influencers only
+        influencer = User.query.filter_by(
+            id=influencer_id, 
+            role='influencer', 
+            is_active=True,
+            influencer_approved=True,
+            is_flagged=False
+        ).first()
+        
+        if not influencer: 
+            return jsonify({"message": "Influencer not found or not available. The influencer may be pending approval or flagged for policy violations."}), 404
+        
+        # Validate payment amount
+        try: 
+            payment = float(data['payment_amount'])
+            if payment <= 0:
+                return jsonify({"message": "Payment amount must be greater than zero"}), 400
+        except (ValueError, TypeError): 
+            return jsonify({"message": "Invalid payment amount - must be a valid number"}), 400
+
+        if payment > remaining_budget(campaign) + AMOUNT_EPSILON:
+            return jsonify({"message": f"Payment amount exceeds the remaining campaign budget ({format_currency(remaining_budget(campaign))})"}), 400
+
+        # Check if any request already exists for this influencer on this campaign (regardless of status)
+        existing_request = AdRequest.query.filter_by(
+            campaign_id=campaign.id,
+            influencer_id=influencer.id
+        ).first()
+        
+        if existing_request:
+            status_msg = f"An ad request already exists for this influencer on this campaign (status: {existing_request.status})"
+            return jsonify({"message": status_msg, "ad_request_id": existing_request.id}), 409
+
+        # Create the ad request
+        ad_request = AdRequest(
+            campaign_id=campaign.id, 
+            influencer_id=influencer.id, 
+            initiator_id=sponsor_id, 
+            last_offer_by='sponsor',
+            message=data.get('message', ''), 
+            requirements=data['requirements'], 
+            payment_amount=payment, 
+            status='Pending'
+        )
+        
+        db.session.add(ad_request)
+        db.session.flush()  # Get the ad_request ID before committing
+        
+        # Create initial history record
+        history = NegotiationHistory(
+            ad_request_id=ad_request.id,
+            user_id=sponsor_id,
+            user_role='sponsor',
+            action='propose',
+            message=data.get('message', ''),
+            payment_amount=payment,
+            requirements=data['requirements']
+        )
+        
+        db.session.add(history)
+        db.session.commit()
+        
+        return jsonify({
+            "message": "Ad request sent successfully", 
+            "ad_request": serialize_ad_request_detail(ad_request)
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error in sponsor_create_ad_request: {str(e)}")
+        return jsonify({"message": f"An error occurred while processing your request: {str(e)}"}), 500
+
+@bp.route('/api/sponsor/ad_requests', methods=['GET']) # Get all ad requests initiated by sponsor
+@jwt_required()
+@sponsor_required
+def sponsor_get_all_ad_requests():
+    sponsor_id = get_jwt_identity()
+    status_filter = request.args.get('status')
+    campaign_id_filter = request.args.get('campaign_id')
+    since, error = get_since_param()
+    if error: return error
+    watermark = new_watermark()
+
+    query = AdRequest.query.join(Campaign).filter(Campaign.sponsor_id == sponsor_id) # Filter by sponsor via campaign
+
+    if since is not None:
+        # Delta mode: changed rows outside the status filter are returned as tombstones instead
+        query = query.filter(AdRequest.updated_at >= changes_window_start(since))
+    elif status_filter:
+        query = query.filter(AdRequest.status == status_filter)
+    if campaign_id_filter:
+         try: query = query.filter(AdRequest.campaign_id == int(campaign_id_filter))
+         except ValueError: pass
+
+    requests = query.order_by(AdRequest.updated_at.desc()).all()
+    
+    # Safe serialization with error handling
+    ad_requests_data = []
+    tombstones = []
+    for ar in requests:
+        if since is not None and status_filter and ar.status != status_filter:
+            tombstones.append(filtered_out_tombstone('ad_request', ar.id, ar.status, ar.updated_at))
+            continue
+        try:
+            data = {
+                "id": ar.id,
+                "campaign_id": ar.campaign_id,
+                "campaign_name": ar.campaign.name if ar.campaign else "Unknown",
+                "influencer_id": ar.influencer_id,
+                "influencer_name": ar.target_influencer.username if ar.target_influencer else "Unknown",
+                "status": ar.status,
+                "payment_amount": ar.payment_amount,
+                "payment_amount_formatted": format_currency(ar.payment_amount),
+                "last_offer_by": ar.last_offer_by,
+                "requirements": ar.requirements,
+                "created_at": format_datetime(ar.created_at) if ar.created_at else None,
+                "updated_at": format_datetime(ar.updated_at) if ar.updated_at else None,
+                "created_at_iso": ar.created_at.isoformat() if ar.created_at else None,
+                "updated_at_iso": ar.updated_at.isoformat() if ar.updated_at else None
+            }
+            ad_requests_data.append(data)
+        except Exception as e:
+            current_app.logger.error(f"Error serializing ad request {ar.id}: {str(e)}")
+            # Continue with next item instead of failing completely
+            
+    response_data = {
+        "ad_requests": ad_requests_data,
+        "currency_symbol": CURRENCY_SYMBOL,
+        "watermark": watermark.isoformat()
+    }
+    if since is not None:
+        response_data["tombstones"] = tombstones + tombstones_since('ad_request', since, sponsor_id=sponsor_id)
+    return sync_response(response_data, watermark)
+
+@bp.route('/api/sponsor/ad_requests/<int:ad_request_id>', methods=['GET'])
+@jwt_required()
+@sponsor_required
+def sponsor_get_ad_request(ad_request_id):
+    sponsor_id = get_jwt_identity()
+    
+    try:
+        ad_request = db.session.get(AdRequest, ad_request_id)
+        
+        if not ad_request:
+            # Fall back to the archive for old closed ad requests
+            archived = find_archived('ad_request', ad_request_id)
+            if archived and archived.sponsor_id == sponsor_id:
+                payload = archived_payload(archived)
+                return jsonify(dict(payload['detail'], negotiation_history=payload['negotiation_history'])), 200
+            return jsonify({"message": "Ad Request not found"}), 404
+        
+        # Check ownership via campaign
+        if not ad_request.campaign or ad_request.campaign.sponsor_id != sponsor_id:
+            return jsonify({"message": "Access denied"}), 403
+        
+        # Get negotiation history
+        negotiations = NegotiationHistory.query.filter_by(ad_request_id=ad_request_id).order_by(NegotiationHistory.created_at).all()
+        negotiation_history = [
+            {
+                "id": neg.id,
+                "action": neg.action,
+                "message": neg.message,
+                "payment_amount": neg.payment_amount,
+                "payment_amount_formatted": format_currency(neg.payment_amount),
+                "requirements": neg.requirements,
+                "actor": neg.user_role,
+                "actor_name": neg.user.username if neg.user else "Unknown User",
+                "created_at": format_datetime(neg.created_at) if neg.created_at else None,
+                "created_at_iso": neg.created_at.isoformat() if neg.created_at else None
+            } for neg in negotiations
+        ]
+        
+        # Safe access to related objects
+        campaign_name = ad_request.campaign.name if ad_request.campaign else "Unknown Campaign"
+        influencer_name = ad_request.target_influencer.username if ad_request.target_influencer else "Unknown Influencer"
+        
+        # Get influencer details for more context
+        influencer_details = None
+        if ad_request.target_influencer:
+            influencer = ad_request.target_influencer
+            influencer_details = {
+                "id": influencer.id,
+                "username": influencer.username,
+                "influencer_name": influencer.influencer_name,
+                "category": influencer.category,
+                "niche": influencer.niche,
+                "reach": influencer.reach
+            }
+        
+        ad_request_data = {
+            "id": ad_request.id,
+            "campaign_id": ad_request.campaign_id,
+            "campaign_name": campaign_name,
+            "influencer_id": ad_request.influencer_id,
+            "influencer_name": influencer_name,
+            "influencer_details": influencer_details,
+            "status": ad_request.status,
+            "payment_amount": ad_request.payment_amount,
+            "payment_amount_formatted": format_currency(ad_request.payment_amount),
+            "last_offer_by": ad_request.last_offer_by,
+            "requirements": ad_request.requirements,
+            "message": ad_request.message,
+            "created_at": format_datetime(ad_request.created_at) if ad_request.created_at else None,
+            "updated_at": format_datetime(ad_request.updated_at) if ad_request.updated_at else None,
+            "created_at_iso": ad_request.created_at.isoformat() if ad_request.created_at else None,
+            "updated_at_iso": ad_request.updated_at.isoformat() if ad_request.updated_at else None,
+            "negotiation_history": negotiation_history,
+            # Add clear negotiation status flags for UI
+            "can_respond": ad_request.status == 'Negotiating' and ad_request.last_offer_by == 'influencer',
+            "is_active": ad_request.status in ['Pending', 'Negotiating'],
+            "is_completed": ad_request.status == 'Accepted',
+            "is_rejected": ad_request.status == 'Rejected',
+            "currency_symbol": CURRENCY_SYMBOL
+        }
+        
+        return jsonify(ad_request_data), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error in sponsor_get_ad_request: {str(e)}")
+        return jsonify({"message": f"An error occurred while fetching the ad request: {str(e)}"}), 500
+
+@bp.route('/api/sponsor/ad_requests/<int:ad_request_id>', methods=['PUT']) # Sponsor responds to negotiation
+@jwt_required()
+@sponsor_required
+def sponsor_negotiate_ad_request(ad_request_id):
+    sponsor_id = get_jwt_identity()
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request: return jsonify({"message": "Ad Request not found"}), 404
+    if ad_request.campaign.sponsor_id != sponsor_id: return jsonify({"message": "Access denied"}), 403
+
+    # Allow sponsor action if status is 'Pending' OR ('Negotiating' and last offer was by influencer)
+    if not ((ad_request.status == 'Pending') or 
+            (ad_request.status == 'Negotiating' and ad_request.last_offer_by == 'influencer')):
+         return jsonify({"message": "Cannot modify request now or not sponsor's turn"}), 400
+
+    data = request.get_json()
+    action = data.get('action') # 'accept' (accept influencer's offer), 'reject', 'negotiate' (counter-offer)
+
+    # Create history record
+    history = NegotiationHistory(
+        ad_request_id=ad_request.id,
+        user_id=sponsor_id,
+        user_role='sponsor',
+        action='respond' if ad_request.status == 'Pending' else action,
+        message=data.get('message'),
+        payment_amount=data.get('payment_amount', ad_request.payment_amount),
+        requirements=data.get('requirements')
+    )
+    db.session.add(history)
+
+    if action == 'accept':
+        ad_request.status = 'Accepted'
+        try:
+            commit_ad_request(ad_request)
+        except BudgetExceededError as e:
+            db.session.rollback()
+            return jsonify({"message": str(e)}), 409
+        message = "Offer accepted"
+    elif action == 'reject':
+        ad_request.status = 'Rejected'
+        message = "Offer rejected"
+    elif action == 'negotiate':
+        # Sponsor makes counter-offer
+        new_payment = data.get('payment_amount')
+        new_message = data.get('message')
+        new_requirements = data.get('requirements') # Allow changing requirements?
+
+        if new_payment is None: return jsonify({"message": "Payment amount required for counter-offer"}), 400
+        try: ad_request.payment_amount = float(new_payment)
+        except (ValueError, TypeError): return jsonify({"message": "Invalid payment amount"}), 400
+        if ad_request.payment_amount > remaining_budget(ad_request.campaign) + AMOUNT_EPSILON:
+            db.session.rollback()
+            return jsonify({"message": "Counter-offer exceeds the remaining campaign budget"}), 400
+
+        if new_message: ad_request.message = new_message
+        if new_requirements: ad_request.requirements = new_requirements # Be careful allowing this
+
+        ad_request.status = 'Negotiating' # Remains negotiating
+        ad_request.last_offer_by = 'sponsor'
+        message = "Counter-offer sent to influencer"
+    else:
+        return jsonify({"message": "Invalid action. Use 'accept', 'reject', or 'negotiate'."}), 400
+
+    ad_request.updated_at = datetime.utcnow()
+    db.session.commit()
+    # Add notification logic later
+    return jsonify({"message": message, "ad_request": serialize_ad_request_detail(ad_request)}), 200
+
+
+@bp.route('/api/sponsor/ad_requests/<int:ad_request_id>', methods=['DELETE'])
+@jwt_required()
+@sponsor_required
+def sponsor_delete_ad_request(ad_request_id):
+    sponsor_id = get_jwt_identity()
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request: return jsonify({"message": "Ad Request not found"}), 404
+    # Check ownership via campaign
+    if ad_request.campaign.sponsor_id != sponsor_id: return jsonify({"message": "Access denied"}), 403
+    if ad_request.status not in ['Pending', 'Rejected']: return jsonify({"message": "Cannot delete active request"}), 400
+
+    record_tombstone('ad_request', ad_request.id, sponsor_id=sponsor_id, influencer_id=ad_request.influencer_id)
+    db.session.delete(ad_request); db.session.commit()
+    return jsonify({"message": "Ad Request deleted"}), 200
+
+@bp.route('/api/sponsor/campaigns/<int:campaign_id>/negotiation_summary', methods=['GET'])
+@jwt_required()
+@sponsor_required
+def sponsor_campaign_negotiation_summary(campaign_id):
+    """Get summary of negotiations for a sponsor's campaign"""
+    sponsor_id = get_jwt_identity()
+    
+    # Check campaign ownership
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+    if not campaign:
+        return jsonify({"message": "Campaign not found or access denied"}), 404
+    
+    # Get all ad requests for this campaign
+    ad_requests = AdRequest.query.filter_by(campaign_id=campaign_id).all()
+    
+    # For each ad request, get the latest negotiation history
+    results = []
+    for ad_request in ad_requests:
+        latest_history = NegotiationHistory.query.filter_by(ad_request_id=ad_request.id).order_by(NegotiationHistory.created_at.desc()).first()
+        
+        if latest_history:
+            results.append({
+                'ad_request': serialize_ad_request_detail(ad_request),
+                'latest_action': {
+                    'user_role': latest_history.user_role,
+                    'action': latest_history.action,
+                    'payment_amount': latest_history.payment_amount,
+                    'created_at': latest_history.created_at.isoformat() if latest_history.created_at else None,
+                }
+            })
+    
+    return jsonify(results), 200
+
+
+# == Sponsor: Handling Influencer Applications ==
+
+@bp.route('/api/sponsor/campaigns/<int:campaign_id>/applications', methods=['GET'])
+@jwt_required()
+@sponsor_required
+def sponsor_get_campaign_applications(campaign_id):
+    """Get AdRequests initiated by influencers for a specific campaign."""
+    sponsor_id = get_jwt_identity()
+
+    # Verify campaign exists and belongs to the sponsor
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+    if not campaign:
+        return jsonify({"message": "Campaign not found or access denied"}), 404
+
+    # Get filters and pagination params
+    status_filter = request.args.get('status', 'Pending') # Default to pending applications
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+
+    # Query AdRequests for this campaign initiated by influencers
+    query = AdRequest.query.filter(
+        AdRequest.campaign_id == campaign_id,
+        AdRequest.initiator_id == AdRequest.influencer_id # Ensure influencer started it
+    )
+
+    if status_filter:
+        query = query.filter(AdRequest.status == status_filter)
+
+    query = query.order_by(AdRequest.created_at.desc())
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+
+    return jsonify({
+        'applications': [serialize_ad_request_detail(req) for req in pagination.items],
+        'pagination': serialize_pagination(pagination)
+    }), 200
+
+@bp.route('/api/sponsor/applications/<int:ad_request_id>/accept', methods=['PATCH'])
+@jwt_required()
+@sponsor_required
+def sponsor_accept_application(ad_request_id):
+    """Sponsor accepts an influencer's application (AdRequest)."""
+    sponsor_id = get_jwt_identity()
+    ad_request = db.session.get(AdRequest, ad_request_id)
+
+    if not ad_request:
+        return jsonify({"message": "Application (Ad Request) not found"}), 404
+    # Verify ownership via campaign
+    if ad_request.campaign.sponsor_id != sponsor_id:
+        return jsonify({"message": "Access denied"}), 403
+    # Verify it's a pending application initiated by the influencer
+    if not (ad_request.status == 'Pending' and ad_request.initiator_id == ad_request.influencer_id):
+        return jsonify({"message": "Application is not pending or was not initiated by the influencer"}), 400
+
+    ad_request.status = 'Accepted' # Now it's an active agreement
+    ad_request.updated_at = datetime.utcnow()
+    try:
+        commit_ad_request(ad_request)
+    except BudgetExceededError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 409
+
+    # Log this action in history
+    history = NegotiationHistory(
+        ad_request_id=ad_request.id,
+        user_id=sponsor_id,
+        user_role='sponsor',
+        action='accept_application', # Distinguish from accepting a negotiation counter-offer
+        message="Sponsor accepted influencer's initial application.",
+        payment_amount=ad_request.payment_amount,
+        requirements=ad_request.requirements
+    )
+    db.session.add(history)
+    db.session.commit()
+
+    # Add notification logic here if implemented
+
+    return jsonify({
+        "message": "Influencer application accepted",
+        "ad_request": serialize_ad_request_detail(ad_request)
+    }), 200
+
+@bp.route('/api/sponsor/applications/<int:ad_request_id>/reject', methods=['PATCH'])
+@jwt_required()
+@sponsor_required
+def sponsor_reject_application(ad_request_id):
+    """Sponsor rejects an influencer's application (AdRequest)."""
+    sponsor_id = get_jwt_identity()
+    ad_request = db.session.get(AdRequest, ad_request_id)
+
+    if not ad_request:
+        return jsonify({"message": "Application (Ad Request) not found"}), 404
+    # Verify ownership via campaign
+    if ad_request.campaign.sponsor_id != sponsor_id:
+        return jsonify({"message": "Access denied"}), 403
+    # Verify it's a pending application initiated by the influencer
+    if not (ad_request.status == 'Pending' and ad_request.initiator_id == ad_request.influencer_id):
+        return jsonify({"message": "Application is not pending or was not initiated by the influencer"}), 400
+
+    ad_request.status = 'Rejected'
+    ad_request.updated_at = datetime.utcnow()
+
+    # Log this action in history
+    history = NegotiationHistory(
+        ad_request_id=ad_request.id,
+        user_id=sponsor_id,
+        user_role='sponsor',
+        action='reject_application',
+        message="Sponsor rejected influencer's initial application.",
+        payment_amount=ad_request.payment_amount,
+        requirements=ad_request.requirements
+    )
+    db.session.add(history)
+    db.session.commit()
+
+    # Add notification logic here if implemented
+
+    return jsonify({"message": "Influencer application rejected"}), 200
+
+@bp.route('/api/sponsor/ad_requests/<int:ad_request_id>/payments', methods=['GET'])
+@jwt_required()
+@sponsor_required
+def get_payments(ad_request_id):
+    """Get payments for an ad request"""
+    sponsor_id = get_jwt_identity()
+    
+    # Check ad request exists and belongs to the sponsor
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request:
+        return jsonify({"message": "Ad Request not found"}), 404
+    
+    # Verify ownership via campaign
+    if ad_request.campaign.sponsor_id != sponsor_id:
+        return jsonify({"message": "Access denied"}), 403
+    
+    # Get all payments for this ad request
+    payments = Payment.query.filter_by(ad_request_id=ad_request_id).order_by(Payment.created_at.desc()).all()
+    
+    # Serialize payments
+    payments_data = [serialize_payment(payment) for payment in payments]
+    
+    return jsonify(payments_data), 200
+
+@bp.route('/api/sponsor/ad_requests/<int:ad_request_id>/payments', methods=['POST'])
+@jwt_required()
+@sponsor_required
+def create_payment(ad_request_id):
+    """Create a new payment for an ad request"""
+    sponsor_id = get_jwt_identity()
+    
+    # Check ad request exists and belongs to the sponsor
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request:
+        return jsonify({"message": "Ad Request not found"}), 404
+    
+    # Verify ownership via campaign
+    if ad_request.campaign.sponsor_id != sponsor_id:
+        return jsonify({"message": "Access denied"}), 403
+    
+    # Check if ad request is accepted (only can pay for accepted requests)
+    if ad_request.status != 'Accepted':
+        return jsonify({"message": "Cannot make payment for non-accepted ad requests"}), 400
+    
+    # Get payment data
+    data = request.get_json()
+    if not data:
+        return jsonify({"message": "No payment data provided"}), 400
+    
+    # Validate required fields
+    if 'amount' not in data:
+        return jsonify({"message": "Payment amount is required"}), 400
+        
+    if 'payment_type' not in data:
+        return jsonify({"message": "Payment type is required"}), 400
+        
+    # Get amount from data or pay whatever is still outstanding
+    amount = None
+    outstanding = outstanding_amount(ad_request)
+    if outstanding <= AMOUNT_EPSILON:
+        return jsonify({"message": "This ad request has already been paid in full"}), 400
+    if data['payment_type'] == 'full':
+        amount = outstanding
+    else:  # partial payment
+        try:
+            amount = float(data['amount'])
+            if amount <= 0:
+                return jsonify({"message": "Payment amount must be positive"}), 400
+            if amount > outstanding + AMOUNT_EPSILON:
+                return jsonify({"message": f"Partial payment cannot exceed the outstanding amount ({format_currency(outstanding)})"}), 400
+        except (ValueError, TypeError):
+            return jsonify({"message": "Invalid payment amount"}), 400
+    
+    # Calculate platform fees (1% of payment amount)
+    platform_fee = amount * 0.01  # 1% fee
+    influencer_amount = amount - platform_fee
+    
+    # Generate simple transaction ID
+    transaction_id = f"TXN_{ad_request_id}_{int(time.time())}"
+    
+    # Create payment record
+    payment = Payment(
+        ad_request_id=ad_request_id,
+        amount=amount,
+        platform_fee=platform_fee,
+        influencer_amount=influencer_amount,
+        status='Completed',
+        payment_method='Direct',
+        transaction_id=transaction_id,
+        payment_response=json.dumps({
+            "message": data.get('message', ''),
+            "payment_type": data['payment_type']
+        })
+    )
+    
+    db.session.add(payment)
+    try:
+        record_payment(ad_request, amount)
+    except OverpaymentError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 409
+    
+    # Email the influencer: queued in the payment's transaction and sent by the outbox dispatcher
+    influencer = db.session.get(User, ad_request.influencer_id)
+    if influencer and influencer.email:
+        body = render_template_with_defaults('emails/payment_received.html',
+            influencer=influencer,
+            campaign_name=ad_request.campaign.name,
+            amount=format_currency(amount),
+            platform_fee=format_currency(platform_fee),
+            net_amount=format_currency(influencer_amount),
+            transaction_id=transaction_id,
+            paid_at=format_datetime(datetime.utcnow()),
+            message=data.get('message')
+        )
+        queue_email("Payment Received", influencer.email, body)
+    db.session.commit()
+    
+    return jsonify({
+        "payment": serialize_payment(payment),
+        "receipt_url": f"/api/sponsor/payments/{payment.id}/receipt"
+    }), 201
+
+@bp.route('/api/sponsor/ad_requests/<int:ad_request_id>/progress', methods=['GET'])
+@jwt_required()
+@sponsor_required
+def sponsor_get_progress_updates(ad_request_id):
+    """Get progress updates for an ad request (sponsor view)"""
+    sponsor_id = get_jwt_identity()
+    
+    # Check ad request exists and belongs to the sponsor
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request:
+        return jsonify({"message": "Ad Request not found"}), 404
+    
+    # Verify ownership via campaign
+    if ad_request.campaign.sponsor_id != sponsor_id:
+        return jsonify({"message": "Access denied"}), 403
+    
+    # Get all progress updates for this ad request
+    from models import ProgressUpdate
+    progress_updates = ProgressUpdate.query.filter_by(ad_request_id=ad_request_id).order_by(ProgressUpdate.created_at.desc()).all()
+    
+    # Serialize progress updates
+    progress_data = [serialize_progress_update(update) for update in progress_updates]
+    
+    return jsonify(progress_data), 200
+
+@bp.route('/api/sponsor/ad_requests/<int:ad_request_id>/progress/<int:update_id>', methods=['PATCH'])
+@jwt_required()
+@sponsor_required
+def sponsor_review_progress_update(ad_request_id, update_id):
+    """Review a progress update (sponsor only)"""
+    sponsor_id = get_jwt_identity()
+    
+    # Check ad request exists and belongs to the sponsor
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    if not ad_request:
+        return jsonify({"message": "Ad Request not found"}), 404
+    
+    # Verify ownership via campaign
+    if ad_request.campaign.sponsor_id != sponsor_id:
+        return jsonify({"message": "Access denied"}), 403
+    
+    # Find the progress update
+    from models import ProgressUpdate
+    update = ProgressUpdate.query.filter_by(id=update_id, ad_request_id=ad_request_id).first()
+    if not update:
+        return jsonify({"message": "Progress update not found"}), 404
+    
+    # Check if update is pending (can only review pending updates)
+    if update.status != 'Pending':
+        return jsonify({"message": "Cannot review non-pending updates"}), 400
+    
+    # Get action from request data
+    data = request.get_json()
+    if not data or 'action' not in data:
+        return jsonify({"message": "Action is required"}), 400
+    
+    action = data['action']
+    
+    # Handle different actions
+    if action == 'approve':
+        update.status = 'Approved'
+    elif action == 'request_revision':
+        if 'feedback' not in data or not data['feedback']:
+            return jsonify({"message": "Feedback is required for revision requests"}), 400
+        
+        update.status = 'Revision Requested'
+        update.feedback = data['feedback']
+    else:
+        return jsonify({"message": "Invalid action. Use 'approve' or 'request_revision'"}), 400
+    
+    update.updated_at = datetime.utcnow()
+    db.session.commit()
+    
+    return jsonify({
+        "message": f"Progress update {action}d successfully",
+        "update": serialize_progress_update(update)
+    }), 200
+
+@bp.route('/api/sponsor/campaigns/<int:campaign_id>/complete', methods=['PATCH'])
+@jwt_required()
+@sponsor_required
+def sponsor_complete_campaign(campaign_id):
+    """Mark a campaign as completed by the sponsor."""
+    sponsor_id = get_jwt_identity()
+    
+    # Find the campaign and verify ownership
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+    if not campaign:
+        return jsonify({"message": "Campaign not found or access denied"}), 404
+    
+    # Only active campaigns can be marked as completed
+    if campaign.status != 'active':
+        return jsonify({"message": f"Only active campaigns can be marked as completed. Current status: {campaign.status}"}), 400
+    
+    # Mark as completed
+    campaign.status = 'completed'
+    db.session.commit()
+    
+    return jsonify({
+        "message": "Campaign marked as completed successfully",
+        "campaign": serialize_campaign_detail(campaign)
+    }), 200
@@ -3,7 +3,7 @@
 Comprehensive application launcher for Sponnect
 Launches all required services in separate terminals:
 - Redis server
-- Celery worker
+- Celery workers (one per queue)
 - Celery beat
 - Flask backend
 - Frontend (Vite dev server)
@@ -11,6 +11,11 @@ Launches all required services in separate terminals:
 
 This script works in Linux environments and attempts to use
 VSCode terminals as first preference if available.
+
+Usage:
+    python run.py                 # Flask development server
+    python run.py --production    # Gunicorn API workers + separate SSE pool
+    python run.py --reload        # Gracefully reload running Gunicorn servers
 """
 
 import os
@@ -31,6 +36,15 @@ FRONTEND_DIR = os.path.join(PROJECT_ROOT, 'sponnect', 'frontend')
 # Process list to keep track of launched processes
 processes = []
 
+# Gunicorn pid files written by gunicorn.conf.py / gunicorn_sse.conf.py
+GUNICORN_PIDFILES = [
+    os.path.join(BACKEND_DIR, 'gunicorn.pid'),
+    os.path.join(BACKEND_DIR, 'gunicorn_sse.pid'),
+]
+
+# Celery queues by workload class, one worker each (must match workers.QUEUE_NAMES)
+CELERY_QUEUES = ['transactional', 'periodic', 'maintenance', 'bulk']
+
 # Terminal detection and configuration
 def is_vscode_terminal():
     """Check if we're running in a VSCode terminal"""
@@ -176,7 +190,7 @@ def check_mailhog():
         return False
 
 def start_celery_worker():
-    """Start Celery worker"""
+    """Start one Celery worker per queue (see QUEUE_WORKER_SETTINGS in workers.py)"""
     worker_script = os.path.join(BACKEND_DIR, "celery_worker.sh")
     
     # Create worker script if it doesn't exist
@@ -184,14 +198,21 @@ def start_celery_worker():
         with open(worker_script, 'w') as f:
             f.write('#!/bin/bash\n')
             f.write('cd "$(dirname "$0")"\n')
-            f.write('celery -A workers.celery worker --loglevel=info\n')
+            f.write('if [ -n "$1" ]; then\n')
+            f.write('    celery -A workers.celery worker -Q "$1" -n "$1@%h" --loglevel=info\n')
+            f.write('else\n')
+            f.write('    celery -A workers.celery worker --loglevel=info\n')
+            f.write('fi\n')
         os.chmod(worker_script, 0o755)
     
-    proc = run_service("Celery Worker", [worker_script], cwd=BACKEND_DIR)
-    if proc:
-        processes.append(proc)
-        return True
-    return False
+    started = True
+    for queue in CELERY_QUEUES:
+        proc = run_service(f"Celery Worker ({queue})", [worker_script, queue], cwd=BACKEND_DIR)
+        if proc:
+            processes.append(proc)
+        else:
+            started = False
+    return started
 
 def start_celery_beat():
     """Start Celery beat scheduler"""
@@ -211,6 +232,49 @@ def start_celery_beat():
         return True
     return False
 
+def start_gunicorn():
+    """Start the backend under Gunicorn: API workers and a separate SSE pool"""
+    if not shutil.which('gunicorn'):
+        print("Gunicorn not found. Install it with 'pip install gunicorn'.")
+        return False
+    
+    gunicorn_script = os.path.join(BACKEND_DIR, "gunicorn_run.sh")
+    
+    # Create gunicorn script if it doesn't exist
+    if not os.path.exists(gunicorn_script):
+        with open(gunicorn_script, 'w') as f:
+            f.write('#!/bin/bash\n')
+            f.write('cd "$(dirname "$0")"\n')
+            f.write('flask --app app init-db\n')
+            f.write('gunicorn -c gunicorn.conf.py wsgi:app &\n')
+            f.write('gunicorn -c gunicorn_sse.conf.py wsgi:app &\n')
+            f.write('wait\n')
+        os.chmod(gunicorn_script, 0o755)
+    
+    proc = run_service("Gunicorn Backend", [gunicorn_script], cwd=BACKEND_DIR)
+    if proc:
+        processes.append(proc)
+        return True
+    return False
+
+def reload_gunicorn():
+    """Gracefully reload running Gunicorn servers (SIGHUP: new workers start before old ones stop)"""
+    reloaded = False
+    for pidfile in GUNICORN_PIDFILES:
+        if not os.path.exists(pidfile):
+            continue
+        try:
+            with open(pidfile) as f:
+                pid = int(f.read().strip())
+            os.kill(pid, signal.SIGHUP)
+            print(f"Sent SIGHUP to Gunicorn master {pid} ({os.path.basename(pidfile)})")
+            reloaded = True
+        except (ValueError, ProcessLookupError, PermissionError) as e:
+            print(f"Could not reload from {pidfile}: {e}")
+    if not reloaded:
+        print("No running Gunicorn servers found.")
+    return reloaded
+
 def start_flask():
     """Start Flask backend"""
     flask_script = os.path.join(BACKEND_DIR, "flask_run.sh")
@@ -222,6 +286,7 @@ def start_flask():
             f.write('cd "$(dirname "$0")"\n')
             f.write('export FLASK_APP=app.py\n')
             f.write('export FLASK_ENV=development\n')
+            f.write('flask init-db\n')
             f.write('flask run --debug\n')
         os.chmod(flask_script, 0o755)
     
@@ -267,6 +332,10 @@ def cleanup(signum=None, frame=None):
 
 def main():
     """Main function to start all services"""
+    if '--reload' in sys.argv:
+        sys.exit(0 if reload_gunicorn() else 1)
+    production = '--production' in sys.argv
+    
     print("=== Sponnect Application Launcher ===")
     print(f"Project root: {PROJECT_ROOT}")
     
@@ -293,7 +362,7 @@ def main():
         print("WARNING: Failed to start Celery beat. Scheduled tasks will not work.")
     
     # Start Flask backend
-    if not start_flask():
+    if not (start_gunicorn() if production else start_flask()):
         print("ERROR: Failed to start Flask backend.")
         cleanup()
         sys.exit(1)
@@ -304,6 +373,8 @@ def main():
     
     print("\nAll services started successfully!")
     print("Backend: http://localhost:5000")
+    if production:
+        print("Live updates (SSE): http://localhost:5001")
     print("Frontend: http://localhost:5173")
     print("Mailhog: http://0.0.0.0:8025")
     print("\nPress Ctrl+C to shut down all services.")
@@ -0,0 +1,229 @@
+"""
+Celery beat schedule for the Sponnect application.
+Each periodic task's cadence comes from Config ("every <seconds>", a crontab in
+CELERY_TIMEZONE, or "off" to leave it out). Interval tasks get a fixed start offset and a per-run jitter so
+they don't all fire at the same second, runs are skipped while the previous one
+is still going, and every run's duration is recorded in Redis for tuning.
+"""
+
+import json
+import logging
+import random
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+from celery import current_task
+from celery.schedules import schedule, crontab, schedstate
+
+from config import Config
+from redis_client import get_redis
+
+RUN_LOCK_PREFIX = 'sponnect:schedule:running:'
+RUN_HISTORY_PREFIX = 'sponnect:schedule:runs:'
+RUN_SKIPPED_PREFIX = 'sponnect:schedule:skipped:'
+
+# Beat entries: (entry name, task, Config cadence attribute, start offset in seconds)
+# Offsets spread the interval tasks across the interval instead of stacking them at :00
+SCHEDULE = (
+    ('send-minute-activity-update', 'user_notifications.send_minute_activity_update', 'SCHEDULE_MINUTE_ACTIVITY_UPDATE', 0),
+    ('notify-admin-pending-approvals', 'user_notifications.notify_admin_pending_approvals', 'SCHEDULE_ADMIN_PENDING_APPROVALS', 15),
+    ('update-expired-campaigns', 'task.update_expired_campaigns', 'SCHEDULE_EXPIRED_CAMPAIGNS', 30),
+    ('send-sponsor-stats-update', 'user_notifications.send_sponsor_stats_update', 'SCHEDULE_SPONSOR_STATS', 600),
+    ('send-influencer-stats-update', 'user_notifications.send_influencer_stats_update', 'SCHEDULE_INFLUENCER_STATS', 1800),
+    ('send-admin-daily-report', 'user_notifications.send_admin_daily_report', 'SCHEDULE_ADMIN_DAILY_REPORT', 0),
+    ('archive-old-records', 'archive.archive_old_records', 'SCHEDULE_ARCHIVE', 0),
+    ('dispatch-email-outbox', 'outbox.dispatch_outbox', 'SCHEDULE_OUTBOX_DISPATCH', 0),
+    ('purge-email-outbox', 'outbox.purge_sent_emails', 'SCHEDULE_OUTBOX_PURGE', 0),
+    ('reconcile-activity-counters', 'activity_counters.reconcile_activity_counters', 'SCHEDULE_ACTIVITY_RECONCILE', 45),
+    ('consume-domain-events', 'event_consumers.consume_domain_events', 'SCHEDULE_DOMAIN_EVENTS', 0),
+    ('purge-read-notifications', 'inbox.purge_read_notifications', 'SCHEDULE_INBOX_PURGE', 0),
+    ('sync-revoked-users', 'revocation.sync_revoked_users', 'SCHEDULE_REVOCATION_SYNC', 50),
+)
+
+
+class staggered(schedule):
+    """
+    Fixed interval aligned to the clock: runs at offset, offset + interval, ...
+    seconds (epoch-aligned), each delayed by a jitter that is random per run but
+    stable while beat re-checks the same run
+    """
+
+    def __init__(self, run_every, offset=0, jitter=0, key='', **kwargs):
+        super().__init__(run_every=run_every, **kwargs)
+        self.offset = offset % self.seconds
+        self.jitter = min(jitter, self.seconds / 2)
+        self.key = key
+
+    def _due_at(self, slot):
+        jitter = random.Random(f"{self.key}:{slot}").uniform(0, self.jitter) if self.jitter else 0
+        return slot * self.seconds + self.offset + jitter
+
+    def _next_slot(self, timestamp):
+        return int((timestamp - self.offset) // self.seconds) + 1
+
+    def is_due(self, last_run_at):
+        now = self.now().timestamp()
+        due_at = self._due_at(self._next_slot(self.maybe_make_aware(last_run_at).timestamp()))
+        if now >= due_at:
+            return schedstate(is_due=True, next=max(self._due_at(self._next_slot(now)) - now, 1))
+        return schedstate(is_due=False, next=due_at - now)
+
+    def __repr__(self):
+        return f"<staggered: every {self.seconds:g}s +{self.offset:g}s ~{self.jitter:g}s>"
+
+    def __reduce__(self):
+        return self.__class__, (self.run_every, self.offset, self.jitter, self.key)
+
+    def __eq__(self, other):
+        if isinstance(other, staggered):
+            return (self.run_every, self.offset, self.jitter, self.key) == \
+                (other.run_every, other.offset, other.jitter, other.key)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.run_every, self.offset, self.jitter, self.key))
+
+
+def parse_cadence(value, offset=0, jitter=0, key='', app=None):
+    """
+    Turn a cadence setting into a beat schedule
+
+    Args:
+        value (str): "every <seconds>" (or just the seconds) or a 5-field crontab
+            "<minute> <hour> <day of month> <month> <day of week>"
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    parts = value.split()
+    if parts and parts[0] == 'every':
+        parts = parts[1:]
+    if len(parts) == 1:
+        seconds = float(parts[0])
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive: {value!r}")
+        return staggered(seconds, offset=offset, jitter=jitter, key=key, app=app)
+    if len(parts) == 5:
+        minute, hour, day_of_month, month_of_year, day_of_week = parts
+        return crontab(minute=minute, hour=hour, day_of_month=day_of_month,
+                       month_of_year=month_of_year, day_of_week=day_of_week, app=app)
+    raise ValueError(f"Invalid schedule {value!r}: use 'every <seconds>' or a 5-field crontab")
+
+
+def build_beat_schedule(app=None):
+    """The beat_schedule dict for all periodic tasks"""
+    entries = [(name, task, getattr(Config, attr), offset) for name, task, attr, offset in SCHEDULE]
+    if Config.DATABASE_REPLICA_URL:
+        # Refresh the local SQLite read replica when one is configured
+        entries.append(('refresh-sqlite-replica', 'task.refresh_sqlite_replica',
+                        f"every {Config.REPLICA_SNAPSHOT_SECONDS}", 5))
+
+    beat_schedule = {}
+    for name, task, cadence, offset in entries:
+        if cadence.strip().lower() == 'off':
+            continue
+        beat_schedule[name] = {
+            'task': task,
+            'schedule': parse_cadence(cadence, offset=offset, jitter=Config.SCHEDULE_JITTER_SECONDS,
+                                      key=name, app=app),
+            'args': ()
+        }
+    return beat_schedule
+
+
+def record_run(task_name, started_at, duration, status):
+    """Keep the last SCHEDULE_HISTORY_SIZE runs of a task"""
+    key = f"{RUN_HISTORY_PREFIX}{task_name}"
+    entry = json.dumps({'started_at': started_at, 'duration': round(duration, 3), 'status': status})
+    pipe = get_redis().pipeline()
+    pipe.lpush(key, entry)
+    pipe.ltrim(key, 0, Config.SCHEDULE_HISTORY_SIZE - 1)
+    pipe.execute()
+
+
+def _release(key, token):
+    client = get_redis()
+    # Only release our own lock; an expired lock may have been taken by a newer run
+    if client.get(key) == token:
+        client.delete(key)
+
+
+def non_overlapping(lock_seconds=None):
+    """
+    Skip a periodic task's run while its previous run is still in progress, and
+    record how long each run took. Inline calls from other tasks run unlocked.
+    Apply below @celery.task().
+    """
+    def decorator(fn):
+        task_name = f"{fn.__module__}.{fn.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_task or current_task.name != task_name:
+                return fn(*args, **kwargs)
+
+            key = f"{RUN_LOCK_PREFIX}{task_name}"
+            token = uuid.uuid4().hex
+            try:
+                acquired = get_redis().set(key, token, nx=True, ex=lock_seconds or Config.SCHEDULE_LOCK_SECONDS)
+            except Exception as e:
+                # Without Redis, running twice is better than not running
+                logging.error(f"Failed to take run lock for {task_name}: {str(e)}")
+                return fn(*args, **kwargs)
+            if not acquired:
+                logging.warning(f"Skipping {task_name}: previous run still in progress")
+                get_redis().incr(f"{RUN_SKIPPED_PREFIX}{task_name}")
+                return None
+
+            started_at = datetime.utcnow().isoformat()
+            started = time.monotonic()
+            status = 'failed'
+            try:
+                result = fn(*args, **kwargs)
+                status = 'succeeded'
+                return result
+            finally:
+                try:
+                    _release(key, token)
+                    record_run(task_name, started_at, time.monotonic() - started, status)
+                except Exception as e:
+                    logging.error(f"Failed to record run of {task_name}: {str(e)}")
+        return wrapper
+    return decorator
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def schedule_report():
+    """Configured cadence and recorded run durations for every beat entry"""
+    client = get_redis()
+    report = []
+    for name, entry in build_beat_schedule().items():
+        task_name = entry['task']
+        runs = [json.loads(run) for run in client.lrange(f"{RUN_HISTORY_PREFIX}{task_name}", 0, -1)]
+        durations = sorted(run['duration'] for run in runs)
+        interval = entry['schedule'].seconds if isinstance(entry['schedule'], staggered) else None
+        stats = None
+        if durations:
+            stats = {
+                'runs': len(durations),
+                'p50_seconds': _percentile(durations, 0.5),
+                'p95_seconds': _percentile(durations, 0.95),
+                'max_seconds': durations[-1],
+                'failed': sum(1 for run in runs if run['status'] != 'succeeded'),
+                'last_started_at': runs[0]['started_at'],
+                # A p95 close to the interval means runs will start being skipped
+                'interval_utilization': round(_percentile(durations, 0.95) / interval, 3) if interval else None
+            }
+        report.append({
+            'entry': name,
+            'task': task_name,
+            'schedule': repr(entry['schedule']),
+            'interval_seconds': interval,
+            'skipped_runs': int(client.get(f"{RUN_SKIPPED_PREFIX}{task_name}") or 0),
+            'durations': stats
+        })
+    return report
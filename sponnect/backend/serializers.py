@@ -0,0 +1,243 @@
+"""
+JSON serializers shared by the API routes and the archiver
+"""
+
+from flask import current_app
+from sqlalchemy import func
+from models import db, AdRequest
+from formatting import CURRENCY_SYMBOL, format_currency, format_currency_pdf, format_datetime, format_date
+from ledger import remaining_budget, outstanding_amount
+
+
+def serialize_pagination(pagination_obj):
+    """Helper to generate pagination metadata."""
+    return {
+        'page': pagination_obj.page,
+        'per_page': pagination_obj.per_page,
+        'total_pages': pagination_obj.pages,
+        'total_items': pagination_obj.total,
+        'has_prev': pagination_obj.has_prev,
+        'has_next': pagination_obj.has_next,
+        'prev_num': pagination_obj.prev_num,
+        'next_num': pagination_obj.next_num
+    }
+
+# --- Helper Functions ---
+def serialize_user_basic(user):
+    return {'id': user.id, 'username': user.username, 'role': user.role, 'is_flagged': user.is_flagged}
+
+def serialize_user_profile(user):
+    data = serialize_user_basic(user)
+    data['email'] = user.email  # Add email field
+    data['created_at'] = user.created_at.isoformat() if user.created_at else None
+    data['is_active'] = user.is_active  # Include active status
+    if user.role == 'sponsor':
+        data.update({
+            'company_name': user.company_name, 
+            'industry': user.industry, 
+            'sponsor_approved': user.sponsor_approved
+        })
+    elif user.role == 'influencer':
+        data.update({
+            'influencer_name': user.influencer_name, 
+            'category': user.category, 
+            'niche': user.niche, 
+            'reach': user.reach,
+            'influencer_approved': user.influencer_approved
+        })
+    return data
+
+def serialize_campaign_basic(campaign):
+     return {
+        'id': campaign.id, 
+        'name': campaign.name, 
+        'budget': campaign.budget, 
+        'budget_formatted': format_currency(campaign.budget),
+        'visibility': campaign.visibility,
+        'status': campaign.status, 
+        'is_flagged': campaign.is_flagged
+     }
+
+def serialize_campaign_detail(campaign):
+    data = serialize_campaign_basic(campaign)
+    data.update({
+        'description': campaign.description, 
+        'goals': campaign.goals, 
+        'sponsor_id': campaign.sponsor_id,
+        'category': campaign.category,
+        'start_date': format_date(campaign.start_date) if campaign.start_date else None,
+        'end_date': format_date(campaign.end_date) if campaign.end_date else None,
+        'created_at': format_datetime(campaign.created_at) if campaign.created_at else None,
+        'start_date_iso': campaign.start_date.isoformat() if campaign.start_date else None,
+        'end_date_iso': campaign.end_date.isoformat() if campaign.end_date else None,
+        'created_at_iso': campaign.created_at.isoformat() if campaign.created_at else None,
+        # Budget ledger
+        'committed_amount': campaign.committed_amount or 0.0,
+        'paid_amount': campaign.paid_amount or 0.0,
+        'remaining_budget': remaining_budget(campaign),
+        # Add sponsor details
+        'sponsor_name': campaign.sponsor.username if campaign.sponsor else "Unknown",
+        'sponsor_company': campaign.sponsor.company_name if campaign.sponsor else None,
+    })
+    return data
+
+def serialize_ad_request_detail(ad_request):
+    """Detailed ad request serialization with related objects"""
+    try:
+        # Get basic attributes
+        result = {
+            "id": ad_request.id,
+            "status": ad_request.status,
+            "payment_amount": ad_request.payment_amount,
+            "requirements": ad_request.requirements,
+            "message": ad_request.message,
+            "last_offer_by": ad_request.last_offer_by,
+            "payment_amount_formatted": format_currency(ad_request.payment_amount),
+            "paid_amount": ad_request.paid_amount or 0.0,
+            "outstanding_amount": outstanding_amount(ad_request)
+        }
+        
+        # Add dates with proper formatting - both ISO and human readable
+        if ad_request.created_at:
+            result["created_at"] = format_datetime(ad_request.created_at)
+            result["created_at_iso"] = ad_request.created_at.isoformat()
+        
+        if ad_request.updated_at:
+            result["updated_at"] = format_datetime(ad_request.updated_at)
+            result["updated_at_iso"] = ad_request.updated_at.isoformat()
+        
+        # Include campaign details
+        if ad_request.campaign:
+            result["campaign"] = serialize_campaign_basic(ad_request.campaign)
+            result["campaign_id"] = ad_request.campaign.id
+            result["campaign_name"] = ad_request.campaign.name
+        
+        # Include influencer details
+        if ad_request.target_influencer:
+            result["influencer"] = serialize_user_basic(ad_request.target_influencer)
+            result["influencer_id"] = ad_request.target_influencer.id
+            result["influencer_name"] = ad_request.target_influencer.username
+        
+        # Include sponsor details through campaign if available
+        if ad_request.campaign and ad_request.campaign.sponsor:
+            result["sponsor"] = serialize_user_basic(ad_request.campaign.sponsor)
+            result["sponsor_id"] = ad_request.campaign.sponsor.id
+            result["sponsor_name"] = ad_request.campaign.sponsor.username
+        
+        return result
+    except Exception as e:
+        current_app.logger.error(f"Error serializing ad request {ad_request.id}: {str(e)}")
+        # Return minimal information to avoid breaking the frontend
+        return {
+            "id": ad_request.id,
+            "status": getattr(ad_request, "status", "Unknown"),
+            "error": "Error processing this ad request"
+        }
+
+def serialize_negotiation_history(history_item):
+    return {
+        'id': history_item.id,
+        'ad_request_id': history_item.ad_request_id,
+        'user_id': history_item.user_id,
+        'user_role': history_item.user_role,
+        'action': history_item.action,
+        'message': history_item.message,
+        'payment_amount': history_item.payment_amount,
+        'payment_amount_formatted': format_currency(history_item.payment_amount),
+        'requirements': history_item.requirements,
+        'created_at': format_datetime(history_item.created_at) if history_item.created_at else None,
+        'created_at_iso': history_item.created_at.isoformat() if history_item.created_at else None,
+        'username': history_item.user.username if history_item.user else None,
+    }
+
+def serialize_campaign_list(campaigns):
+    """
+    Serialize campaigns with ad request counts by status and latest activity, using one
+    grouped query over the ad requests of just these campaigns
+    """
+    campaign_ids = [c.id for c in campaigns]
+    stats = {}
+    if campaign_ids:
+        rows = db.session.query(
+            AdRequest.campaign_id, AdRequest.status,
+            func.count(AdRequest.id), func.max(AdRequest.updated_at)
+        ).filter(AdRequest.campaign_id.in_(campaign_ids))\
+         .group_by(AdRequest.campaign_id, AdRequest.status).all()
+        for campaign_id, status, count, last_updated in rows:
+            entry = stats.setdefault(campaign_id, {'counts': {}, 'last_updated': None})
+            entry['counts'][status] = count
+            if last_updated and (entry['last_updated'] is None or last_updated > entry['last_updated']):
+                entry['last_updated'] = last_updated
+
+    results = []
+    for campaign in campaigns:
+        entry = stats.get(campaign.id, {'counts': {}, 'last_updated': None})
+        counts = {status: entry['counts'].get(status, 0) for status in ['Pending', 'Negotiating', 'Accepted', 'Rejected']}
+        last_activity = max([t for t in (campaign.updated_at, campaign.created_at, entry['last_updated']) if t], default=None)
+
+        data = serialize_campaign_detail(campaign)
+        data.update({
+            'ad_request_counts': counts,
+            'ad_request_total': sum(entry['counts'].values()),
+            'committed_amount_formatted': format_currency(campaign.committed_amount or 0.0),
+            'last_activity_at': format_datetime(last_activity) if last_activity else None,
+            'last_activity_at_iso': last_activity.isoformat() if last_activity else None
+        })
+        results.append(data)
+    return results
+
+
+def serialize_progress_update(update):
+    """Serialize a progress update object for API responses"""
+    return {
+        'id': update.id,
+        'ad_request_id': update.ad_request_id,
+        'content': update.content,
+        'media_urls': update.media_urls.split(',') if update.media_urls else [],
+        'metrics_data': update.metrics_data,  # Front-end will parse this JSON
+        'status': update.status,
+        'feedback': update.feedback,
+        'created_at': format_datetime(update.created_at) if update.created_at else None,
+        'updated_at': format_datetime(update.updated_at) if update.updated_at else None,
+        'created_at_iso': update.created_at.isoformat() if update.created_at else None,
+        'updated_at_iso': update.updated_at.isoformat() if update.updated_at else None
+    }
+
+def serialize_payment(payment):
+    """Serialize a payment object for API responses"""
+    return {
+        'id': payment.id,
+        'ad_request_id': payment.ad_request_id,
+        'amount': payment.amount,
+        'amount_formatted': format_currency(payment.amount),
+        'amount_formatted_pdf': format_currency_pdf(payment.amount),
+        'platform_fee': payment.platform_fee,
+        'platform_fee_formatted': format_currency(payment.platform_fee),
+        'platform_fee_formatted_pdf': format_currency_pdf(payment.platform_fee),
+        'influencer_amount': payment.influencer_amount,
+        'influencer_amount_formatted': format_currency(payment.influencer_amount),
+        'influencer_amount_formatted_pdf': format_currency_pdf(payment.influencer_amount),
+        'status': payment.status,
+        'payment_method': payment.payment_method,
+        'transaction_id': payment.transaction_id,
+        'created_at': format_datetime(payment.created_at) if payment.created_at else None,
+        'updated_at': format_datetime(payment.updated_at) if payment.updated_at else None,
+        'created_at_iso': payment.created_at.isoformat() if payment.created_at else None,
+        'updated_at_iso': payment.updated_at.isoformat() if payment.updated_at else None,
+        'currency_symbol': CURRENCY_SYMBOL,
+        'currency_code': 'INR'
+    }
+
+def serialize_notification(notification):
+    """Serialize an inbox notification for API responses"""
+    return {
+        'id': notification.id,
+        'kind': notification.kind,
+        'title': notification.title,
+        'body': notification.body,
+        'link': notification.link,
+        'is_read': notification.is_read,
+        'created_at': format_datetime(notification.created_at) if notification.created_at else None,
+        'created_at_iso': notification.created_at.isoformat() if notification.created_at else None,
+        'read_at_iso': notification.read_at.isoformat() if notification.read_at else None
+    }
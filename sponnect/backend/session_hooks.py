@@ -0,0 +1,31 @@
+"""
+Database session hooks for the Sponnect application.
+Lets other modules defer side effects (publishing events, bumping counters)
+until the surrounding transaction has actually been committed.
+"""
+
+import logging
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_PENDING_KEY = 'sponnect_after_commit'
+
+
+def run_after_commit(session, callback):
+    """Run callback once the session commits; it is dropped if the session rolls back"""
+    session.info.setdefault(_PENDING_KEY, []).append(callback)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_pending_callbacks(session):
+    callbacks = session.info.pop(_PENDING_KEY, [])
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logging.error(f"After-commit callback failed: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_callbacks(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,106 @@
+"""
+Delta sync helpers for the Sponnect application.
+List endpoints accept ?since=<watermark> and return only rows updated after it,
+plus tombstones for rows that were deleted or left the requested result set.
+"""
+
+from datetime import datetime, timedelta
+from flask import request, jsonify
+
+from config import Config
+from models import db, Tombstone
+
+
+def parse_watermark(value):
+    """
+    Parse a watermark previously returned by the API
+
+    Args:
+        value (str): ISO 8601 UTC timestamp
+
+    Returns:
+        datetime: Naive UTC datetime
+
+    Raises:
+        ValueError: If the watermark is not a valid timestamp
+    """
+    watermark = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if watermark.tzinfo is not None:
+        watermark = watermark.replace(tzinfo=None) - watermark.utcoffset()
+    return watermark
+
+
+def new_watermark():
+    """Watermark for the current sync; take it before querying so no change is missed"""
+    return datetime.utcnow()
+
+
+def changes_window_start(since):
+    """
+    Start of the window to scan for changes. Rows are stamped before their
+    transaction commits, so re-scan a small overlap; clients apply changes by ID.
+    """
+    return since - timedelta(seconds=Config.SYNC_WATERMARK_OVERLAP_SECONDS)
+
+
+def record_tombstone(entity_type, entity_id, sponsor_id=None, influencer_id=None, reason='deleted'):
+    """Add a tombstone to the current session (committed with the delete itself)"""
+    db.session.add(Tombstone(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        sponsor_id=sponsor_id,
+        influencer_id=influencer_id,
+        reason=reason
+    ))
+
+
+def tombstones_since(entity_type, since, sponsor_id=None, influencer_id=None):
+    """Tombstones of one entity type for an owner created after the watermark"""
+    query = Tombstone.query.filter(
+        Tombstone.entity_type == entity_type,
+        Tombstone.deleted_at >= changes_window_start(since)
+    )
+    if sponsor_id is not None:
+        query = query.filter(Tombstone.sponsor_id == sponsor_id)
+    if influencer_id is not None:
+        query = query.filter(Tombstone.influencer_id == influencer_id)
+    return [serialize_tombstone(t) for t in query.order_by(Tombstone.deleted_at).all()]
+
+
+def serialize_tombstone(tombstone):
+    return {
+        'id': tombstone.entity_id,
+        'entity_type': tombstone.entity_type,
+        'reason': tombstone.reason,
+        'deleted_at_iso': tombstone.deleted_at.isoformat() if tombstone.deleted_at else None
+    }
+
+
+def filtered_out_tombstone(entity_type, row_id, status, updated_at):
+    """Tombstone for a changed row that no longer matches the client's status filter"""
+    return {
+        'id': row_id,
+        'entity_type': entity_type,
+        'reason': status.lower(),
+        'deleted_at_iso': updated_at.isoformat() if updated_at else None
+    }
+
+
+def get_since_param():
+    """Parse the optional ?since= delta sync watermark. Returns (since, error_response)."""
+    since_param = request.args.get('since')
+    if not since_param:
+        return None, None
+    try:
+        return parse_watermark(since_param), None
+    except ValueError:
+        return None, (jsonify({"message": "Invalid since watermark"}), 400)
+
+
+def sync_response(data, watermark):
+    """JSON response carrying the next delta sync watermark (also in the body for delta responses)"""
+    if isinstance(data, dict) and 'tombstones' in data:
+        data['watermark'] = watermark.isoformat()
+    response = jsonify(data)
+    response.headers['X-Sync-Watermark'] = watermark.isoformat()
+    return response, 200
@@ -1,6 +1,5 @@
 from workers import celery
 from models import db, User, Campaign, AdRequest, Payment, ProgressUpdate
-from celery.schedules import crontab
 from mailer import send_email
 from flask import render_template, render_template_string
 from datetime import datetime, timedelta
@@ -10,7 +9,9 @@ import uuid
 import json
 import logging
 from sqlalchemy import desc, func
-from app import app as flask_app
+from config import Config
+from db_routing import snapshot_sqlite_replica
+from scheduling import build_beat_schedule, non_overlapping
 from user_notifications import (
     send_minute_activity_update,
     send_registration_pending_notification,
@@ -23,45 +24,41 @@ from user_notifications import (
     send_admin_daily_report
 )
 
-# Import the update_expired_campaigns task
-from app import update_expired_campaigns
-
 # Set up logging
 logger = logging.getLogger('celery.tasks')
 
-# Define beat schedule directly
-celery.conf.beat_schedule = {
-    'send-minute-activity-update': {
-        'task': 'user_notifications.send_minute_activity_update',
-        'schedule': 60.0,
-        'args': ()
-    },
-    'notify-admin-pending-approvals': {
-        'task': 'user_notifications.notify_admin_pending_approvals',
-        'schedule': 60.0,
-        'args': ()
-    },
-    'update-expired-campaigns': {
-        'task': 'app.update_expired_campaigns',
-        'schedule': 60.0,
-        'args': ()
-    },
-    'send-sponsor-stats-update': {
-        'task': 'user_notifications.send_sponsor_stats_update',
-        'schedule': 60.0,
-        'args': ()
-    },
-    'send-influencer-stats-update': {
-        'task': 'user_notifications.send_influencer_stats_update',
-        'schedule': 60.0,
-        'args': ()
-    },
-    'send-admin-daily-report': {
-        'task': 'user_notifications.send_admin_daily_report',
-        'schedule': 60.0,
-        'args': ()
-    }
-}
+# Staggered, config-driven beat schedule (see scheduling.py)
+celery.conf.beat_schedule = build_beat_schedule(celery)
+
+@celery.task()
+@non_overlapping()
+def update_expired_campaigns():
+    """Background task to mark campaigns as completed when their end date has passed."""
+    now = datetime.utcnow()
+    
+    # Find active campaigns with end_date in the past
+    expired_campaigns = Campaign.query.filter(
+        Campaign.status == 'active',
+        Campaign.end_date.isnot(None),
+        Campaign.end_date < now
+    ).all()
+    
+    completed_count = 0
+    for campaign in expired_campaigns:
+        campaign.status = 'completed'
+        completed_count += 1
+    
+    if completed_count > 0:
+        db.session.commit()
+        logger.info(f"Auto-completed {completed_count} expired campaigns")
+    
+    return completed_count
+
+@celery.task()
+@non_overlapping()
+def refresh_sqlite_replica():
+    """Snapshot the primary SQLite DB into the replica file"""
+    return snapshot_sqlite_replica()
 
 @celery.on_after_finalize.connect
 def setup_periodic_tasks(sender, **kwargs):
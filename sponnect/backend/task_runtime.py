@@ -0,0 +1,78 @@
+"""
+Task runtime for the Sponnect Celery workers.
+Each task gets its own SQLAlchemy session, which is closed when the task ends
+however it ends. Long loops iterate with stream() instead of .all(), so a run
+over every user keeps only one page in memory. A sample of task runs is traced
+with tracemalloc and their peak allocation is exported as a metric.
+"""
+
+import logging
+import random
+import tracemalloc
+from sqlalchemy import inspect
+
+from config import Config
+from models import db
+import metrics
+
+
+def stream(query, batch_size=None):
+    """
+    Iterate over a query's results batch_size rows at a time, paging by primary key,
+    and expunge each page from the session once the caller has moved past it.
+    Every page is a complete query, so no cursor stays open between pages and the
+    loop body may commit or write on another connection (e.g. send_email). Objects
+    from earlier pages are detached, so don't keep them across pages.
+
+    Args:
+        query: A Query or select() of one entity, without its own ordering or limit
+        batch_size (int, optional): Rows per page, defaults to Config.TASK_STREAM_BATCH_SIZE
+    """
+    batch_size = batch_size or Config.TASK_STREAM_BATCH_SIZE
+    statement = getattr(query, 'statement', query)
+    mapper = inspect(statement.column_descriptions[0]['entity'])
+    key = mapper.primary_key[0]
+    last_key = None
+    while True:
+        page_statement = statement if last_key is None else statement.where(key > last_key)
+        page = db.session.execute(page_statement.order_by(key).limit(batch_size)).scalars().all()
+        if not page:
+            return
+        last_key = mapper.primary_key_from_instance(page[-1])[0]
+        yield from page
+        for obj in page:
+            if obj in db.session:
+                db.session.expunge(obj)
+        if len(page) < batch_size:
+            return
+
+
+def _start_sample():
+    """Start tracing this run if it is sampled and no other run is being traced"""
+    if random.random() >= Config.TASK_MEMORY_SAMPLE_RATE or tracemalloc.is_tracing():
+        return False
+    tracemalloc.start()
+    return True
+
+
+def _finish_sample(task_name):
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    metrics.record_task_memory(task_name, peak)
+    if peak > Config.TASK_MEMORY_WARN_MB * 1024 * 1024:
+        logging.warning(f"Task {task_name} peaked at {peak / 1024 / 1024:.1f} MB of Python allocations")
+
+
+def run_task(task, args, kwargs):
+    """Run a task body, then tear down its session. Call inside the task's app context."""
+    sampled = _start_sample()
+    try:
+        return task.run(*args, **kwargs)
+    finally:
+        try:
+            # Roll back anything left open and return the connection to the pool
+            db.session.remove()
+        except Exception as e:
+            logging.error(f"Failed to remove session after {task.name}: {str(e)}")
+        if sampled:
+            _finish_sample(task.name)
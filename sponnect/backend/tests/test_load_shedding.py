@@ -0,0 +1,61 @@
+"""
+Load shedding must give back every slot it takes, including for /api/batch,
+whose sub-requests run their hooks inside the batch's g.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix='sponnect-tests-')
+os.environ.update(DATABASE_URL=f"sqlite:///{WORKDIR}/sponnect.db",
+                  ARCHIVE_DATABASE_URL=f"sqlite:///{WORKDIR}/archive.db",
+                  REDIS_URL='memory://', SLOW_QUERY_LOG='')
+sys.path.insert(0, BACKEND_DIR)
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import create_app, init_db  # noqa: E402
+from config import Config  # noqa: E402
+from models import db, User  # noqa: E402
+import throttling  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, 'LOAD_SHEDDING', True)
+    monkeypatch.setattr(Config, 'SHED_MAX_IN_FLIGHT', 4)
+    app = create_app()
+    with app.app_context():
+        init_db()
+        user = User.query.filter_by(username='shed-sponsor').first()
+        if user is None:
+            user = User(username='shed-sponsor', email='shed-sponsor@example.com', role='sponsor',
+                        sponsor_approved=True, company_name='Shed Co', industry='Technology')
+            user.set_password('password')
+            db.session.add(user)
+            db.session.commit()
+        token = create_access_token(identity=user.id, additional_claims={'role': 'sponsor'})
+    yield app.test_client(), {'Authorization': f"Bearer {token}"}
+
+
+def test_batches_release_their_slot(client):
+    test_client, headers = client
+    batch = {'requests': [{'id': str(i), 'path': '/api/notifications/unread-count'} for i in range(3)]}
+    for _ in range(Config.SHED_MAX_IN_FLIGHT + 2):
+        response = test_client.post('/api/batch', json=batch, headers=headers)
+        assert response.status_code == 200
+        assert all(sub['status'] == 200 for sub in response.get_json()['responses'].values())
+    assert throttling._in_flight == 0
+
+
+def test_shed_requests_take_no_slot(client, monkeypatch):
+    test_client, headers = client
+    monkeypatch.setattr(throttling, '_in_flight', Config.SHED_MAX_IN_FLIGHT)
+    response = test_client.get('/api/notifications/unread-count', headers=headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(Config.SHED_RETRY_AFTER_SECONDS)
+    assert throttling._in_flight == Config.SHED_MAX_IN_FLIGHT
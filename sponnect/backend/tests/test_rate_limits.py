@@ -0,0 +1,49 @@
+"""Login attempts are limited per account and address, so guessing from one IP can't lock the owner out."""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix='sponnect-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{WORKDIR}/sponnect.db")
+os.environ.setdefault('ARCHIVE_DATABASE_URL', f"sqlite:///{WORKDIR}/archive.db")
+os.environ.setdefault('REDIS_URL', 'memory://')
+os.environ.setdefault('SLOW_QUERY_LOG', '')
+sys.path.insert(0, BACKEND_DIR)
+
+from app import create_app, init_db  # noqa: E402
+from config import Config  # noqa: E402
+from models import db, User  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, 'RATE_LIMITING', True)
+    monkeypatch.setattr(Config, 'RATE_LIMIT_LOGIN', '5/60')
+    monkeypatch.setattr(Config, 'RATE_LIMIT_LOGIN_IP', '20/60')
+    monkeypatch.setattr(Config, 'TRUSTED_PROXIES', 1)
+    app = create_app()
+    with app.app_context():
+        init_db()
+        if User.query.filter_by(username='victim').first() is None:
+            user = User(username='victim', email='victim@example.com', role='sponsor',
+                        sponsor_approved=True, company_name='Victim Co', industry='Technology')
+            user.set_password('password')
+            db.session.add(user)
+            db.session.commit()
+    return app.test_client()
+
+
+def login(client, ip, password='wrong'):
+    return client.post('/api/login', json={'username': 'victim', 'password': password},
+                       headers={'X-Forwarded-For': ip})
+
+
+def test_guessing_from_one_address_does_not_lock_out_another(client):
+    for _ in range(5):
+        assert login(client, '6.6.6.6').status_code == 401
+    assert login(client, '6.6.6.6').status_code == 429
+    assert login(client, '1.2.3.4').status_code == 401
@@ -0,0 +1,15 @@
+"""Every task_routes entry must name a registered task, or its route silently never applies."""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('REDIS_URL', 'memory://')
+sys.path.insert(0, BACKEND_DIR)
+
+from workers import celery  # noqa: E402
+
+
+def test_routes_name_registered_tasks():
+    celery.loader.import_default_modules()
+    assert sorted(name for name in celery.conf.task_routes if name not in celery.tasks) == []
@@ -0,0 +1,315 @@
+"""
+Rate limiting and load shedding for the Sponnect application.
+
+Expensive endpoints are wrapped in @rate_limited(name): a request takes one
+token from a bucket per user (or per login name and client IP) and one per client IP, and
+gets a 429 with Retry-After when either is empty. Limits are configured per
+name as RATE_LIMIT_<NAME> and RATE_LIMIT_<NAME>_IP ("<requests>/<seconds>",
+e.g. '30/10' allows bursts of 30 and refills 3 per second; 'off' disables).
+Buckets live in Redis and are updated atomically by a Lua script, so the limit
+holds across processes; without Redis (or scripting) each process keeps its own.
+Once a client is refused, the process remembers it until its Retry-After, and
+a hook that runs before every other one (metrics, profiling, JWT and revocation
+checks) refuses its repeats without any further work.
+
+Load shedding is a before_request hook: when this process already has
+SHED_MAX_IN_FLIGHT requests running, or its database pool is at least
+SHED_POOL_SATURATION checked out, new API requests get a 503 with Retry-After
+instead of queuing for a connection.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from redis.exceptions import ResponseError
+
+from config import Config
+from redis_client import get_redis
+import metrics
+
+BUCKET_PREFIX = 'sponnect:ratelimit:'
+LOCAL_BUCKETS = 10000  # Buckets each process keeps when falling back
+PENALTIES = 10000  # Refused clients each process remembers until their Retry-After
+SHED_EXEMPT_PATHS = ('/api/health', '/metrics')
+
+# KEYS: buckets; ARGV: capacity and refill per second of each bucket in turn.
+# Takes a token from every bucket or from none; returns the seconds to wait (0 when allowed).
+_TAKE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'at')
+    local tokens = tonumber(state[1]) or capacity
+    local at = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'at', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+end
+return tostring(wait)
+"""
+_take = None
+_scripting = True
+
+
+class LocalBuckets:
+    """In-process token buckets with the same semantics as the script, for when Redis can't be used"""
+
+    def __init__(self, size):
+        self.size = size
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, limits):
+        """limits: [(key, capacity, refill per second)]. Returns the seconds to wait (0 when allowed)."""
+        now = time.monotonic()
+        with self._lock:
+            levels, wait = [], 0
+            for key, capacity, rate in limits:
+                tokens, at = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - at) * rate)
+                levels.append(tokens)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+            for (key, _, _), tokens in zip(limits, levels):
+                self._buckets[key] = (tokens if wait else tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.size:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+_local = LocalBuckets(LOCAL_BUCKETS)
+
+
+class PenaltyBox:
+    """Clients refused by a limit, until they may retry. Only ever refuses what the buckets would."""
+
+    def __init__(self, size):
+        self.size = size
+        self._until = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hold(self, key, seconds):
+        with self._lock:
+            self._until[key] = time.monotonic() + seconds
+            self._until.move_to_end(key)
+            while len(self._until) > self.size:
+                self._until.popitem(last=False)
+
+    def remaining(self, key):
+        """Seconds the client must still wait, 0 when it may try again"""
+        with self._lock:
+            until = self._until.get(key)
+            if until is None:
+                return 0
+            wait = until - time.monotonic()
+            if wait <= 0:
+                del self._until[key]
+                return 0
+            return wait
+
+
+_penalties = PenaltyBox(PENALTIES)
+
+
+def parse_limit(value):
+    """'<requests>/<seconds>' as (capacity, refill per second), or None when off"""
+    if not value or value.strip().lower() == 'off':
+        return None
+    requests, seconds = value.split('/')
+    return float(requests), float(requests) / float(seconds)
+
+
+def client_ip():
+    """The client's address: the last TRUSTED_PROXIES hop of X-Forwarded-For behind proxies"""
+    if Config.TRUSTED_PROXIES:
+        hops = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        if len(hops) >= Config.TRUSTED_PROXIES:
+            return hops[-Config.TRUSTED_PROXIES]
+    return request.remote_addr or 'unknown'
+
+
+def take(name, identity):
+    """
+    Take a token for a request to a limited endpoint
+
+    Args:
+        name (str): Limit name; RATE_LIMIT_<NAME> applies per identity, RATE_LIMIT_<NAME>_IP per client IP
+        identity: User ID or login name, None when unknown
+
+    Returns:
+        float: Seconds to wait before retrying, 0 when the request may go ahead
+    """
+    global _take, _scripting
+    limits = []
+    per_identity = parse_limit(getattr(Config, f"RATE_LIMIT_{name.upper()}", None))
+    if per_identity and identity is not None:
+        limits.append((f"{BUCKET_PREFIX}{name}:user:{identity}", *per_identity))
+    per_ip = parse_limit(getattr(Config, f"RATE_LIMIT_{name.upper()}_IP", None))
+    if per_ip:
+        limits.append((f"{BUCKET_PREFIX}{name}:ip:{client_ip()}", *per_ip))
+    if not limits:
+        return 0
+    if _scripting:
+        try:
+            client = get_redis()
+            if _take is None:
+                _take = client.register_script(_TAKE_SCRIPT)
+            return float(_take(keys=[key for key, _, _ in limits],
+                               args=[value for _, capacity, rate in limits for value in (capacity, rate)],
+                               client=client))
+        except ResponseError as e:
+            # A server without scripting: limit in this process from now on
+            logging.error(f"Rate limit script unavailable, limiting per process: {str(e)}")
+            _scripting = False
+        except Exception as e:
+            logging.error(f"Rate limit check failed, limiting per process: {str(e)}")
+    return _local.take(limits)
+
+
+def _jwt_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None  # No verified token on this request
+
+
+def login_identity():
+    """
+    The account a login attempt targets, from this client IP: password guessing
+    is limited per account and address, so failed attempts from elsewhere can't
+    lock the owner out (the per-IP bucket caps each address overall)
+    """
+    data = request.get_json(silent=True) or {}
+    name = data.get('username') or data.get('email')
+    return f"{str(name).strip().lower()}|{client_ip()}" if name else None
+
+
+def _penalty_key(name, identity):
+    # The same credentials from the same address; taking no tokens meanwhile is what the buckets would do
+    return name, client_ip(), identity() if identity else request.headers.get('Authorization', '')
+
+
+def _rate_limited_response(name, wait):
+    metrics.count_throttled('rate_limit', name)
+    return _retry_response(429, {"message": "Too many requests. Please try again later.",
+                                 "error": "RATE_LIMITED"}, wait)
+
+
+def _retry_response(status, body, wait):
+    response = jsonify(dict(body, retry_after=math.ceil(wait)))
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+    return response
+
+
+def rate_limited(name, identity=None):
+    """
+    Apply the RATE_LIMIT_<NAME> limits to an endpoint. Goes after @jwt_required
+    so the user is known; identity overrides how the per-identity key is found.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if Config.RATE_LIMITING:
+                wait = take(name, identity() if identity else _jwt_identity())
+                if wait:
+                    _penalties.hold(_penalty_key(name, identity), wait)
+                    return _rate_limited_response(name, wait)
+            return fn(*args, **kwargs)
+        # Copied onto the outer decorators by functools.wraps, so _refuse_penalized finds them
+        wrapper.rate_limit = (name, identity)
+        return wrapper
+    return decorator
+
+
+def _refuse_penalized():
+    """First before_request hook: refuse a client still waiting out a 429 before any other work"""
+    if not Config.RATE_LIMITING or request.endpoint is None:
+        return None
+    limit = getattr(current_app.view_functions.get(request.endpoint), 'rate_limit', None)
+    if limit is None:
+        return None
+    wait = _penalties.remaining(_penalty_key(*limit))
+    return _rate_limited_response(limit[0], wait) if wait else None
+
+
+# --- Load shedding ---
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def pool_saturation():
+    """Highest share of a bind's connection capacity (pool size plus overflow) checked out in this process"""
+    from models import db
+    saturation = 0.0
+    for engine in db.engines.values():
+        pool = engine.pool
+        # Only QueuePool has a bounded capacity; SQLite memory DBs use a static pool
+        max_overflow = getattr(pool, '_max_overflow', -1)
+        if not hasattr(pool, 'checkedout') or max_overflow < 0:
+            continue
+        capacity = pool.size() + max_overflow
+        if capacity:
+            saturation = max(saturation, pool.checkedout() / capacity)
+    return saturation
+
+
+def _admit():
+    """before_request hook: shed the request when the process is saturated"""
+    global _in_flight
+    # Batch sub-requests run the hooks inside the batch's g, hence the stack; they
+    # ride on the batch's admission rather than taking (or being refused) a slot
+    admitted = g.setdefault('shed_admitted', [])
+    if (not Config.LOAD_SHEDDING or any(admitted) or request.path in SHED_EXEMPT_PATHS
+            or not request.path.startswith('/api/')):
+        admitted.append(False)
+        return None
+    with _in_flight_lock:
+        if Config.SHED_MAX_IN_FLIGHT and _in_flight >= Config.SHED_MAX_IN_FLIGHT:
+            reason = 'in_flight'
+        elif pool_saturation() >= Config.SHED_POOL_SATURATION:
+            reason = 'db_pool'
+        else:
+            _in_flight += 1
+            admitted.append(True)
+            return None
+    admitted.append(False)
+    metrics.count_throttled('shed', reason)
+    return _retry_response(503, {"message": "Server is busy. Please try again shortly.", "error": "OVERLOADED"},
+                           Config.SHED_RETRY_AFTER_SECONDS)
+
+
+def _release(exc=None):
+    global _in_flight
+    if g.get('shed_admitted') and g.shed_admitted.pop():
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+def init_throttling(app):
+    """Register the early rate limit check (ahead of every other before_request hook) and the load shedding hooks"""
+    app.before_request_funcs.setdefault(None, []).insert(0, _refuse_penalized)
+    app.before_request(_admit)
+    app.teardown_request(_release)
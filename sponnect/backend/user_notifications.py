@@ -4,15 +4,26 @@ This module contains Celery tasks for sending notifications to users.
 """
 
 from workers import celery
-from models import db, User, Campaign, AdRequest, NegotiationHistory, ProgressUpdate, Payment
-from mailer import send_email, send_template_email
+from models import db, User, Campaign, AdRequest, NegotiationHistory, ProgressUpdate
+from mailer import send_email, send_template_email, send_to_recipients
+from email_render import render as render_email, render_many
+from outbox import enqueue_emails
+from inbox import notify_users
+from activity_counters import counts_since
+from event_consumers import take_activity_changes, restore_activity_changes, ALL_CATEGORIES
+from config import Config
+from db_routing import read_only, primary
+from scheduling import non_overlapping
+from task_runtime import stream
+from notification_gate import StatsEmailGate
 from datetime import datetime, timedelta
-from flask import render_template
 import os
 from sqlalchemy import func, and_, or_
 
 
 @celery.task()
+@non_overlapping()
+@read_only
 def send_minute_activity_update():
     """
     Send activity updates to relevant users (admins, sponsors, influencers)
@@ -24,11 +35,11 @@ def send_minute_activity_update():
         total_campaigns = Campaign.query.count()
         total_ad_requests = AdRequest.query.count()
         
-        # Recent activity (past day)
-        one_day_ago = datetime.utcnow() - timedelta(days=1)
-        new_users = User.query.filter(User.created_at >= one_day_ago).count()
-        new_campaigns = Campaign.query.filter(Campaign.created_at >= one_day_ago).count()
-        new_ad_requests = AdRequest.query.filter(AdRequest.created_at >= one_day_ago).count()
+        # Recent activity (past day), from the activity counters
+        recent = counts_since(datetime.utcnow() - timedelta(days=1), ('users', 'campaigns', 'ad_requests'))
+        new_users = recent['users']
+        new_campaigns = recent['campaigns']
+        new_ad_requests = recent['ad_requests']
         
         print(f"Activity Update - Stats: Users={total_users}, Campaigns={total_campaigns}, New Users={new_users}")
         
@@ -36,11 +47,24 @@ def send_minute_activity_update():
         send_admin_activity_updates(total_users, total_campaigns, total_ad_requests,
                                    new_users, new_campaigns, new_ad_requests)
         
+        # Only users whose numbers changed since the last run, when domain events track that
+        if Config.DOMAIN_EVENTS and Config.ACTIVITY_UPDATES_FROM_EVENTS:
+            changes = take_activity_changes()
+            try:
+                # The events may be newer than the replica snapshot, so read these users' numbers from the primary
+                with primary():
+                    send_sponsor_activity_updates(new_campaigns, changes)
+                    send_influencer_activity_updates(new_campaigns, changes)
+            except Exception:
+                restore_activity_changes(changes)  # Retried on the next run
+                raise
+            return "Activity updates sent successfully"
+        
         # SEND TO SPONSORS - Only relevant sponsor-specific information
-        send_sponsor_activity_updates(new_campaigns)
+        send_sponsor_activity_updates(new_campaigns, None)
         
         # SEND TO INFLUENCERS - Only relevant influencer-specific information
-        send_influencer_activity_updates(new_campaigns)
+        send_influencer_activity_updates(new_campaigns, None)
         
         return "Activity updates sent successfully"
         
@@ -56,47 +80,38 @@ def send_admin_activity_updates(total_users, total_campaigns, total_ad_requests,
     admins = User.query.filter_by(role='admin').all()
     print(f"Activity Update - Found {len(admins)} admins to notify")
     
-    admin_sent_count = 0
     frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
+    subject = "Sponnect Platform Daily Activity Update"
     
-    for admin in admins:
-        try:
-            subject = "Sponnect Platform Daily Activity Update"
-            
-            # Render the template with admin-specific context
-            body = render_template('emails/activity_update.html',
-                user=admin,
-                role='admin',
-                total_users=total_users,
-                total_campaigns=total_campaigns,
-                total_ad_requests=total_ad_requests,
-                new_users=new_users,
-                new_campaigns=new_campaigns,
-                new_ad_requests=new_ad_requests,
-                frontend_url=frontend_url
-            )
-            
-            if admin.email:
-                send_email(subject, admin.email, body)
-                admin_sent_count += 1
-                print(f"Sent activity update to admin: {admin.email}")
-            else:
-                print(f"Admin {admin.username} has no email address")
-        except Exception as e:
-            print(f"Error sending to admin {admin.username}: {str(e)}")
+    # Every admin gets the same numbers: render once and fill in each name
+    admin_sent_count = send_to_recipients(subject, 'emails/activity_update.html', admins, 'user', dict(
+        role='admin',
+        total_users=total_users,
+        total_campaigns=total_campaigns,
+        total_ad_requests=total_ad_requests,
+        new_users=new_users,
+        new_campaigns=new_campaigns,
+        new_ad_requests=new_ad_requests,
+        frontend_url=frontend_url
+    ))
+    print(f"Sent activity update to {admin_sent_count} admins")
     
     return admin_sent_count
 
 
-def send_sponsor_activity_updates(new_campaigns):
-    """Helper function to send activity updates to sponsors"""
-    sponsors = User.query.filter_by(role='sponsor', is_active=True).all()
-    print(f"Activity Update - Found {len(sponsors)} active sponsors to notify")
+def send_sponsor_activity_updates(new_campaigns, changes=None):
+    """Helper function to send activity updates to sponsors (only the changed ones, given take_activity_changes())"""
+    sponsors = User.query.filter_by(role='sponsor', is_active=True)
+    if changes is not None:
+        sponsors = sponsors.filter(User.id.in_(changes['sponsors']))
+    print(f"Activity Update - Found {sponsors.count()} active sponsors to notify")
     
     sponsor_sent_count = 0
     frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
+    gate = StatsEmailGate('sponsor_activity')
+    pending = []  # Rendered and queued a batch at a time
     
-    for sponsor in sponsors:
+    for sponsor in stream(sponsors):
         try:
             # Get sponsor-specific stats
             sponsor_campaigns = Campaign.query.filter_by(sponsor_id=sponsor.id).count()
@@ -106,12 +121,8 @@ def send_sponsor_activity_updates(new_campaigns):
             ).count()
             
             # Only send if they have pending requests or campaigns
-            if pending_requests > 0 or sponsor_campaigns > 0:
-                subject = "Sponnect: Campaign Activity Update"
-                
-                # Render the template with sponsor-specific context
-                body = render_template('emails/sponsor_stats.html',
-                    sponsor=sponsor,
+            if (pending_requests > 0 or sponsor_campaigns > 0) and sponsor.email:
+                stats = dict(
                     active_campaigns=Campaign.query.filter(
                         Campaign.sponsor_id == sponsor.id,
                         Campaign.end_date >= datetime.utcnow()
@@ -130,31 +141,43 @@ def send_sponsor_activity_updates(new_campaigns):
                         Campaign.sponsor_id == sponsor.id,
                         ProgressUpdate.status == 'Pending'
                     ).count(),
-                    recent_requests=get_recent_requests_for_sponsor(sponsor.id),
-                    frontend_url=frontend_url
+                    recent_requests=get_recent_requests_for_sponsor(sponsor.id)
                 )
                 
-                if sponsor.email:
-                    send_email(subject, sponsor.email, body)
-                    sponsor_sent_count += 1
-                    print(f"Sent activity update to sponsor: {sponsor.email}")
-                else:
-                    print(f"Sponsor {sponsor.username} has no email address")
+                # Skip unchanged numbers (and users over their daily limit) before rendering
+                if not gate.should_send(sponsor.id, stats):
+                    continue
+                
+                subject = "Sponnect: Campaign Activity Update"
+                pending.append((sponsor.id, sponsor.email, subject, dict(sponsor=sponsor, frontend_url=frontend_url, **stats)))
+                if len(pending) >= Config.TASK_STREAM_BATCH_SIZE:
+                    sponsor_sent_count += queue_activity_updates('emails/sponsor_stats.html', pending, gate)
         except Exception as e:
             print(f"Error sending to sponsor {sponsor.username}: {str(e)}")
     
+    sponsor_sent_count += queue_activity_updates('emails/sponsor_stats.html', pending, gate)
+    print(f"Sent activity update to {sponsor_sent_count} sponsors")
+    print(f"Activity Update - Skipped {gate.finish()} unchanged or rate-limited sponsor updates")
     return sponsor_sent_count
 
 
-def send_influencer_activity_updates(new_campaigns):
-    """Helper function to send activity updates to influencers"""
-    influencers = User.query.filter_by(role='influencer', is_active=True).all()
-    print(f"Activity Update - Found {len(influencers)} active influencers to notify")
+def send_influencer_activity_updates(new_campaigns, changes=None):
+    """Helper function to send activity updates to influencers (only the changed ones, given take_activity_changes())"""
+    influencers = User.query.filter_by(role='influencer', is_active=True)
+    if changes is not None and ALL_CATEGORIES not in changes['categories']:
+        # Their own requests changed, or a campaign in their category came or went
+        influencers = influencers.filter(or_(
+            User.id.in_(changes['influencers']),
+            func.lower(User.category).in_(changes['categories'])
+        ))
+    print(f"Activity Update - Found {influencers.count()} active influencers to notify")
     
     influencer_sent_count = 0
     frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
+    gate = StatsEmailGate('influencer_activity')
+    pending = []  # Rendered and queued a batch at a time
     
-    for influencer in influencers:
+    for influencer in stream(influencers):
         try:
             # Get matching campaigns for this influencer
             matching_campaigns = Campaign.query.filter(
@@ -170,9 +193,7 @@ def send_influencer_activity_updates(new_campaigns):
             ).count()
             
             # Only send if they have matching campaigns or pending applications
-            if matching_campaigns > 0 or pending_apps > 0:
-                subject = "Sponnect: Campaign Opportunities Update"
-                
+            if (matching_campaigns > 0 or pending_apps > 0) and influencer.email:
                 # Get recent matching campaigns for this influencer
                 recent_matching_campaigns = Campaign.query.filter(
                     Campaign.visibility == 'public',
@@ -180,9 +201,7 @@ def send_influencer_activity_updates(new_campaigns):
                     (Campaign.category == influencer.category) | (Campaign.category == 'any')
                 ).order_by(Campaign.created_at.desc()).limit(3).all()
                 
-                # Render the template with influencer-specific context
-                body = render_template('emails/influencer_stats.html',
-                    influencer=influencer,
+                stats = dict(
                     pending_applications=pending_apps,
                     active_negotiations=AdRequest.query.filter_by(
                         influencer_id=influencer.id,
@@ -197,19 +216,24 @@ def send_influencer_activity_updates(new_campaigns):
                         ProgressUpdate.status == 'Pending'
                     ).count(),
                     matching_campaigns=matching_campaigns,
-                    recent_matching_campaigns=recent_matching_campaigns,
-                    frontend_url=frontend_url
+                    recent_matching_campaigns=recent_matching_campaigns
                 )
                 
-                if influencer.email:
-                    send_email(subject, influencer.email, body)
-                    influencer_sent_count += 1
-                    print(f"Sent activity update to influencer: {influencer.email}")
-                else:
-                    print(f"Influencer {influencer.username} has no email address")
+                # Skip unchanged numbers (and users over their daily limit) before rendering
+                if not gate.should_send(influencer.id, stats):
+                    continue
+                
+                subject = "Sponnect: Campaign Opportunities Update"
+                pending.append((influencer.id, influencer.email, subject,
+                                dict(influencer=influencer, frontend_url=frontend_url, **stats)))
+                if len(pending) >= Config.TASK_STREAM_BATCH_SIZE:
+                    influencer_sent_count += queue_activity_updates('emails/influencer_stats.html', pending, gate)
         except Exception as e:
             print(f"Error sending to influencer {influencer.username}: {str(e)}")
     
+    influencer_sent_count += queue_activity_updates('emails/influencer_stats.html', pending, gate)
+    print(f"Sent activity update to {influencer_sent_count} influencers")
+    print(f"Activity Update - Skipped {gate.finish()} unchanged or rate-limited influencer updates")
     return influencer_sent_count
 
 
@@ -234,10 +258,78 @@ def get_recent_requests_for_sponsor(sponsor_id):
     return recent_requests_data
 
 
+def queue_stats_emails(template_name, pending, gate):
+    """
+    Render a batch of stats emails with one render_many() call and queue them in
+    one outbox transaction, then clear the batch. Recipients of a batch that
+    fails keep their old fingerprint, so the next run retries them.
+
+    Args:
+        pending (list): (user id, email, subject, context) tuples
+        gate (StatsEmailGate): Gate that let them through
+
+    Returns:
+        int: Number of emails queued
+    """
+    if not pending:
+        return 0
+    try:
+        bodies = render_many(template_name, [context for _, _, _, context in pending])
+        queued = enqueue_emails([(subject, email, body) for (_, email, subject, _), body in zip(pending, bodies)])
+        if queued:
+            for user_id, _, _, _ in pending:
+                gate.record_sent(user_id)
+        return queued
+    except Exception as e:
+        print(f"Error queuing {len(pending)} stats emails: {str(e)}")
+        return 0
+    finally:
+        pending.clear()
+
+
+# Inbox form of the activity digests: (kind, link, body built from the email's context)
+ACTIVITY_NOTIFICATIONS = {
+    'emails/sponsor_stats.html': (
+        'sponsor_activity', '/sponsor/dashboard',
+        "{pending_requests} pending requests, {active_negotiations} in negotiation, "
+        "{accepted_partnerships} accepted, {pending_progress_updates} progress updates to review"
+    ),
+    'emails/influencer_stats.html': (
+        'influencer_activity', '/influencer/dashboard',
+        "{matching_campaigns} matching campaigns, {pending_applications} pending applications, "
+        "{active_negotiations} in negotiation, {active_partnerships} active partnerships"
+    ),
+}
+
+
+def queue_activity_updates(template_name, pending, gate):
+    """
+    Deliver a batch of minute activity digests over ACTIVITY_UPDATES_CHANNEL:
+    one inbox insert ('inbox') or stats emails ('email'), then clear the batch.
+    Takes the same arguments as queue_stats_emails() and returns the number delivered.
+    """
+    if Config.ACTIVITY_UPDATES_CHANNEL != 'inbox':
+        return queue_stats_emails(template_name, pending, gate)
+    if not pending:
+        return 0
+    kind, link, body = ACTIVITY_NOTIFICATIONS[template_name]
+    try:
+        stored = notify_users([dict(user_id=user_id, kind=kind, title=subject.replace('Sponnect: ', ''),
+                                    body=body.format(**context), link=link)
+                               for user_id, _, subject, context in pending])
+        if stored:
+            for user_id, _, _, _ in pending:
+                gate.record_sent(user_id)
+        return stored
+    finally:
+        pending.clear()
+
+
 @celery.task()
-def send_registration_pending_notification(user_id):
+def send_registration_pending_notification(user_id, notify_admins=True, dedupe_key=None):
     """
-    Send notification to user when they register and are waiting for admin approval
+    Send notification to user when they register and are waiting for admin approval.
+    Raises if the email can't be queued; dedupe_key queues it at most once.
     """
     user = User.query.get(user_id)
     if not user:
@@ -248,24 +340,27 @@ def send_registration_pending_notification(user_id):
     frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
     
     # Render the template with context
-    body = render_template('emails/registration_pending.html',
+    body = render_email('emails/registration_pending.html',
         user=user,
         frontend_url=frontend_url
     )
     
     # Send the email
-    send_email(subject, user.email, body)
+    if not send_email(subject, user.email, body, dedupe_key=dedupe_key):
+        raise RuntimeError(f"Failed to queue registration pending email for user {user_id}")
     
     # Also notify admins
-    notify_admin_pending_approvals()
+    if notify_admins:
+        notify_admin_pending_approvals()
     
     return f"Registration pending notification sent to {user.email}"
 
 
 @celery.task()
-def send_account_approval_notification(user_id):
+def send_account_approval_notification(user_id, dedupe_key=None):
     """
-    Send notification to user when their account is approved
+    Send notification to user when their account is approved.
+    Raises if the email can't be queued; dedupe_key queues it at most once.
     """
     user = User.query.get(user_id)
     if not user:
@@ -276,18 +371,20 @@ def send_account_approval_notification(user_id):
     frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
     
     # Render the template with context
-    body = render_template('emails/account_approval.html',
+    body = render_email('emails/account_approval.html',
         user=user,
         frontend_url=frontend_url
     )
     
     # Send the email
-    send_email(subject, user.email, body)
+    if not send_email(subject, user.email, body, dedupe_key=dedupe_key):
+        raise RuntimeError(f"Failed to queue account approval email for user {user_id}")
     
     return f"Account approval notification sent to {user.email}"
 
 
 @celery.task()
+@read_only
 def send_login_stats(user_id):
     """
     Send login stats notification to user
@@ -366,7 +463,7 @@ def send_login_stats(user_id):
             })
         
         # Render the template with context
-        body = render_template('emails/login_stats.html', **context)
+        body = render_email('emails/login_stats.html', **context)
         
         # Send the email
         send_email(subject, user.email, body)
@@ -379,9 +476,13 @@ def send_login_stats(user_id):
 
 
 @celery.task()
-def notify_admin_pending_approvals():
+@non_overlapping()
+@read_only
+def notify_admin_pending_approvals(dedupe=False):
     """
-    Notify admins about pending user approvals
+    Notify admins about pending user approvals. With dedupe, each admin gets at
+    most one summary per newest pending user, so a redelivered registration
+    event doesn't repeat it. Raises if the emails can't be queued.
     """
     # Get counts of pending approvals
     pending_sponsors = User.query.filter(
@@ -410,36 +511,38 @@ def notify_admin_pending_approvals():
         ((User.role == 'influencer') & (User.influencer_approved.is_(None)))
     ).order_by(User.created_at.desc()).limit(5).all()
     
-    # Send to all admins
-    for admin in admins:
-        # Render the template with context
-        body = render_template('emails/pending_approval_admin.html',
-            admin=admin,
-            pending_sponsors=pending_sponsors,
-            pending_influencers=pending_influencers,
-            pending_details=pending_details,
-            frontend_url=frontend_url
-        )
-        
-        send_email(subject, admin.email, body)
+    # Send to all admins, rendered once
+    dedupe_key = f"pending_approvals:{pending_details[0].id}" if dedupe else None
+    sent_count = send_to_recipients(subject, 'emails/pending_approval_admin.html', admins, 'admin', dict(
+        pending_sponsors=pending_sponsors,
+        pending_influencers=pending_influencers,
+        pending_details=pending_details,
+        frontend_url=frontend_url
+    ), dedupe_key=dedupe_key)
+    if not sent_count and any(admin.email for admin in admins):
+        raise RuntimeError("Failed to queue pending approvals emails")
     
-    return f"Pending approvals notification sent to {len(admins)} admins"
+    return f"Pending approvals notification sent to {sent_count} admins"
 
 
 @celery.task()
+@non_overlapping()
+@read_only
 def send_sponsor_stats_update():
     """
     Send detailed stats to sponsors
     Includes: pending ad requests, negotiations, campaigns, etc.
     """
     try:
-        sponsors = User.query.filter_by(role='sponsor', is_active=True, sponsor_approved=True).all()
-        print(f"Sponsor Stats Update - Found {len(sponsors)} approved sponsors to notify")
+        sponsors = User.query.filter_by(role='sponsor', is_active=True, sponsor_approved=True)
+        print(f"Sponsor Stats Update - Found {sponsors.count()} approved sponsors to notify")
         
         frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
         
         sent_count = 0
-        for sponsor in sponsors:
+        gate = StatsEmailGate('sponsor_stats')
+        pending = []  # Rendered and queued a batch at a time
+        for sponsor in stream(sponsors):
             try:
                 # Get campaign stats
                 active_campaigns = Campaign.query.filter(
@@ -476,33 +579,36 @@ def send_sponsor_stats_update():
                 # Get recent ad requests
                 recent_requests_data = get_recent_requests_for_sponsor(sponsor.id)
                 
-                # Generate stats summary email using template
-                subject = f"Sponnect Sponsor Status Update - {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
+                if not sponsor.email:
+                    print(f"Sponsor {sponsor.username} has no email address")
+                    continue
                 
-                # Render the template with context
-                body = render_template('emails/sponsor_stats.html',
-                    sponsor=sponsor,
+                stats = dict(
                     active_campaigns=active_campaigns,
                     total_campaigns=total_campaigns,
                     pending_requests=pending_requests,
                     active_negotiations=active_negotiations,
                     accepted_partnerships=accepted_partnerships,
                     pending_progress_updates=pending_progress_updates,
-                    recent_requests=recent_requests_data,
-                    frontend_url=frontend_url
+                    recent_requests=recent_requests_data
                 )
                 
-                if sponsor.email:
-                    send_email(subject, sponsor.email, body)
-                    sent_count += 1
-                    print(f"Sent stats update to sponsor: {sponsor.email}")
-                else:
-                    print(f"Sponsor {sponsor.username} has no email address")
+                # Skip unchanged numbers (and users over their daily limit) before rendering
+                if not gate.should_send(sponsor.id, stats):
+                    continue
+                
+                # Generate stats summary email using template
+                subject = f"Sponnect Sponsor Status Update - {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
+                pending.append((sponsor.id, sponsor.email, subject, dict(sponsor=sponsor, frontend_url=frontend_url, **stats)))
+                if len(pending) >= Config.TASK_STREAM_BATCH_SIZE:
+                    sent_count += queue_stats_emails('emails/sponsor_stats.html', pending, gate)
                     
             except Exception as e:
                 print(f"Error sending to sponsor {sponsor.username}: {str(e)}")
         
-        return f"Sponsor stats update sent to {sent_count} sponsors"
+        sent_count += queue_stats_emails('emails/sponsor_stats.html', pending, gate)
+        skipped = gate.finish()
+        return f"Sponsor stats update sent to {sent_count} sponsors ({skipped} unchanged or rate-limited skipped)"
     except Exception as e:
         error_message = f"Error in send_sponsor_stats_update: {str(e)}"
         print(error_message)
@@ -510,19 +616,23 @@ def send_sponsor_stats_update():
 
 
 @celery.task()
+@non_overlapping()
+@read_only
 def send_influencer_stats_update():
     """
     Send detailed stats to influencers
     Includes: campaigns, ad requests, progress updates, etc.
     """
     try:
-        influencers = User.query.filter_by(role='influencer', is_active=True, influencer_approved=True).all()
-        print(f"Influencer Stats Update - Found {len(influencers)} approved influencers to notify")
+        influencers = User.query.filter_by(role='influencer', is_active=True, influencer_approved=True)
+        print(f"Influencer Stats Update - Found {influencers.count()} approved influencers to notify")
         
         frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
         
         sent_count = 0
-        for influencer in influencers:
+        gate = StatsEmailGate('influencer_stats')
+        pending = []  # Rendered and queued a batch at a time
+        for influencer in stream(influencers):
             try:
                 # Get ad request stats
                 pending_applications = AdRequest.query.filter_by(
@@ -562,32 +672,36 @@ def send_influencer_stats_update():
                     (Campaign.category == influencer.category) | (Campaign.category == 'any')
                 ).order_by(Campaign.created_at.desc()).limit(3).all()
                 
-                # Generate stats summary email using template
-                subject = f"Sponnect Influencer Status Update - {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
+                if not influencer.email:
+                    print(f"Influencer {influencer.username} has no email address")
+                    continue
                 
-                # Render the template with context
-                body = render_template('emails/influencer_stats.html',
-                    influencer=influencer,
+                stats = dict(
                     pending_applications=pending_applications,
                     active_negotiations=active_negotiations,
                     active_partnerships=active_partnerships,
                     pending_content_reviews=pending_content_reviews,
                     matching_campaigns=matching_campaigns,
-                    recent_matching_campaigns=recent_matching_campaigns,
-                    frontend_url=frontend_url
+                    recent_matching_campaigns=recent_matching_campaigns
                 )
                 
-                if influencer.email:
-                    send_email(subject, influencer.email, body)
-                    sent_count += 1
-                    print(f"Sent stats update to influencer: {influencer.email}")
-                else:
-                    print(f"Influencer {influencer.username} has no email address")
+                # Skip unchanged numbers (and users over their daily limit) before rendering
+                if not gate.should_send(influencer.id, stats):
+                    continue
+                
+                # Generate stats summary email using template
+                subject = f"Sponnect Influencer Status Update - {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
+                pending.append((influencer.id, influencer.email, subject,
+                                dict(influencer=influencer, frontend_url=frontend_url, **stats)))
+                if len(pending) >= Config.TASK_STREAM_BATCH_SIZE:
+                    sent_count += queue_stats_emails('emails/influencer_stats.html', pending, gate)
                     
             except Exception as e:
                 print(f"Error sending to influencer {influencer.username}: {str(e)}")
         
-        return f"Influencer stats update sent to {sent_count} influencers"
+        sent_count += queue_stats_emails('emails/influencer_stats.html', pending, gate)
+        skipped = gate.finish()
+        return f"Influencer stats update sent to {sent_count} influencers ({skipped} unchanged or rate-limited skipped)"
     except Exception as e:
         error_message = f"Error in send_influencer_stats_update: {str(e)}"
         print(error_message)
@@ -595,6 +709,8 @@ def send_influencer_stats_update():
 
 
 @celery.task()
+@non_overlapping()
+@read_only
 def send_admin_daily_report():
     """
     Send daily summary report to admins
@@ -624,13 +740,13 @@ def send_admin_daily_report():
         
         pending_approvals = pending_sponsors + pending_influencers
         
-        # Get daily activity
-        one_day_ago = datetime.utcnow() - timedelta(days=1)
+        # Get daily activity, from the activity counters
+        recent = counts_since(datetime.utcnow() - timedelta(days=1))
         
-        new_users = User.query.filter(User.created_at >= one_day_ago).count()
-        new_campaigns = Campaign.query.filter(Campaign.created_at >= one_day_ago).count()
-        new_ad_requests = AdRequest.query.filter(AdRequest.created_at >= one_day_ago).count()
-        new_payments = Payment.query.filter(Payment.created_at >= one_day_ago).count()
+        new_users = recent['users']
+        new_campaigns = recent['campaigns']
+        new_ad_requests = recent['ad_requests']
+        new_payments = recent['payments']
         
         # Get mock data for system status (in a real system, these would come from monitoring)
         db_size = "24.5 MB"
@@ -639,43 +755,28 @@ def send_admin_daily_report():
         
         frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
         
-        sent_count = 0
-        for admin in admins:
-            try:
-                # Generate daily report email using template
-                subject = f"Sponnect Admin Daily Report - {datetime.utcnow().strftime('%Y-%m-%d')}"
-                
-                # Render the template with context
-                body = render_template('emails/admin_daily_report.html',
-                    admin=admin,
-                    pending_approvals=pending_approvals,
-                    pending_sponsors=pending_sponsors,
-                    pending_influencers=pending_influencers,
-                    total_users=total_users,
-                    active_campaigns=active_campaigns,
-                    total_ad_requests=total_ad_requests,
-                    completed_partnerships=completed_partnerships,
-                    new_users=new_users,
-                    new_campaigns=new_campaigns,
-                    new_ad_requests=new_ad_requests,
-                    new_payments=new_payments,
-                    reports=[],  # Mock data for content reports
-                    disputes=[],  # Mock data for payment disputes
-                    db_size=db_size,
-                    storage_usage=storage_usage,
-                    api_health=api_health,
-                    frontend_url=frontend_url
-                )
-                
-                if admin.email:
-                    send_email(subject, admin.email, body)
-                    sent_count += 1
-                    print(f"Sent daily report to admin: {admin.email}")
-                else:
-                    print(f"Admin {admin.username} has no email address")
-                    
-            except Exception as e:
-                print(f"Error sending to admin {admin.username}: {str(e)}")
+        subject = f"Sponnect Admin Daily Report - {datetime.utcnow().strftime('%Y-%m-%d')}"
+        
+        # The report is the same for every admin: render once and fill in each name
+        sent_count = send_to_recipients(subject, 'emails/admin_daily_report.html', admins, 'admin', dict(
+            pending_approvals=pending_approvals,
+            pending_sponsors=pending_sponsors,
+            pending_influencers=pending_influencers,
+            total_users=total_users,
+            active_campaigns=active_campaigns,
+            total_ad_requests=total_ad_requests,
+            completed_partnerships=completed_partnerships,
+            new_users=new_users,
+            new_campaigns=new_campaigns,
+            new_ad_requests=new_ad_requests,
+            new_payments=new_payments,
+            reports=[],  # Mock data for content reports
+            disputes=[],  # Mock data for payment disputes
+            db_size=db_size,
+            storage_usage=storage_usage,
+            api_health=api_health,
+            frontend_url=frontend_url
+        ))
         
         return f"Admin daily report sent to {sent_count} admins"
     except Exception as e:
@@ -1,24 +1,131 @@
+import os
 from celery import Celery
+from celery.signals import worker_init
+from kombu import Queue
+
+import metrics  # Registers the task signal collectors
 
 # Initialize celery app
 celery = Celery(
     'sponnect',
-    include=['task', 'user_notifications'],
+    include=['task', 'user_notifications', 'archive', 'outbox', 'activity_counters', 'event_consumers', 'inbox', 'revocation'],
     broker='redis://localhost:6379/1',
     backend='redis://localhost:6379/2'
 )
 
+# Configure Celery (kept here so workers don't need to build the Flask app to start)
+celery.conf.update(
+    broker_url=os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/1'),
+    result_backend=os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/2'),
+    task_serializer='json',
+    accept_content=['json'],
+    result_serializer='json',
+    timezone=os.environ.get('CELERY_TIMEZONE', 'Asia/Kolkata'),  # Crontab schedules run in IST
+    enable_utc=True,
+    task_always_eager=False,
+    broker_connection_retry_on_startup=True
+)
+
+# --- Queues by workload class ---
+# transactional: user-facing emails that someone is waiting for, and the outbox dispatcher
+# periodic:      beat-driven notification and stats runs
+# maintenance:   housekeeping (expiry sweep, archival, replica refresh)
+# bulk:          anything not routed explicitly (e.g. ad hoc one-off tasks)
+QUEUE_NAMES = ('transactional', 'periodic', 'maintenance', 'bulk')
+
+# Worker settings per queue, applied when a worker consumes exactly one queue.
+# Short tasks take one message at a time so a slow one can't hold others back.
+QUEUE_WORKER_SETTINGS = {
+    'transactional': {'concurrency': int(os.environ.get('CELERY_TRANSACTIONAL_CONCURRENCY', 4)), 'prefetch_multiplier': 1},
+    'periodic': {'concurrency': int(os.environ.get('CELERY_PERIODIC_CONCURRENCY', 2)), 'prefetch_multiplier': 1},
+    'maintenance': {'concurrency': int(os.environ.get('CELERY_MAINTENANCE_CONCURRENCY', 1)), 'prefetch_multiplier': 1},
+    'bulk': {'concurrency': int(os.environ.get('CELERY_BULK_CONCURRENCY', 2)), 'prefetch_multiplier': 4},
+}
+
+# Priorities within a queue: with the Redis broker 0 is the highest
+celery.conf.task_routes = {
+    'user_notifications.send_registration_pending_notification': {'queue': 'transactional', 'priority': 0},
+    'user_notifications.send_account_approval_notification': {'queue': 'transactional', 'priority': 0},
+    'user_notifications.send_login_stats': {'queue': 'transactional', 'priority': 6},
+    'outbox.dispatch_outbox': {'queue': 'transactional', 'priority': 1},
+    'event_consumers.consume_domain_events': {'queue': 'periodic', 'priority': 1},
+    'user_notifications.notify_admin_pending_approvals': {'queue': 'periodic', 'priority': 2},
+    'user_notifications.send_minute_activity_update': {'queue': 'periodic', 'priority': 5},
+    'user_notifications.send_sponsor_stats_update': {'queue': 'periodic', 'priority': 5},
+    'user_notifications.send_influencer_stats_update': {'queue': 'periodic', 'priority': 5},
+    'user_notifications.send_admin_daily_report': {'queue': 'periodic', 'priority': 5},
+    'task.update_expired_campaigns': {'queue': 'maintenance', 'priority': 2},
+    'task.refresh_sqlite_replica': {'queue': 'maintenance', 'priority': 5},
+    'archive.archive_old_records': {'queue': 'maintenance', 'priority': 8},
+    'outbox.purge_sent_emails': {'queue': 'maintenance', 'priority': 8},
+    'inbox.purge_read_notifications': {'queue': 'maintenance', 'priority': 8},
+    'revocation.sync_revoked_users': {'queue': 'maintenance', 'priority': 5},
+    'activity_counters.reconcile_activity_counters': {'queue': 'maintenance', 'priority': 5},
+}
+celery.conf.task_queues = tuple(Queue(name, routing_key=name) for name in QUEUE_NAMES)
+celery.conf.task_default_queue = 'bulk'
+celery.conf.task_default_priority = 5
+celery.conf.broker_transport_options = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    # A worker consuming several queues drains them in QUEUE_NAMES order
+    'queue_order_strategy': 'priority',
+}
+
+
+@worker_init.connect
+def configure_queue_worker(sender=None, **kwargs):
+    """
+    Apply QUEUE_WORKER_SETTINGS to a worker started for a single queue, e.g.
+    `celery -A workers.celery worker -Q periodic -n periodic@%h`. Tune them with the
+    CELERY_<QUEUE>_CONCURRENCY environment variables.
+    """
+    queues = list(sender.app.amqp.queues.consume_from)
+    if len(queues) != 1 or queues[0] not in QUEUE_WORKER_SETTINGS:
+        return
+    settings = QUEUE_WORKER_SETTINGS[queues[0]]
+    sender.concurrency = settings['concurrency']
+    sender.prefetch_multiplier = settings['prefetch_multiplier']
+
+
+@worker_init.connect
+def precompile_email_templates(sender=None, **kwargs):
+    """Compile the email templates before the pool forks, so every child starts with them"""
+    import email_render
+    email_render.precompile()
+
 # Beat scheduler configuration
 celery.conf.beat_schedule_filename = 'celerybeat-schedule'
-celery.conf.worker_max_tasks_per_child = 100  # Restart workers after handling 100 tasks
+# Safety net only: tasks close their sessions and stream long loops, so memory stays flat
+celery.conf.worker_max_tasks_per_child = int(os.environ.get('CELERY_MAX_TASKS_PER_CHILD', 1000)) or None
 celery.conf.broker_connection_retry_on_startup = True
 celery.conf.result_expires = 3600  # Results expire after 1 hour
 
+_flask_app = None
+
+
+def get_flask_app():
+    """The worker's Flask app, built on first use (beat and idle workers never need it)"""
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app()
+    return _flask_app
+
+
 class ContextTask(celery.Task):
     """Task that provides app context to the task when run"""
     abstract = True
     
     def __call__(self, *args, **kwargs):
-        from app import app
-        with app.app_context():
-            return self.run(*args, **kwargs) 
\ No newline at end of file
+        from flask import has_app_context
+        if has_app_context():
+            # Called inline from a request or another task - reuse its context and session
+            return self.run(*args, **kwargs)
+        from task_runtime import run_task
+        with get_flask_app().app_context():
+            return run_task(self, args, kwargs)
+
+
+# Set task base class which provides app context
+celery.Task = ContextTask
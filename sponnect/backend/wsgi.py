@@ -0,0 +1,11 @@
+"""
+WSGI entry point for production servers, e.g.
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()
+
+if __name__ == "__main__":
+    app.run()
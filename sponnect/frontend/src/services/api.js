@@ -521,4 +521,38 @@ export const adminService = {
 export const negotiationService = {
   getHistory: (adRequestId) => apiService.get(`/api/ad_requests/${adRequestId}/history`),
   getCampaignNegotiationSummary: (campaignId) => apiService.get(`/api/sponsor/campaigns/${campaignId}/negotiation_summary`)
-} 
\ No newline at end of file
+} 
+// Batch Requests
+export const batchService = {
+  // Run several GET requests in one round trip.
+  // `requests` maps an id to a path or { path, params }, e.g.
+  //   batchService.get({ stats: '/api/admin/stats', users: { path: '/api/admin/users', params: { page: 1 } } })
+  // Resolves to { [id]: { status, data } } so each entry reads like a normal response.
+  get: (requests) => {
+    const payload = Object.entries(requests).map(([id, request]) => (
+      typeof request === 'string' ? { id, path: request } : { id, ...request }
+    ));
+    return apiService.post('/api/batch', { requests: payload })
+      .then(response => {
+        const results = {};
+        Object.entries(response.data.responses || {}).forEach(([id, result]) => {
+          let data = result.body;
+          // Apply the same { data } unwrapping the response interceptor does
+          if (data && typeof data === 'object' && !Array.isArray(data) && 'data' in data) {
+            data = data.data;
+          }
+          results[id] = { status: result.status, data };
+        });
+        return results;
+      });
+  }
+}
+
+// Notification Inbox
+export const notificationService = {
+  // Newest first; pass the previous page's next_cursor as params.cursor
+  list: (params = {}) => apiService.get('/api/notifications', { params }),
+  unreadCount: () => apiService.get('/api/notifications/unread-count'),
+  markRead: (ids) => apiService.post('/api/notifications/read', { ids }),
+  markAllRead: () => apiService.post('/api/notifications/read', { all: true })
+}
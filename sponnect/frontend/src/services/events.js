@@ -0,0 +1,60 @@
+// Live updates over Server-Sent Events
+// The backend pushes ad request, negotiation and progress update changes for the
+// logged-in user, so views can patch the changed row instead of refetching lists.
+
+const baseURL = import.meta.env.VITE_API_URL || 'http://localhost:5000'
+// In production the stream is served by a separate long-request server pool
+const eventsURL = import.meta.env.VITE_EVENTS_URL || baseURL
+
+/**
+ * Subscribe to the current user's event stream
+ * @param {Object} handlers - Map of event type (e.g. 'ad_request.updated') to callback(data)
+ * @returns {Function} Unsubscribe function that closes the stream
+ */
+export const subscribeToEvents = (handlers) => {
+  const token = localStorage.getItem('token')
+  if (!token || typeof EventSource === 'undefined') {
+    return () => {}
+  }
+
+  const source = new EventSource(`${eventsURL}/api/events/stream?token=${encodeURIComponent(token)}`)
+
+  Object.entries(handlers).forEach(([eventType, handler]) => {
+    source.addEventListener(eventType, (event) => {
+      try {
+        handler(JSON.parse(event.data))
+      } catch (error) {
+        console.error(`Error handling live event ${eventType}:`, error)
+      }
+    })
+  })
+
+  source.onerror = () => {
+    // EventSource reconnects by itself using the server's retry hint
+    console.warn('Live updates connection lost, reconnecting...')
+  }
+
+  return () => source.close()
+}
+
+/**
+ * Merge an ad request event payload into a list of ad request rows in place
+ * @param {Array} rows - Current list of ad requests
+ * @param {Object} data - Event payload from the server
+ * @returns {Array} The updated list (new rows are prepended)
+ */
+export const patchAdRequestRow = (rows, data) => {
+  const patch = {
+    ...data,
+    // Lists display the timestamp fields; the event carries ISO strings
+    updated_at: data.updated_at_iso,
+    created_at: data.created_at_iso
+  }
+  const index = rows.findIndex(row => row.id === data.id)
+  if (index === -1) {
+    return [patch, ...rows]
+  }
+  const updated = [...rows]
+  updated[index] = { ...rows[index], ...patch }
+  return updated
+}
@@ -151,6 +151,8 @@ export const useAuthStore = defineStore('auth', () => {
   }
   
   const logout = () => {
+    const currentToken = token.value
+    
     // Clear token and user data from local storage and state
     localStorage.removeItem('token')
     localStorage.removeItem('userRole')
@@ -158,8 +160,13 @@ export const useAuthStore = defineStore('auth', () => {
     token.value = null
     userRole.value = null
     
-    // Redirect to home page (handled by the router)
-    window.location.href = '/'
+    // Revoke the token on the server (best effort), then redirect to home page (handled by the router)
+    const revoke = currentToken
+      ? api.post('/api/logout', null, { headers: { Authorization: `Bearer ${currentToken}` } }).catch(() => {})
+      : Promise.resolve()
+    revoke.finally(() => {
+      window.location.href = '/'
+    })
   }
   
   const getProfile = async () => {